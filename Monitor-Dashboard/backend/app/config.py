@@ -29,6 +29,7 @@ class Settings(BaseSettings):
     
     # 文件監控配置
     watch_files: bool = True
+    watch_debounce: float = 0.2  # 秒，連續寫入結束後才刷新快照
     watch_directories: list[str] = [
         "/Users/charlie/.openclaw/workspace/kanban"
     ]
@@ -44,6 +45,12 @@ class Settings(BaseSettings):
     # 監控配置
     health_check_interval: int = 30  # 秒
     
+    # 推送配置（SSE）
+    sse_keepalive_interval: int = 15  # 秒
+    sse_history_size: int = 100  # 保留的 diff 數量，用於斷線重連補發
+    sse_queue_size: int = 100  # 每個客戶端的待發送事件上限
+    sse_max_diff_tasks: int = 200  # 超過此數量的變化改為通知重新拉取
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
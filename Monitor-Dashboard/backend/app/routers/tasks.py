@@ -4,16 +4,20 @@
 提供任務管理的所有 API 端點。
 """
 
+import asyncio
 from typing import List, Optional
 
-from fastapi import APIRouter, Query, Depends
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Query, Depends, Request, Header
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from app.config import settings
 
 from app.models.task import (
     Task, TaskCreate, TaskUpdate, TaskStatus,
     TaskListResponse, TaskStatusUpdate, BatchOperation
 )
 from app.services.task_service import task_service
+from app.services.task_snapshot import task_snapshot, format_sse_event
 from app.utils.exceptions import http_exception_handler
 
 router = APIRouter(prefix="/tasks", tags=["Tasks"])
@@ -44,6 +48,65 @@ async def list_tasks(
         http_exception_handler(e)
 
 
+@router.get("/events")
+async def stream_task_events(
+    request: Request,
+    since: Optional[int] = Query(None, ge=0, description="客戶端已有的快照版本"),
+    last_event_id: Optional[str] = Header(None)
+):
+    """
+    推送任務變化（Server-Sent Events）
+    
+    事件類型：
+    - snapshot / reset：帶版本和統計，客戶端需要重新拉取列表
+    - diff：added / updated / removed 任務和最新統計
+    
+    斷線重連時帶上 since（或瀏覽器自動發送的 Last-Event-ID），
+    在保留的歷史範圍內會補發錯過的 diff。
+    """
+    if since is None and last_event_id and last_event_id.isdigit():
+        since = int(last_event_id)
+    
+    queue = task_snapshot.subscribe()
+    return StreamingResponse(
+        _event_stream(request, queue, since),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def _event_stream(request: Request, queue: asyncio.Queue, since: Optional[int]):
+    """先補發歷史（或發送 snapshot），再轉發訂閱隊列中的事件"""
+    try:
+        backlog = task_snapshot.events_since(since) if since is not None else None
+        if backlog is None:
+            backlog = [task_snapshot.reset_event("snapshot")]
+        
+        last_version = since or 0
+        for event in backlog:
+            yield format_sse_event(event)
+            last_version = event["version"]
+        
+        while True:
+            try:
+                event = await asyncio.wait_for(
+                    queue.get(), timeout=settings.sse_keepalive_interval
+                )
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield ": keepalive\n\n"
+                continue
+            
+            # 訂閱後、補發前產生的事件可能重複
+            if event["type"] == "diff" and event["version"] <= last_version:
+                continue
+            yield format_sse_event(event)
+            last_version = event["version"]
+    finally:
+        task_snapshot.unsubscribe(queue)
+
+
 @router.post("/", response_model=Task, status_code=201)
 async def create_task(task_create: TaskCreate):
     """創建新任務"""
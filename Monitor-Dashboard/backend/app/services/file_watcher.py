@@ -1,18 +1,18 @@
 """
 文件監控服務
 
-監控 tasks.json 文件的變化，支持實時更新。
+監控 tasks.json 文件的變化，刷新任務快照並推送給客戶端。
 """
 
-import time
 from pathlib import Path
-from threading import Thread
+from threading import Lock, Thread, Timer
 from typing import Callable, Optional
 
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 
 from app.config import settings
+from app.services.task_snapshot import task_snapshot
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -21,31 +21,53 @@ logger = get_logger(__name__)
 class TasksFileHandler(FileSystemEventHandler):
     """任務文件變化處理器"""
     
-    def __init__(self, callback: Callable[[str], None]):
+    def __init__(self, callback: Callable[[str], None], file_name: str = "tasks.json"):
         self.callback = callback
-        self.last_modified = 0
+        self.file_name = file_name
+        self._timer: Optional[Timer] = None
+        self._lock = Lock()
     
     def on_modified(self, event):
         """文件修改事件"""
-        if event.is_directory:
-            return
-        
-        file_path = Path(event.src_path)
-        if file_path.name != "tasks.json":
-            return
-        
-        # 防抖動：避免頻繁觸發
-        current_time = time.time()
-        if current_time - self.last_modified < 1.0:  # 1秒內的變化忽略
+        if not event.is_directory:
+            self._schedule(event.src_path)
+    
+    def on_created(self, event):
+        """文件創建事件（先刪後寫）"""
+        if not event.is_directory:
+            self._schedule(event.src_path)
+    
+    def on_moved(self, event):
+        """文件移動事件（臨時文件 + rename 的原子寫入）"""
+        if not event.is_directory:
+            self._schedule(event.dest_path)
+    
+    def _schedule(self, path: str):
+        """防抖動：一段時間內沒有新的寫入後才觸發（保證處理最後一次寫入）"""
+        file_path = Path(path)
+        if file_path.name != self.file_name:
             return
         
-        self.last_modified = current_time
-        
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = Timer(settings.watch_debounce, self._fire, args=(str(file_path),))
+            self._timer.daemon = True
+            self._timer.start()
+    
+    def _fire(self, file_path: str):
         try:
             logger.info(f"Tasks file modified: {file_path}")
-            self.callback(str(file_path))
+            self.callback(file_path)
         except Exception as e:
             logger.error(f"Error in file change callback: {e}")
+    
+    def cancel(self):
+        """取消尚未觸發的回調"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
 
 
 class FileWatcherService:
@@ -53,6 +75,7 @@ class FileWatcherService:
     
     def __init__(self):
         self.observer: Optional[Observer] = None
+        self.event_handler: Optional[TasksFileHandler] = None
         self.tasks_file = Path(settings.tasks_file)
         self.watch_thread: Optional[Thread] = None
         self.running = False
@@ -72,12 +95,12 @@ class FileWatcherService:
             self.observer = Observer()
             
             # 設置處理器
-            event_handler = TasksFileHandler(callback)
+            self.event_handler = TasksFileHandler(callback, self.tasks_file.name)
             
             # 添加監控
             watch_path = self.tasks_file.parent
             self.observer.schedule(
-                event_handler,
+                self.event_handler,
                 str(watch_path),
                 recursive=False
             )
@@ -102,6 +125,9 @@ class FileWatcherService:
                 self.observer.stop()
                 self.observer.join()
                 self.observer = None
+            if self.event_handler:
+                self.event_handler.cancel()
+                self.event_handler = None
             
             self.running = False
             logger.info("Stopped file watcher")
@@ -118,12 +144,9 @@ def start_file_watcher():
     """啟動文件監控的便捷函數"""
     
     def file_changed_callback(file_path: str):
-        """文件變化回調函數"""
-        # 這裡可以添加實時更新邏輯，例如：
-        # - 發送 WebSocket 通知
-        # - 更新緩存
-        # - 觸發事件處理
-        logger.info(f"File changed event processed: {file_path}")
+        """文件變化回調函數：刷新快照，變化會推送給 SSE 訂閱者"""
+        if task_snapshot.refresh():
+            logger.info(f"Tasks snapshot updated to v{task_snapshot.version}")
     
     file_watcher.start_watching(file_changed_callback)
 
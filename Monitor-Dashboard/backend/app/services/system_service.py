@@ -16,6 +16,7 @@ from app.models.system import (
     ScanRequest, ScanResponse
 )
 from app.services.task_service import task_service
+from app.services.task_snapshot import task_snapshot
 from app.services.agent_service import agent_service
 from app.utils.logger import get_logger
 
@@ -122,29 +123,28 @@ class SystemService:
         )
     
     def _check_tasks_file(self) -> ComponentStatus:
-        """檢查任務文件狀態"""
+        """檢查任務文件狀態（讀取快照元數據，不重新解析文件）"""
         try:
-            tasks_file = Path(settings.tasks_file)
-            if not tasks_file.exists():
+            file_status = task_snapshot.file_status()
+            if not file_status["exists"]:
                 return ComponentStatus(
                     status="unhealthy",
                     details={"reason": "Tasks file not found"}
                 )
             
-            # 嘗試讀取文件
-            with open(tasks_file, 'r', encoding='utf-8') as f:
-                json.load(f)
-            
-            file_size = tasks_file.stat().st_size
-            modified_time = datetime.fromtimestamp(
-                tasks_file.stat().st_mtime
-            )
+            if file_status["error"]:
+                return ComponentStatus(
+                    status="unhealthy",
+                    details={"reason": file_status["error"]}
+                )
             
             return ComponentStatus(
                 status="healthy",
                 details={
-                    "file_size": file_size,
-                    "last_modified": modified_time.isoformat()
+                    "file_size": file_status["file_size"],
+                    "last_modified": file_status["last_modified"].isoformat(),
+                    "snapshot_version": file_status["version"],
+                    "tasks": file_status["tasks"]
                 }
             )
             
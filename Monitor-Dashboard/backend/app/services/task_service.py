@@ -2,25 +2,34 @@
 任務數據服務
 
 處理任務的 CRUD 操作、文件讀寫和業務邏輯。
+讀操作由內存快照（task_snapshot）提供；寫操作持有 tasks.json.lock 原子寫入，
+檢測到並發修改時基於最新文件重做，落盤後刷新快照。
 """
 
 import json
+import shutil
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Callable, Tuple
 
 from app.config import settings
 from app.models.task import (
     Task, TaskCreate, TaskUpdate, TaskStatus,
     TaskListResponse, BatchOperation
 )
+from app.services.task_snapshot import task_snapshot
+from app.utils.atomic_file import (
+    StaleFileError, atomic_write_json, file_lock, file_version, read_json_versioned
+)
 from app.utils.exceptions import (
-    TaskNotFound, InvalidTaskStatus, FileAccessError
+    MonitorException, TaskNotFound, InvalidTaskStatus, FileAccessError
 )
 from app.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+MAX_WRITE_RETRIES = 5
+
 
 class TaskService:
     """任務服務類"""
@@ -45,37 +54,90 @@ class TaskService:
     
     def _load_tasks(self) -> List[Dict[str, Any]]:
         """加載任務數據"""
+        return self._read_tasks()[0]
+    
+    def _read_tasks(self) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """加載任務數據和對應的文件版本"""
         try:
-            with open(self.tasks_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return read_json_versioned(self.tasks_file)
         except json.JSONDecodeError as e:
             logger.error(f"Invalid JSON in tasks file: {e}")
-            return []
+            return [], file_version(self.tasks_file)
         except Exception as e:
             raise FileAccessError(
                 str(self.tasks_file),
                 f"Cannot read tasks file: {e}"
             )
     
-    def _save_tasks(self, tasks: List[Dict[str, Any]]):
-        """保存任務數據"""
+    def _write_tasks(self, tasks: List[Dict[str, Any]]):
+        """備份並原子寫入（調用方需持有文件鎖）"""
+        # 備份現有文件（複製而不是改名，寫入期間 tasks.json 始終存在）
+        backup_file = self.tasks_file.with_suffix('.json.backup')
+        if self.tasks_file.exists():
+            shutil.copy2(self.tasks_file, backup_file)
+        
+        # 保存新數據
+        atomic_write_json(self.tasks_file, tasks)
+        logger.info(f"Saved {len(tasks)} tasks to {self.tasks_file}")
+    
+    def _save_tasks(self, tasks: List[Dict[str, Any]], expected_version: Optional[str] = None):
+        """
+        保存任務數據
+        
+        Args:
+            expected_version: 讀取時的文件版本；文件已被其他寫入方更新時拋出 StaleFileError
+        """
         try:
-            # 備份現有文件
-            backup_file = self.tasks_file.with_suffix('.json.backup')
-            if self.tasks_file.exists():
-                self.tasks_file.replace(backup_file)
-            
-            # 保存新數據
-            with open(self.tasks_file, 'w', encoding='utf-8') as f:
-                json.dump(tasks, f, ensure_ascii=False, indent=2)
-            
-            logger.info(f"Saved {len(tasks)} tasks to {self.tasks_file}")
-            
+            with file_lock(self.tasks_file):
+                if expected_version is not None:
+                    current = file_version(self.tasks_file)
+                    if current != expected_version:
+                        raise StaleFileError(f"{self.tasks_file} changed: {expected_version} -> {current}")
+                self._write_tasks(tasks)
+        except StaleFileError:
+            raise
         except Exception as e:
             raise FileAccessError(
                 str(self.tasks_file),
                 f"Cannot save tasks file: {e}"
             )
+        
+        # 立即刷新快照，不等文件監控事件
+        task_snapshot.refresh()
+    
+    def _modify_tasks(self, mutate: Callable[[List[Dict[str, Any]]], Any]) -> Any:
+        """
+        讀取 → 修改 → 寫入
+        
+        其他進程在此期間寫了 tasks.json 時，基於最新內容重新執行 mutate；
+        重試用盡後在文件鎖內完成整個讀改寫。
+        
+        Returns:
+            mutate 的返回值
+        """
+        for attempt in range(MAX_WRITE_RETRIES):
+            tasks_data, version = self._read_tasks()
+            result = mutate(tasks_data)
+            try:
+                self._save_tasks(tasks_data, expected_version=version)
+                return result
+            except StaleFileError as e:
+                logger.info(f"Tasks file changed during write, retrying ({attempt + 1}): {e}")
+        
+        try:
+            with file_lock(self.tasks_file):
+                tasks_data, _ = self._read_tasks()
+                result = mutate(tasks_data)
+                self._write_tasks(tasks_data)
+        except MonitorException:
+            raise
+        except Exception as e:
+            raise FileAccessError(
+                str(self.tasks_file),
+                f"Cannot save tasks file: {e}"
+            )
+        task_snapshot.refresh()
+        return result
     
     def get_tasks(
         self,
@@ -89,125 +151,103 @@ class TaskService:
     ) -> TaskListResponse:
         """獲取任務列表"""
         
-        tasks_data = self._load_tasks()
-        tasks = [Task(**task_data) for task_data in tasks_data]
-        
-        # 過濾
-        if status:
-            tasks = [t for t in tasks if t.status == status]
-        if agent:
-            tasks = [t for t in tasks if t.agent == agent]
-        if priority:
-            tasks = [t for t in tasks if t.priority.value == priority]
-        
-        # 排序
-        reverse = sort_order.lower() == "desc"
-        if sort_by == "created_at":
-            tasks.sort(key=lambda t: t.created_at, reverse=reverse)
-        elif sort_by == "updated_at":
-            tasks.sort(key=lambda t: t.updated_at, reverse=reverse)
-        elif sort_by == "priority":
-            priority_order = {"highest": 4, "high": 3, "normal": 2, "low": 1}
-            tasks.sort(
-                key=lambda t: priority_order.get(t.priority.value, 0),
-                reverse=reverse
-            )
-        
-        # 分頁
-        start = (page - 1) * page_size
-        end = start + page_size
-        paginated_tasks = tasks[start:end]
+        tasks, total = task_snapshot.query(
+            status=status,
+            agent=agent,
+            priority=priority,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            page=page,
+            page_size=page_size
+        )
         
         return TaskListResponse(
-            tasks=paginated_tasks,
-            total=len(tasks),
+            tasks=tasks,
+            total=total,
             page=page,
             page_size=page_size
         )
     
     def get_task(self, task_id: str) -> Task:
         """獲取單個任務"""
-        tasks_data = self._load_tasks()
-        
-        for task_data in tasks_data:
-            if task_data.get('id') == task_id:
-                return Task(**task_data)
-        
-        raise TaskNotFound(task_id)
+        task = task_snapshot.get(task_id)
+        if task is None:
+            raise TaskNotFound(task_id)
+        return task
     
     def create_task(self, task_create: TaskCreate) -> Task:
         """創建新任務"""
-        tasks_data = self._load_tasks()
-        
-        # 生成任務 ID
-        now = datetime.now()
-        task_id = now.strftime("%Y%m%d-%H%M%S-") + "001"
-        
-        # 檢查 ID 是否已存在
-        existing_ids = {t.get('id') for t in tasks_data}
-        suffix = 1
-        while task_id in existing_ids:
-            task_id = now.strftime(f"%Y%m%d-%H%M%S-{suffix:03d}")
-            suffix += 1
         
-        # 創建任務
-        task_dict = task_create.dict()
-        task_dict.update({
-            'id': task_id,
-            'created_at': now.isoformat(),
-            'updated_at': now.isoformat(),
-            'completed_at': None
-        })
+        def mutate(tasks_data):
+            # 生成任務 ID
+            now = datetime.now()
+            task_id = now.strftime("%Y%m%d-%H%M%S-") + "001"
+            
+            # 檢查 ID 是否已存在
+            existing_ids = {t.get('id') for t in tasks_data}
+            suffix = 1
+            while task_id in existing_ids:
+                task_id = now.strftime(f"%Y%m%d-%H%M%S-{suffix:03d}")
+                suffix += 1
+            
+            # 創建任務
+            task_dict = task_create.dict()
+            task_dict.update({
+                'id': task_id,
+                'created_at': now.isoformat(),
+                'updated_at': now.isoformat(),
+                'completed_at': None
+            })
+            
+            tasks_data.append(task_dict)
+            return task_dict
         
-        tasks_data.append(task_dict)
-        self._save_tasks(tasks_data)
+        task_dict = self._modify_tasks(mutate)
         
         task = Task(**task_dict)
-        logger.info(f"Created task: {task_id} - {task.title}")
+        logger.info(f"Created task: {task.id} - {task.title}")
         
         return task
     
     def update_task(self, task_id: str, task_update: TaskUpdate) -> Task:
         """更新任務"""
-        tasks_data = self._load_tasks()
         
-        for i, task_data in enumerate(tasks_data):
-            if task_data.get('id') == task_id:
-                # 更新字段
-                update_dict = task_update.dict(exclude_unset=True)
-                
-                # 如果狀態改為完成，設置完成時間
-                if (task_update.status == TaskStatus.COMPLETED and 
-                    task_data.get('completed_at') is None):
-                    update_dict['completed_at'] = datetime.now().isoformat()
-                
-                # 更新時間
-                update_dict['updated_at'] = datetime.now().isoformat()
-                
-                # 應用更新
-                task_data.update(update_dict)
-                
-                # 保存
-                self._save_tasks(tasks_data)
-                
-                task = Task(**task_data)
-                logger.info(f"Updated task: {task_id}")
-                
-                return task
+        def mutate(tasks_data):
+            for task_data in tasks_data:
+                if task_data.get('id') == task_id:
+                    # 更新字段
+                    update_dict = task_update.dict(exclude_unset=True)
+                    
+                    # 如果狀態改為完成，設置完成時間
+                    if (task_update.status == TaskStatus.COMPLETED and 
+                        task_data.get('completed_at') is None):
+                        update_dict['completed_at'] = datetime.now().isoformat()
+                    
+                    # 更新時間
+                    update_dict['updated_at'] = datetime.now().isoformat()
+                    
+                    # 應用更新
+                    task_data.update(update_dict)
+                    return task_data
+            
+            raise TaskNotFound(task_id)
         
-        raise TaskNotFound(task_id)
+        task = Task(**self._modify_tasks(mutate))
+        logger.info(f"Updated task: {task_id}")
+        
+        return task
     
     def delete_task(self, task_id: str) -> bool:
         """刪除任務"""
-        tasks_data = self._load_tasks()
-        
-        original_length = len(tasks_data)
-        tasks_data = [t for t in tasks_data if t.get('id') != task_id]
         
-        if len(tasks_data) == original_length:
-            raise TaskNotFound(task_id)
+        def mutate(tasks_data):
+            original_length = len(tasks_data)
+            tasks_data[:] = [t for t in tasks_data if t.get('id') != task_id]
+            
+            if len(tasks_data) == original_length:
+                raise TaskNotFound(task_id)
         
-        self._save_tasks(tasks_data)
+        self._modify_tasks(mutate)
         logger.info(f"Deleted task: {task_id}")
         
         return True
@@ -259,22 +299,7 @@ class TaskService:
     
     def get_task_stats(self) -> Dict[str, Any]:
         """獲取任務統計信息"""
-        tasks_data = self._load_tasks()
-        
-        stats = {
-            "total": len(tasks_data),
-            "pending": 0,
-            "in_progress": 0,
-            "completed": 0,
-            "failed": 0
-        }
-        
-        for task_data in tasks_data:
-            status = task_data.get('status', 'pending')
-            if status in stats:
-                stats[status] += 1
-        
-        return stats
+        return task_snapshot.stats()
 
 
 # 創建全局服務實例
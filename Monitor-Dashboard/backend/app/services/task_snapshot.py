@@ -0,0 +1,332 @@
+"""
+任務快照服務
+
+在內存中維護 tasks.json 的版本化快照：
+- 文件只在變化時重新解析（由文件監控推送，或請求時的 stat 檢查兜底）
+- 未變化的任務行重用已構建的 Task 對象
+- 預建 status / agent / priority 索引和統計，篩選排序結果按版本緩存
+- 每次變化生成 diff 並推送給訂閱者（SSE）
+"""
+
+import asyncio
+import json
+import threading
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from app.config import settings
+from app.models.task import Task, TaskStatus
+from app.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+PRIORITY_ORDER = {"highest": 4, "high": 3, "normal": 2, "low": 1}
+STAT_STATUSES = ("pending", "in_progress", "completed", "failed")
+INDEX_FIELDS = ("status", "agent", "priority")
+MAX_CACHED_VIEWS = 128
+
+
+def format_sse_event(event: Dict[str, Any]) -> str:
+    """將事件格式化為 Server-Sent Events 消息"""
+    data = json.dumps(event, ensure_ascii=False)
+    return f"id: {event['version']}\nevent: {event['type']}\ndata: {data}\n\n"
+
+
+class TaskSnapshot:
+    """tasks.json 的內存快照"""
+
+    def __init__(self, tasks_file: Optional[str] = None):
+        self.tasks_file = Path(tasks_file or settings.tasks_file)
+        self.version = 0
+        self.error: Optional[str] = None
+        self.file_size: Optional[int] = None
+        self.last_modified: Optional[datetime] = None
+
+        self._lock = threading.RLock()
+        self._signature: Optional[Tuple[int, int, int]] = None
+        self._raw: Dict[str, Dict[str, Any]] = {}
+        self._tasks: List[Task] = []
+        self._by_id: Dict[str, Task] = {}
+        self._indexes: Dict[str, Dict[Any, List[Task]]] = {f: {} for f in INDEX_FIELDS}
+        self._stats: Dict[str, int] = {"total": 0, **{s: 0 for s in STAT_STATUSES}}
+        self._views: Dict[tuple, List[Task]] = {}
+        self._history: Deque[Dict[str, Any]] = deque(maxlen=settings.sse_history_size)
+        self._subscribers: Dict[asyncio.Queue, asyncio.AbstractEventLoop] = {}
+
+    def _stat(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = self.tasks_file.stat()
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def ensure_current(self):
+        """確認快照與文件一致（一次 stat，文件未變時不讀取）"""
+        if self._stat() != self._signature or self.version == 0:
+            self.refresh()
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        文件變化時重新加載快照
+
+        解析失敗（例如寫入中途）時保留上一個快照並記錄錯誤。
+
+        Returns:
+            是否產生了新版本
+        """
+        with self._lock:
+            signature = self._stat()
+            if not force and signature == self._signature and self.version > 0:
+                return False
+            self._signature = signature
+
+            if signature is None:
+                self.error = "Tasks file not found"
+                return False
+
+            try:
+                with open(self.tasks_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                self.error = str(e)
+                logger.error(f"Cannot load tasks snapshot: {e}")
+                return False
+            if not isinstance(data, list):
+                self.error = "Tasks file must contain a JSON list"
+                logger.error(self.error)
+                return False
+
+            self.error = None
+            self.file_size = signature[1]
+            self.last_modified = datetime.fromtimestamp(signature[0] / 1e9)
+            return self._apply(data)
+
+    def _apply(self, rows: List[Any]) -> bool:
+        """用新的任務行替換快照，計算 diff"""
+        raw: Dict[str, Dict[str, Any]] = {}
+        tasks: List[Task] = []
+        by_id: Dict[str, Task] = {}
+        stats = {"total": len(rows), **{s: 0 for s in STAT_STATUSES}}
+        invalid = 0
+
+        for row in rows:
+            if not isinstance(row, dict):
+                invalid += 1
+                continue
+            status = row.get('status', 'pending')
+            if status in stats:
+                stats[status] += 1
+
+            task_id = row.get('id')
+            task = self._by_id.get(task_id)
+            if task is None or self._raw.get(task_id) != row:
+                try:
+                    task = Task(**row)
+                except (ValidationError, TypeError) as e:
+                    invalid += 1
+                    logger.debug(f"Skipping invalid task {task_id}: {e}")
+                    continue
+            raw[task_id] = row
+            tasks.append(task)
+            by_id[task_id] = task
+
+        if invalid:
+            logger.warning(f"Skipped {invalid} invalid tasks in {self.tasks_file}")
+
+        added = [tid for tid in by_id if tid not in self._by_id]
+        removed = [tid for tid in self._by_id if tid not in by_id]
+        updated = [
+            tid for tid in by_id
+            if tid in self._raw and self._raw[tid] != raw[tid]
+        ]
+        first_load = self.version == 0
+        if not first_load and not (added or removed or updated) and stats == self._stats:
+            return False
+
+        indexes: Dict[str, Dict[Any, List[Task]]] = {f: {} for f in INDEX_FIELDS}
+        for task in tasks:
+            indexes["status"].setdefault(task.status, []).append(task)
+            indexes["agent"].setdefault(task.agent, []).append(task)
+            indexes["priority"].setdefault(task.priority.value, []).append(task)
+
+        self._raw = raw
+        self._tasks = tasks
+        self._by_id = by_id
+        self._indexes = indexes
+        self._stats = stats
+        self._views = {}
+        self.version += 1
+
+        if first_load:
+            logger.info(f"Loaded tasks snapshot v{self.version}: {len(tasks)} tasks")
+            return True
+
+        logger.info(
+            f"Tasks snapshot v{self.version}: "
+            f"+{len(added)} ~{len(updated)} -{len(removed)}"
+        )
+        if len(added) + len(updated) > settings.sse_max_diff_tasks:
+            # 大批量變化不推送完整任務，讓客戶端重新拉取
+            event = self.reset_event()
+        else:
+            event = {
+                "type": "diff",
+                "version": self.version,
+                "added": [by_id[tid].model_dump(mode="json") for tid in added],
+                "updated": [by_id[tid].model_dump(mode="json") for tid in updated],
+                "removed": removed,
+                "stats": dict(stats),
+            }
+        self._history.append(event)
+        self._publish(event)
+        return True
+
+    # ------------------------------------------------------------------
+    # 查詢
+    # ------------------------------------------------------------------
+
+    def get(self, task_id: str) -> Optional[Task]:
+        """按 ID 獲取任務"""
+        self.ensure_current()
+        return self._by_id.get(task_id)
+
+    def stats(self) -> Dict[str, int]:
+        """任務統計（加載時預先計算）"""
+        self.ensure_current()
+        return dict(self._stats)
+
+    def query(
+        self,
+        status: Optional[TaskStatus] = None,
+        agent: Optional[str] = None,
+        priority: Optional[str] = None,
+        sort_by: str = "created_at",
+        sort_order: str = "desc",
+        page: int = 1,
+        page_size: int = 50
+    ) -> Tuple[List[Task], int]:
+        """
+        過濾、排序並分頁
+
+        同一版本內相同的過濾/排序組合只計算一次，之後每次請求只切出當前頁。
+
+        Returns:
+            (當前頁任務, 匹配總數)
+        """
+        self.ensure_current()
+        key = (status, agent, priority, sort_by, sort_order.lower())
+        with self._lock:
+            view = self._views.get(key)
+            if view is None:
+                view = self._build_view(status, agent, priority, sort_by, sort_order)
+                if len(self._views) >= MAX_CACHED_VIEWS:
+                    self._views.clear()
+                self._views[key] = view
+
+        start = (page - 1) * page_size
+        return view[start:start + page_size], len(view)
+
+    def _build_view(self, status, agent, priority, sort_by, sort_order) -> List[Task]:
+        filters = [
+            (field, value)
+            for field, value in (("status", status), ("agent", agent), ("priority", priority))
+            if value
+        ]
+        if filters:
+            # 從最小的索引桶開始，再用其他條件過濾
+            buckets = [self._indexes[field].get(value, []) for field, value in filters]
+            tasks = list(min(buckets, key=len))
+            if status:
+                tasks = [t for t in tasks if t.status == status]
+            if agent:
+                tasks = [t for t in tasks if t.agent == agent]
+            if priority:
+                tasks = [t for t in tasks if t.priority.value == priority]
+        else:
+            tasks = list(self._tasks)
+
+        reverse = sort_order.lower() == "desc"
+        if sort_by == "created_at":
+            tasks.sort(key=lambda t: t.created_at, reverse=reverse)
+        elif sort_by == "updated_at":
+            tasks.sort(key=lambda t: t.updated_at, reverse=reverse)
+        elif sort_by == "priority":
+            tasks.sort(
+                key=lambda t: PRIORITY_ORDER.get(t.priority.value, 0),
+                reverse=reverse
+            )
+        return tasks
+
+    def file_status(self) -> Dict[str, Any]:
+        """快照對應的文件狀態（供健康檢查使用）"""
+        self.ensure_current()
+        return {
+            "exists": self._signature is not None,
+            "error": self.error,
+            "file_size": self.file_size,
+            "last_modified": self.last_modified,
+            "version": self.version,
+            "tasks": len(self._tasks),
+        }
+
+    # ------------------------------------------------------------------
+    # 推送
+    # ------------------------------------------------------------------
+
+    def reset_event(self, event_type: str = "reset") -> Dict[str, Any]:
+        """通知客戶端重新拉取列表的事件"""
+        return {"type": event_type, "version": self.version, "stats": dict(self._stats)}
+
+    def events_since(self, version: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        客戶端版本之後的事件
+
+        Returns:
+            事件列表；歷史不足以補齊時返回 None（客戶端需要重新拉取）
+        """
+        self.ensure_current()
+        with self._lock:
+            if version == self.version:
+                return []
+            events = [e for e in self._history if e["version"] > version]
+            if version > self.version or not events or events[0]["version"] != version + 1:
+                return None
+            return events
+
+    def subscribe(self) -> asyncio.Queue:
+        """訂閱快照變化（在事件循環中調用）"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=settings.sse_queue_size)
+        with self._lock:
+            self._subscribers[queue] = asyncio.get_running_loop()
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        """取消訂閱"""
+        with self._lock:
+            self._subscribers.pop(queue, None)
+
+    def _publish(self, event: Dict[str, Any]):
+        """把事件交給每個訂閱者的事件循環（可在文件監控線程中調用）"""
+        for queue, loop in list(self._subscribers.items()):
+            try:
+                loop.call_soon_threadsafe(self._offer, queue, event)
+            except RuntimeError:
+                # 事件循環已關閉
+                self._subscribers.pop(queue, None)
+
+    def _offer(self, queue: asyncio.Queue, event: Dict[str, Any]):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # 客戶端跟不上：丟棄積壓的 diff，改為通知重新拉取
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(self.reset_event())
+
+
+# 創建全局快照實例
+task_snapshot = TaskSnapshot()
@@ -0,0 +1,89 @@
+"""
+原子文件寫入工具
+
+與 kanban-ops/tasks_file.py 使用同一套約定，保證儀表板和各守護進程
+寫 tasks.json 時互斥且不會讓讀取方看到缺失或半寫的文件：
+- 寫入鎖：目標文件旁的 <name>.lock 上的 flock
+- 原子寫入：同目錄臨時文件 → fsync → os.replace
+- 文件版本：(mtime_ns, size, inode)，用於樂觀並發檢查
+"""
+
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Optional, Tuple
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+LOCK_TIMEOUT = 30  # 秒
+
+
+class StaleFileError(Exception):
+    """寫入時文件已被其他寫入方更新"""
+
+
+def _version(st: os.stat_result) -> str:
+    return f"{st.st_mtime_ns}:{st.st_size}:{st.st_ino}"
+
+
+def file_version(path: Path) -> Optional[str]:
+    """文件當前版本（不存在時為 None）"""
+    try:
+        return _version(os.stat(path))
+    except FileNotFoundError:
+        return None
+
+
+@contextmanager
+def file_lock(path: Path, timeout: float = LOCK_TIMEOUT):
+    """目標文件的寫入鎖（跨進程）"""
+    path = Path(path)
+    lock_file = path.with_name(path.name + '.lock')
+    lock_file.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(str(lock_file), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if FCNTL_AVAILABLE:
+            deadline = time.monotonic() + timeout
+            while True:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if time.monotonic() >= deadline:
+                        raise TimeoutError(f"Timed out waiting for {lock_file}")
+                    time.sleep(0.05)
+        yield
+    finally:
+        os.close(fd)
+
+
+def read_json_versioned(path: Path) -> Tuple[Any, Optional[str]]:
+    """讀取 JSON 和對應的文件版本（取自同一個已打開的文件）"""
+    with open(path, 'r', encoding='utf-8') as f:
+        version = _version(os.fstat(f.fileno()))
+        return json.load(f), version
+
+
+def atomic_write_json(path: Path, payload: Any, indent: Optional[int] = 2) -> Optional[str]:
+    """原子寫入 JSON（調用方需持有 file_lock），返回寫入後的版本"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=f'.{path.stem}-', suffix='.tmp', dir=str(path.parent))
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return file_version(path)
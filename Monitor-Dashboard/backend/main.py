@@ -23,7 +23,8 @@ from fastapi.responses import JSONResponse
 from app.main import create_app
 from app.config import settings
 from app.utils.logger import setup_logging
-from app.services.file_watcher import start_file_watcher
+from app.services.file_watcher import start_file_watcher, stop_file_watcher
+from app.services.task_snapshot import task_snapshot
 
 # 設置日誌
 setup_logging(level=settings.log_level)
@@ -49,6 +50,9 @@ async def startup_event():
     """應用啟動事件"""
     logger.info("Starting Monitor Dashboard Backend...")
     
+    # 預先加載任務快照
+    task_snapshot.refresh()
+    
     # 啟動文件監控
     if settings.watch_files:
         logger.info("Starting file watcher...")
@@ -60,6 +64,7 @@ async def startup_event():
 async def shutdown_event():
     """應用關閉事件"""
     logger.info("Shutting down Monitor Dashboard Backend...")
+    stop_file_watcher()
 
 if __name__ == "__main__":
     uvicorn.run(
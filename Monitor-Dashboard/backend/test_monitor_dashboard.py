@@ -12,6 +12,7 @@ Monitor Dashboard 單元測試
 import sys
 import os
 import json
+import tempfile
 import unittest
 from datetime import datetime
 from pathlib import Path
@@ -22,6 +23,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '.'))
 from app.services.task_service import task_service
 from app.services.agent_service import agent_service
 from app.services.system_service import system_service
+from app.services.task_snapshot import TaskSnapshot
 from app.models.task import TaskCreate, TaskStatus, TaskPriority
 from app.config import settings
 
@@ -140,6 +142,98 @@ class TestTaskService(unittest.TestCase):
         self.assertEqual(len(high_priority_tasks.tasks), 2)
 
 
+class TestTaskSnapshot(unittest.TestCase):
+    """測試任務內存快照"""
+    
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.tasks_file = Path(self.tmpdir.name) / "tasks.json"
+        self.snapshot = TaskSnapshot(str(self.tasks_file))
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def make_task(self, task_id, **extra):
+        task = {
+            "id": task_id,
+            "title": f"任務 {task_id}",
+            "agent": "research",
+            "status": "pending",
+            "priority": "normal",
+            "created_at": f"2026-02-{int(task_id[1:]) + 1:02d}T00:00:00",
+            "updated_at": "2026-02-01T00:00:00"
+        }
+        task.update(extra)
+        return task
+    
+    def write_tasks(self, tasks):
+        with open(self.tasks_file, 'w', encoding='utf-8') as f:
+            json.dump(tasks, f, ensure_ascii=False)
+        self.snapshot.refresh()
+    
+    def test_query_filters_sorts_and_paginates(self):
+        """測試快照查詢與原有過濾排序語義一致"""
+        self.write_tasks([
+            self.make_task("t1", agent="coder", priority="high"),
+            self.make_task("t2", status="completed"),
+            self.make_task("t3", agent="coder"),
+            self.make_task("t4", agent="coder", priority="high", status="failed"),
+        ])
+        
+        tasks, total = self.snapshot.query(agent="coder")
+        self.assertEqual(total, 3)
+        self.assertEqual([t.id for t in tasks], ["t4", "t3", "t1"])
+        
+        tasks, total = self.snapshot.query(
+            agent="coder", priority="high", sort_order="asc", page=2, page_size=1
+        )
+        self.assertEqual(total, 2)
+        self.assertEqual([t.id for t in tasks], ["t4"])
+        
+        tasks, _ = self.snapshot.query(status=TaskStatus.COMPLETED)
+        self.assertEqual([t.id for t in tasks], ["t2"])
+        
+        self.assertEqual(self.snapshot.stats(), {
+            "total": 4, "pending": 2, "in_progress": 0, "completed": 1, "failed": 1
+        })
+    
+    def test_external_change_produces_diff(self):
+        """測試外部修改文件後生成 diff 並重用未變化的任務"""
+        self.write_tasks([self.make_task("t1"), self.make_task("t2")])
+        version = self.snapshot.version
+        unchanged = self.snapshot.get("t1")
+        
+        self.write_tasks([
+            self.make_task("t1"),
+            self.make_task("t3"),
+            self.make_task("t2", status="completed"),
+        ])
+        
+        self.assertEqual(self.snapshot.version, version + 1)
+        self.assertIs(self.snapshot.get("t1"), unchanged)
+        
+        events = self.snapshot.events_since(version)
+        self.assertEqual(len(events), 1)
+        self.assertEqual([t["id"] for t in events[0]["added"]], ["t3"])
+        self.assertEqual(events[0]["updated"][0]["status"], "completed")
+        self.assertEqual(events[0]["removed"], [])
+        
+        # 文件未變化時不產生新版本
+        self.assertFalse(self.snapshot.refresh())
+        self.assertEqual(self.snapshot.events_since(self.snapshot.version), [])
+        self.assertIsNone(self.snapshot.events_since(version + 5))
+    
+    def test_invalid_json_keeps_last_snapshot(self):
+        """測試文件寫入中途（無效 JSON）時保留上一個快照"""
+        self.write_tasks([self.make_task("t1")])
+        with open(self.tasks_file, 'w', encoding='utf-8') as f:
+            f.write('[{"id": ')
+        
+        self.assertFalse(self.snapshot.refresh())
+        self.assertIsNotNone(self.snapshot.get("t1"))
+        self.assertIsNotNone(self.snapshot.file_status()["error"])
+
+
 class TestAgentService(unittest.TestCase):
     """測試代理服務"""
     
@@ -342,6 +436,7 @@ def run_all_tests():
     # 添加測試類
     test_classes = [
         TestTaskService,
+        TestTaskSnapshot,
         TestAgentService,
         TestSystemService,
         TestMarketConditions
@@ -5,10 +5,9 @@
 
 import os
 import sys
-sys.path.insert(0, '/Users/charlie/report')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from convert_new_reports import clean_markdown_content, create_html_template
-import markdown
+from report_builder import build_reports, print_summary
 
 # 今天完成的研究報告列表
 reports = [
@@ -156,63 +155,26 @@ reports = [
     }
 ]
 
-def convert_markdown_to_html(md_content, title):
-    """轉換 Markdown 到 HTML"""
-    # 清理內容
-    md_content = clean_markdown_content(md_content)
-    
-    # 轉換為 HTML
-    html_content = markdown.markdown(
-        md_content,
-        extensions=[
-            'tables',
-            'fenced_code',
-            'codehilite',
-            'toc',
-            'nl2br',
-            'sane_lists'
-        ]
-    )
-    
-    return html_content
+# 今天的報告使用的 Markdown 擴展（保留換行、寬鬆列表）
+MD_EXTENSIONS = [
+    'tables',
+    'fenced_code',
+    'codehilite',
+    'toc',
+    'nl2br',
+    'sane_lists'
+]
 
 # 目標目錄
 target_dir = '/Users/charlie/report'
-os.makedirs(target_dir, exist_ok=True)
 
-print("🚀 開始轉換今天（2026-02-20）完成的研究報告...")
+if __name__ == "__main__":
+    print("🚀 開始轉換今天（2026-02-20）完成的研究報告...")
 
-for report in reports:
-    source_path = report['filepath']
-    
-    if os.path.exists(source_path):
-        filename = os.path.basename(source_path)
-        print(f"📖 正在處理: {filename}")
-        
-        try:
-            with open(source_path, 'r', encoding='utf-8') as f:
-                md_content = f.read()
-            
-            html_content = convert_markdown_to_html(md_content, report['title'])
-            
-            full_html = create_html_template(
-                report['title'],
-                html_content,
-                filename,
-                report.get('description', '')
-            )
-            
-            output_filename = filename.replace('.md', '.html')
-            output_path = os.path.join(target_dir, output_filename)
-            
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(full_html)
-            
-            print(f"✅ 轉換完成: {filename} → {output_filename}")
-            
-        except Exception as e:
-            print(f"❌ 轉換失敗: {filename} - {str(e)}")
-    else:
-        print(f"❌ 檔案不存在: {report['filepath']}")
+    # 只轉換內容或標題/描述有變化的報告
+    stats = build_reports(reports, target_dir, extensions=MD_EXTENSIONS)
+    for source_path in stats['missing']:
+        print(f"❌ 檔案不存在: {source_path}")
+    print_summary(stats)
 
-print("✨ 今天的研究報告轉換完成！")
+    print("✨ 今天的研究報告轉換完成！")
@@ -1,13 +1,19 @@
 #!/usr/bin/env python3
 """
 下載 QQQ, GLD, UUP, TLT 歷史數據
-使用 yfinance 從 Yahoo Finance 獲取至少 10 年歷史數據
+通過本地數據湖（quant/market_data_store.py）獲取至少 10 年歷史數據，只補抓缺少的區間
 """
 
-import yfinance as yf
 import pandas as pd
+import importlib.util
 import os
+import sys
 from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / 'quant'))
+
+from market_data_store import get_store
 
 def download_historical_data():
     """下載指定資產的歷史數據"""
@@ -32,9 +38,9 @@ def download_historical_data():
         print(f"\n正在下載 {ticker}...")
         
         try:
-            # 下載數據
-            stock = yf.Ticker(ticker)
-            hist_data = stock.history(start=start_date, end=end_date)
+            # 從本地數據湖載入（復權價格）
+            hist_data = get_store().load(ticker, start=start_date.date(), end=end_date.date(),
+                                         auto_adjust=True)
             
             if hist_data.empty:
                 print(f"⚠️  {ticker} 沒有獲取到數據")
@@ -121,14 +127,11 @@ def create_combined_data(all_data):
 if __name__ == "__main__":
     print("🚀 開始下載歷史數據...")
     
-    # 檢查是否安裝了 yfinance
-    try:
-        import yfinance
-    except ImportError:
+    # 檢查是否安裝了 yfinance（數據湖補抓時使用）
+    if importlib.util.find_spec('yfinance') is None:
         print("❌ yfinance 未安裝，正在安裝...")
         import subprocess
         subprocess.run(['pip', 'install', 'yfinance'])
-        import yfinance
     
     # 下載數據
     all_data = download_historical_data()
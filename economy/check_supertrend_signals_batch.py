@@ -1,13 +1,23 @@
 #!/usr/bin/env python3
 """
 檢查台灣股市 Supertrend 當前訊號 - 批量版本
+
+使用增量掃描器（quant/signal_scanner.py）：每檔股票保存滾動的 Supertrend 狀態，
+每次只讀取最新的 bar；API 請求經由連接池並發發出。
+
+用法：
+    python3 check_supertrend_signals_batch.py [--source dashboard|lake]
 """
 
-import requests
 import json
-from typing import List, Dict
+from pathlib import Path
+from typing import Dict
 import sys
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'quant'))
+
+from signal_scanner import DashboardSource, LakeSource, SupertrendScanner
+
 # Dashboard API 配置
 API_BASE = "http://localhost:8000"
 ADMIN_TOKEN = "admin995"
@@ -34,118 +44,30 @@ ST_CONFIG = {
     "multiplier": 3.0
 }
 
-def get_supertrend_signal(symbol: str) -> Dict:
-    """獲取單一股票的 Supertrend 訊號"""
-    try:
-        # 提取股票代碼（去除 .TW 後綴）
-        stock_code = symbol.replace('.TW', '')
-
-        # 調用 API
-        response = requests.get(
-            f"{API_BASE}/api/stocks/{stock_code}/history",
-            params={
-                "market": "TW",
-                "supertrend": "true",
-                "days": 365
-            },
-            headers=HEADERS,
-            timeout=5
-        )
-
-        if response.status_code != 200:
-            return {
-                "symbol": stock_code,
-                "error": f"API Error: {response.status_code}"
-            }
-
-        data = response.json()
-
-        if not data:
-            return {
-                "symbol": stock_code,
-                "error": "No data"
-            }
-
-        # 獲取最後一條數據
-        latest = data[-1]
-
-        # 檢查 Supertrend 訊號
-        supertrend_direction = latest.get(f"SUPERTd_{ST_CONFIG['period']}_{ST_CONFIG['multiplier']}")
-        supertrend_value = latest.get(f"SUPERTl_{ST_CONFIG['period']}_{ST_CONFIG['multiplier']}")
-        supertrend_short = latest.get(f"SUPERTs_{ST_CONFIG['period']}_{ST_CONFIG['multiplier']}")
-        price = latest.get("close")
-
-        if supertrend_direction is None:
-            return {
-                "symbol": stock_code,
-                "error": "No Supertrend data"
-            }
-
-        # 解讀訊號
-        # SUPERTd = 1 表示看漲，SUPERTd = -1 表示看跌
-        signal = "BUY" if supertrend_direction == 1 else "SELL"
-
-        # 使用合適的 Supertrend 值（根據方向）
-        st_value = supertrend_short if supertrend_direction == -1 else supertrend_value
-
-        return {
-            "symbol": stock_code,
-            "date": latest.get("trade_date"),
-            "close": price,
-            "supertrend": st_value,
-            "signal": signal,
-            "direction": supertrend_direction
-        }
-
-    except requests.Timeout:
-        return {
-            "symbol": symbol.replace('.TW', '') if symbol else "unknown",
-            "error": "Timeout"
-        }
-    except Exception as e:
-        return {
-            "symbol": symbol.replace('.TW', '') if symbol else "unknown",
-            "error": str(e)[:50]
-        }
-
-def check_all_signals():
-    """檢查所有股票的當前訊號並返回 JSON"""
-    results = {
-        "buy_signals": [],
-        "sell_signals": [],
-        "errors": [],
-        "summary": {
-            "total": len(ST_CONFIG["symbols"]),
-            "buy": 0,
-            "sell": 0,
-            "error": 0
-        },
-        "checked_at": None
-    }
-
-    for symbol in ST_CONFIG["symbols"]:
-        result = get_supertrend_signal(symbol)
-
-        if "error" in result:
-            results["errors"].append(result)
-            results["summary"]["error"] += 1
-        else:
-            if result["signal"] == "BUY":
-                results["buy_signals"].append(result)
-                results["summary"]["buy"] += 1
-            else:
-                results["sell_signals"].append(result)
-                results["summary"]["sell"] += 1
-
-    # 設置檢查時間
-    import datetime
-    results["checked_at"] = datetime.datetime.now().isoformat()
-
-    return results
+def check_all_signals(source: str = "dashboard") -> Dict:
+    """
+    檢查所有股票的當前訊號並返回 JSON
+
+    Args:
+        source: "dashboard"（API，已有狀態時只取最近幾天）或 "lake"（本地數據湖，不訪問網絡）
+    """
+    if source == "lake":
+        bar_source = LakeSource()
+    else:
+        bar_source = DashboardSource(API_BASE, headers=HEADERS, market="TW", timeout=5)
+
+    scanner = SupertrendScanner(
+        ST_CONFIG["symbols"],
+        bar_source,
+        period=ST_CONFIG["period"],
+        multiplier=ST_CONFIG["multiplier"]
+    )
+    return scanner.scan()
 
 if __name__ == "__main__":
     # 檢查所有訊號
-    results = check_all_signals()
+    source = sys.argv[2] if len(sys.argv) > 2 and sys.argv[1] == "--source" else "dashboard"
+    results = check_all_signals(source)
 
     # 輸出 JSON
     print(json.dumps(results, indent=2, ensure_ascii=False))
@@ -10,17 +10,20 @@ Created: 2026-03-03
 """
 
 import sys
+from pathlib import Path
 sys.path.insert(0, '/Users/charlie/Dashboard/backend')
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'quant'))
 
 import pandas as pd
 import numpy as np
 import vectorbt as vbt
 import duckdb
-import pandas_ta as ta
 from datetime import date, datetime
 from typing import Dict, List, Any, Tuple
 import json
 
+import indicators
+
 # Database connection
 DB_PATH = "/Users/charlie/Dashboard/data/market_data_db/market_data.duckdb"
 
@@ -81,23 +84,18 @@ class DirectFilterBacktester:
 
         return ohlcv_dict
 
-    def calculate_supertrend(self, df: pd.DataFrame, length: int = 10, multiplier: float = 3.0) -> pd.DataFrame:
-        """Calculate Supertrend indicator."""
-        hl2 = (df['high'] + df['low']) / 2
-        atr = ta.atr(df['high'], df['low'], df['close'], length=length)
-
-        supertrend = ta.supertrend(df['high'], df['low'], df['close'], length=length, multiplier=multiplier)
-        return supertrend
+    def calculate_supertrend(self, high: pd.DataFrame, low: pd.DataFrame, close: pd.DataFrame,
+                             length: int = 10, multiplier: float = 3.0) -> pd.DataFrame:
+        """Calculate Supertrend direction (1 / -1) for every symbol column in one pass."""
+        return indicators.supertrend(high, low, close, period=length, multiplier=multiplier).direction
 
-    def apply_ma_filter(self, df: pd.DataFrame, ma_period: int) -> pd.Series:
+    def apply_ma_filter(self, close: pd.DataFrame, ma_period: int) -> pd.DataFrame:
         """Apply MA filter - only allow entries when price > MA."""
-        ma = df['close'].rolling(window=ma_period).mean()
-        return df['close'] > ma
+        return indicators.ma_filter(close, ma_period)
 
-    def apply_volatility_filter(self, df: pd.DataFrame, min_vol: float = 0.01, max_vol: float = 0.08) -> pd.Series:
+    def apply_volatility_filter(self, close: pd.DataFrame, min_vol: float = 0.01, max_vol: float = 0.08) -> pd.DataFrame:
         """Apply volatility filter - only allow entries within volatility range."""
-        returns = df['close'].pct_change()
-        volatility = returns.rolling(window=20).std()
+        volatility = close.pct_change().rolling(window=20).std()
         return (volatility >= min_vol) & (volatility <= max_vol)
 
     def run_backtest(
@@ -127,36 +125,21 @@ class DirectFilterBacktester:
         all_volume = pd.DataFrame({sym: df['volume'] for sym, df in ohlcv_dict.items()})
 
         # Calculate Supertrend signals
-        entries = pd.DataFrame(False, index=all_close.index, columns=all_close.columns)
-        exits = pd.DataFrame(False, index=all_close.index, columns=all_close.columns)
-
-        for symbol in all_close.columns:
-            if symbol in ohlcv_dict:
-                df = ohlcv_dict[symbol]
-                supertrend = self.calculate_supertrend(df, length=10, multiplier=3.0)
+        st_trend = self.calculate_supertrend(all_high, all_low, all_close, length=10, multiplier=3.0)
 
-                # Entry: Supertrend turns up
-                st_trend = supertrend['SUPERTd_10_3.0']
-                entries[symbol] = (st_trend == 1) & (st_trend.shift(1) != 1)
+        # Entry: Supertrend turns up
+        entries = (st_trend == 1) & (st_trend.shift(1) != 1)
 
-                # Exit: Supertrend turns down
-                exits[symbol] = (st_trend == -1) & (st_trend.shift(1) != -1)
+        # Exit: Supertrend turns down
+        exits = (st_trend == -1) & (st_trend.shift(1) != -1)
 
         # Apply filters
         if ma_filter:
-            for symbol in all_close.columns:
-                if symbol in ohlcv_dict:
-                    df = ohlcv_dict[symbol]
-                    ma_mask = self.apply_ma_filter(df, ma_filter)
-                    entries[symbol] = entries[symbol] & ma_mask
+            entries = entries & self.apply_ma_filter(all_close, ma_filter)
 
         if vol_filter:
             min_vol, max_vol = vol_filter
-            for symbol in all_close.columns:
-                if symbol in ohlcv_dict:
-                    df = ohlcv_dict[symbol]
-                    vol_mask = self.apply_volatility_filter(df, min_vol, max_vol)
-                    entries[symbol] = entries[symbol] & vol_mask
+            entries = entries & self.apply_volatility_filter(all_close, min_vol, max_vol)
 
         # Shift signals for next-open execution
         entries = entries.shift(1)
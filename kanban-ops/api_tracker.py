@@ -8,28 +8,58 @@ API 錯誤追蹤模塊
 3. 統計錯誤類型、頻率、趨勢
 4. 生成診斷報告
 
+存儲：
+- 調用日誌：追加寫入的 JSONL（api_tracker_journal.jsonl），按大小輪轉
+- 聚合數據：按小時分桶的計數 + 對數分桶的時延草圖（api_tracker_aggregates.json），
+  記錄已消化到的日誌位置，啟動時只重放其後的新行
+- 每次調用只追加一行並增量更新聚合，O(1)；窗口診斷讀取小時分桶，不再掃描原始記錄
+
 P0 行動：診斷卡住任務的根本原因
 
 Author: System Optimization v2
 Date: 2026-03-05
 """
 
+import atexit
 import json
 import logging
+import math
+import os
+import sys
+import threading
+import time
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
 from dataclasses import dataclass, asdict, field
-from collections import defaultdict, Counter
-import traceback
+from collections import defaultdict, deque, Counter
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from tasks_file import atomic_write_json, tasks_lock
 
 # 路徑配置
 WORKSPACE = Path.home() / ".openclaw" / "workspace"
 API_TRACK_LOG = WORKSPACE / "kanban-ops" / "api_tracker.log"
-API_TRACK_DB = WORKSPACE / "kanban-ops" / "api_tracker_db.json"
+API_TRACK_DB = WORKSPACE / "kanban-ops" / "api_tracker_db.json"  # 舊格式，僅用於遷移
+API_JOURNAL = WORKSPACE / "kanban-ops" / "api_tracker_journal.jsonl"
+API_AGGREGATES_FILE = WORKSPACE / "kanban-ops" / "api_tracker_aggregates.json"
 API_STATS_FILE = WORKSPACE / "kanban-ops" / "api_tracker_stats.json"
 
+# 日誌輪轉
+JOURNAL_MAX_BYTES = 20 * 1024 * 1024
+JOURNAL_BACKUPS = 5
+
+# 聚合配置
+SKETCH_ACCURACY = 0.02          # 分位數相對誤差
+HOURLY_RETENTION_HOURS = 24 * 30
+STATS_HOURLY_HOURS = 24         # APIStats.hourly_calls 保留的小時數
+RECENT_ERRORS_KEPT = 100
+FLUSH_EVERY_CALLS = 20
+FLUSH_INTERVAL = 30             # 秒
+
 # 配置日誌
+API_TRACK_LOG.parent.mkdir(parents=True, exist_ok=True)
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s [%(levelname)s] %(message)s',
@@ -73,71 +103,374 @@ class APIStats:
     last_update: str = ""
 
 
-class APITracker:
-    """API 追蹤器"""
+class DurationSketch:
+    """
+    時延分位數草圖（對數分桶，DDSketch 風格）
+
+    桶邊界按 gamma 的冪次增長，任意分位數的相對誤差不超過 accuracy；
+    內存只與數值的量級範圍有關，與樣本數無關，並且可以直接合併。
+    """
+
+    def __init__(self, accuracy: float = SKETCH_ACCURACY):
+        self.accuracy = accuracy
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def add(self, value: float):
+        """加入一個樣本"""
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        if value <= 0:
+            self.zero_count += 1
+        else:
+            key = math.ceil(math.log(value) / self._log_gamma)
+            self.buckets[key] = self.buckets.get(key, 0) + 1
+
+    def merge(self, other: 'DurationSketch'):
+        """合併另一個相同精度的草圖"""
+        if other.count == 0:
+            return
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.total += other.total
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0
+
+    def quantile(self, q: float) -> float:
+        """估算分位數（q 取 0~1）"""
+        if self.count == 0:
+            return 0
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if rank < seen:
+                value = 2 * self.gamma ** key / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def to_dict(self) -> Dict:
+        return {
+            'accuracy': self.accuracy,
+            'buckets': {str(k): v for k, v in self.buckets.items()},
+            'zero_count': self.zero_count,
+            'count': self.count,
+            'total': self.total,
+            'min': self.min,
+            'max': self.max,
+        }
 
-    def __init__(self):
-        self.records: List[APICallRecord] = []
-        self.stats = self._load_stats()
-        self._load_records()
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'DurationSketch':
+        sketch = cls(data.get('accuracy', SKETCH_ACCURACY))
+        sketch.buckets = {int(k): v for k, v in data.get('buckets', {}).items()}
+        sketch.zero_count = data.get('zero_count', 0)
+        sketch.count = data.get('count', 0)
+        sketch.total = data.get('total', 0.0)
+        sketch.min = data.get('min')
+        sketch.max = data.get('max')
+        return sketch
+
+
+def classify_error(error_message: str) -> str:
+    """分類錯誤類型"""
+    error_msg_lower = error_message.lower()
+
+    if any(kw in error_msg_lower for kw in ['rate limit', '429', 'too many requests']):
+        return 'rate_limit'
+    elif any(kw in error_msg_lower for kw in ['timeout', 'timed out']):
+        return 'timeout'
+    elif any(kw in error_msg_lower for kw in ['connection', 'network']):
+        return 'network'
+    elif any(kw in error_msg_lower for kw in ['parse', 'json']):
+        return 'parsing'
+    else:
+        return 'unknown'
 
-    def _load_stats(self) -> APIStats:
-        """載入統計數據"""
-        try:
-            if API_STATS_FILE.exists():
-                with open(API_STATS_FILE, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    return APIStats(**data)
-        except Exception as e:
-            logger.warning(f"載入統計數據失敗: {e}")
 
-        return APIStats()
+def _new_hour_bucket() -> Dict:
+    return {
+        'calls': 0,
+        'errors': 0,
+        'by_type': {},
+        'by_action': {},
+        'durations': {},  # action -> DurationSketch
+    }
 
-    def _save_stats(self):
-        """保存統計數據"""
-        try:
-            with open(API_STATS_FILE, 'w', encoding='utf-8') as f:
-                json.dump(asdict(self.stats), f, indent=2, ensure_ascii=False)
-        except Exception as e:
-            logger.error(f"保存統計數據失敗: {e}")
 
-    def _load_records(self):
-        """載入歷史記錄（最多保留 1000 條）"""
+class APITracker:
+    """API 追蹤器"""
+
+    def __init__(self, journal_path: Optional[Path] = None,
+                 aggregates_path: Optional[Path] = None,
+                 stats_path: Optional[Path] = None):
+        self.journal_path = Path(journal_path or API_JOURNAL)
+        self.aggregates_path = Path(aggregates_path or API_AGGREGATES_FILE)
+        self.stats_path = Path(stats_path or API_STATS_FILE)
+
+        self.stats = APIStats()
+        self.sketches: Dict[str, DurationSketch] = {}  # 'all' / 'action:<a>' / 'error:<type>'
+        self.hourly: Dict[str, Dict] = {}               # YYYY-MM-DDTHH -> 小時分桶
+        self.recent_errors = deque(maxlen=RECENT_ERRORS_KEPT)
+
+        # 已消化到的日誌位置（inode + 偏移）
+        self._journal_ino: Optional[int] = None
+        self._journal_offset = 0
+
+        self._lock = threading.RLock()
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+        if journal_path is None and not self.journal_path.exists():
+            self._migrate_legacy_db()
+        self._load_aggregates()
+        self._catch_up()
+        atexit.register(self.flush)
+
+    # ------------------------------------------------------------------
+    # 持久化
+    # ------------------------------------------------------------------
+
+    def _migrate_legacy_db(self):
+        """把舊版 api_tracker_db.json（最近 1000 條）導入日誌"""
         try:
             if API_TRACK_DB.exists():
                 with open(API_TRACK_DB, 'r', encoding='utf-8') as f:
                     data = json.load(f)
-                    self.records = [APICallRecord(**r) for r in data[-1000:]]
+                self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.journal_path, 'a', encoding='utf-8') as f:
+                    for r in data:
+                        f.write(json.dumps(r, ensure_ascii=False, separators=(',', ':')) + '\n')
+                logger.info(f"已將 {len(data)} 條舊記錄遷移到 {self.journal_path.name}")
         except Exception as e:
-            logger.warning(f"載入歷史記錄失敗: {e}")
+            logger.warning(f"遷移歷史記錄失敗: {e}")
 
-    def _save_records(self):
-        """保存記錄（最多保留 1000 條）"""
+    def _load_aggregates(self):
+        """載入聚合數據"""
         try:
-            # 只保留最近 1000 條記錄
-            records_to_save = self.records[-1000:]
-            with open(API_TRACK_DB, 'w', encoding='utf-8') as f:
-                json.dump([asdict(r) for r in records_to_save], f, indent=2, ensure_ascii=False)
+            if not self.aggregates_path.exists():
+                return
+            with open(self.aggregates_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.stats = APIStats(**data.get('stats', {}))
+            self.sketches = {
+                name: DurationSketch.from_dict(s) for name, s in data.get('sketches', {}).items()
+            }
+            self.hourly = {}
+            for hour, bucket in data.get('hourly', {}).items():
+                bucket['durations'] = {
+                    action: DurationSketch.from_dict(s)
+                    for action, s in bucket.get('durations', {}).items()
+                }
+                self.hourly[hour] = bucket
+            self.recent_errors.extend(data.get('recent_errors', []))
+            self._journal_ino = data.get('journal_ino')
+            self._journal_offset = data.get('journal_offset', 0)
         except Exception as e:
-            logger.error(f"保存記錄失敗: {e}")
-
-    def _calculate_percentiles(self, durations: List[float]) -> tuple:
-        """計算百分位數"""
-        if not durations:
-            return 0, 0, 0
-
-        sorted_durations = sorted(durations)
-        n = len(sorted_durations)
+            logger.warning(f"載入聚合數據失敗，將從日誌重建: {e}")
+            self.stats = APIStats()
+            self.sketches = {}
+            self.hourly = {}
+            self.recent_errors.clear()
+            self._journal_ino = None
+            self._journal_offset = 0
+
+    def flush(self):
+        """把聚合數據和統計寫盤"""
+        with self._lock:
+            self._refresh_derived_stats()
+            aggregates = {
+                'journal_ino': self._journal_ino,
+                'journal_offset': self._journal_offset,
+                'stats': asdict(self.stats),
+                'sketches': {name: s.to_dict() for name, s in self.sketches.items()},
+                'hourly': {
+                    hour: {
+                        **bucket,
+                        'durations': {a: s.to_dict() for a, s in bucket['durations'].items()},
+                    }
+                    for hour, bucket in self.hourly.items()
+                },
+                'recent_errors': list(self.recent_errors),
+            }
+            try:
+                with tasks_lock(self.aggregates_path):
+                    atomic_write_json(self.aggregates_path, aggregates, indent=None)
+                    atomic_write_json(self.stats_path, asdict(self.stats))
+            except Exception as e:
+                logger.error(f"保存統計數據失敗: {e}")
+            self._pending = 0
+            self._last_flush = time.monotonic()
+
+    def _maybe_flush(self):
+        if self._pending >= FLUSH_EVERY_CALLS or time.monotonic() - self._last_flush >= FLUSH_INTERVAL:
+            self.flush()
+
+    def _rotated_path(self, index: int) -> Path:
+        return self.journal_path.with_name(f"{self.journal_path.name}.{index}")
+
+    def _journal_files(self) -> List[Path]:
+        """所有日誌文件，從舊到新"""
+        files = [self._rotated_path(i) for i in range(JOURNAL_BACKUPS, 0, -1)]
+        files.append(self.journal_path)
+        return [p for p in files if p.exists()]
+
+    def _append(self, record: APICallRecord):
+        """追加一行到日誌，超過大小上限時輪轉"""
+        line = json.dumps(asdict(record), ensure_ascii=False, separators=(',', ':')) + '\n'
+        self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.journal_path, 'a', encoding='utf-8') as f:
+            f.write(line)
+            size = f.tell()
+        if size >= JOURNAL_MAX_BYTES:
+            self._rotate()
+
+    def _rotate(self):
+        with tasks_lock(self.journal_path):
+            try:
+                if os.path.getsize(self.journal_path) < JOURNAL_MAX_BYTES:
+                    return  # 其他進程已經輪轉
+            except FileNotFoundError:
+                return
+            for i in range(JOURNAL_BACKUPS, 1, -1):
+                older = self._rotated_path(i - 1)
+                if older.exists():
+                    os.replace(older, self._rotated_path(i))
+            os.replace(self.journal_path, self._rotated_path(1))
+
+    def _read_from(self, path: Path, offset: int) -> int:
+        """從 offset 讀取完整的行並應用，返回新的偏移"""
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            data = f.read()
+        end = data.rfind(b'\n')
+        if end < 0:
+            return offset
+        for line in data[:end + 1].splitlines():
+            if not line.strip():
+                continue
+            try:
+                self._apply(json.loads(line))
+                self._pending += 1
+            except (ValueError, TypeError) as e:
+                logger.warning(f"跳過無法解析的日誌行: {e}")
+        return offset + end + 1
+
+    def _catch_up(self):
+        """
+        應用日誌中尚未消化的行（包括其他進程追加的）
 
-        def percentile(p: float) -> float:
-            idx = int(n * p / 100)
-            return sorted_durations[min(idx, n - 1)]
+        日誌輪轉後 inode 變化：先在輪轉文件中找到原 inode 讀完剩餘部分，再從新文件開頭讀
+        """
+        try:
+            current_ino = os.stat(self.journal_path).st_ino
+        except FileNotFoundError:
+            current_ino = None
+
+        if self._journal_ino is not None and self._journal_ino != current_ino:
+            for path in self._journal_files()[:-1] if current_ino else self._journal_files():
+                if os.stat(path).st_ino == self._journal_ino:
+                    self._read_from(path, self._journal_offset)
+                    break
+            self._journal_offset = 0
+        self._journal_ino = current_ino
+
+        if current_ino is not None:
+            self._journal_offset = self._read_from(self.journal_path, self._journal_offset)
+
+    # ------------------------------------------------------------------
+    # 聚合
+    # ------------------------------------------------------------------
+
+    def _sketch(self, name: str) -> DurationSketch:
+        sketch = self.sketches.get(name)
+        if sketch is None:
+            sketch = self.sketches[name] = DurationSketch()
+        return sketch
+
+    def _apply(self, r: Dict):
+        """把一條記錄計入聚合（O(1)）"""
+        success = r.get('success', True)
+        duration = r.get('duration_ms')
+        action = r.get('action', 'unknown')
+        hour_key = r['timestamp'][:13]  # YYYY-MM-DDTHH
 
-        return (
-            sum(durations) / n,
-            percentile(95),
-            percentile(99)
-        )
+        self.stats.total_calls += 1
+        error_type = None
+        if success:
+            self.stats.successful_calls += 1
+        else:
+            self.stats.failed_calls += 1
+            error_type = classify_error(r.get('error_message') or 'unknown')
+            if r.get('error_message'):
+                # 錯誤分類
+                if error_type == 'rate_limit':
+                    self.stats.rate_limit_errors += 1
+                elif error_type == 'timeout':
+                    self.stats.timeout_errors += 1
+                self.stats.error_types[error_type] = self.stats.error_types.get(error_type, 0) + 1
+            self.recent_errors.append({
+                'task_id': r.get('task_id'),
+                'timestamp': r['timestamp'],
+                'action': action,
+                'duration_ms': duration,
+                'error': r.get('error_message'),
+            })
+
+        bucket = self.hourly.get(hour_key)
+        if bucket is None:
+            bucket = self.hourly[hour_key] = _new_hour_bucket()
+            self._prune_hourly()
+        bucket['calls'] += 1
+        bucket['by_action'][action] = bucket['by_action'].get(action, 0) + 1
+        if error_type:
+            bucket['errors'] += 1
+            bucket['by_type'][error_type] = bucket['by_type'].get(error_type, 0) + 1
+
+        if duration is not None:
+            self._sketch('all').add(duration)
+            self._sketch(f'action:{action}').add(duration)
+            if error_type:
+                self._sketch(f'error:{error_type}').add(duration)
+            sketch = bucket['durations'].get(action)
+            if sketch is None:
+                sketch = bucket['durations'][action] = DurationSketch()
+            sketch.add(duration)
+
+    def _prune_hourly(self):
+        """清理超過保留期的小時分桶（只在新建分桶時執行）"""
+        cutoff = (datetime.now(timezone.utc) - timedelta(hours=HOURLY_RETENTION_HOURS)).isoformat()[:13]
+        for hour in [h for h in self.hourly if h < cutoff]:
+            del self.hourly[hour]
+
+    def _refresh_derived_stats(self):
+        """由草圖和小時分桶計算平均、百分位數和最近 24 小時的調用數"""
+        overall = self.sketches.get('all')
+        if overall and overall.count:
+            self.stats.avg_duration_ms = round(overall.mean, 2)
+            self.stats.p95_duration_ms = round(overall.quantile(0.95), 2)
+            self.stats.p99_duration_ms = round(overall.quantile(0.99), 2)
+        cutoff = (datetime.now(timezone.utc) - timedelta(hours=STATS_HOURLY_HOURS)).isoformat()[:13]
+        self.stats.hourly_calls = {
+            hour: bucket['calls'] for hour, bucket in sorted(self.hourly.items()) if hour >= cutoff
+        }
+        self.stats.last_update = datetime.now(timezone.utc).isoformat()
 
     def record_call(self, task_id: str, action: str, start_time: datetime,
                      status_code: Optional[str] = None,
@@ -175,11 +508,15 @@ class APITracker:
             rate_limit_headers=rate_limit_headers or {}
         )
 
-        self.records.append(record)
-        self._save_records()
-
-        # 更新統計
-        self._update_stats(record)
+        with self._lock:
+            try:
+                self._append(record)
+            except Exception as e:
+                logger.error(f"寫入調用日誌失敗: {e}")
+                self._apply(asdict(record))
+            # 更新統計（同時消化其他進程追加的記錄）
+            self._catch_up()
+            self._maybe_flush()
 
         # 記錄日誌
         if success:
@@ -189,113 +526,111 @@ class APITracker:
 
         return record
 
-    def _update_stats(self, record: APICallRecord):
-        """更新統計"""
-        self.stats.total_calls += 1
-
-        if record.success:
-            self.stats.successful_calls += 1
-        else:
-            self.stats.failed_calls += 1
-
-            # 錯誤分類
-            if record.error_message:
-                error_msg_lower = record.error_message.lower()
-
-                if any(kw in error_msg_lower for kw in ['rate limit', '429', 'too many requests']):
-                    self.stats.rate_limit_errors += 1
-                elif any(kw in error_msg_lower for kw in ['timeout', 'timed out']):
-                    self.stats.timeout_errors += 1
-
-                # 統計錯誤類型
-                error_type = self._classify_error(record.error_message)
-                self.stats.error_types[error_type] = self.stats.error_types.get(error_type, 0) + 1
-
-        # 計算平均和百分位數
-        durations = [r.duration_ms for r in self.records if r.duration_ms is not None]
-        if durations:
-            avg, p95, p99 = self._calculate_percentiles(durations)
-            self.stats.avg_duration_ms = round(avg, 2)
-            self.stats.p95_duration_ms = round(p95, 2)
-            self.stats.p99_duration_ms = round(p99, 2)
-
-        # 每小時調用統計
-        hour_key = record.timestamp[:13]  # YYYY-MM-DDTHH
-        self.stats.hourly_calls[hour_key] = self.stats.hourly_calls.get(hour_key, 0) + 1
-
-        # 清理舊的每小時統計（保留 24 小時）
-        cutoff = (datetime.now(timezone.utc) - timedelta(hours=24)).isoformat()[:13]
-        self.stats.hourly_calls = {
-            k: v for k, v in self.stats.hourly_calls.items() if k >= cutoff
-        }
-
-        self.stats.last_update = datetime.now(timezone.utc).isoformat()
-        self._save_stats()
-
     def _classify_error(self, error_message: str) -> str:
         """分類錯誤類型"""
-        error_msg_lower = error_message.lower()
-
-        if any(kw in error_msg_lower for kw in ['rate limit', '429', 'too many requests']):
-            return 'rate_limit'
-        elif any(kw in error_msg_lower for kw in ['timeout', 'timed out']):
-            return 'timeout'
-        elif any(kw in error_msg_lower for kw in ['connection', 'network']):
-            return 'network'
-        elif any(kw in error_msg_lower for kw in ['parse', 'json']):
-            return 'parsing'
-        else:
-            return 'unknown'
+        return classify_error(error_message)
+
+    # ------------------------------------------------------------------
+    # 查詢
+    # ------------------------------------------------------------------
+
+    def _window(self, hours: int) -> List[tuple]:
+        """最近 N 小時的小時分桶（含當前小時）"""
+        with self._lock:
+            self._catch_up()
+            cutoff = (datetime.now(timezone.utc) - timedelta(hours=hours)).isoformat()[:13]
+            return [(hour, b) for hour, b in sorted(self.hourly.items()) if hour >= cutoff]
+
+    def iter_records(self, hours: Optional[int] = None) -> Iterator[APICallRecord]:
+        """逐條讀取日誌中的原始記錄（包括已輪轉的文件），用於深入排查"""
+        cutoff = None
+        if hours is not None:
+            cutoff = (datetime.now(timezone.utc) - timedelta(hours=hours)).isoformat()
+        for path in self._journal_files():
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        data = json.loads(line)
+                    except ValueError:
+                        continue
+                    if cutoff is None or data.get('timestamp', '') >= cutoff:
+                        yield APICallRecord(**data)
 
     def get_recent_records(self, hours: int = 1) -> List[APICallRecord]:
         """獲取最近 N 小時的記錄"""
-        cutoff = datetime.now(timezone.utc) - timedelta(hours=hours)
-        return [r for r in self.records
-                if datetime.fromisoformat(r.timestamp) >= cutoff]
+        return list(self.iter_records(hours))
+
+    def counters(self) -> Dict:
+        """累計計數快照（調用方與上次快照求差即得到區間內的調用、錯誤和平均時延）"""
+        with self._lock:
+            self._catch_up()
+            overall = self.sketches.get('all') or DurationSketch()
+            return {
+                'calls': self.stats.total_calls,
+                'failures': self.stats.failed_calls,
+                'rate_limit_errors': self.stats.rate_limit_errors,
+                'timeout_errors': self.stats.timeout_errors,
+                'duration_count': overall.count,
+                'duration_total': overall.total,
+            }
+
+    def get_latency_summary(self, hours: int = 24) -> Dict:
+        """按動作合併最近 N 小時的時延草圖"""
+        merged: Dict[str, DurationSketch] = defaultdict(DurationSketch)
+        for _, bucket in self._window(hours):
+            for action, sketch in bucket['durations'].items():
+                merged[action].merge(sketch)
+                merged['all'].merge(sketch)
+        return {
+            action: {
+                'count': s.count,
+                'avg_ms': round(s.mean, 2),
+                'p50_ms': round(s.quantile(0.50), 2),
+                'p95_ms': round(s.quantile(0.95), 2),
+                'p99_ms': round(s.quantile(0.99), 2),
+                'max_ms': s.max,
+            }
+            for action, s in merged.items()
+        }
 
     def get_error_summary(self, hours: int = 24) -> Dict:
-        """獲取錯誤摘要"""
-        recent_records = self.get_recent_records(hours)
-        failed_records = [r for r in recent_records if not r.success]
+        """獲取錯誤摘要（按小時分桶聚合）"""
+        window = self._window(hours)
+        total_calls = sum(b['calls'] for _, b in window)
 
-        if not failed_records:
+        by_type = Counter()
+        by_hour = {}
+        for hour, bucket in window:
+            if bucket['errors']:
+                by_hour[hour] = bucket['errors']
+                by_type.update(bucket['by_type'])
+
+        total_errors = sum(by_hour.values())
+        if not total_errors:
             return {
+                'total_calls': total_calls,
                 'total_errors': 0,
                 'by_type': {},
                 'by_hour': {},
                 'recent_errors': []
             }
 
-        # 按類型統計
-        by_type = Counter()
-        for record in failed_records:
-            error_type = self._classify_error(record.error_message or 'unknown')
-            by_type[error_type] += 1
-
-        # 按小時統計
-        by_hour = defaultdict(int)
-        for record in failed_records:
-            hour_key = record.timestamp[:13]
-            by_hour[hour_key] += 1
+        cutoff = (datetime.now(timezone.utc) - timedelta(hours=hours)).isoformat()[:13]
+        recent = [e for e in self.recent_errors if e['timestamp'][:13] >= cutoff]
 
         return {
-            'total_errors': len(failed_records),
+            'total_calls': total_calls,
+            'total_errors': total_errors,
             'by_type': dict(by_type),
-            'by_hour': dict(by_hour),
-            'recent_errors': [
-                {
-                    'task_id': r.task_id,
-                    'timestamp': r.timestamp,
-                    'action': r.action,
-                    'duration_ms': r.duration_ms,
-                    'error': r.error_message
-                }
-                for r in failed_records[-10:]  # 最近 10 個錯誤
-            ]
+            'by_hour': by_hour,
+            'recent_errors': recent[-10:]  # 最近 10 個錯誤
         }
 
     def print_stats(self):
         """打印統計信息"""
+        with self._lock:
+            self._catch_up()
+            self._refresh_derived_stats()
         print(f"\n{'='*70}")
         print(f"📊 API 追蹤統計")
         print(f"{'='*70}")
@@ -320,6 +655,7 @@ class APITracker:
     def generate_diagnostic_report(self, hours: int = 24) -> str:
         """生成診斷報告"""
         error_summary = self.get_error_summary(hours)
+        latency = self.get_latency_summary(hours)
 
         report = f"\n{'='*70}\n"
         report += f"🔍 API 診斷報告（最近 {hours} 小時）\n"
@@ -343,6 +679,11 @@ class APITracker:
                 report += f"  [{err['timestamp']}] {err['task_id']} - {err['action']} - {err['error']}\n"
                 report += f"    持續時間: {err['duration_ms']}ms\n"
 
+        if latency:
+            report += f"\n回應時間（按動作）:\n"
+            for action, s in sorted(latency.items()):
+                report += f"  {action}: {s['count']} 次, 平均 {s['avg_ms']}ms, P95 {s['p95_ms']}ms, P99 {s['p99_ms']}ms\n"
+
         # 分析建議
         report += f"\n{'='*70}\n"
         report += f"🎯 診斷建議:\n"
@@ -350,12 +691,12 @@ class APITracker:
 
         if error_summary['total_errors'] == 0:
             report += f"✅ 沒有發現 API 錯誤，系統運作正常\n"
-        elif self.stats.rate_limit_errors / max(self.stats.total_calls, 1) > 0.1:
+        elif error_summary['by_type'].get('rate_limit', 0) / max(error_summary['total_calls'], 1) > 0.1:
             report += f"⚠️ Rate Limit 錯誤率 > 10%，建議:\n"
             report += f"  - 降低啟動頻率（當前 65 秒 → 建議 120-180 秒）\n"
             report += f"  - 降低並發上限（當前 3 → 建議 2）\n"
             report += f"  - 實施背壓機制（P1 行動）\n"
-        elif self.stats.p99_duration_ms > 5000:
+        elif latency.get('all', {}).get('p99_ms', 0) > 5000:
             report += f"⚠️ P99 回應時間 > 5 秒，API 可能存在延遲問題\n"
             report += f"  - 建議檢查網絡連接\n"
             report += f"  - 建議檢查 API 服務狀態\n"
@@ -9,11 +9,12 @@
 将它们回滚到 'pending' 状态，增加重试计数
 """
 
-import json
 import sys
 from pathlib import Path
 from datetime import datetime, timezone, timedelta
 
+from task_store import get_store
+
 TASKS_JSON = Path.home() / ".openclaw" / "workspace-automation" / "kanban" / "tasks.json"
 LOG_FILE = Path.home() / ".openclaw" / "logs" / "stuck_tasks_cleanup.log"
 
@@ -31,20 +32,13 @@ def log(message):
 
 
 def load_tasks():
-    """载入任务"""
-    if not TASKS_JSON.exists():
-        return {}
-    
-    with open(TASKS_JSON, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-        return {t['id']: t for t in data.get('tasks', [])}
+    """载入任务（经 TaskStore）"""
+    return {t['id']: t for t in get_store(TASKS_JSON).all()}
 
 
 def save_tasks(tasks):
-    """保存任务"""
-    data = {"tasks": list(tasks.values())}
-    with open(TASKS_JSON, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    """保存任务（经 TaskStore）"""
+    get_store(TASKS_JSON).replace_all(list(tasks.values()))
 
 
 def cleanup_stuck_tasks():
@@ -76,12 +76,9 @@ def recover_failed_tasks_with_output(handler, min_output_size_bytes=1000, min_li
         if analysis.should_recover:
             # 自動恢復狀態
             _apply_recovery(task, analysis, now)
+            handler._save_task(task)
             recoveries.append(analysis)
     
-    # 保存修改
-    if recoveries:
-        handler._save_tasks()
-    
     return recoveries
 
 
@@ -36,6 +36,9 @@ import time
 from datetime import datetime, timezone
 from pathlib import Path
 
+from task_store import get_store
+from task_scheduler import get_scheduler, report_graph_problems
+
 # 配置
 WORKSPACE = Path.home() / ".openclaw" / "workspace"
 CONFIG_FILE = WORKSPACE / "kanban-ops" / "AUTO_RESEARCH.json"
@@ -149,23 +152,21 @@ def update_stats(config, **updates):
 # ============ 任務管理 ============
 
 def load_tasks():
-    """載入 tasks.json"""
+    """載入所有任務（經 TaskStore）"""
     try:
-        with open(TASKS_JSON, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return get_store(TASKS_JSON).all()
     except Exception as e:
-        log("ERROR", f"載入 tasks.json 失敗: {e}")
+        log("ERROR", f"載入任務失敗: {e}")
         return []
 
 
 def save_tasks(tasks):
-    """保存任務到 tasks.json"""
+    """以完整列表覆蓋任務（經 TaskStore）"""
     try:
-        with open(TASKS_JSON, 'w', encoding='utf-8') as f:
-            json.dump(tasks, f, indent=2, ensure_ascii=False)
+        get_store(TASKS_JSON).replace_all(tasks)
         return True
     except Exception as e:
-        log("ERROR", f"保存 tasks.json 失敗: {e}")
+        log("ERROR", f"保存任務失敗: {e}")
         return False
 
 
@@ -277,43 +278,19 @@ def trigger_scout_scan():
 # ============ 任務啟動 ============
 
 def find_spawnable_tasks(tasks, max_spawn, only_research=True):
-    """找出可啟動的任務"""
-    spawnable = []
-
-    for task in tasks:
-        if task['status'] != 'pending':
-            continue
-
-        # 檢查是否只啟動研究任務
-        if only_research:
-            agent = task.get('agent', '')
-            if agent != 'research':
-                log("INFO", f"跳過非研究任務: {task['id']} (agent={agent})")
-                continue
-
-        # 檢查依賴
-        deps = task.get('dependencies', task.get('depends_on', []))
-        if deps:
-            all_deps_completed = True
-            for dep_id in deps:
-                dep_task = next((t for t in tasks if t['id'] == dep_id), None)
-                if dep_task and dep_task['status'] != 'completed':
-                    all_deps_completed = False
-                    break
-
-            if not all_deps_completed:
-                continue
-
-        spawnable.append(task)
-
-    # 按優先級排序
-    priority_order = {'high': 0, 'medium': 1, 'low': 2, 'normal': 1}
-    spawnable.sort(key=lambda t: (
-        priority_order.get(t.get('priority', 'normal'), 1),
-        t['created_at']
-    ))
+    """找出可啟動的任務（依賴圖在守護進程內跨循環增量維護）"""
+    scheduler = get_scheduler()
+    if scheduler.sync(tasks):
+        report_graph_problems(scheduler, log)
+
+    def is_research(task):
+        agent = task.get('agent', '')
+        if agent != 'research':
+            log("INFO", f"跳過非研究任務: {task['id']} (agent={agent})")
+            return False
+        return True
 
-    return spawnable[:max_spawn]
+    return scheduler.next_spawnable(max_spawn, is_research if only_research else None)
 
 
 def generate_spawn_commands(spawnable_tasks, output_path):
@@ -397,15 +374,16 @@ def auto_spawn_tasks(config):
 
         # 更新任務狀態
         task_ids = [t['id'] for t in spawnable]
-        updated = 0
+        changed = []
         for task in tasks:
             if task['id'] in task_ids:
                 task['status'] = 'spawning'
                 task['updated_at'] = datetime.now(timezone.utc).isoformat()
-                updated += 1
+                changed.append(task)
 
+        updated = len(changed)
         if updated > 0:
-            save_tasks(tasks)
+            get_store(TASKS_JSON).upsert_many(changed)
             log("INFO", f"已更新 {updated} 個任務狀態為 'spawning'")
 
         return count
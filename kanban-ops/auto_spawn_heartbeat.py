@@ -27,6 +27,9 @@ from pathlib import Path
 from datetime import datetime, timezone
 from typing import Dict, Optional
 
+from task_store import get_store
+from task_scheduler import get_scheduler, report_graph_problems
+
 # 導入背壓機制（P1 行動）
 try:
     from backpressure import get_spawn_interval, check_backpressure
@@ -35,8 +38,14 @@ except ImportError:
     BACKPRESSURE_AVAILABLE = False
     log = lambda level, msg: None  # Placeholder
 
-# P2 行動：優先級規則引擎（通過 subprocess 調用）
+# P2 行動：優先級規則引擎（進程內調用編譯後的規則；不可用時退回 subprocess）
 PRIORITY_RULES_SCRIPT = Path.home() / ".openclaw" / "workspace" / "skills" / "priority-rule-engine" / "scripts" / "apply_rules.py"
+try:
+    sys.path.insert(0, str(PRIORITY_RULES_SCRIPT.parent))
+    from rule_engine import load_engine
+    RULE_ENGINE_AVAILABLE = True
+except ImportError:
+    RULE_ENGINE_AVAILABLE = False
 
 # 多模型支持
 try:
@@ -115,32 +124,21 @@ def get_spawn_start_time(task_id: str) -> Optional[datetime]:
 
 
 def load_tasks():
-    """載入 tasks.json"""
+    """載入所有任務（經 TaskStore）"""
     try:
-        with open(TASKS_JSON, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-            # 處理不同的 JSON 格式
-            if isinstance(data, dict) and 'tasks' in data:
-                return data['tasks']
-            elif isinstance(data, list):
-                return data
-            else:
-                log("ERROR", f"未知的 tasks.json 格式: {type(data)}")
-                return []
+        return get_store(TASKS_JSON).all()
     except Exception as e:
-        log("ERROR", f"載入 tasks.json 失敗：{e}")
+        log("ERROR", f"載入任務失敗：{e}")
         return []
 
 
 def save_tasks(tasks):
-    """保存任務到 tasks.json"""
+    """以完整列表覆蓋任務（經 TaskStore）"""
     try:
-        with open(TASKS_JSON, 'w', encoding='utf-8') as f:
-            json.dump(tasks, f, indent=2, ensure_ascii=False)
+        get_store(TASKS_JSON).replace_all(tasks)
         return True
     except Exception as e:
-        log("ERROR", f"保存 tasks.json 失敗：{e}")
+        log("ERROR", f"保存任務失敗：{e}")
         return False
 
 
@@ -152,6 +150,27 @@ def get_running_sessions():
     return sum(1 for t in tasks if t.get('status') == 'in_progress')
 
 
+def apply_priority_rules(tasks, rules_file):
+    """
+    在進程內應用優先級規則，只寫回有變化的任務
+
+    Returns:
+        應用規則後的任務列表
+    """
+    engine = load_engine(rules_file)
+    changes = engine.evaluate(tasks)
+    if not changes:
+        log("DEBUG", "🎯 優先級規則引擎：沒有需要調整的任務")
+        return tasks
+
+    updated = engine.apply(changes)
+    get_store(TASKS_JSON).upsert_many(updated)
+    for change in changes:
+        log("INFO", f"🎯 {change['id']}：{change['from']} → {change['to']}（{change['rule']}）")
+    log("INFO", f"🎯 優先級規則引擎：已更新 {len(updated)} 個任務")
+    return tasks
+
+
 def find_spawnable_tasks(tasks, max_spawn=5):
     """
     找出可啟動的任務
@@ -162,39 +181,15 @@ def find_spawnable_tasks(tasks, max_spawn=5):
     3. 按優先級排序（high > medium > low）
     4. 同優先級按創建時間排序
 
+    依賴圖與就緒隊列由 task_scheduler 增量維護，只處理有變化的任務。
+
     Returns:
         可啟動的任務列表
     """
-    spawnable = []
-
-    for task in tasks:
-        if task['status'] != 'pending':
-            continue
-
-        # 檢查依賴
-        deps = task.get('dependencies', task.get('depends_on', []))
-        if deps:
-            # 檢查所有依賴是否完成
-            all_deps_completed = True
-            for dep_id in deps:
-                dep_task = next((t for t in tasks if t['id'] == dep_id), None)
-                if dep_task and dep_task['status'] != 'completed':
-                    all_deps_completed = False
-                    break
-
-            if not all_deps_completed:
-                continue  # 依賴未完成，跳過
-
-        spawnable.append(task)
-
-    # 按優先級排序
-    priority_order = {'high': 0, 'medium': 1, 'low': 2, 'normal': 1}
-    spawnable.sort(key=lambda t: (
-        priority_order.get(t.get('priority', 'normal'), 1),
-        t['created_at']
-    ))
-
-    return spawnable[:max_spawn]
+    scheduler = get_scheduler()
+    if scheduler.sync(tasks):
+        report_graph_problems(scheduler, log)
+    return scheduler.next_spawnable(max_spawn)
 
 
 def generate_spawn_commands(spawnable_tasks, output_path):
@@ -348,16 +343,19 @@ def generate_spawn_commands(spawnable_tasks, output_path):
 
 
 def update_task_status(tasks, task_ids, new_status):
-    """更新任務狀態"""
-    updated = 0
+    """更新任務狀態（只寫回有變化的行）"""
+    changed = []
     for task in tasks:
         if task['id'] in task_ids:
             task['status'] = new_status
             task['updated_at'] = datetime.now(timezone.utc).isoformat()
             if new_status == 'in_progress':
                 task['spawned_at'] = datetime.now(timezone.utc).isoformat()
-            updated += 1
-    return updated
+            changed.append(task)
+
+    if changed:
+        get_store(TASKS_JSON).upsert_many(changed)
+    return len(changed)
 
 
 def main():
@@ -427,9 +425,14 @@ def main():
         return 0
 
     # P2 行動：應用優先級規則（在選擇任務之前調整優先級）
-    if PRIORITY_RULES_SCRIPT.exists():
+    rules_file = WORKSPACE / "skills" / "priority-rule-engine" / "references" / "priority_rules.json"
+    if RULE_ENGINE_AVAILABLE and rules_file.exists():
+        try:
+            tasks = apply_priority_rules(tasks, rules_file)
+        except Exception as e:
+            log("WARNING", f"優先級規則引擎執行失敗：{e}")
+    elif PRIORITY_RULES_SCRIPT.exists():
         try:
-            rules_file = WORKSPACE / "skills" / "priority-rule-engine" / "references" / "priority_rules.json"
             if rules_file.exists():
                 # 通過 subprocess 調用優先級規則引擎
                 result = subprocess.run(
@@ -517,7 +520,6 @@ def main():
         updated = update_task_status(tasks, task_ids, 'spawning')
 
         if updated > 0:
-            save_tasks(tasks)
             log("INFO", f"已更新 {updated} 個任務狀態為 'spawning'")
 
         # 顯示任務摘要
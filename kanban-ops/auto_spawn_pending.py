@@ -20,6 +20,8 @@ import sys
 from pathlib import Path
 from datetime import datetime
 
+from task_store import get_store
+
 # 路徑配置
 TASKS_JSON = Path.home() / ".openclaw/workspace/kanban/tasks.json"
 MAX_CONCURRENT = 5  # 總體並發限制
@@ -33,12 +35,11 @@ def log(level, message):
 
 
 def load_tasks():
-    """載入 tasks.json"""
+    """載入所有任務（經 TaskStore）"""
     try:
-        with open(TASKS_JSON, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return get_store(TASKS_JSON).all()
     except Exception as e:
-        log("ERROR", f"載入 tasks.json 失敗：{e}")
+        log("ERROR", f"載入任務失敗：{e}")
         return []
 
 
@@ -2,15 +2,21 @@
 """
 Backpressure Mechanism - 背壓機制
 
-根據系統健康度動態調整任務啟動頻率和並發上限：
+閉環並發控制器（AIMD + 時延梯度），根據實時信號調整並發上限和啟動頻率：
 
-健康度計算：
-  health = 1 - (stuck_count / max_concurrent)
+信號（每次檢查取與上次的差值）：
+- api_tracker：區間內的調用數、失敗數、429 次數、平均時延
+- error_recovery：區間內新增的 Rate Limit / Timeout 錯誤
+- TaskStore：當前 in_progress/spawning 數量、卡住的 spawning 任務（> 45 分鐘）
 
-動態調整規則：
-- health >= 0.8: 啟動頻率 65 秒，並發上限 3
-- 0.5 <= health < 0.8: 啟動頻率 120 秒，並發上限 3
-- health < 0.5: 啟動頻率 300 秒，並發上限 2
+控制規則：
+- 區間內出現 429 / 超時、錯誤率 > 10%、卡住任務增加：並發上限乘以 0.7（乘性減）
+- 時延 EWMA 超過基線 2 倍：並發上限乘以時延梯度（不低於 0.7）
+- 否則，並發已用滿時並發上限 +1（加性增），逐步逼近限流上限
+- 啟動頻率與健康度成反比：health = 1 → 30 秒，最慢 300 秒
+
+健康度 = (1 - 卡住比例) × (1 - 錯誤率 EWMA / 0.5) × 時延梯度；
+所有狀態均為常量大小（EWMA + 最近 24 小時的每小時健康度摘要）。
 
 P1 行動：根據 Mentor 建議實施
 
@@ -22,17 +28,28 @@ import json
 import logging
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
-from dataclasses import dataclass, asdict
-from typing import Tuple, Optional
+from dataclasses import dataclass, asdict, field, fields
+from typing import Dict, Optional
 import traceback
 
+from task_store import get_store
+
+# 實時 API 信號（可選）
+try:
+    from api_tracker import get_tracker
+    API_TRACKER_AVAILABLE = True
+except ImportError:
+    API_TRACKER_AVAILABLE = False
+
 # 路徑配置
 WORKSPACE = Path.home() / ".openclaw" / "workspace"
 TASKS_FILE = WORKSPACE / "kanban" / "tasks.json"
 BACKPRESSURE_STATS_FILE = WORKSPACE / "kanban-ops" / "backpressure_stats.json"
 BACKPRESSURE_LOG = WORKSPACE / "kanban-ops" / "backpressure.log"
+RECOVERY_STATS_FILE = WORKSPACE / "kanban-ops" / "error_recovery_stats.json"
 
 # 配置日誌
+BACKPRESSURE_LOG.parent.mkdir(parents=True, exist_ok=True)
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s [%(levelname)s] %(message)s',
@@ -46,7 +63,7 @@ logger = logging.getLogger(__name__)
 
 @dataclass
 class BackpressureStats:
-    """背壓統計"""
+    """背壓統計（含控制器狀態）"""
     max_concurrent: int = 3
     current_concurrent: int = 0
     stuck_count: int = 0
@@ -55,43 +72,61 @@ class BackpressureStats:
     reduced_concurrent: bool = False
     last_adjusted: str = ""
     adjustment_count: int = 0
-    health_history: list = None
-
-    def __post_init__(self):
-        if self.health_history is None:
-            self.health_history = []
+    # 控制器狀態
+    concurrency_limit: float = 3.0
+    latency_ewma_ms: float = 0
+    latency_baseline_ms: float = 0
+    error_rate_ewma: float = 0
+    last_action: str = ""  # 'increase' / 'decrease' / 'hold'
+    last_signals: Dict[str, float] = field(default_factory=dict)  # 上次讀到的累計計數
+    health_hourly: Dict[str, list] = field(default_factory=dict)  # YYYY-MM-DDTHH -> [sum, count, min, max]
 
 
 class BackpressureManager:
     """背壓管理器"""
 
-    # 健康度閾值
+    # 健康度閾值（用於狀態顯示）
     HEALTH_THRESHOLD_HIGH = 0.8
     HEALTH_THRESHOLD_LOW = 0.5
 
-    # 啟動頻率配置（秒）
-    SPAWN_INTERVAL_NORMAL = 65
-    SPAWN_INTERVAL_MEDIUM = 120
+    # 並發上限範圍
+    MIN_CONCURRENT = 1
+    MAX_CONCURRENT_CEILING = 10
+
+    # AIMD 參數
+    ADDITIVE_INCREASE = 1
+    MULTIPLICATIVE_DECREASE = 0.7
+
+    # 信號閾值
+    STUCK_MINUTES = 45
+    ERROR_RATE_THRESHOLD = 0.1
+    ERROR_RATE_CEILING = 0.5    # 錯誤率 EWMA 達到此值時健康度為 0
+    LATENCY_TOLERANCE = 2.0     # 時延超過基線的倍數，視為在排隊
+    EWMA_ALPHA = 0.3
+    BASELINE_ALPHA = 0.02       # 基線緩慢跟隨，避免被一次抖動拉高
+
+    # 啟動頻率範圍（秒）
+    SPAWN_INTERVAL_MIN = 30
     SPAWN_INTERVAL_SLOW = 300
 
-    # 並發上限配置
-    MAX_CONCURRENT_NORMAL = 3
-    MAX_CONCURRENT_REDUCED = 2
+    HEALTH_HISTORY_HOURS = 24
 
-    def __init__(self):
+    def __init__(self, stats_file: Optional[Path] = None, tasks_file: Optional[Path] = None):
+        self.stats_file = Path(stats_file or BACKPRESSURE_STATS_FILE)
+        self.tasks_file = Path(tasks_file or TASKS_FILE)
         self.stats = self._load_stats()
 
     def _load_stats(self) -> BackpressureStats:
-        """載入統計數據"""
+        """載入統計數據（忽略舊版本的字段，如 health_history）"""
         try:
-            if BACKPRESSURE_STATS_FILE.exists():
-                with open(BACKPRESSURE_STATS_FILE, 'r', encoding='utf-8') as f:
+            if self.stats_file.exists():
+                with open(self.stats_file, 'r', encoding='utf-8') as f:
                     data = json.load(f)
-                    stats = BackpressureStats(**data)
-                    # 確保 health_history 是列表
-                    if stats.health_history is None:
-                        stats.health_history = []
-                    return stats
+                known = {f.name for f in fields(BackpressureStats)}
+                stats = BackpressureStats(**{k: v for k, v in data.items() if k in known})
+                if 'concurrency_limit' not in data:
+                    stats.concurrency_limit = float(stats.max_concurrent)
+                return stats
         except Exception as e:
             logger.warning(f"載入背壓統計失敗: {e}")
 
@@ -100,118 +135,185 @@ class BackpressureManager:
     def _save_stats(self):
         """保存統計數據"""
         try:
-            with open(BACKPRESSURE_STATS_FILE, 'w', encoding='utf-8') as f:
+            with open(self.stats_file, 'w', encoding='utf-8') as f:
                 json.dump(asdict(self.stats), f, indent=2, ensure_ascii=False)
         except Exception as e:
             logger.error(f"保存背壓統計失敗: {e}")
 
-    def _calculate_health(self) -> float:
+    def _scan_tasks(self):
+        """統計當前並發和卡住任務（只查 spawning/in_progress 行）"""
+        try:
+            store = get_store(self.tasks_file)
+            spawning = store.all(status='spawning')
+            now = datetime.now(timezone.utc)
+            stuck_count = 0
+            for task in spawning:
+                updated_at = task.get('updated_at', task.get('spawned_at'))
+                if not updated_at:
+                    continue
+                try:
+                    updated_time = datetime.fromisoformat(updated_at.replace('Z', '+00:00'))
+                    if now - updated_time > timedelta(minutes=self.STUCK_MINUTES):
+                        stuck_count += 1
+                except (ValueError, TypeError):
+                    pass
+            return store.count(status='in_progress') + len(spawning), stuck_count
+        except Exception as e:
+            logger.error(f"統計任務狀態失敗: {e}")
+            logger.error(traceback.format_exc())
+            return self.stats.current_concurrent, self.stats.stuck_count
+
+    def _read_counters(self) -> Dict[str, float]:
+        """讀取各信號源的累計計數"""
+        counters = {}
+        if API_TRACKER_AVAILABLE:
+            try:
+                for key, value in get_tracker().counters().items():
+                    counters[f'api_{key}'] = value
+            except Exception as e:
+                logger.warning(f"讀取 API 追蹤數據失敗: {e}")
+        try:
+            if RECOVERY_STATS_FILE.exists():
+                with open(RECOVERY_STATS_FILE, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                counters['recovery_rate_limit_errors'] = data.get('rate_limit_errors', 0)
+                counters['recovery_timeout_errors'] = data.get('timeout_errors', 0)
+        except Exception as e:
+            logger.warning(f"讀取錯誤恢復統計失敗: {e}")
+        return counters
+
+    def _collect_signals(self) -> Dict[str, float]:
         """
-        計算系統健康度
+        本次檢查區間內的信號（累計計數與上次求差）
 
-        Returns:
-            健康度（0.0-1.0）
+        第一次看到某個計數時差值記 0，不對歷史數據做反應；計數變小（統計被重建）時取當前值
         """
-        try:
-            with open(TASKS_FILE, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-
-            # 處理不同的 JSON 格式
-            if isinstance(data, dict) and 'tasks' in data:
-                tasks = data['tasks']
-            elif isinstance(data, list):
-                tasks = data
+        current = self._read_counters()
+        last = self.stats.last_signals
+        delta = {}
+        for key, value in current.items():
+            if key not in last:
+                delta[key] = 0
+            elif value >= last[key]:
+                delta[key] = value - last[key]
             else:
-                logger.error(f"未知的 tasks.json 格式: {type(data)}")
-                return 1.0
+                delta[key] = value
+        self.stats.last_signals = current
+        return delta
 
-            # 統計卡住任務（spawning > 45 分鐘）
-            now = datetime.now(timezone.utc)
-            stuck_count = 0
-            current_concurrent = 0
-
-            for task in tasks:
-                status = task.get('status')
-
-                # 統計當前並發
-                if status == 'in_progress' or status == 'spawning':
-                    current_concurrent += 1
-
-                    # 檢查是否卡住（spawning > 45 分鐘）
-                    if status == 'spawning':
-                        updated_at = task.get('updated_at', task.get('spawned_at'))
-                        if updated_at:
-                            try:
-                                updated_time = datetime.fromisoformat(updated_at.replace('Z', '+00:00'))
-                                elapsed = now - updated_time
-                                if elapsed > timedelta(minutes=45):
-                                    stuck_count += 1
-                            except:
-                                pass
-
-            # 計算健康度
-            health = 1.0
-            if self.stats.max_concurrent > 0:
-                health = max(0.0, 1.0 - (stuck_count / self.stats.max_concurrent))
-
-            # 更新統計
-            self.stats.current_concurrent = current_concurrent
-            self.stats.stuck_count = stuck_count
-            self.stats.health = round(health, 2)
-
-            # 記錄健康度歷史（最近 24 小時）
-            cutoff = (datetime.now(timezone.utc) - timedelta(hours=24)).isoformat()
-            self.stats.health_history = [
-                (timestamp, h) for timestamp, h in self.stats.health_history
-                if timestamp >= cutoff
-            ]
-            self.stats.health_history.append((datetime.now(timezone.utc).isoformat(), health))
-
-            return health
+    def _ewma(self, previous: float, value: float, alpha: float) -> float:
+        return value if previous <= 0 else previous + alpha * (value - previous)
 
-        except Exception as e:
-            logger.error(f"計算健康度失敗: {e}")
-            logger.error(traceback.format_exc())
-            return 1.0  # 錯誤時返回健康
+    def _calculate_health(self, signals: Optional[Dict[str, float]] = None) -> float:
+        """
+        更新 EWMA 狀態並計算系統健康度
 
-    def _adjust_backpressure(self):
+        Returns:
+            健康度（0.0-1.0）
         """
-        根據健康度調整背壓參數
+        signals = signals or {}
+        current_concurrent, stuck_count = self._scan_tasks()
+        self.stats.current_concurrent = current_concurrent
+        self.stats.stuck_count = stuck_count
+
+        calls = signals.get('api_calls', 0)
+        if calls > 0:
+            error_rate = signals.get('api_failures', 0) / calls
+            self.stats.error_rate_ewma += self.EWMA_ALPHA * (error_rate - self.stats.error_rate_ewma)
+
+        duration_count = signals.get('api_duration_count', 0)
+        if duration_count > 0:
+            latency = signals.get('api_duration_total', 0) / duration_count
+            self.stats.latency_ewma_ms = self._ewma(self.stats.latency_ewma_ms, latency, self.EWMA_ALPHA)
+            baseline = self.stats.latency_baseline_ms
+            if baseline <= 0 or latency < baseline:
+                self.stats.latency_baseline_ms = latency
+            else:
+                self.stats.latency_baseline_ms = self._ewma(baseline, latency, self.BASELINE_ALPHA)
+
+        limit = max(self.stats.concurrency_limit, 1.0)
+        stuck_factor = max(0.0, 1.0 - stuck_count / limit)
+        error_factor = max(0.0, 1.0 - self.stats.error_rate_ewma / self.ERROR_RATE_CEILING)
+        health = stuck_factor * error_factor * self._latency_gradient()
+
+        self.stats.health = round(health, 2)
+        self._record_health(health)
+        return health
+
+    def _latency_gradient(self) -> float:
+        """時延梯度：時延在基線的 LATENCY_TOLERANCE 倍以內為 1，超出後按比例下降"""
+        latency = self.stats.latency_ewma_ms
+        baseline = self.stats.latency_baseline_ms
+        if latency <= 0 or baseline <= 0:
+            return 1.0
+        return min(1.0, self.LATENCY_TOLERANCE * baseline / latency)
+
+    def _record_health(self, health: float):
+        """記錄健康度到每小時摘要（只保留最近 24 小時，內存固定）"""
+        hour = datetime.now(timezone.utc).isoformat()[:13]
+        entry = self.stats.health_hourly.get(hour)
+        if entry is None:
+            self.stats.health_hourly[hour] = [health, 1, health, health]
+            for old in sorted(self.stats.health_hourly)[:-self.HEALTH_HISTORY_HOURS]:
+                del self.stats.health_hourly[old]
+        else:
+            entry[0] += health
+            entry[1] += 1
+            entry[2] = min(entry[2], health)
+            entry[3] = max(entry[3], health)
 
-        調整規則：
-        - health >= 0.8: 啟動頻率 65 秒，並發上限 3
-        - 0.5 <= health < 0.8: 啟動頻率 120 秒，並發上限 3
-        - health < 0.5: 啟動頻率 300 秒，並發上限 2
+    def _adjust_backpressure(self, signals: Optional[Dict[str, float]] = None, previous_stuck: int = 0):
+        """
+        根據信號調整並發上限（AIMD + 時延梯度）和啟動頻率
         """
+        signals = signals or {}
         health = self.stats.health
         old_interval = self.stats.spawn_interval
         old_concurrent = self.stats.max_concurrent
+        limit = self.stats.concurrency_limit
+
+        # 乘性減只看本區間的新信號；EWMA 只影響健康度，避免一次錯誤後連續多輪收縮
+        calls = signals.get('api_calls', 0)
+        error_rate = signals.get('api_failures', 0) / calls if calls else 0.0
+        overloaded = (
+            signals.get('api_rate_limit_errors', 0) > 0
+            or signals.get('api_timeout_errors', 0) > 0
+            or signals.get('recovery_rate_limit_errors', 0) > 0
+            or signals.get('recovery_timeout_errors', 0) > 0
+            or error_rate > self.ERROR_RATE_THRESHOLD
+            or self.stats.stuck_count > previous_stuck
+        )
+        gradient = self._latency_gradient()
+
+        if overloaded:
+            limit *= self.MULTIPLICATIVE_DECREASE
+            action = 'decrease'
+        elif gradient < 1.0:
+            limit *= max(gradient, self.MULTIPLICATIVE_DECREASE)
+            action = 'decrease'
+        elif self.stats.current_concurrent >= int(limit):
+            # 並發已用滿且沒有過載信號：探測更高的上限
+            limit += self.ADDITIVE_INCREASE
+            action = 'increase'
+        else:
+            action = 'hold'
 
-        # 根據健康度調整
-        if health >= self.HEALTH_THRESHOLD_HIGH:
-            # 健康狀態：正常啟動
-            self.stats.spawn_interval = self.SPAWN_INTERVAL_NORMAL
-            self.stats.max_concurrent = self.MAX_CONCURRENT_NORMAL
-            self.stats.reduced_concurrent = False
-
-        elif health >= self.HEALTH_THRESHOLD_LOW:
-            # 中等健康：降低啟動頻率
-            self.stats.spawn_interval = self.SPAWN_INTERVAL_MEDIUM
-            self.stats.max_concurrent = self.MAX_CONCURRENT_NORMAL
-            self.stats.reduced_concurrent = False
+        limit = min(float(self.MAX_CONCURRENT_CEILING), max(float(self.MIN_CONCURRENT), limit))
+        self.stats.concurrency_limit = round(limit, 3)
+        self.stats.max_concurrent = int(limit)
+        self.stats.last_action = action
+        self.stats.reduced_concurrent = action == 'decrease'
 
-        else:
-            # 不健康：嚴格限制
-            self.stats.spawn_interval = self.SPAWN_INTERVAL_SLOW
-            self.stats.max_concurrent = self.MAX_CONCURRENT_REDUCED
-            self.stats.reduced_concurrent = True
+        # 啟動頻率與健康度成反比
+        floor = self.SPAWN_INTERVAL_MIN / self.SPAWN_INTERVAL_SLOW
+        self.stats.spawn_interval = int(round(self.SPAWN_INTERVAL_MIN / max(health, floor)))
 
         # 檢查是否有變化
         if self.stats.spawn_interval != old_interval or self.stats.max_concurrent != old_concurrent:
             self.stats.adjustment_count += 1
             self.stats.last_adjusted = datetime.now(timezone.utc).isoformat()
 
-            logger.info(f"🔧 背壓調整：")
+            logger.info(f"🔧 背壓調整（{action}）：")
             logger.info(f"   健康度：{health:.2f}")
             logger.info(f"   啟動頻率：{old_interval}秒 → {self.stats.spawn_interval}秒")
             logger.info(f"   並發上限：{old_concurrent} → {self.stats.max_concurrent}")
@@ -219,16 +321,19 @@ class BackpressureManager:
 
     def check_and_adjust(self) -> dict:
         """
-        檢查並調整背壓
+        檢查並調整背壓（一個控制週期）
 
         Returns:
             調整結果字典
         """
-        # 計算健康度
-        health = self._calculate_health()
+        previous_stuck = self.stats.stuck_count
+
+        # 收集信號並計算健康度
+        signals = self._collect_signals()
+        self._calculate_health(signals)
 
         # 調整背壓
-        self._adjust_backpressure()
+        self._adjust_backpressure(signals, previous_stuck)
 
         # 保存統計
         self._save_stats()
@@ -242,7 +347,11 @@ class BackpressureManager:
             'max_concurrent': self.stats.max_concurrent,
             'reduced_concurrent': self.stats.reduced_concurrent,
             'last_adjusted': self.stats.last_adjusted,
-            'adjustment_count': self.stats.adjustment_count
+            'adjustment_count': self.stats.adjustment_count,
+            'concurrency_limit': self.stats.concurrency_limit,
+            'error_rate_ewma': round(self.stats.error_rate_ewma, 4),
+            'latency_ewma_ms': round(self.stats.latency_ewma_ms, 1),
+            'last_action': self.stats.last_action,
         }
 
     def get_spawn_interval(self) -> int:
@@ -267,19 +376,17 @@ class BackpressureManager:
         print(f"卡住任務: {self.stats.stuck_count} 個")
         print(f"並發上限: {self.stats.max_concurrent} 個" + (" (降級)" if self.stats.reduced_concurrent else ""))
         print(f"啟動頻率: {self.stats.spawn_interval} 秒")
+        print(f"控制器: 上限 {self.stats.concurrency_limit:.2f}，上次動作 {self.stats.last_action or '無'}")
+        print(f"錯誤率 EWMA: {self.stats.error_rate_ewma:.1%}，時延 EWMA: {self.stats.latency_ewma_ms:.0f}ms（基線 {self.stats.latency_baseline_ms:.0f}ms）")
         print(f"調整次數: {self.stats.adjustment_count}")
         print(f"最後調整: {self.stats.last_adjusted if self.stats.last_adjusted else '未調整'}")
         print(f"{'='*70}\n")
 
     def generate_report(self, hours: int = 24) -> str:
         """生成背壓報告"""
-        # 計算健康度趨勢
-        cutoff = (datetime.now(timezone.utc) - timedelta(hours=hours)).isoformat()
-        recent_history = [
-            (timestamp, health)
-            for timestamp, health in self.stats.health_history
-            if timestamp >= cutoff
-        ]
+        # 計算健康度趨勢（每小時摘要）
+        cutoff = (datetime.now(timezone.utc) - timedelta(hours=hours)).isoformat()[:13]
+        recent_hours = [entry for hour, entry in self.stats.health_hourly.items() if hour >= cutoff]
 
         report = f"\n{'='*70}\n"
         report += f"📊 背壓機制報告（最近 {hours} 小時）\n"
@@ -288,16 +395,19 @@ class BackpressureManager:
         report += f"當前狀態:\n"
         report += f"  健康度: {self.stats.health:.2f}\n"
         report += f"  卡住任務: {self.stats.stuck_count}\n"
-        report += f"  並發上限: {self.stats.max_concurrent}\n"
+        report += f"  並發上限: {self.stats.max_concurrent}（控制器 {self.stats.concurrency_limit:.2f}）\n"
+        report += f"  錯誤率 EWMA: {self.stats.error_rate_ewma:.1%}\n"
+        report += f"  時延 EWMA: {self.stats.latency_ewma_ms:.0f}ms（基線 {self.stats.latency_baseline_ms:.0f}ms）\n"
         report += f"  啟動頻率: {self.stats.spawn_interval} 秒\n"
         report += f"  調整次數: {self.stats.adjustment_count}\n\n"
 
-        if recent_history:
-            avg_health = sum(h for _, h in recent_history) / len(recent_history)
-            min_health = min(h for _, h in recent_history)
-            max_health = max(h for _, h in recent_history)
+        if recent_hours:
+            checks = sum(entry[1] for entry in recent_hours)
+            avg_health = sum(entry[0] for entry in recent_hours) / checks
+            min_health = min(entry[2] for entry in recent_hours)
+            max_health = max(entry[3] for entry in recent_hours)
 
-            report += f"健康度趨勢（最近 {len(recent_history)} 個檢查點）：\n"
+            report += f"健康度趨勢（最近 {checks} 個檢查點）：\n"
             report += f"  平均: {avg_health:.2f}\n"
             report += f"  最低: {min_health:.2f}\n"
             report += f"  最高: {max_health:.2f}\n\n"
@@ -377,7 +487,7 @@ def main():
         print(f"  健康度: {result['health']:.2f}")
         print(f"  卡住任務: {result['stuck_count']}")
         print(f"  當前並發: {result['current_concurrent']}")
-        print(f"  並發上限: {result['max_concurrent']}")
+        print(f"  並發上限: {result['max_concurrent']}（{result['last_action']}）")
         print(f"  啟動頻率: {result['spawn_interval']} 秒")
 
     elif command == 'status':
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+輸入壓縮緩存（內容尋址）
+
+重試任務、拆分出的子任務經常帶著相同的輸入文件和相同的任務描述，
+這裡按「文件內容 SHA-256 + 任務查詢 + 壓縮方式」緩存壓縮結果，命中時不再調用
+qmd 搜索，也不再重新提取內容。
+
+- 存儲：compression_cache/<key>.json，每個條目一個文件
+- 索引：compression_cache/index.json，記錄條目大小和最近訪問時間；
+  另外按 (mtime_ns, size, inode) 記住文件的內容哈希，文件未變時不重複讀取
+- 淘汰：總大小超過上限時按最近訪問時間（LRU）刪除
+- 統計：命中 / 未命中 / 淘汰累計寫入 compression_stats.json 的 input_cache 字段
+
+用法：
+    python3 compression_cache.py stats
+    python3 compression_cache.py clear
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from tasks_file import atomic_write_json, tasks_lock
+
+# 路徑配置
+WORKSPACE = Path.home() / ".openclaw" / "workspace"
+CACHE_DIR = WORKSPACE / "kanban-ops" / "compression_cache"
+COMPRESSION_STATS_FILE = WORKSPACE / "kanban-ops" / "compression_stats.json"
+
+CACHE_VERSION = 1                    # 壓縮邏輯變化時遞增，使舊條目失效
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+MAX_HASH_MEMO = 4096                 # 記住內容哈希的文件數上限
+HASH_CHUNK = 1024 * 1024
+
+
+def _file_signature(st: os.stat_result) -> str:
+    return f"{st.st_mtime_ns}:{st.st_size}:{st.st_ino}"
+
+
+def _hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class CompressionCache:
+    """內容尋址的壓縮結果緩存（磁盤 LRU）"""
+
+    def __init__(self, cache_dir: Optional[Path] = None,
+                 stats_file: Optional[Path] = None,
+                 max_bytes: int = CACHE_MAX_BYTES):
+        self.cache_dir = Path(cache_dir or CACHE_DIR)
+        self.stats_file = Path(stats_file or COMPRESSION_STATS_FILE)
+        self.index_path = self.cache_dir / 'index.json'
+        self.max_bytes = max_bytes
+
+        self.entries: Dict[str, Dict] = {}
+        self.hashes: Dict[str, list] = {}
+        self._dirty = False
+        # 本進程尚未合併到 compression_stats.json 的計數
+        self.pending = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0, 'bytes_skipped': 0}
+        self._load_index()
+
+    # ------------------------------------------------------------------
+    # 索引
+    # ------------------------------------------------------------------
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == CACHE_VERSION:
+                self.entries = data.get('entries', {})
+                self.hashes = data.get('hashes', {})
+        except (OSError, ValueError):
+            self.entries, self.hashes = {}, {}
+
+    def _merge_index(self):
+        """寫盤前合併其他進程的改動（訪問時間取較新的，已刪除的條目不恢復）"""
+        mine_entries, mine_hashes = self.entries, self.hashes
+        self._load_index()
+        for key, entry in mine_entries.items():
+            theirs = self.entries.get(key)
+            if theirs is None or entry['atime'] >= theirs['atime']:
+                if (self.cache_dir / f"{key}.json").exists():
+                    self.entries[key] = entry
+        self.hashes.update(mine_hashes)
+        while len(self.hashes) > MAX_HASH_MEMO:
+            self.hashes.pop(next(iter(self.hashes)))
+
+    def content_hash(self, path: Path) -> str:
+        """文件內容哈希（文件未變化時直接取記錄）"""
+        path = Path(path)
+        signature = _file_signature(path.stat())
+        memo = self.hashes.get(str(path))
+        if memo and memo[0] == signature:
+            return memo[1]
+        digest = _hash_file(path)
+        self.hashes.pop(str(path), None)
+        self.hashes[str(path)] = [signature, digest]
+        self._dirty = True
+        return digest
+
+    def make_key(self, path: Path, query: str = "", variant: str = "") -> str:
+        """緩存鍵：內容哈希 + 任務查詢 + 壓縮方式"""
+        material = '\0'.join([str(CACHE_VERSION), self.content_hash(path), query or '', variant or ''])
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    # ------------------------------------------------------------------
+    # 讀寫
+    # ------------------------------------------------------------------
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """讀取緩存的壓縮結果（未命中返回 None）"""
+        entry_path = self.cache_dir / f"{key}.json"
+        try:
+            with open(entry_path, 'r', encoding='utf-8') as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            self.pending['misses'] += 1
+            if self.entries.pop(key, None) is not None:
+                self._dirty = True
+            return None
+
+        entry = self.entries.setdefault(key, {'size': entry_path.stat().st_size})
+        entry['atime'] = time.time()
+        self._dirty = True
+        self.pending['hits'] += 1
+        self.pending['bytes_skipped'] += value.get('original_size', 0) or 0
+        return value
+
+    def put(self, key: str, value: Dict[str, Any]):
+        """寫入壓縮結果（錯誤結果不緩存）"""
+        if 'error' in value:
+            return
+        entry_path = self.cache_dir / f"{key}.json"
+        try:
+            atomic_write_json(entry_path, value, indent=None)
+            self.entries[key] = {'size': entry_path.stat().st_size, 'atime': time.time()}
+            self.pending['stores'] += 1
+            self._dirty = True
+        except (OSError, TypeError, ValueError) as e:
+            print(f"⚠️  Failed to cache compression result: {e}")
+
+    def lookup(self, path: Path, query: str = "", variant: str = "") -> Tuple[Optional[str], Optional[Dict]]:
+        """
+        計算鍵並查找
+
+        Returns:
+            (key, value)；文件不可讀時 key 為 None
+        """
+        try:
+            key = self.make_key(path, query, variant)
+        except OSError:
+            return None, None
+        return key, self.get(key)
+
+    def _evict(self):
+        """按最近訪問時間淘汰，直到總大小不超過上限"""
+        total = sum(e['size'] for e in self.entries.values())
+        if total <= self.max_bytes:
+            return
+        for key, entry in sorted(self.entries.items(), key=lambda kv: kv[1].get('atime', 0)):
+            if total <= self.max_bytes:
+                break
+            try:
+                (self.cache_dir / f"{key}.json").unlink()
+            except FileNotFoundError:
+                pass
+            total -= entry['size']
+            del self.entries[key]
+            self.pending['evictions'] += 1
+
+    def flush(self):
+        """保存索引（合併其他進程的改動、執行淘汰）並把統計合併到 compression_stats.json"""
+        if not self._dirty and not any(self.pending.values()):
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with tasks_lock(self.index_path):
+            self._merge_index()
+            self._evict()
+            atomic_write_json(self.index_path, {
+                'version': CACHE_VERSION,
+                'entries': self.entries,
+                'hashes': self.hashes,
+            }, indent=None)
+            self._merge_stats()
+        self._dirty = False
+
+    def _merge_stats(self):
+        """把本進程的計數累加到 compression_stats.json（保留其他字段）"""
+        try:
+            with open(self.stats_file, 'r', encoding='utf-8') as f:
+                stats = json.load(f)
+        except (OSError, ValueError):
+            stats = {}
+        section = stats.get('input_cache', {})
+        for name, value in self.pending.items():
+            section[name] = section.get(name, 0) + value
+        lookups = section.get('hits', 0) + section.get('misses', 0)
+        section['hit_rate'] = round(section.get('hits', 0) / lookups, 4) if lookups else 0
+        section['entries'] = len(self.entries)
+        section['cache_bytes'] = sum(e['size'] for e in self.entries.values())
+        section['updated_at'] = datetime.now(timezone.utc).isoformat()
+        stats['input_cache'] = section
+        atomic_write_json(self.stats_file, stats)
+        self.pending = {name: 0 for name in self.pending}
+
+    def clear(self) -> int:
+        """刪除所有條目"""
+        with tasks_lock(self.index_path):
+            self._load_index()
+            removed = 0
+            for key in list(self.entries):
+                try:
+                    (self.cache_dir / f"{key}.json").unlink()
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+            self.entries = {}
+            if self.cache_dir.exists():
+                atomic_write_json(self.index_path, {
+                    'version': CACHE_VERSION, 'entries': {}, 'hashes': self.hashes,
+                }, indent=None)
+        return removed
+
+
+# 全局實例
+_cache = None
+
+
+def get_cache() -> CompressionCache:
+    """獲取全局壓縮緩存實例"""
+    global _cache
+    if _cache is None:
+        _cache = CompressionCache()
+    return _cache
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ('stats', 'clear'):
+        print("Usage: python3 compression_cache.py <stats|clear>")
+        return
+
+    cache = get_cache()
+    if sys.argv[1] == 'clear':
+        print(f"🧹 Removed {cache.clear()} cached entries")
+        return
+
+    try:
+        with open(cache.stats_file, 'r', encoding='utf-8') as f:
+            section = json.load(f).get('input_cache', {})
+    except (OSError, ValueError):
+        section = {}
+    total = sum(e['size'] for e in cache.entries.values())
+    print(f"Entries: {len(cache.entries)} ({total // 1024}KB / {cache.max_bytes // 1024 // 1024}MB)")
+    print(f"Hits: {section.get('hits', 0)}  Misses: {section.get('misses', 0)}  "
+          f"Hit rate: {section.get('hit_rate', 0):.1%}")
+    print(f"Evictions: {section.get('evictions', 0)}  "
+          f"Input bytes skipped: {section.get('bytes_skipped', 0) // 1024}KB")
+
+
+if __name__ == '__main__':
+    main()
@@ -8,11 +8,19 @@
 """
 
 import json
-import os
 import sys
 from datetime import datetime, timezone
 from pathlib import Path
 
+from task_store import get_store
+
+# 背壓控制器建議的並發上限（可選）
+try:
+    from backpressure import get_max_concurrent
+    BACKPRESSURE_AVAILABLE = True
+except ImportError:
+    BACKPRESSURE_AVAILABLE = False
+
 # 路徑配置
 WORKSPACE = Path.home() / ".openclaw" / "workspace"
 QUEUE_DIR = WORKSPACE / "kanban-ops" / "task_queue"
@@ -20,6 +28,8 @@ TASKS_JSON = WORKSPACE / "kanban" / "tasks.json"
 CONSUMED_DIR = QUEUE_DIR / "consumed"
 READY_TO_SPAWN_FILE = QUEUE_DIR / "ready_to_spawn.jsonl"
 
+DEFAULT_MAX_CONCURRENT = 5
+
 
 def log(level, message):
     """記錄日誌"""
@@ -29,29 +39,21 @@ def log(level, message):
 
 
 def load_tasks():
-    """載入 tasks.json"""
-    if not os.path.exists(TASKS_JSON):
-        log("WARNING", f"tasks.json 不存在：{TASKS_JSON}")
-        return []
-
+    """載入所有任務（經 TaskStore）"""
     try:
-        with open(TASKS_JSON, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            return data.get('tasks', [])
+        return get_store(TASKS_JSON).all()
     except Exception as e:
-        log("ERROR", f"載入 tasks.json 失敗：{e}")
+        log("ERROR", f"載入任務失敗：{e}")
         return []
 
 
 def save_tasks(tasks):
-    """保存任務到 tasks.json"""
+    """以完整列表覆蓋任務（經 TaskStore）"""
     try:
-        data = {"tasks": tasks}
-        with open(TASKS_JSON, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        get_store(TASKS_JSON).replace_all(tasks)
         return True
     except Exception as e:
-        log("ERROR", f"保存 tasks.json 失敗：{e}")
+        log("ERROR", f"保存任務失敗：{e}")
         return False
 
 
@@ -116,8 +118,21 @@ def trigger_system_event(message):
         return False
 
 
-def consume_queue(max_tasks=5, max_concurrent=5):
+def resolve_max_concurrent(max_concurrent=None):
+    """未指定並發上限時使用背壓控制器的建議值"""
+    if max_concurrent is not None:
+        return max_concurrent
+    if BACKPRESSURE_AVAILABLE:
+        try:
+            return get_max_concurrent()
+        except Exception as e:
+            log("WARNING", f"讀取背壓建議並發失敗，使用默認值：{e}")
+    return DEFAULT_MAX_CONCURRENT
+
+
+def consume_queue(max_tasks=5, max_concurrent=None):
     """消費任務隊列"""
+    max_concurrent = resolve_max_concurrent(max_concurrent)
     log("INFO", f"開始消費隊列（max_tasks={max_tasks}, max_concurrent={max_concurrent}）")
 
     # 確保目錄存在
@@ -141,9 +156,7 @@ def consume_queue(max_tasks=5, max_concurrent=5):
 
     log("INFO", f"隊列中有 {len(task_files)} 個任務")
 
-    # 載入 tasks.json
-    tasks = load_tasks()
-    tasks_dict = {t['id']: t for t in tasks}
+    store = get_store(TASKS_JSON)
 
     # 消費任務
     triggered = []
@@ -165,7 +178,7 @@ def consume_queue(max_tasks=5, max_concurrent=5):
 
             # 檢查任務是否已在運行中
             label = task_data.get('label')
-            if tasks_dict.get(label, {}).get('status') == 'in_progress':
+            if (store.get(label) or {}).get('status') == 'in_progress':
                 log("DEBUG", f"任務 {label} 已在運行中，跳過")
                 skipped += 1
                 continue
@@ -199,11 +212,7 @@ def consume_queue(max_tasks=5, max_concurrent=5):
                 json.dump(task_data, f, indent=2, ensure_ascii=False)
 
             # 更新 tasks.json 中的任務
-            if task_id in tasks_dict:
-                tasks_dict[task_id]['status'] = 'ready_to_spawn'
-                tasks_dict[task_id]['updated_at'] = datetime.now(timezone.utc).isoformat()
-                save_tasks(tasks)
-            else:
+            if not store.update(task_id, status='ready_to_spawn'):
                 log("WARNING", f"tasks.json 中未找到任務 {task_id}")
 
             log("SUCCESS", f"任務 {task_id} 已標記為 ready_to_spawn")
@@ -238,14 +247,15 @@ def main():
 
     parser.add_argument('--max-tasks', type=int, default=5,
                         help='最多觸發任務數（默認：5）')
-    parser.add_argument('--max-concurrent', type=int, default=5,
-                        help='最大並發數（默認：5）')
+    parser.add_argument('--max-concurrent', type=int, default=None,
+                        help='最大並發數（默認：背壓控制器建議值）')
     parser.add_argument('--dry-run', action='store_true',
                         help='試運行模式，不實際觸發')
     parser.add_argument('--list', action='store_true',
                         help='列出隊列中的任務')
 
     args = parser.parse_args()
+    args.max_concurrent = resolve_max_concurrent(args.max_concurrent)
 
     if args.list:
         # 列出隊列中的任務
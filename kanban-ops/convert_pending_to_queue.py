@@ -13,6 +13,8 @@ import sys
 from datetime import datetime, timezone
 from pathlib import Path
 
+from task_store import get_store
+
 # 路徑配置
 WORKSPACE = Path.home() / ".openclaw" / "workspace"
 TASKS_JSON = WORKSPACE / "kanban" / "tasks.json"
@@ -20,9 +22,8 @@ QUEUE_DIR = WORKSPACE / "kanban-ops" / "task_queue"
 
 
 def load_tasks():
-    """載入 tasks.json"""
-    with open(TASKS_JSON, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    """載入所有任務（經 TaskStore）"""
+    return get_store(TASKS_JSON).all()
 
 
 def get_executable_tasks(tasks):
@@ -10,6 +10,14 @@ from typing import Dict, Optional, List
 from pathlib import Path
 from model_allocator import ModelAllocator
 
+# 按成本換算 Token，交給預估器做增量學習（可選）
+try:
+    from task_estimator import get_estimator, observed_tokens
+    from task_store import get_store
+    ESTIMATOR_AVAILABLE = True
+except ImportError:
+    ESTIMATOR_AVAILABLE = False
+
 logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
 logger = logging.getLogger(__name__)
 
@@ -320,6 +328,25 @@ class CostOptimizer:
 
         logger.info(f"💰 成本追蹤：{model_id} +¥{cost:.2f} (任務: {task_id})")
 
+        if task_id and ESTIMATOR_AVAILABLE:
+            self._observe_cost_tokens(model, cost, task_id)
+
+    def _observe_cost_tokens(self, model: dict, cost: float, task_id: str):
+        """
+        沒有 token_usage 記錄的任務，按模型單價把成本換算成 Token 交給預估器
+
+        按輸入單價換算（偏高估），只用於沒有實際 Token 記錄的任務
+        """
+        price = model.get("cost_metadata", {}).get("cost_per_1k_tokens")
+        if not price or cost <= 0:
+            return
+        try:
+            task = get_store().find(task_id)
+            if task and observed_tokens(task) is None:
+                get_estimator().observe(task, tokens=cost / price * 1000)
+        except Exception as e:
+            logger.warning(f"⚠️ 更新預估器失敗：{e}")
+
     def estimate_task_cost(self, model_id: str, task: dict) -> float:
         """
         預估任務成本
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Dedup Index - 任務去重索引
+
+Scout 去重原本對每個候選主題都與全部任務逐一做 SequenceMatcher
+（O(候選數 × 任務數 × 標題長度²)），並每次重新從標題提取 arXiv ID。
+本模組維護一份持久化索引（kanban/dedup_index.db）：
+
+- 完全相同標題、arXiv ID：索引列查找
+- 相似標題：字符 n-gram 的 MinHash 簽名 + LSH 分桶（bands 表），只對同桶候選計算 SequenceMatcher
+- 與 TaskStore 增量同步：只對新增或標題變化的任務計算簽名；
+  註冊任務時可直接 add() 插入
+
+MinHash 使用單次哈希分桶（one permutation hashing）並做旋轉填充，
+每個標題只需對每個 n-gram 哈希一次。
+
+用法：
+    from dedup_index import get_dedup_index
+
+    index = get_dedup_index()
+    index.sync_store()
+    match = index.find_similar("Some Paper Title", threshold=0.85)
+"""
+
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+from array import array
+from difflib import SequenceMatcher
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from task_store import get_store
+
+logger = logging.getLogger(__name__)
+
+# 路徑配置
+WORKSPACE = Path.home() / ".openclaw" / "workspace"
+TASKS_FILE = WORKSPACE / "kanban" / "tasks.json"
+INDEX_DB = WORKSPACE / "kanban" / "dedup_index.db"
+
+# MinHash / LSH 參數
+NGRAM = 3
+NUM_BINS = 64
+BANDS = 21
+ROWS = 3
+PARAMS = f"ngram={NGRAM},bins={NUM_BINS},bands={BANDS},rows={ROWS}"
+
+_MASK32 = 0xFFFFFFFF
+_EMPTY = _MASK32 + 1
+_ROTATION = 0x9E3779B1
+
+# 常見格式：arXiv:1234.5678, arXiv ID: 1234.5678, etc.（按順序嘗試）
+_ARXIV_PATTERNS = [
+    re.compile(r'arXiv:\s*(\d{4}\.\d{4,5})', re.IGNORECASE),
+    re.compile(r'arXiv\s+ID:\s*(\d{4}\.\d{4,5})', re.IGNORECASE),
+    re.compile(r'arXiv\s*(\d{4}\.\d{4,5})', re.IGNORECASE),
+]
+_NON_WORD = re.compile(r'\W+')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    task_id  TEXT PRIMARY KEY,
+    title    TEXT NOT NULL,
+    status   TEXT,
+    arxiv_id TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_entries_title ON entries(title);
+CREATE INDEX IF NOT EXISTS idx_entries_arxiv ON entries(arxiv_id);
+CREATE TABLE IF NOT EXISTS bands (
+    band_key INTEGER NOT NULL,
+    task_id  TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_bands_key ON bands(band_key);
+CREATE INDEX IF NOT EXISTS idx_bands_task ON bands(task_id);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def extract_arxiv_id(title: str) -> Optional[str]:
+    """從標題中提取 arXiv ID（如果存在）"""
+    for pattern in _ARXIV_PATTERNS:
+        match = pattern.search(title)
+        if match:
+            return match.group(1)
+    return None
+
+
+def title_ngrams(title: str, n: int = NGRAM) -> Set[str]:
+    """標題的字符 n-gram（小寫、標點折疊為空格）"""
+    text = f" {_NON_WORD.sub(' ', title.lower()).strip()} "
+    if len(text) <= n:
+        return {text}
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def minhash(title: str) -> array:
+    """
+    標題的 MinHash 簽名（NUM_BINS 個 32 位值）
+
+    每個 n-gram 哈希一次：低位選擇分桶，高位作為桶內最小值；
+    空桶從右側最近的非空桶旋轉借值，保持相似度估計無偏。
+    """
+    sig = [_EMPTY] * NUM_BINS
+    for gram in title_ngrams(title):
+        h = int.from_bytes(hashlib.blake2b(gram.encode('utf-8'), digest_size=8).digest(), 'little')
+        b = h % NUM_BINS
+        value = (h >> 8) & _MASK32
+        if value < sig[b]:
+            sig[b] = value
+
+    if _EMPTY in sig:
+        original = list(sig)
+        for i in range(NUM_BINS):
+            if original[i] != _EMPTY:
+                continue
+            distance = 1
+            while original[(i + distance) % NUM_BINS] == _EMPTY:
+                distance += 1
+            sig[i] = (original[(i + distance) % NUM_BINS] + distance * _ROTATION) & _MASK32
+    return array('I', sig)
+
+
+def band_keys(sig: array) -> List[int]:
+    """
+    LSH 分桶鍵（每個 band 一個 56 位整數）
+
+    每個 band 取間隔 BANDS 的桶（b, b+BANDS, ...）而非連續的桶：
+    連續的空桶會從同一個非空桶借值，放在同一 band 會讓碰撞機率接近 J 而非 J^ROWS。
+    """
+    keys = []
+    for band in range(BANDS):
+        payload = bytes([band]) + sig[band:BANDS * ROWS:BANDS].tobytes()
+        keys.append(int.from_bytes(hashlib.blake2b(payload, digest_size=7).digest(), 'little'))
+    return keys
+
+
+def title_similarity(str1: str, str2: str) -> float:
+    """計算兩個字符串的相似度（0.0 - 1.0，與原 calculate_similarity 相同）"""
+    return SequenceMatcher(None, str1.lower(), str2.lower()).ratio()
+
+
+class DedupIndex:
+    """標題 / arXiv ID 去重索引（查詢直接走 SQLite 索引，打開時無需載入）"""
+
+    def __init__(self, db_path: Optional[Path] = None):
+        self.db_path = Path(db_path or INDEX_DB)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+        self._qdm: Dict[str, Dict] = {}
+        self._qdm_signature = None
+
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'params'").fetchone()
+        if row is None or row[0] != PARAMS:
+            # 參數變化：簽名不再可比，清空後由 sync 重建
+            with self._conn:
+                self._conn.execute("DELETE FROM entries")
+                self._conn.execute("DELETE FROM bands")
+                self._conn.execute(
+                    "INSERT INTO meta(key, value) VALUES('params', ?) "
+                    "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                    (PARAMS,),
+                )
+
+    # ------------------------------------------------------------------
+    # 增量更新
+    # ------------------------------------------------------------------
+
+    def _insert(self, task_id: str, title: str, status: Optional[str]) -> None:
+        """寫入單個任務（需在事務中調用）"""
+        self._delete(task_id)
+        self._conn.execute(
+            "INSERT INTO entries(task_id, title, status, arxiv_id) VALUES(?, ?, ?, ?)",
+            (task_id, title, status, extract_arxiv_id(title)),
+        )
+        self._conn.executemany(
+            "INSERT INTO bands(band_key, task_id) VALUES(?, ?)",
+            [(key, task_id) for key in band_keys(minhash(title))],
+        )
+
+    def _delete(self, task_id: str) -> None:
+        self._conn.execute("DELETE FROM entries WHERE task_id = ?", (task_id,))
+        self._conn.execute("DELETE FROM bands WHERE task_id = ?", (task_id,))
+
+    def add(self, task: Dict) -> None:
+        """註冊任務時插入（或更新）索引"""
+        title = task.get('title') or ''
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT title FROM entries WHERE task_id = ?", (task['id'],)).fetchone()
+            if row and row[0] == title:
+                self._conn.execute(
+                    "UPDATE entries SET status = ? WHERE task_id = ?", (task.get('status'), task['id'])
+                )
+            else:
+                self._insert(task['id'], title, task.get('status'))
+
+    def remove(self, task_id: str) -> None:
+        with self._lock, self._conn:
+            self._delete(task_id)
+
+    def sync(self, tasks: Iterable[Dict]) -> Dict[str, int]:
+        """
+        與任務列表同步（只需 id / title / status 字段）
+
+        Returns:
+            {'indexed': 重新計算簽名的任務數, 'removed': 移除的任務數}
+        """
+        indexed = 0
+        with self._lock, self._conn:
+            current = {
+                task_id: (title, status)
+                for task_id, title, status in self._conn.execute("SELECT task_id, title, status FROM entries")
+            }
+            status_updates = []
+            for task in tasks:
+                task_id = task['id']
+                title = task.get('title') or ''
+                status = task.get('status')
+                existing = current.pop(task_id, None)
+                if existing is None or existing[0] != title:
+                    self._insert(task_id, title, status)
+                    indexed += 1
+                elif existing[1] != status:
+                    status_updates.append((status, task_id))
+
+            if status_updates:
+                self._conn.executemany("UPDATE entries SET status = ? WHERE task_id = ?", status_updates)
+            for task_id in current:
+                self._delete(task_id)
+        return {'indexed': indexed, 'removed': len(current)}
+
+    def sync_store(self, tasks_json: Optional[Path] = None) -> Dict[str, int]:
+        """與 TaskStore 同步（只讀取 id / title / status）"""
+        return self.sync(get_store(tasks_json or TASKS_FILE).fields('title', 'status'))
+
+    def sync_qdm(self, qdm_index: Dict) -> None:
+        """索引 QDM 中的 arXiv 主題（QDM 文件很小，只保存在內存）"""
+        signature = json.dumps(qdm_index.get('arxiv', []), sort_keys=True, default=str)
+        if signature == self._qdm_signature:
+            return
+        self._qdm = {}
+        for topic in qdm_index.get('arxiv', []):
+            arxiv_id = extract_arxiv_id(topic.get('title', ''))
+            if arxiv_id and arxiv_id not in self._qdm:
+                self._qdm[arxiv_id] = topic
+        self._qdm_signature = signature
+
+    # ------------------------------------------------------------------
+    # 查詢
+    # ------------------------------------------------------------------
+
+    def find_exact(self, title: str, status: Optional[str] = None) -> Optional[Dict]:
+        """標題完全相同的第一個任務（可限定狀態）"""
+        sql = "SELECT task_id, title, status FROM entries WHERE title = ?"
+        params = [title]
+        if status is not None:
+            sql += " AND status = ?"
+            params.append(status)
+        with self._lock:
+            row = self._conn.execute(sql + " ORDER BY rowid LIMIT 1", params).fetchone()
+        return {'id': row[0], 'title': row[1], 'status': row[2]} if row else None
+
+    def find_arxiv(self, arxiv_id: str) -> Optional[Dict]:
+        """
+        arXiv ID 是否已存在
+
+        Returns:
+            {'task': 任務} 或 {'type': 'qdm', 'topic': 主題}，不存在時 None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT task_id, title, status FROM entries WHERE arxiv_id = ? ORDER BY rowid LIMIT 1",
+                (arxiv_id,),
+            ).fetchone()
+        if row:
+            return {'task': {'id': row[0], 'title': row[1], 'status': row[2]}}
+        if arxiv_id in self._qdm:
+            return {'type': 'qdm', 'topic': self._qdm[arxiv_id]}
+        return None
+
+    def candidates(self, title: str) -> List[Dict]:
+        """與標題落在同一 LSH 桶的任務"""
+        keys = band_keys(minhash(title))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT task_id, title, status FROM entries WHERE task_id IN ("
+                f"SELECT task_id FROM bands WHERE band_key IN ({','.join('?' * len(keys))}))",
+                keys,
+            ).fetchall()
+        return [{'id': task_id, 'title': t, 'status': status} for task_id, t, status in rows]
+
+    def find_similar(self, title: str, threshold: float) -> Optional[Dict]:
+        """
+        相似度最高且 >= threshold 的任務（只對 LSH 候選計算 SequenceMatcher）
+
+        Returns:
+            {'task': 任務, 'similarity': 相似度} 或 None
+        """
+        best = None
+        query = title.lower()
+        for task in self.candidates(title):
+            matcher = SequenceMatcher(None, query, task['title'].lower())
+            if matcher.real_quick_ratio() < threshold or matcher.quick_ratio() < threshold:
+                continue
+            similarity = matcher.ratio()
+            if similarity >= threshold and (best is None or similarity > best['similarity']):
+                best = {'task': task, 'similarity': similarity}
+        return best
+
+    def stats(self) -> Dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return {'entries': entries, 'qdm_arxiv': len(self._qdm), 'db_path': str(self.db_path)}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_indexes: Dict[str, DedupIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_dedup_index(db_path: Optional[Path] = None) -> DedupIndex:
+    """取得（進程內共享的）去重索引"""
+    key = str(Path(db_path or INDEX_DB).expanduser().resolve())
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = _indexes[key] = DedupIndex(Path(key))
+        return index
@@ -22,6 +22,8 @@ from dataclasses import dataclass, asdict
 from enum import Enum
 import traceback
 
+from task_store import get_store
+
 # 路徑配置
 WORKSPACE = Path.home() / ".openclaw" / "workspace"
 TASKS_FILE = WORKSPACE / "kanban" / "tasks.json"
@@ -214,10 +216,8 @@ class ErrorRecoveryManager:
             logger.info(f"檢測到錯誤類型: {error_type.value}")
 
             # 載入任務
-            with open(TASKS_FILE, 'r', encoding='utf-8') as f:
-                tasks = json.load(f)
-
-            task = next((t for t in tasks if t.get('id') == task_id), None)
+            store = get_store(TASKS_FILE)
+            task = store.get(task_id)
             if not task:
                 return False, f"任務 {task_id} 不存在"
 
@@ -243,20 +243,18 @@ class ErrorRecoveryManager:
                 self._update_stats(error_type, False)
                 return False, "不應該重試（達到最大重試次數或正在退避中）"
 
-            # 執行恢復
-            task['status'] = 'pending'
-            task['retry_count'] = error_record.retry_count + 1
-            task['error_recovery'] = {
-                'last_error': error_message[:500],
-                'error_type': error_type.value,
-                'recovered_at': datetime.now(timezone.utc).isoformat(),
-                'backoff_seconds': error_record.backoff_seconds
-            }
-            task['updated_at'] = datetime.now(timezone.utc).isoformat()
-
-            # 保存任務
-            with open(TASKS_FILE, 'w', encoding='utf-8') as f:
-                json.dump(tasks, f, indent=2, ensure_ascii=False)
+            # 執行恢復（行級更新，不會覆蓋其他進程對別的任務的修改）
+            store.update(
+                task_id,
+                status='pending',
+                retry_count=error_record.retry_count + 1,
+                error_recovery={
+                    'last_error': error_message[:500],
+                    'error_type': error_type.value,
+                    'recovered_at': datetime.now(timezone.utc).isoformat(),
+                    'backoff_seconds': error_record.backoff_seconds
+                }
+            )
 
             # 更新統計
             self._update_stats(error_type, True)
@@ -286,21 +284,8 @@ class ErrorRecoveryManager:
         }
 
         try:
-            # 載入任務
-            with open(TASKS_FILE, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-
-            # 處理不同的 JSON 格式
-            if isinstance(data, dict) and 'tasks' in data:
-                tasks = data['tasks']
-            elif isinstance(data, list):
-                tasks = data
-            else:
-                logger.error(f"未知的 tasks.json 格式: {type(data)}")
-                return stats
-
             # 找出失敗任務
-            failed_tasks = [t for t in tasks if t.get('status') == 'failed']
+            failed_tasks = get_store(TASKS_FILE).all(status='failed')
             stats['total_failed'] = len(failed_tasks)
 
             if not failed_tasks:
@@ -27,6 +27,7 @@ SPAWN_COMMANDS_FILE = WORKSPACE / "kanban" / "spawn_commands.jsonl"
 # 導入 API 追蹤器
 sys.path.insert(0, str(WORKSPACE / "kanban-ops"))
 from api_tracker import get_tracker
+from task_store import get_store
 
 
 def track_spawn_result(task_id: str, status_code: str, error_message: str = None,
@@ -74,10 +75,8 @@ def update_task_from_spawn_result(task_id: str, result: dict):
             }
     """
     try:
-        with open(TASKS_JSON, 'r', encoding='utf-8') as f:
-            tasks = json.load(f)
-
-        task = next((t for t in tasks if t.get('id') == task_id), None)
+        store = get_store(TASKS_JSON)
+        task = store.get(task_id)
         if not task:
             print(f"⚠️ 任務 {task_id} 不存在", flush=True)
             return
@@ -86,19 +85,20 @@ def update_task_from_spawn_result(task_id: str, result: dict):
         status_code = result.get('status', 'unknown')
 
         if status_code == 'accepted':
-            task['status'] = 'in_progress'
-            task['subagent_session_key'] = result.get('childSessionKey')
-            task['run_id'] = result.get('runId')
+            fields = {
+                'status': 'in_progress',
+                'subagent_session_key': result.get('childSessionKey'),
+                'run_id': result.get('runId'),
+            }
         else:
             # rejected 或其他錯誤
-            task['status'] = 'failed'
-            task['error'] = f"Spawn rejected: {status_code}"
-
-        task['updated_at'] = datetime.now(timezone.utc).isoformat()
+            fields = {
+                'status': 'failed',
+                'error': f"Spawn rejected: {status_code}",
+            }
 
-        # 保存
-        with open(TASKS_JSON, 'w', encoding='utf-8') as f:
-            json.dump(tasks, f, indent=2, ensure_ascii=False)
+        # 保存（行級更新）
+        store.update(task_id, updated_at=datetime.now(timezone.utc).isoformat(), **fields)
 
         # 追蹤 API 調用
         error_message = None
@@ -6,6 +6,8 @@ This module provides automatic input file compression using:
 - Basic extraction for small files (< 30 KB)
 - QMD semantic search for large files (≥ 30 KB)
 - Automatic fallback to basic compression if QMD fails
+- Content-addressed cache (file hash + task query): retries and subtasks
+  with identical inputs skip compression entirely
 
 API COMPATIBLE with V1 - drop-in replacement with 10% better compression.
 
@@ -33,12 +35,19 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 # Import QMD Enhanced Compressor
 try:
-    from qmd_enhanced_compressor import QMDEnhancedCompressor
+    from qmd_enhanced_compressor import QMDEnhancedCompressor, is_cacheable
     QMD_AVAILABLE = True
 except ImportError:
     QMD_AVAILABLE = False
     print("⚠️  QMD Enhanced Compressor not available, using basic compression only")
 
+# Import compression cache
+try:
+    from compression_cache import get_cache
+    CACHE_AVAILABLE = True
+except ImportError:
+    CACHE_AVAILABLE = False
+
 
 def compress_task_inputs(task: Dict[str, Any], workspace: Path = None) -> Dict[str, str]:
     """
@@ -46,6 +55,8 @@ def compress_task_inputs(task: Dict[str, Any], workspace: Path = None) -> Dict[s
 
     Uses QMD semantic search for large files (≥ 30 KB) and basic extraction
     for small files. Automatically falls back to basic compression if QMD fails.
+    Results are cached by file content hash + task query; on a warm cache no
+    compressor is created and no qmd subprocess is started.
 
     Args:
         task: Task data dictionary with 'input_paths' field
@@ -65,11 +76,10 @@ def compress_task_inputs(task: Dict[str, Any], workspace: Path = None) -> Dict[s
     # Build task query for semantic search
     task_query = _build_task_query(task)
 
-    # Initialize compressor
-    if QMD_AVAILABLE:
-        compressor = QMDEnhancedCompressor()
-    else:
-        compressor = None
+    # Compressor is created lazily on the first cache miss
+    cache = get_cache() if CACHE_AVAILABLE else None
+    variant = 'auto' if QMD_AVAILABLE else 'basic'
+    compressor = None
 
     compressed_inputs = {}
     total_original = 0
@@ -93,14 +103,20 @@ def compress_task_inputs(task: Dict[str, Any], workspace: Path = None) -> Dict[s
         original_size = full_path.stat().st_size
         total_original += original_size
 
-        # Compress using QMD Enhanced or basic
-        if compressor:
-            result = compressor.compress_file(
-                str(full_path),
-                task_query=task_query
-            )
-        else:
-            result = _basic_compress(str(full_path))
+        # Look up cache, then compress using QMD Enhanced or basic
+        cache_key, result = cache.lookup(full_path, task_query, variant) if cache else (None, None)
+        cached = result is not None
+        if not cached:
+            if QMD_AVAILABLE:
+                compressor = compressor or QMDEnhancedCompressor()
+                result = compressor.compress_file(
+                    str(full_path),
+                    task_query=task_query
+                )
+            else:
+                result = _basic_compress(str(full_path))
+            if cache_key and (not QMD_AVAILABLE or is_cacheable(result)):
+                cache.put(cache_key, result)
 
         # Format as compressed text
         compressed_text = _format_compressed_content(result)
@@ -112,7 +128,7 @@ def compress_task_inputs(task: Dict[str, Any], workspace: Path = None) -> Dict[s
         # Print per-file stats
         compression_ratio = result.get('compression_ratio', 0)
         method = result.get('method', 'unknown')
-        method_icon = '🧠' if 'semantic' in method else '⚡'
+        method_icon = '♻️' if cached else '🧠' if 'semantic' in method else '⚡'
         print(f"  {method_icon} {Path(input_path).name}: {original_size//1024}KB → {compressed_size//1024}KB ({method}, 節省 {compression_ratio:.1f}%)")
 
     # Print summary
@@ -120,6 +136,12 @@ def compress_task_inputs(task: Dict[str, Any], workspace: Path = None) -> Dict[s
         compression_ratio = (1 - total_compressed / total_original) * 100
         print(f"✅ Total: {total_original//1024}KB → {total_compressed//1024}KB (節省 {compression_ratio:.1f}%)")
 
+    if cache:
+        try:
+            cache.flush()
+        except Exception as e:
+            print(f"⚠️  Failed to save compression cache index: {e}")
+
     return compressed_inputs
 
 
@@ -328,4 +350,5 @@ if __name__ == '__main__':
     print("  🧠 QMD semantic search for large files (≥ 30 KB)")
     print("  ⚡ Basic compression for small files (< 30 KB)")
     print("  🛡️ Automatic fallback if QMD fails")
+    print("  ♻️ Content-addressed cache for repeated inputs")
     print("  📊 96% compression (vs 87% in V1)")
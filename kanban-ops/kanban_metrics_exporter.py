@@ -9,17 +9,33 @@ OpenClaw Kanban Metrics Exporter
 - Token 消耗
 - 自動恢復統計
 - 假失敗檢測
+
+採集器在兩次抓取之間保存狀態：
+- tasks.json 只在文件版本（mtime / size / inode）變化時重新解析
+- auto-recovery 日誌從上次的偏移量繼續讀取（輪轉或截斷時從頭開始）
+- 計數器按任務記賬，只累加增量，重複解析不會重複計數
+- 輸出文本在數據變化時渲染一次並緩存，/metrics 直接返回緩存
 """
 
-import json
-import time
+import argparse
+import os
 import sys
 from pathlib import Path
 from datetime import datetime
 from http.server import HTTPServer, BaseHTTPRequestHandler
+from typing import Dict, List
 from urllib.parse import urlparse, parse_qs
 import threading
 
+sys.path.insert(0, str(Path(__file__).parent))
+from tasks_file import file_version, parse_tasks_payload, read_tasks
+
+# 默認配置
+METRICS_PORT = 9101
+TASKS_JSON_PATH = '/Users/charlie/.openclaw/workspace/kanban/tasks.json'
+AUTO_RECOVERY_LOG_PATH = '/Users/charlie/.openclaw/logs/auto_recovery.log'
+REFRESH_INTERVAL = 5  # 秒
+
 # ============================================================================
 # Prometheus Metrics
 # ============================================================================
@@ -212,108 +228,216 @@ auto_recovery_recovered_tasks = Gauge(
 )
 
 
+ALL_METRICS = [
+    tasks_total,
+    tasks_by_agent,
+    task_duration_minutes,
+    task_tokens_total,
+    false_failures_total,
+    auto_recoveries_total,
+    progressive_research_checkpoints,
+    progressive_research_searches,
+    auto_recovery_runs,
+    auto_recovery_recovered_tasks,
+]
+
+
 # ============================================================================
 # 數據採集
 # ============================================================================
 
-def collect_kanban_metrics(tasks_json_path: str):
-    """從 tasks.json 採集指標"""
-    try:
-        with open(tasks_json_path, 'r', encoding='utf-8') as f:
-            tasks = json.load(f)
-    except Exception as e:
-        print(f"Error reading tasks.json: {e}", file=sys.stderr)
-        return
+def _count(ledger: Dict[tuple, float], counter: Counter, task_id: str, value, **labels):
+    """
+    按任務記賬累加計數器
 
+    ledger 記錄每個 (指標, 任務, 標籤) 已計入的值，只累加超出的部分，
+    因此同一份數據重複採集不會重複計數，任務被歸檔後計數也不會下降。
+    """
+    if not isinstance(value, (int, float)):
+        return
+    key = (counter.name, task_id, tuple(sorted(labels.items())))
+    counted = ledger.get(key, 0)
+    if value > counted:
+        counter.inc(value - counted, **labels)
+        ledger[key] = value
+    elif key not in ledger:
+        # 值為 0 也建立時間序列
+        counter.inc(0, **labels)
+        ledger[key] = 0
+
+
+def collect_kanban_metrics(tasks: List[Dict], ledger: Dict[tuple, float]):
+    """從任務列表採集指標（單次遍歷）"""
     # 重置 gauge 指標
     tasks_by_agent.metrics = {}
     progressive_research_checkpoints.metrics = {}
-    auto_recovery_recovered_tasks.metrics = {}
 
     for task in tasks:
+        if not isinstance(task, dict):
+            continue
         status = task.get('status', 'unknown')
         agent = task.get('agent', 'unknown')
         task_id = task.get('id', 'unknown')
 
-        # 任務計數
-        tasks_total.inc(status=status)
-        tasks_by_agent.set(
-            tasks_by_agent.metrics.get((agent, status), 0) + 1,
-            agent=agent,
-            status=status
-        )
+        # 任務計數（每個任務在每個狀態只計一次）
+        _count(ledger, tasks_total, task_id, 1, status=status)
+        tasks_by_agent.inc(agent=agent, status=status)
 
         # 如果已完成，記錄時長和 token
         if status == 'completed':
-            time_tracking = task.get('time_tracking', {})
+            time_tracking = task.get('time_tracking') or {}
 
-            # 時長
-            if 'actual_time_minutes' in time_tracking:
-                duration = time_tracking.get('actual_time_minutes')
-                if duration is not None and isinstance(duration, (int, float)):
-                    task_duration_minutes.observe(
-                        duration,
-                        agent=agent
-                    )
+            # 時長（每個任務只觀測一次）
+            duration = time_tracking.get('actual_time_minutes')
+            duration_key = (task_duration_minutes.name, task_id)
+            if isinstance(duration, (int, float)) and duration_key not in ledger:
+                task_duration_minutes.observe(duration, agent=agent)
+                ledger[duration_key] = duration
 
             # Token
-            if 'token_usage' in task:
-                token_usage = task['token_usage']
-                task_tokens_total.inc(
-                    token_usage.get('input', 0),
-                    agent=agent,
-                    direction='input'
-                )
-                task_tokens_total.inc(
-                    token_usage.get('output', 0),
-                    agent=agent,
-                    direction='output'
-                )
+            token_usage = task.get('token_usage')
+            if isinstance(token_usage, dict):
+                _count(ledger, task_tokens_total, task_id, token_usage.get('input', 0),
+                       agent=agent, direction='input')
+                _count(ledger, task_tokens_total, task_id, token_usage.get('output', 0),
+                       agent=agent, direction='output')
 
             # 自動恢復
             if time_tracking.get('auto_recovered'):
                 confidence = time_tracking.get('recovery_confidence', 'unknown')
-                auto_recoveries_total.inc(confidence=confidence)
+                _count(ledger, auto_recoveries_total, task_id, 1, confidence=confidence)
 
             # 假失敗檢測
             if time_tracking.get('false_failure_detected'):
-                false_failures_total.inc()
+                _count(ledger, false_failures_total, task_id, 1)
 
         # Progressive Research 檢查點統計
-        if 'progressive_research' in task:
-            pr_data = task['progressive_research']
+        pr_data = task.get('progressive_research')
+        if isinstance(pr_data, dict):
             if 'checkpoint_count' in pr_data:
                 progressive_research_checkpoints.set(
                     pr_data['checkpoint_count'],
                     task_id=task_id
                 )
             if 'search_count' in pr_data:
-                progressive_research_searches.inc(
-                    pr_data['search_count'],
-                    task_id=task_id,
-                    status='completed'
-                )
-
-
-def collect_auto_recovery_metrics(log_path: str):
-    """從 auto-recovery 日誌採集指標"""
-    try:
-        with open(log_path, 'r') as f:
-            log_content = f.read()
-
-        # 簡單統計：計算成功運行的次數
-        success_count = log_content.count('✅ Auto-recovery completed')
-        error_count = log_content.count('❌ Auto-recovery failed')
-
-        auto_recovery_runs.inc(success_count, result='success')
-        auto_recovery_runs.inc(error_count, result='error')
-
-        # 統計恢復的任務數（需要解析日誌）
-        recovered_count = log_content.count('Recovered task:')
-        auto_recovery_recovered_tasks.set(recovered_count)
-
-    except Exception as e:
-        print(f"Error reading auto-recovery log: {e}", file=sys.stderr)
+                _count(ledger, progressive_research_searches, task_id, pr_data['search_count'],
+                       task_id=task_id, status='completed')
+
+
+def collect_auto_recovery_metrics(text: str):
+    """從新增的 auto-recovery 日誌行採集指標"""
+    # 簡單統計：計算成功運行的次數
+    auto_recovery_runs.inc(text.count('✅ Auto-recovery completed'), result='success')
+    auto_recovery_runs.inc(text.count('❌ Auto-recovery failed'), result='error')
+
+    # 統計恢復的任務數
+    auto_recovery_recovered_tasks.inc(text.count('Recovered task:'))
+
+
+def render_metrics() -> str:
+    """生成 Prometheus 格式輸出"""
+    output = []
+    output.append('# OpenClaw Kanban Metrics Exporter')
+    output.append(f'# Generated at: {datetime.now().isoformat()}')
+    output.append('')
+
+    for metric in ALL_METRICS:
+        output.append(metric.format_prometheus())
+        output.append('')
+
+    return '\n'.join(output)
+
+
+class MetricsCollector:
+    """在兩次抓取之間保存狀態的採集器"""
+
+    def __init__(self, tasks_json_path: str, log_path: str):
+        self.tasks_json_path = Path(tasks_json_path)
+        self.log_path = Path(log_path)
+        self.body = b''
+
+        self._ledger: Dict[tuple, float] = {}
+        self._tasks_version = None
+        self._log_inode = None
+        self._log_offset = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def _collect_tasks(self) -> bool:
+        """tasks.json 版本變化時重新計算"""
+        if file_version(self.tasks_json_path) == self._tasks_version:
+            return False
+        try:
+            payload, version = read_tasks(self.tasks_json_path)
+        except (OSError, ValueError) as e:
+            print(f"Error reading tasks.json: {e}", file=sys.stderr)
+            return False
+
+        self._tasks_version = version
+        tasks, _ = parse_tasks_payload(payload)
+        collect_kanban_metrics(tasks, self._ledger)
+        return True
+
+    def _collect_log(self) -> bool:
+        """從上次的偏移量讀取新增的完整日誌行"""
+        try:
+            st = os.stat(self.log_path)
+        except FileNotFoundError:
+            return False
+
+        if st.st_ino != self._log_inode or st.st_size < self._log_offset:
+            # 日誌輪轉或被截斷，從頭讀取新文件
+            self._log_inode = st.st_ino
+            self._log_offset = 0
+        if st.st_size == self._log_offset:
+            return False
+
+        try:
+            with open(self.log_path, 'rb') as f:
+                f.seek(self._log_offset)
+                chunk = f.read(st.st_size - self._log_offset)
+        except OSError as e:
+            print(f"Error reading auto-recovery log: {e}", file=sys.stderr)
+            return False
+
+        # 最後一行可能還沒寫完，留到下次
+        end = chunk.rfind(b'\n') + 1
+        if end == 0:
+            return False
+        self._log_offset += end
+        collect_auto_recovery_metrics(chunk[:end].decode('utf-8', errors='replace'))
+        return True
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        採集變化並在需要時重新渲染輸出
+
+        Returns:
+            數據是否有變化
+        """
+        with self._lock:
+            changed = self._collect_tasks()
+            changed = self._collect_log() or changed
+            if changed or force or not self.body:
+                self.body = render_metrics().encode('utf-8')
+            return changed
+
+    def run(self, interval: float = REFRESH_INTERVAL):
+        """後台定期採集"""
+        while not self._stop.wait(interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error collecting metrics: {e}", file=sys.stderr)
+
+    def start(self, interval: float = REFRESH_INTERVAL) -> threading.Thread:
+        self.refresh(force=True)
+        thread = threading.Thread(target=self.run, args=(interval,), daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self._stop.set()
 
 
 # ============================================================================
@@ -321,45 +445,20 @@ def collect_auto_recovery_metrics(log_path: str):
 # ============================================================================
 
 class MetricsHandler(BaseHTTPRequestHandler):
-    """處理 /metrics 請求"""
+    """處理 /metrics 請求（返回緩存的輸出，不讀取任何文件）"""
 
     def do_GET(self):
         parsed_path = urlparse(self.path)
 
         if parsed_path.path == '/metrics':
-            # 採集最新指標
-            collect_kanban_metrics(TASKS_JSON_PATH)
-            collect_auto_recovery_metrics(AUTO_RECOVERY_LOG_PATH)
-
-            # 生成 Prometheus 格式輸出
-            output = []
-            output.append('# OpenClaw Kanban Metrics Exporter')
-            output.append(f'# Generated at: {datetime.now().isoformat()}')
-            output.append('')
-
-            # 所有指標
-            metrics = [
-                tasks_total,
-                tasks_by_agent,
-                task_duration_minutes,
-                task_tokens_total,
-                false_failures_total,
-                auto_recoveries_total,
-                progressive_research_checkpoints,
-                progressive_research_searches,
-                auto_recovery_runs,
-                auto_recovery_recovered_tasks,
-            ]
-
-            for metric in metrics:
-                output.append(metric.format_prometheus())
-                output.append('')
+            body = self.server.collector.body
 
             # 發送響應
             self.send_response(200)
             self.send_header('Content-Type', 'text/plain; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
             self.end_headers()
-            self.wfile.write('\n'.join(output).encode('utf-8'))
+            self.wfile.write(body)
         else:
             self.send_response(404)
             self.end_headers()
@@ -373,27 +472,36 @@ class MetricsHandler(BaseHTTPRequestHandler):
 # 主程序
 # ============================================================================
 
-def run_metrics_server(port: int):
+def run_metrics_server(port: int, collector: MetricsCollector, interval: float = REFRESH_INTERVAL):
     """運行指標 HTTP 服務器"""
+    collector.start(interval)
     server_address = ('', port)
     httpd = HTTPServer(server_address, MetricsHandler)
+    httpd.collector = collector
     print(f"✅ OpenClaw Metrics Exporter started on port {port}", flush=True)
     print(f"   Metrics endpoint: http://localhost:{port}/metrics", flush=True)
     httpd.serve_forever()
 
 
 if __name__ == '__main__':
-    # 配置
-    METRICS_PORT = 9101
-    TASKS_JSON_PATH = '/Users/charlie/.openclaw/workspace/kanban/tasks.json'
-    AUTO_RECOVERY_LOG_PATH = '/Users/charlie/.openclaw/logs/auto_recovery.log'
+    parser = argparse.ArgumentParser(description='OpenClaw Kanban Metrics Exporter')
+    parser.add_argument('--port', type=int, default=METRICS_PORT, help='HTTP 端口')
+    parser.add_argument('--tasks-json', default=TASKS_JSON_PATH, help='tasks.json 路徑')
+    parser.add_argument('--recovery-log', default=AUTO_RECOVERY_LOG_PATH, help='auto-recovery 日誌路徑')
+    parser.add_argument('--interval', type=float, default=REFRESH_INTERVAL, help='採集間隔（秒）')
+    args = parser.parse_args()
 
     print("=" * 60)
     print("🔬 OpenClaw Kanban Metrics Exporter")
     print("=" * 60)
-    print(f"Port: {METRICS_PORT}")
-    print(f"Tasks JSON: {TASKS_JSON_PATH}")
-    print(f"Auto-Recovery Log: {AUTO_RECOVERY_LOG_PATH}")
+    print(f"Port: {args.port}")
+    print(f"Tasks JSON: {args.tasks_json}")
+    print(f"Auto-Recovery Log: {args.recovery_log}")
+    print(f"Refresh interval: {args.interval}s")
     print("=" * 60)
 
-    run_metrics_server(METRICS_PORT)
+    run_metrics_server(
+        args.port,
+        MetricsCollector(args.tasks_json, args.recovery_log),
+        args.interval
+    )
@@ -17,6 +17,8 @@ import sys
 from pathlib import Path
 from datetime import datetime
 
+from task_store import get_store
+
 # 路徑配置
 WORKSPACE = Path.home() / ".openclaw" / "workspace"
 QUEUE_DIR = WORKSPACE / "kanban-ops" / "task_queue"
@@ -61,44 +63,29 @@ def list_queue():
 
 
 def load_tasks():
-    """載入 tasks.json"""
-    if not TASKS_JSON.exists():
-        print(f"⚠️ tasks.json 不存在：{TASKS_JSON}")
-        return []
-
+    """載入所有任務（經 TaskStore）"""
     try:
-        with open(TASKS_JSON, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return get_store(TASKS_JSON).all()
     except Exception as e:
-        print(f"⚠️ 載入 tasks.json 失敗：{e}")
+        print(f"⚠️ 載入任務失敗：{e}")
         return []
 
 
 def save_tasks(tasks):
-    """保存任務到 tasks.json"""
+    """以完整列表覆蓋任務（經 TaskStore）"""
     try:
-        with open(TASKS_JSON, 'w', encoding='utf-8') as f:
-            json.dump(tasks, f, indent=2, ensure_ascii=False)
+        get_store(TASKS_JSON).replace_all(tasks)
         return True
     except Exception as e:
-        print(f"⚠️ 保存 tasks.json 失敗：{e}")
+        print(f"⚠️ 保存任務失敗：{e}")
         return False
 
 
 def update_task_status(task_id, status):
-    """更新任務狀態"""
-    tasks = load_tasks()
-    task_found = False
-
-    for task in tasks:
-        if task.get('id') == task_id:
-            task['status'] = status
-            task['updated_at'] = datetime.now().isoformat()
-            task_found = True
-            break
+    """更新任務狀態（行級更新）"""
+    task = get_store(TASKS_JSON).update(task_id, status=status, updated_at=datetime.now().isoformat())
 
-    if task_found:
-        save_tasks(tasks)
+    if task is not None:
         print(f"✅ 任務 {task_id} 狀態已更新為 {status}")
     else:
         print(f"⚠️ 未找到任務 {task_id}")
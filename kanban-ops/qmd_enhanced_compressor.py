@@ -6,6 +6,7 @@ QMD Enhanced Input Compressor
 - 小文件（< 30 KB）：基礎壓縮（快速）
 - 大文件（>= 30 KB）：QMD 語意搜索（更精準）
 - QMD 失敗時自動回退到基礎壓縮
+- 可選的內容尋址緩存：相同文件內容 + 相同任務查詢直接返回上次的結果
 """
 
 import subprocess
@@ -14,6 +15,22 @@ import re
 from pathlib import Path
 from typing import Dict, List, Optional
 
+try:
+    from compression_cache import CompressionCache, get_cache
+    CACHE_AVAILABLE = True
+except ImportError:
+    CACHE_AVAILABLE = False
+
+
+def is_cacheable(result: Dict) -> bool:
+    """
+    壓縮結果是否可寫入緩存
+
+    錯誤結果和 QMD 失敗後回退的基礎壓縮結果（fallback 標記）不緩存，
+    否則同一文件 + 查詢之後會一直命中回退結果，不再重試語意搜索。
+    """
+    return 'error' not in result and not result.get('fallback')
+
 
 class QMDEnhancedCompressor:
     """智能輸入壓縮器 - 整合基礎壓縮和 QMD 語意搜索"""
@@ -21,13 +38,20 @@ class QMDEnhancedCompressor:
     def __init__(
         self,
         qmd_path: str = "~/.qmd/qmd",
-        semantic_threshold: int = 30 * 1024  # 30 KB
+        semantic_threshold: int = 30 * 1024,  # 30 KB
+        cache: Optional['CompressionCache'] = None
     ):
         self.qmd_path = Path(qmd_path).expanduser()
         self.semantic_threshold = semantic_threshold
+        self.cache = cache
+        self._qmd_available = None
 
-        # 檢查 QMD 是否可用
-        self.qmd_available = self._check_qmd_available()
+    @property
+    def qmd_available(self) -> bool:
+        """QMD 是否可用（第一次需要時才檢查，緩存命中時不啟動子進程）"""
+        if self._qmd_available is None:
+            self._qmd_available = self._check_qmd_available()
+        return self._qmd_available
 
     def _check_qmd_available(self) -> bool:
         """檢查 QMD 是否可用"""
@@ -67,6 +91,23 @@ class QMDEnhancedCompressor:
                 'file': str(path)
             }
 
+        # 內容尋址緩存
+        cache_key = None
+        if self.cache is not None:
+            cache_key, cached = self.cache.lookup(path, task_query, force_method or 'auto')
+            if cached is not None:
+                print(f"♻️  Using cached compression for {path.name}")
+                return cached
+
+        result = self._compress_uncached(path, task_query, force_method)
+
+        if cache_key is not None and is_cacheable(result):
+            self.cache.put(cache_key, result)
+        return result
+
+    def _compress_uncached(self, path: Path, task_query: str, force_method: Optional[str]) -> Dict:
+        """選擇壓縮方法並執行"""
+        file_path = str(path)
         file_size = path.stat().st_size
 
         # 決定使用哪種壓縮方法
@@ -120,14 +161,14 @@ class QMDEnhancedCompressor:
 
             if result.returncode != 0:
                 print(f"⚠️  QMD search failed, falling back to basic compression")
-                return self._basic_compress(file_path)
+                return self._fallback_compress(file_path)
 
             # 解析 QMD JSON 結果
             try:
                 qmd_results = json.loads(result.stdout)
             except json.JSONDecodeError:
                 print(f"⚠️  QMD returned invalid JSON, falling back to basic compression")
-                return self._basic_compress(file_path)
+                return self._fallback_compress(file_path)
 
             # 提取相關內容
             relevant_content = self._extract_relevant_content(
@@ -138,7 +179,7 @@ class QMDEnhancedCompressor:
 
             if not relevant_content:
                 print(f"⚠️  No relevant content found, falling back to basic compression")
-                return self._basic_compress(file_path)
+                return self._fallback_compress(file_path)
 
             print(f"✅ Semantic compression: found {len(relevant_content)} relevant sections")
 
@@ -154,10 +195,10 @@ class QMDEnhancedCompressor:
 
         except subprocess.TimeoutExpired:
             print(f"⚠️  QMD search timeout, falling back to basic compression")
-            return self._basic_compress(file_path)
+            return self._fallback_compress(file_path)
         except Exception as e:
             print(f"⚠️  QMD search error: {e}, falling back to basic compression")
-            return self._basic_compress(file_path)
+            return self._fallback_compress(file_path)
 
     def _extract_relevant_content(
         self,
@@ -265,6 +306,12 @@ class QMDEnhancedCompressor:
         except Exception as e:
             return f"Error reading file: {e}"
 
+    def _fallback_compress(self, file_path: str) -> Dict:
+        """語意搜索失敗時的基礎壓縮（帶 fallback 標記，見 is_cacheable）"""
+        result = dict(self._basic_compress(file_path))
+        result['fallback'] = True
+        return result
+
     def _basic_compress(self, file_path: str) -> Dict:
         """基礎壓縮（提取關鍵信息）"""
 
@@ -361,8 +408,8 @@ def compress_task_inputs(
     # 構建任務查詢（用於語意搜索）
     task_query = f"{task.get('title', '')} {task.get('notes', '')} {task.get('description', '')}"
 
-    # 創建壓縮器
-    compressor = QMDEnhancedCompressor()
+    # 創建壓縮器（帶緩存）
+    compressor = QMDEnhancedCompressor(cache=get_cache() if CACHE_AVAILABLE else None)
 
     # 壓縮每個輸入文件
     results = []
@@ -406,6 +453,9 @@ def compress_task_inputs(
         saved = (1 - total_compressed / total_original) * 100
         print(f"\n✅ Total: {total_original//1024}KB → {total_compressed//1024}KB (節省 {saved:.1f}%)")
 
+    if compressor.cache is not None:
+        compressor.cache.flush()
+
     return {
         'task_id': task_id,
         'task_title': task.get('title', ''),
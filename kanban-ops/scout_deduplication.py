@@ -4,13 +4,16 @@ Scout 去重檢查器
 
 在 Scout 創建任務前，檢查是否已存在相同或相似任務。
 避免創建重複的任務。
+
+查詢經 dedup_index 的持久化索引（標題 / arXiv ID 哈希表 + MinHash LSH），
+不再對每個候選主題掃描全部任務。
 """
 
 import json
-import re
 from pathlib import Path
 from typing import List, Dict, Optional
-from difflib import SequenceMatcher
+
+from dedup_index import DedupIndex, extract_arxiv_id, get_dedup_index, title_similarity
 
 # 配置
 WORKSPACE = Path.home() / ".openclaw" / "workspace"
@@ -21,32 +24,6 @@ QDM_INDEX = WORKSPACE / "scout-ops" / "QDM_INDEX.json"
 TITLE_SIMILARITY_THRESHOLD = 0.85  # 85% 相似度
 
 
-def load_tasks() -> List[Dict]:
-    """載入所有任務"""
-    if not TASKS_FILE.exists():
-        return []
-
-    with open(TASKS_FILE, 'r', encoding='utf-8') as f:
-        return json.load(f)
-
-
-def extract_arxiv_id(title: str) -> Optional[str]:
-    """從標題中提取 arXiv ID（如果存在）"""
-    # 常見格式：arXiv:1234.5678, arXiv ID: 1234.5678, etc.
-    patterns = [
-        r'arXiv:\s*(\d{4}\.\d{4,5})',
-        r'arXiv\s+ID:\s*(\d{4}\.\d{4,5})',
-        r'arXiv\s*(\d{4}\.\d{4,5})',
-    ]
-
-    for pattern in patterns:
-        match = re.search(pattern, title, re.IGNORECASE)
-        if match:
-            return match.group(1)
-
-    return None
-
-
 def load_qdm_index() -> Dict[str, List[str]]:
     """載入 QDM 索引"""
     if not QDM_INDEX.exists():
@@ -58,62 +35,25 @@ def load_qdm_index() -> Dict[str, List[str]]:
 
 def calculate_similarity(str1: str, str2: str) -> float:
     """計算兩個字符串的相似度（0.0 - 1.0）"""
-    return SequenceMatcher(None, str1.lower(), str2.lower()).ratio()
-
-
-def check_exact_match(title: str, tasks: List[Dict]) -> Optional[Dict]:
-    """檢查是否有完全相同的標題"""
-    for task in tasks:
-        if task.get('title') == title:
-            return task
-    return None
-
-
-def check_arxiv_id(arxiv_id: str, tasks: List[Dict], qdm_index: Dict) -> Optional[Dict]:
-    """檢查 arXiv ID 是否已存在"""
-    # 檢查 tasks.json
-    for task in tasks:
-        task_arxiv_id = extract_arxiv_id(task.get('title', ''))
-        if task_arxiv_id and task_arxiv_id == arxiv_id:
-            return task
-
-    # 檢查 QDM 索引
-    if 'arxiv' in qdm_index:
-        for topic in qdm_index['arxiv']:
-            topic_arxiv_id = extract_arxiv_id(topic.get('title', ''))
-            if topic_arxiv_id and topic_arxiv_id == arxiv_id:
-                return {'type': 'qdm', 'topic': topic}
-
-    return None
-
-
-def check_similar_title(title: str, tasks: List[Dict], threshold: float) -> Optional[Dict]:
-    """檢查是否有相似的標題"""
-    for task in tasks:
-        similarity = calculate_similarity(title, task.get('title', ''))
-        if similarity >= threshold:
-            return {
-                'task': task,
-                'similarity': similarity
-            }
-    return None
+    return title_similarity(str1, str2)
 
 
-def check_completed_task(title: str, tasks: List[Dict]) -> Optional[Dict]:
-    """檢查是否有相同標題的已完成任務"""
-    for task in tasks:
-        if task.get('title') == title and task.get('status') == 'completed':
-            return task
-    return None
+def load_dedup_index() -> DedupIndex:
+    """取得與 TaskStore、QDM 索引同步後的去重索引"""
+    index = get_dedup_index()
+    index.sync_store(TASKS_FILE)
+    index.sync_qdm(load_qdm_index())
+    return index
 
 
-def should_create_task(title: str, verbose: bool = True) -> Dict:
+def should_create_task(title: str, verbose: bool = True, index: Optional[DedupIndex] = None) -> Dict:
     """
     判斷是否應該創建任務（考慮所有去重檢查）
 
     Args:
         title: 任務標題
         verbose: 是否輸出詳細日誌
+        index: 已同步的去重索引（批量檢查時共用，默認自動載入）
 
     Returns:
         dict: 檢查結果
@@ -124,11 +64,11 @@ def should_create_task(title: str, verbose: bool = True) -> Dict:
     """
 
     # 載入數據
-    tasks = load_tasks()
-    qdm_index = load_qdm_index()
+    if index is None:
+        index = load_dedup_index()
 
     # 檢查 1: 完全相同的標題
-    exact_match = check_exact_match(title, tasks)
+    exact_match = index.find_exact(title)
     if exact_match:
         reason = f"標題完全匹配（任務 ID: {exact_match['id']}）"
         if verbose:
@@ -140,7 +80,7 @@ def should_create_task(title: str, verbose: bool = True) -> Dict:
         }
 
     # 檢查 2: 相同標題的已完成任務
-    completed_match = check_completed_task(title, tasks)
+    completed_match = index.find_exact(title, status='completed')
     if completed_match:
         reason = f"相同標題的任務已完成（任務 ID: {completed_match['id']}）"
         if verbose:
@@ -154,7 +94,7 @@ def should_create_task(title: str, verbose: bool = True) -> Dict:
     # 檢查 3: arXiv ID 去重
     arxiv_id = extract_arxiv_id(title)
     if arxiv_id:
-        arxiv_match = check_arxiv_id(arxiv_id, tasks, qdm_index)
+        arxiv_match = index.find_arxiv(arxiv_id)
         if arxiv_match:
             if 'task' in arxiv_match:
                 reason = f"arXiv ID {arxiv_id} 已存在（任務 ID: {arxiv_match['task']['id']}）"
@@ -170,7 +110,7 @@ def should_create_task(title: str, verbose: bool = True) -> Dict:
             }
 
     # 檢查 4: 標題相似度
-    similar_match = check_similar_title(title, tasks, TITLE_SIMILARITY_THRESHOLD)
+    similar_match = index.find_similar(title, TITLE_SIMILARITY_THRESHOLD)
     if similar_match:
         reason = f"標題相似度 {similar_match['similarity']:.1%} >= {TITLE_SIMILARITY_THRESHOLD:.0%}"
         if verbose:
@@ -206,10 +146,11 @@ def batch_check_topics(topics: List[Dict], verbose: bool = True) -> List[Dict]:
         list: 檢查結果列表
     """
     results = []
+    index = load_dedup_index()
 
     for topic in topics:
         title = topic.get('title', '')
-        result = should_create_task(title, verbose)
+        result = should_create_task(title, verbose, index=index)
         result['topic'] = topic
         results.append(result)
 
@@ -30,6 +30,16 @@ from pathlib import Path
 from datetime import datetime, timezone
 from typing import List, Dict, Tuple
 
+from task_store import get_store
+from task_estimator import get_estimator, static_token_estimate
+
+# 背壓控制器建議的並發上限（可選）
+try:
+    from backpressure import get_max_concurrent
+    BACKPRESSURE_AVAILABLE = True
+except ImportError:
+    BACKPRESSURE_AVAILABLE = False
+
 # 路徑配置
 WORKSPACE = Path.home() / ".openclaw" / "workspace"
 KANBAN_WORKSPACE = Path.home() / ".openclaw" / "workspace-automation" / "kanban"
@@ -52,6 +62,9 @@ SPAWN_CONFIG = {
     
     # 並發配置
     'MAX_CONCURRENT_TASKS': 5,           # 每組最大並發任務數
+
+    # 分組配置
+    'TOKEN_PACKING_UNIT': 1_000,         # 背包容量的離散單位（tokens）
 }
 
 
@@ -59,49 +72,7 @@ SPAWN_CONFIG = {
 # Token 預估數據（基於歷史統計）
 # ============================================================================
 
-# 每個代理的 Token 使用範圍（輸入 + 輸出）
-TOKEN_ESTIMATES = {
-    'research': {
-        'min': 80_000,   # 最小 Token 使用
-        'max': 150_000,  # 最大 Token 使用
-        'avg': 115_000,  # 平均 Token 使用
-    },
-    'analyst': {
-        'min': 50_000,
-        'max': 100_000,
-        'avg': 75_000,
-    },
-    'architect': {
-        'min': 60_000,
-        'max': 120_000,
-        'avg': 90_000,
-    },
-    'developer': {
-        'min': 40_000,
-        'max': 80_000,
-        'avg': 60_000,
-    },
-    'automation': {
-        'min': 20_000,
-        'max': 50_000,
-        'avg': 35_000,
-    },
-    'creative': {
-        'min': 40_000,
-        'max': 90_000,
-        'avg': 65_000,
-    },
-    'mentors': {
-        'min': 50_000,
-        'max': 100_000,
-        'avg': 75_000,
-    },
-    'unknown': {
-        'min': 50_000,
-        'max': 100_000,
-        'avg': 75_000,
-    },
-}
+# 每個代理的 Token 使用範圍（TOKEN_ESTIMATES）已移到 task_estimator，作為學習預估器的先驗
 
 
 # ============================================================================
@@ -120,17 +91,11 @@ def log(level: str, message: str):
 # ============================================================================
 
 def load_tasks() -> Dict:
-    """載入 tasks.json"""
-    if not TASKS_JSON.exists():
-        log("ERROR", f"tasks.json 不存在：{TASKS_JSON}")
-        return {}
-
+    """載入所有任務（經 TaskStore），以 ID 為鍵"""
     try:
-        with open(TASKS_JSON, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            return {t['id']: t for t in data.get('tasks', [])}
+        return {t['id']: t for t in get_store(TASKS_JSON).all()}
     except Exception as e:
-        log("ERROR", f"載入 tasks.json 失敗：{e}")
+        log("ERROR", f"載入任務失敗：{e}")
         return {}
 
 
@@ -162,57 +127,23 @@ def load_queue_tasks() -> List[Dict]:
 def estimate_task_tokens(task: Dict) -> Dict[str, int]:
     """
     預估任務的 Token 使用
-    
-    考慮因素：
-    1. 代理類型
-    2. 任務複雜度（time_tracking.complexity_level）
-    3. 任務描述長度（task 字段長度）
-    
+
+    由 task_estimator 基於已完成任務的歷史數據給出分位數預估（代理類型、複雜度、
+    輸入文件大小、描述長度）；沒有歷史數據時等同靜態預估，預估器不可用時退回靜態預估。
+
     Returns:
         {
-            'min': 最小 Token 使用,
-            'max': 最大 Token 使用,
-            'avg': 平均 Token 使用,
+            'min': p10 Token 使用,
+            'max': p90 Token 使用（分組時作為容量約束）,
+            'avg': p50 Token 使用,
             'confidence': 置信度 (0-1)
         }
     """
-    agent = task.get('agentId', task.get('agent', 'unknown'))
-    complexity = task.get('complexity', task.get('time_tracking', {}).get('complexity_level', 1))
-    task_text = task.get('task', '')
-    
-    # 獲取基礎預估
-    base_estimate = TOKEN_ESTIMATES.get(agent, TOKEN_ESTIMATES['unknown'])
-    
-    # 根據複雜度調整
-    # complexity_level: 1 (簡單) - 5 (非常複雜)
-    complexity_multiplier = 1.0 + (complexity - 1) * 0.25  # 1.0x - 2.0x
-    
-    # 根據任務描述長度調整
-    text_length = len(task_text)
-    text_multiplier = 1.0
-    if text_length > 5000:
-        text_multiplier = 1.2
-    elif text_length > 10000:
-        text_multiplier = 1.4
-    
-    # 計算調整後的預估
-    min_tokens = int(base_estimate['min'] * complexity_multiplier * text_multiplier)
-    max_tokens = int(base_estimate['max'] * complexity_multiplier * text_multiplier)
-    avg_tokens = (min_tokens + max_tokens) // 2
-    
-    # 置信度（基於可用信息）
-    confidence = 0.7  # 基礎置信度
-    if 'time_tracking' in task and 'complexity_level' in task['time_tracking']:
-        confidence += 0.1
-    if text_length > 1000:
-        confidence += 0.1
-    
-    return {
-        'min': min_tokens,
-        'max': max_tokens,
-        'avg': avg_tokens,
-        'confidence': min(confidence, 1.0)
-    }
+    try:
+        return get_estimator().estimate_tokens(task)
+    except Exception as e:
+        log("WARNING", f"學習預估失敗，使用靜態預估：{e}")
+        return static_token_estimate(task)
 
 
 def print_token_estimates(tasks: List[Dict]):
@@ -248,6 +179,26 @@ def print_token_estimates(tasks: List[Dict]):
 # 任務分組
 # ============================================================================
 
+def pack_batch(weights: List[int], capacity: int, max_items: int) -> List[int]:
+    """
+    0/1 背包：在容量和件數限制下選出重量之和最大的一組
+
+    狀態為 (件數, 總重量)，數量不超過 max_items × capacity
+
+    Returns:
+        選中的下標（按原順序）
+    """
+    best = {(0, 0): ()}
+    for index, weight in enumerate(weights):
+        for (count, total), chosen in list(best.items()):
+            state = (count + 1, total + weight)
+            if count < max_items and state[1] <= capacity and state not in best:
+                best[state] = chosen + (index,)
+    # 重量最大；相同時件數少、排在前面的優先
+    _, chosen = max(best.items(), key=lambda kv: (kv[0][1], -kv[0][0], [-i for i in kv[1]]))
+    return list(chosen)
+
+
 def group_tasks_by_token_limit(
     tasks: List[Dict],
     token_limit: int = None,
@@ -257,14 +208,14 @@ def group_tasks_by_token_limit(
     按 Token 限制將任務分組
     
     策略：
-    1. 按預估 Token 從小到大排序
-    2. 貪心算法：盡量填滿每組，但不超過限制
-    3. 每組最多 max_concurrent 個任務
+    1. 每個任務取 p90 預估 Token 作為重量
+    2. 逐組求解 0/1 背包：在 Token 限制內選出 p90 之和最大的任務
+    3. 每組最多 max_concurrent 個任務；單個超限的任務單獨成組
     
     Args:
         tasks: 任務列表
         token_limit: 每組 Token 限制（預設從配置讀取）
-        max_concurrent: 每組最大並發數（預設從配置讀取）
+        max_concurrent: 每組最大並發數（預設取背壓控制器建議值，不可用時從配置讀取）
     
     Returns:
         分組後的任務列表 [[task1, task2], [task3, task4, task5], ...]
@@ -274,6 +225,11 @@ def group_tasks_by_token_limit(
     
     if max_concurrent is None:
         max_concurrent = SPAWN_CONFIG['MAX_CONCURRENT_TASKS']
+        if BACKPRESSURE_AVAILABLE:
+            try:
+                max_concurrent = get_max_concurrent()
+            except Exception as e:
+                log("WARNING", f"讀取背壓建議並發失敗，使用配置值：{e}")
     
     # 應用安全係數
     effective_limit = int(token_limit * SPAWN_CONFIG['TOKEN_SAFETY_MARGIN'])
@@ -281,64 +237,44 @@ def group_tasks_by_token_limit(
     log("INFO", f"分組配置：Token 限制 {effective_limit:,} ({token_limit:,} * {SPAWN_CONFIG['TOKEN_SAFETY_MARGIN']})")
     log("INFO", f"           最大並發 {max_concurrent} 個任務/組")
     
-    # 按預估 Token 排序（小到大）
-    tasks_with_estimate = []
+    # 每個任務只預估一次，以 p90 作為重量
+    unit = SPAWN_CONFIG['TOKEN_PACKING_UNIT']
+    capacity = effective_limit // unit
+    items = []
     for task in tasks:
         estimate = estimate_task_tokens(task)
-        tasks_with_estimate.append({
-            'task': task,
-            'estimate': estimate
-        })
-    
-    tasks_with_estimate.sort(key=lambda x: x['estimate']['max'])
-    
-    # 貪心分組
+        items.append((task, estimate, -(-estimate['max'] // unit)))
+
     groups = []
-    current_group = []
-    current_tokens = 0
-    task_count = 0
-    
-    for item in tasks_with_estimate:
-        task = item['task']
-        estimate = item['estimate']
-        max_tokens = estimate['max']
-        
-        # 檢查是否可以加入當前組
-        can_add = (
-            task_count < max_concurrent and
-            current_tokens + max_tokens <= effective_limit
-        )
-        
-        if can_add:
-            # 加入當前組
-            current_group.append(task)
-            current_tokens += max_tokens
-            task_count += 1
-        else:
-            # 開始新組
-            if current_group:
-                groups.append(current_group)
-            current_group = [task]
-            current_tokens = max_tokens
-            task_count = 1
-    
-    # 添加最後一組
-    if current_group:
-        groups.append(current_group)
-    
+    remaining = list(range(len(items)))
+    while remaining:
+        # 單個任務已超過容量：單獨成組
+        oversized = [i for i in remaining if items[i][2] > capacity]
+        if oversized:
+            groups.append([items[oversized[0]][0]])
+            remaining.remove(oversized[0])
+            continue
+
+        chosen = pack_batch([items[i][2] for i in remaining], capacity, max_concurrent)
+        groups.append([items[remaining[k]][0] for k in chosen])
+        chosen_set = set(chosen)
+        remaining = [i for k, i in enumerate(remaining) if k not in chosen_set]
+
     # 打印分組結果
     log("INFO", "=" * 60)
     log("INFO", f"分組結果：{len(groups)} 組")
     log("INFO", "=" * 60)
     
+    estimates = {id(task): estimate for task, estimate, _ in items}
     for i, group in enumerate(groups, 1):
-        group_tokens = sum(estimate_task_tokens(t)['max'] for t in group)
-        log("INFO", f"組 {i}: {len(group)} 個任務, 預估 {group_tokens:,} tokens")
+        group_tokens = sum(estimates[id(t)]['max'] for t in group)
+        log("INFO", f"組 {i}: {len(group)} 個任務, 預估 p90 {group_tokens:,} tokens "
+                    f"({group_tokens / effective_limit:.0%})")
         for task in group:
             task_id = task.get('label', 'unknown')
             agent = task.get('agentId', 'unknown')
-            estimate = estimate_task_tokens(task)
-            log("DEBUG", f"    - {task_id} ({agent}): {estimate['max']:,} tokens")
+            estimate = estimates[id(task)]
+            log("DEBUG", f"    - {task_id} ({agent}): p50 {estimate['avg']:,} / p90 {estimate['max']:,} tokens")
     
     log("INFO", "=" * 60)
     
@@ -25,6 +25,8 @@ from pathlib import Path
 from typing import List, Dict, Tuple
 import traceback
 
+from task_store import get_store
+
 # 路徑配置
 WORKSPACE = Path.home() / ".openclaw" / "workspace"
 TASKS_FILE = WORKSPACE / "kanban" / "tasks.json"
@@ -51,37 +53,19 @@ class TaskCleanupManager:
         self.to_cleanup = []
 
     def _load_tasks(self) -> List[Dict]:
-        """載入任務"""
+        """載入任務（經 TaskStore）"""
         try:
-            with open(TASKS_FILE, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-
-                # 處理多種格式
-                if isinstance(data, dict):
-                    if 'tasks' in data:
-                        return data['tasks']
-                    else:
-                        return list(data.values())
-                elif isinstance(data, list):
-                    return data
-                else:
-                    logger.warning(f"未知 tasks.json 格式: {type(data)}")
-                    return []
-
-        except FileNotFoundError:
-            logger.error(f"tasks.json 不存在: {TASKS_FILE}")
-            return []
+            return get_store(TASKS_FILE).all()
         except Exception as e:
             logger.error(f"載入任務失敗: {e}")
             logger.error(traceback.format_exc())
             return []
 
     def _save_tasks(self, tasks: List[Dict]):
-        """保存任務"""
+        """保存任務（經 TaskStore）"""
         try:
-            with open(TASKS_FILE, 'w', encoding='utf-8') as f:
-                json.dump(tasks, f, indent=2, ensure_ascii=False)
-            logger.info(f"已保存 {len(tasks)} 個任務到 tasks.json")
+            get_store(TASKS_FILE).replace_all(tasks)
+            logger.info(f"已保存 {len(tasks)} 個任務")
         except Exception as e:
             logger.error(f"保存任務失敗: {e}")
 
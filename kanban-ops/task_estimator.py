@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+"""
+任務 Token / 耗時預估器
+
+在靜態預估（TOKEN_ESTIMATES × 複雜度 × 描述長度）的基礎上，用已完成任務的實際數據
+學習修正量，並給出分位數預估：
+
+- 目標：tokens（token_usage 或由 cost_optimizer 記錄的成本換算）、minutes（time_tracker 的實際時間）
+- 特徵：代理類型（one-hot）、複雜度等級、輸入文件字節數、描述長度
+- 模型：對數空間的遞推最小二乘（RLS），以靜態預估為偏移量，沒有歷史數據時退化為靜態預估
+- 分位數：樣本外殘差的直方圖；樣本不足時使用先驗標準差
+- 增量：每個任務完成時更新一次（O(特徵數²)），不需要重新掃描歷史
+
+用法：
+    python3 task_estimator.py refit            # 從 TaskStore 中已完成的任務補充訓練
+    python3 task_estimator.py show             # 顯示模型狀態
+    python3 task_estimator.py predict <task_id>
+"""
+
+import json
+import math
+import os
+import sys
+from collections import deque
+from pathlib import Path
+from statistics import NormalDist
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from tasks_file import atomic_write_json, tasks_lock
+
+# 路徑配置
+WORKSPACE = Path.home() / ".openclaw" / "workspace"
+ESTIMATOR_STATE_FILE = WORKSPACE / "kanban-ops" / "task_estimator.json"
+
+# 每個代理的 Token 使用範圍（輸入 + 輸出），作為先驗
+TOKEN_ESTIMATES = {
+    'research': {
+        'min': 80_000,   # 最小 Token 使用
+        'max': 150_000,  # 最大 Token 使用
+        'avg': 115_000,  # 平均 Token 使用
+    },
+    'analyst': {
+        'min': 50_000,
+        'max': 100_000,
+        'avg': 75_000,
+    },
+    'architect': {
+        'min': 60_000,
+        'max': 120_000,
+        'avg': 90_000,
+    },
+    'developer': {
+        'min': 40_000,
+        'max': 80_000,
+        'avg': 60_000,
+    },
+    'automation': {
+        'min': 20_000,
+        'max': 50_000,
+        'avg': 35_000,
+    },
+    'creative': {
+        'min': 40_000,
+        'max': 90_000,
+        'avg': 65_000,
+    },
+    'mentors': {
+        'min': 50_000,
+        'max': 100_000,
+        'avg': 75_000,
+    },
+    'unknown': {
+        'min': 50_000,
+        'max': 100_000,
+        'avg': 75_000,
+    },
+}
+
+DEFAULT_MINUTES = 30         # 沒有時間預估時的先驗（分鐘）
+
+AGENTS = sorted(TOKEN_ESTIMATES)
+FEATURES = ['bias'] + [f'agent:{a}' for a in AGENTS] + ['complexity', 'log_input_bytes', 'log_description_len']
+TARGETS = ('tokens', 'minutes')
+
+PRIOR_VARIANCE = 0.5         # 係數先驗方差（越小越貼近靜態預估）
+PRIOR_SIGMA = 0.25           # 樣本不足時的對數殘差標準差
+MIN_RESIDUALS = 20           # 殘差直方圖啟用前需要的樣本數
+RESIDUAL_BIN = 0.05          # 殘差直方圖分桶寬度（對數空間）
+RESIDUAL_LIMIT = 4.0         # 殘差截斷範圍 ±
+OBSERVED_KEPT = 5000         # 記住最近觀測過的任務，避免重複計入
+
+_NORMAL = NormalDist()
+
+
+# ============================================================================
+# 特徵
+# ============================================================================
+
+def task_agent(task: Dict) -> str:
+    agent = task.get('agentId', task.get('agent', 'unknown'))
+    return agent if agent in TOKEN_ESTIMATES else 'unknown'
+
+
+def task_complexity(task: Dict) -> float:
+    complexity = task.get('complexity', (task.get('time_tracking') or {}).get('complexity_level', 1))
+    try:
+        return float(complexity)
+    except (TypeError, ValueError):
+        return 1.0
+
+
+def task_text(task: Dict) -> str:
+    return task.get('task') or task.get('description') or task.get('title') or ''
+
+
+def task_input_bytes(task: Dict) -> int:
+    """輸入文件總字節數（不存在的路徑記 0）"""
+    total = 0
+    for path in task.get('input_paths') or []:
+        candidate = Path(os.path.expanduser(str(path)))
+        if not candidate.is_absolute():
+            candidate = WORKSPACE / candidate
+        try:
+            total += candidate.stat().st_size
+        except OSError:
+            pass
+    return total
+
+
+def task_features(task: Dict) -> List[float]:
+    agent = task_agent(task)
+    return (
+        [1.0]
+        + [1.0 if a == agent else 0.0 for a in AGENTS]
+        + [task_complexity(task) - 1,
+           math.log1p(task_input_bytes(task)),
+           math.log1p(len(task_text(task)))]
+    )
+
+
+def static_token_estimate(task: Dict) -> Dict:
+    """
+    靜態 Token 預估（代理基礎值 × 複雜度 × 描述長度）
+
+    Returns:
+        {'min', 'max', 'avg', 'confidence'}
+    """
+    base_estimate = TOKEN_ESTIMATES[task_agent(task)]
+
+    # complexity_level: 1 (簡單) - 5 (非常複雜)
+    complexity_multiplier = 1.0 + (task_complexity(task) - 1) * 0.25  # 1.0x - 2.0x
+
+    # 根據任務描述長度調整（先判斷更長的分檔）
+    text_length = len(task_text(task))
+    text_multiplier = 1.0
+    if text_length > 10000:
+        text_multiplier = 1.4
+    elif text_length > 5000:
+        text_multiplier = 1.2
+
+    min_tokens = int(base_estimate['min'] * complexity_multiplier * text_multiplier)
+    max_tokens = int(base_estimate['max'] * complexity_multiplier * text_multiplier)
+
+    # 置信度（基於可用信息）
+    confidence = 0.7
+    if 'complexity_level' in (task.get('time_tracking') or {}):
+        confidence += 0.1
+    if text_length > 1000:
+        confidence += 0.1
+
+    return {
+        'min': min_tokens,
+        'max': max_tokens,
+        'avg': (min_tokens + max_tokens) // 2,
+        'confidence': min(confidence, 1.0),
+    }
+
+
+def baseline(task: Dict, target: str) -> float:
+    """靜態預估（模型的偏移量，取對數前）"""
+    if target == 'tokens':
+        return max(static_token_estimate(task)['avg'], 1)
+    estimated = (task.get('time_tracking') or {}).get('estimated_time') or {}
+    if estimated.get('min') is not None and estimated.get('max') is not None:
+        return max((estimated['min'] + estimated['max']) / 2, 1)
+    return DEFAULT_MINUTES
+
+
+def observed_tokens(task: Dict) -> Optional[float]:
+    """從任務記錄中取實際 Token 使用（輸入 + 輸出）"""
+    usage = task.get('token_usage')
+    if isinstance(usage, dict):
+        total = (usage.get('input') or 0) + (usage.get('output') or 0)
+        return total or None
+    if isinstance(usage, (int, float)) and usage > 0:
+        return usage
+    return None
+
+
+def observed_minutes(task: Dict) -> Optional[float]:
+    minutes = (task.get('time_tracking') or {}).get('actual_time_minutes')
+    return minutes if isinstance(minutes, (int, float)) and minutes > 0 else None
+
+
+# ============================================================================
+# 模型
+# ============================================================================
+
+class QuantileModel:
+    """對數空間的遞推最小二乘 + 樣本外殘差直方圖"""
+
+    def __init__(self, dim: int = len(FEATURES)):
+        self.dim = dim
+        self.theta = [0.0] * dim
+        self.P = [[PRIOR_VARIANCE if i == j else 0.0 for j in range(dim)] for i in range(dim)]
+        self.samples = 0
+        self.residuals: Dict[int, int] = {}
+
+    def predict_log(self, x: List[float]) -> float:
+        return sum(t * v for t, v in zip(self.theta, x))
+
+    def update(self, x: List[float], y: float):
+        """加入一個樣本（y 為相對於偏移量的對數值）"""
+        residual = y - self.predict_log(x)
+        clipped = max(-RESIDUAL_LIMIT, min(RESIDUAL_LIMIT, residual))
+        key = int(round(clipped / RESIDUAL_BIN))
+        self.residuals[key] = self.residuals.get(key, 0) + 1
+        self.samples += 1
+
+        Px = [sum(row[j] * x[j] for j in range(self.dim)) for row in self.P]
+        denom = 1.0 + sum(x[i] * Px[i] for i in range(self.dim))
+        gain = [v / denom for v in Px]
+        self.theta = [t + g * residual for t, g in zip(self.theta, gain)]
+        self.P = [
+            [self.P[i][j] - gain[i] * Px[j] for j in range(self.dim)]
+            for i in range(self.dim)
+        ]
+
+    def residual_quantile(self, q: float) -> float:
+        """殘差分位數；樣本不足時按先驗正態分佈"""
+        if self.samples < MIN_RESIDUALS:
+            return PRIOR_SIGMA * _NORMAL.inv_cdf(q)
+        rank = q * (self.samples - 1)
+        seen = 0
+        for key in sorted(self.residuals):
+            seen += self.residuals[key]
+            if rank < seen:
+                return key * RESIDUAL_BIN
+        return max(self.residuals) * RESIDUAL_BIN
+
+    def to_dict(self) -> Dict:
+        return {
+            'theta': self.theta,
+            'P': self.P,
+            'samples': self.samples,
+            'residuals': {str(k): v for k, v in self.residuals.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'QuantileModel':
+        model = cls()
+        if len(data.get('theta', [])) != model.dim:
+            return model  # 特徵變化：重新開始
+        model.theta = data['theta']
+        model.P = data['P']
+        model.samples = data.get('samples', 0)
+        model.residuals = {int(k): v for k, v in data.get('residuals', {}).items()}
+        return model
+
+
+class TaskEstimator:
+    """基於歷史數據的任務預估器"""
+
+    def __init__(self, state_path: Optional[Path] = None):
+        self.state_path = Path(state_path or ESTIMATOR_STATE_FILE)
+        self.models: Dict[str, QuantileModel] = {}
+        self.observed: Dict[str, deque] = {}
+        self._load()
+
+    def _load(self):
+        data = {}
+        try:
+            if self.state_path.exists():
+                with open(self.state_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  載入預估器狀態失敗，重新開始：{e}")
+        self.models = {
+            target: QuantileModel.from_dict(data.get('models', {}).get(target, {}))
+            for target in TARGETS
+        }
+        self.observed = {
+            target: deque(data.get('observed', {}).get(target, []), maxlen=OBSERVED_KEPT)
+            for target in TARGETS
+        }
+
+    def _save(self):
+        atomic_write_json(self.state_path, {
+            'features': FEATURES,
+            'models': {target: model.to_dict() for target, model in self.models.items()},
+            'observed': {target: list(ids) for target, ids in self.observed.items()},
+        }, indent=None)
+
+    def predict(self, task: Dict, target: str = 'tokens',
+                quantiles=(0.1, 0.5, 0.9)) -> Dict[str, float]:
+        """
+        分位數預估
+
+        Returns:
+            {'p10': ..., 'p50': ..., 'p90': ..., 'samples': 訓練樣本數}
+        """
+        model = self.models[target]
+        center = math.log(baseline(task, target)) + model.predict_log(task_features(task))
+        result = {
+            f'p{int(round(q * 100))}': math.exp(center + model.residual_quantile(q))
+            for q in quantiles
+        }
+        result['samples'] = model.samples
+        return result
+
+    def estimate_tokens(self, task: Dict) -> Dict:
+        """
+        Token 預估（與 static_token_estimate 相同的鍵，max 為 p90）
+
+        Returns:
+            {'min': p10, 'avg': p50, 'max': p90, 'p50', 'p90', 'confidence', 'source'}
+        """
+        prediction = self.predict(task, 'tokens')
+        samples = prediction['samples']
+        static = static_token_estimate(task)
+        confidence = static['confidence'] + (1 - static['confidence']) * samples / (samples + MIN_RESIDUALS)
+        return {
+            'min': int(prediction['p10']),
+            'avg': int(prediction['p50']),
+            'max': int(prediction['p90']),
+            'p50': int(prediction['p50']),
+            'p90': int(prediction['p90']),
+            'confidence': round(min(confidence, 1.0), 2),
+            'source': 'learned' if samples else 'prior',
+        }
+
+    def observe(self, task: Dict, tokens: Optional[float] = None,
+                minutes: Optional[float] = None) -> int:
+        """
+        記錄一個完成任務的實際數據並增量更新模型（跨進程加鎖，同一任務只計一次）
+
+        Args:
+            task: 任務字典（用於特徵）
+            tokens: 實際 Token（默認取 task.token_usage）
+            minutes: 實際分鐘數（默認取 time_tracking.actual_time_minutes）
+
+        Returns:
+            更新的目標數
+        """
+        values = {
+            'tokens': tokens if tokens is not None else observed_tokens(task),
+            'minutes': minutes if minutes is not None else observed_minutes(task),
+        }
+        task_id = task.get('id')
+        if not any(v and v > 0 for v in values.values()):
+            return 0
+
+        with tasks_lock(self.state_path):
+            self._load()  # 其他進程可能已經更新
+            updated = self._apply(task, task_id, values)
+            if updated:
+                self._save()
+        return updated
+
+    def _apply(self, task: Dict, task_id: Optional[str], values: Dict[str, Optional[float]]) -> int:
+        updated = 0
+        x = None
+        for target, value in values.items():
+            if not value or value <= 0:
+                continue
+            if task_id and task_id in self.observed[target]:
+                continue
+            x = x or task_features(task)
+            self.models[target].update(x, math.log(value) - math.log(baseline(task, target)))
+            if task_id:
+                self.observed[target].append(task_id)
+            updated += 1
+        return updated
+
+    def refit(self, tasks: List[Dict]) -> int:
+        """把尚未計入的已完成任務補充進模型（一次加鎖、一次寫盤）"""
+        with tasks_lock(self.state_path):
+            self._load()
+            updated = sum(
+                self._apply(task, task.get('id'), {
+                    'tokens': observed_tokens(task),
+                    'minutes': observed_minutes(task),
+                })
+                for task in tasks
+                if task.get('status') == 'completed'
+            )
+            if updated:
+                self._save()
+        return updated
+
+
+# 全局實例
+_estimator = None
+
+
+def get_estimator() -> TaskEstimator:
+    """獲取全局預估器實例"""
+    global _estimator
+    if _estimator is None:
+        _estimator = TaskEstimator()
+    return _estimator
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='任務 Token / 耗時預估器')
+    parser.add_argument('command', choices=['refit', 'show', 'predict'])
+    parser.add_argument('task_id', nargs='?')
+    parser.add_argument('--tasks-json', type=Path, default=None, help='tasks.json 路徑')
+    args = parser.parse_args()
+
+    estimator = get_estimator()
+
+    if args.command == 'show':
+        for target in TARGETS:
+            model = estimator.models[target]
+            spread = model.residual_quantile(0.9) - model.residual_quantile(0.5)
+            print(f"{target}: {model.samples} 個樣本，p90/p50 = {math.exp(spread):.2f}x")
+            for name, value in zip(FEATURES, model.theta):
+                if abs(value) > 1e-6:
+                    print(f"  {name:<24} {value:+.3f}")
+        return
+
+    from task_store import get_store
+    store = get_store(args.tasks_json)
+
+    if args.command == 'refit':
+        updated = estimator.refit(store.all(status='completed'))
+        print(f"✅ 已計入 {updated} 個新觀測")
+    else:
+        task = store.find(args.task_id or '')
+        if not task:
+            print(f"❌ 找不到任務：{args.task_id}")
+            sys.exit(1)
+        tokens = estimator.estimate_tokens(task)
+        minutes = estimator.predict(task, 'minutes')
+        print(f"Token: p50 {tokens['p50']:,} / p90 {tokens['p90']:,}（{tokens['source']}，置信度 {tokens['confidence']:.0%}）")
+        print(f"耗時: p50 {minutes['p50']:.1f} / p90 {minutes['p90']:.1f} 分鐘")
+
+
+if __name__ == '__main__':
+    main()
@@ -17,6 +17,15 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, List, Optional
 
+from task_store import get_store
+
+# Scout 去重索引（註冊時增量插入）
+try:
+    from dedup_index import get_dedup_index
+    DEDUP_INDEX_AVAILABLE = True
+except ImportError:
+    DEDUP_INDEX_AVAILABLE = False
+
 # 路徑配置
 WORKSPACE = Path.home() / ".openclaw" / "workspace"
 TASKS_JSON = WORKSPACE / "kanban" / "tasks.json"
@@ -30,64 +39,21 @@ def log(level, message):
 
 
 def load_tasks() -> List[Dict]:
-    """載入 tasks.json"""
-    if not TASKS_JSON.exists():
-        log("WARNING", f"tasks.json 不存在：{TASKS_JSON}")
-        return []
-
+    """載入所有任務（經 TaskStore）"""
     try:
-        with open(TASKS_JSON, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-            # 處理多種格式
-            if isinstance(data, dict):
-                if 'tasks' in data:
-                    return data['tasks']
-                else:
-                    # 舊格式：{"task_id": {...}}
-                    return list(data.values())
-            elif isinstance(data, list):
-                return data
-            else:
-                log("ERROR", f"未知 tasks.json 格式：{type(data)}")
-                return []
+        return get_store(TASKS_JSON).all()
     except Exception as e:
-        log("ERROR", f"載入 tasks.json 失敗：{e}")
+        log("ERROR", f"載入任務失敗：{e}")
         return []
 
 
 def save_tasks(tasks: List[Dict]) -> bool:
-    """保存任務到 tasks.json"""
+    """以完整列表覆蓋任務（經 TaskStore，tasks.json 保持原格式導出）"""
     try:
-        # 確保目錄存在
-        TASKS_JSON.parent.mkdir(parents=True, exist_ok=True)
-
-        # 檢查是否使用舊格式或新格式
-        use_old_format = False
-
-        if TASKS_JSON.exists():
-            with open(TASKS_JSON, 'r', encoding='utf-8') as f:
-                try:
-                    data = json.load(f)
-                    if isinstance(data, dict) and 'tasks' not in data:
-                        use_old_format = True
-                except:
-                    pass
-
-        if use_old_format:
-            # 舊格式：{"task_id": {...}}
-            tasks_dict = {t['id']: t for t in tasks}
-            with open(TASKS_JSON, 'w', encoding='utf-8') as f:
-                json.dump(tasks_dict, f, indent=2, ensure_ascii=False)
-        else:
-            # 新格式：{"tasks": [{...}, {...}]} 或直接列表
-            data = {"tasks": tasks}
-            with open(TASKS_JSON, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-
+        get_store(TASKS_JSON).replace_all(tasks)
         return True
     except Exception as e:
-        log("ERROR", f"保存 tasks.json 失敗：{e}")
+        log("ERROR", f"保存任務失敗：{e}")
         return False
 
 
@@ -101,60 +67,55 @@ def find_task(task_id: str, tasks: List[Dict]) -> Optional[Dict]:
 
 def register_task(task: Dict) -> bool:
     """註冊新任務到 tasks.json"""
-    tasks = load_tasks()
-
-    # 檢查任務是否已存在
-    if find_task(task['id'], tasks):
-        log("WARNING", f"任務 {task['id']} 已存在，跳過註冊")
-        return True
-
-    # 添加任務
     task['created_at'] = task.get('created_at', datetime.now(timezone.utc).isoformat())
     task['updated_at'] = datetime.now(timezone.utc).isoformat()
 
-    tasks.append(task)
+    try:
+        inserted = get_store(TASKS_JSON).insert(task)
+    except Exception as e:
+        log("ERROR", f"任務 {task['id']} 註冊失敗：{e}")
+        return False
 
-    # 保存任務
-    if save_tasks(tasks):
-        log("SUCCESS", f"任務 {task['id']} 已註冊")
+    if not inserted:
+        log("WARNING", f"任務 {task['id']} 已存在，跳過註冊")
         return True
-    else:
-        log("ERROR", f"任務 {task['id']} 註冊失敗")
-        return False
+
+    if DEDUP_INDEX_AVAILABLE:
+        try:
+            get_dedup_index().add(task)
+        except Exception as e:
+            log("WARNING", f"任務 {task['id']} 加入去重索引失敗：{e}")
+
+    log("SUCCESS", f"任務 {task['id']} 已註冊")
+    return True
 
 
 def verify_task_registered(task_id: str) -> bool:
     """驗證任務是否已註冊"""
-    tasks = load_tasks()
-    return find_task(task_id, tasks) is not None
+    return get_store(TASKS_JSON).exists(task_id)
 
 
 def update_task_status(task_id: str, status: str, metadata: Optional[Dict] = None) -> bool:
     """更新任務狀態"""
-    tasks = load_tasks()
-    task = find_task(task_id, tasks)
-
-    if not task:
-        log("WARNING", f"任務 {task_id} 不存在，無法更新狀態")
-        return False
-
-    # 更新狀態
-    task['status'] = status
-    task['updated_at'] = datetime.now(timezone.utc).isoformat()
+    fields = {'status': status, 'updated_at': datetime.now(timezone.utc).isoformat()}
 
     # 更新元數據
     if metadata:
-        for key, value in metadata.items():
-            task[key] = value
+        fields.update(metadata)
 
-    # 保存任務
-    if save_tasks(tasks):
-        log("SUCCESS", f"任務 {task_id} 狀態已更新為 {status}")
-        return True
-    else:
-        log("ERROR", f"任務 {task_id} 狀態更新失敗")
+    try:
+        task = get_store(TASKS_JSON).update(task_id, **fields)
+    except Exception as e:
+        log("ERROR", f"任務 {task_id} 狀態更新失敗：{e}")
         return False
 
+    if task is None:
+        log("WARNING", f"任務 {task_id} 不存在，無法更新狀態")
+        return False
+
+    log("SUCCESS", f"任務 {task_id} 狀態已更新為 {status}")
+    return True
+
 
 def create_task_from_spawn_params(task_id: str, task_message: str, agent_id: str, model: str, output_path: str) -> Dict:
     """從 sessions_spawn 參數創建任務"""
@@ -240,7 +201,7 @@ def check_unregistered_running_tasks() -> List[str]:
 
         # 檢查每個子代理的任務是否已註冊
         unregistered = []
-        tasks = load_tasks()
+        store = get_store(TASKS_JSON)
 
         for subagent in subagents:
             label = subagent.get('label', '')
@@ -248,7 +209,7 @@ def check_unregistered_running_tasks() -> List[str]:
                 continue
 
             # 檢查任務是否已註冊
-            if not find_task(label, tasks):
+            if not store.exists(label):
                 unregistered.append(label)
                 log("WARNING", f"發現未註冊的運行中任務：{label}")
 
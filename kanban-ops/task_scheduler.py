@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Task Scheduler - 依賴圖調度器
+
+取代每次心跳對全部任務逐一檢查依賴（每個依賴線性查找，O(N·D·N)）的做法：
+
+- 保存依賴圖（dependents 鄰接表）與每個任務尚未完成的依賴數（in-degree）
+- 依賴全部完成的 pending 任務進入優先級堆，next_spawnable(k) 為 O(k log N)
+- sync(tasks) 只對有變化的任務（狀態 / 優先級 / 依賴）做增量更新，
+  常駐的守護進程可以跨循環重用同一個實例
+- 啟動時檢測循環依賴與未知依賴 ID
+
+依賴語義與原實現一致：依賴任務狀態為 completed 即滿足；
+依賴 ID 不存在時不阻塞（但會在 validate() 中報告）。
+
+用法：
+    from task_scheduler import get_scheduler
+
+    scheduler = get_scheduler()
+    scheduler.sync(tasks)
+    for task in scheduler.next_spawnable(3):
+        ...
+"""
+
+import heapq
+import itertools
+import logging
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# 優先級排序（與原 find_spawnable_tasks 相同）
+PRIORITY_ORDER = {'high': 0, 'medium': 1, 'low': 2, 'normal': 1}
+
+
+def task_dependencies(task: Dict) -> List[str]:
+    """任務的依賴 ID 列表（兼容 dependencies / depends_on 兩種字段）"""
+    deps = task.get('dependencies', task.get('depends_on', [])) or []
+    if isinstance(deps, str):
+        deps = [deps]
+    return list(dict.fromkeys(deps))
+
+
+def priority_rank(task: Dict) -> int:
+    priority = task.get('priority', 'normal')
+    try:
+        return PRIORITY_ORDER.get(priority, 1)
+    except TypeError:
+        return 1
+
+
+class DependencyScheduler:
+    """增量維護的依賴圖與就緒隊列"""
+
+    def __init__(self, tasks: Optional[Iterable[Dict]] = None):
+        self.tasks: Dict[str, Dict] = {}
+        self._deps: Dict[str, List[str]] = {}
+        self._dependents: Dict[str, Set[str]] = defaultdict(set)
+        self._blocking: Dict[str, int] = {}
+        self._signatures: Dict[str, tuple] = {}
+        self._versions: Dict[str, int] = {}
+        self._heap: List[tuple] = []
+        self._seq = itertools.count()
+        if tasks is not None:
+            self.sync(tasks)
+
+    # ------------------------------------------------------------------
+    # 增量更新
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _signature(task: Dict) -> tuple:
+        return (
+            task.get('status'),
+            priority_rank(task),
+            task.get('created_at') or '',
+            tuple(task_dependencies(task))
+        )
+
+    def _is_done(self, task_id: str) -> bool:
+        """依賴是否已滿足（未知 ID 視為滿足）"""
+        task = self.tasks.get(task_id)
+        return task is None or task.get('status') == 'completed'
+
+    def _is_ready(self, task_id: str) -> bool:
+        task = self.tasks.get(task_id)
+        return task is not None and task.get('status') == 'pending' and self._blocking.get(task_id, 0) == 0
+
+    def _push(self, task_id: str):
+        """任務就緒時放入堆；舊條目因版本號不符在彈出時丟棄"""
+        version = self._versions[task_id] = self._versions.get(task_id, 0) + 1
+        if self._is_ready(task_id):
+            task = self.tasks[task_id]
+            heapq.heappush(self._heap, (
+                priority_rank(task),
+                task.get('created_at') or '',
+                next(self._seq),
+                task_id,
+                version
+            ))
+
+    def _adjust_dependents(self, task_id: str, delta: int):
+        """task_id 的完成狀態改變時，更新依賴它的任務"""
+        for dependent in self._dependents.get(task_id, ()):
+            before = self._blocking[dependent]
+            self._blocking[dependent] = before + delta
+            if self._blocking[dependent] == 0 or before == 0:
+                self._push(dependent)
+
+    def _set_deps(self, task_id: str, deps: List[str]):
+        for dep in self._deps.get(task_id, ()):
+            self._dependents[dep].discard(task_id)
+        self._deps[task_id] = deps
+        for dep in deps:
+            self._dependents[dep].add(task_id)
+        self._blocking[task_id] = sum(1 for dep in deps if not self._is_done(dep))
+
+    def upsert(self, task: Dict):
+        """新增或更新單個任務"""
+        task_id = task['id']
+        was_done = self._is_done(task_id)
+        self.tasks[task_id] = task
+        self._signatures[task_id] = self._signature(task)
+        self._set_deps(task_id, task_dependencies(task))
+
+        now_done = self._is_done(task_id)
+        if was_done != now_done:
+            self._adjust_dependents(task_id, -1 if now_done else 1)
+        self._push(task_id)
+
+    def remove(self, task_id: str):
+        """移除任務（依賴它的任務視為依賴已滿足）"""
+        if task_id not in self.tasks:
+            return
+        was_done = self._is_done(task_id)
+        for dep in self._deps.pop(task_id, ()):
+            self._dependents[dep].discard(task_id)
+        del self.tasks[task_id]
+        self._signatures.pop(task_id, None)
+        self._blocking.pop(task_id, None)
+        self._versions.pop(task_id, None)
+        if not was_done:
+            self._adjust_dependents(task_id, -1)
+
+    def sync(self, tasks: Iterable[Dict]) -> int:
+        """
+        與最新的任務列表同步，只處理有變化的任務
+
+        Returns:
+            變化的任務數
+        """
+        seen = set()
+        changed = 0
+        for task in tasks:
+            task_id = task['id']
+            seen.add(task_id)
+            if self._signatures.get(task_id) == self._signature(task):
+                # 未變化：仍更新引用，讓調用方拿到最新的 dict
+                self.tasks[task_id] = task
+                continue
+            self.upsert(task)
+            changed += 1
+
+        for task_id in [t for t in self.tasks if t not in seen]:
+            self.remove(task_id)
+            changed += 1
+        return changed
+
+    # ------------------------------------------------------------------
+    # 查詢
+    # ------------------------------------------------------------------
+
+    def next_spawnable(self, k: int, predicate: Optional[Callable[[Dict], bool]] = None) -> List[Dict]:
+        """
+        按優先級（high > medium > low）與創建時間返回前 k 個可啟動任務
+
+        Args:
+            k: 最多返回的任務數
+            predicate: 額外過濾條件（如只啟動研究任務）
+
+        Returns:
+            任務列表（不會從隊列中移除，狀態改變後由 sync 更新）
+        """
+        selected: List[Dict] = []
+        keep: List[tuple] = []
+        while self._heap and len(selected) < k:
+            entry = heapq.heappop(self._heap)
+            task_id, version = entry[3], entry[4]
+            if self._versions.get(task_id) != version or not self._is_ready(task_id):
+                continue  # 過期條目
+            keep.append(entry)
+            task = self.tasks[task_id]
+            if predicate is None or predicate(task):
+                selected.append(task)
+
+        for entry in keep:
+            heapq.heappush(self._heap, entry)
+        return selected
+
+    def ready_count(self) -> int:
+        return sum(1 for task_id in self.tasks if self._is_ready(task_id))
+
+    def validate(self) -> Dict[str, object]:
+        """
+        檢查依賴圖
+
+        Returns:
+            {'unknown': {task_id: [未知依賴 ID]}, 'cycles': [[循環中的任務 ID]]}
+        """
+        unknown = {}
+        for task_id, deps in self._deps.items():
+            missing = [dep for dep in deps if dep not in self.tasks]
+            if missing:
+                unknown[task_id] = missing
+
+        return {'unknown': unknown, 'cycles': self._find_cycles()}
+
+    def _find_cycles(self) -> List[List[str]]:
+        """Kahn 拓撲排序後剩餘的節點都在循環上或被循環阻塞；從中提取各個循環"""
+        indegree = {task_id: 0 for task_id in self.tasks}
+        for task_id, deps in self._deps.items():
+            for dep in deps:
+                if dep in self.tasks:
+                    indegree[task_id] += 1
+
+        queue = [task_id for task_id, degree in indegree.items() if degree == 0]
+        while queue:
+            task_id = queue.pop()
+            for dependent in self._dependents.get(task_id, ()):
+                indegree[dependent] -= 1
+                if indegree[dependent] == 0:
+                    queue.append(dependent)
+
+        remaining = {task_id for task_id, degree in indegree.items() if degree > 0}
+        cycles = []
+        visited: Set[str] = set()
+        for start in sorted(remaining):
+            if start in visited:
+                continue
+            # 沿依賴邊前進直到重複，重複點開始的路徑就是一個循環
+            path: List[str] = []
+            position: Dict[str, int] = {}
+            node = start
+            while node not in position and node not in visited:
+                position[node] = len(path)
+                path.append(node)
+                node = next(dep for dep in self._deps[node] if dep in remaining)
+            if node in position:
+                cycles.append(path[position[node]:])
+            visited.update(path)
+        return cycles
+
+
+_scheduler: Optional[DependencyScheduler] = None
+
+
+def get_scheduler() -> DependencyScheduler:
+    """進程內共用的調度器（常駐守護進程跨循環重用）"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = DependencyScheduler()
+    return _scheduler
+
+
+def report_graph_problems(scheduler: DependencyScheduler, log: Callable[[str, str], None]):
+    """把未知依賴與循環依賴寫入日誌"""
+    problems = scheduler.validate()
+    for task_id, missing in problems['unknown'].items():
+        log("WARNING", f"任務 {task_id} 依賴不存在的任務：{', '.join(missing)}（視為已滿足）")
+    for cycle in problems['cycles']:
+        log("ERROR", f"循環依賴，相關任務永遠不會啟動：{' → '.join(cycle + cycle[:1])}")
+    return problems
@@ -22,12 +22,13 @@
     在執行 sessions_spawn 後自動運行此腳本，清理失敗的啟動
 """
 
-import json
 import subprocess
 import sys
 from pathlib import Path
 from datetime import datetime, timezone, timedelta
 
+from task_store import get_store
+
 # 路徑配置
 WORKSPACE = Path.home() / ".openclaw" / "workspace"
 TASKS_JSON = WORKSPACE / "kanban" / "tasks.json"
@@ -52,23 +53,21 @@ def log(level, message):
 
 
 def load_tasks():
-    """載入 tasks.json"""
+    """載入所有任務（經 TaskStore）"""
     try:
-        with open(TASKS_JSON, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        return get_store(TASKS_JSON).all()
     except Exception as e:
-        log("ERROR", f"載入 tasks.json 失敗：{e}")
+        log("ERROR", f"載入任務失敗：{e}")
         return []
 
 
 def save_tasks(tasks):
-    """保存任務到 tasks.json"""
+    """以完整列表覆蓋任務（經 TaskStore）"""
     try:
-        with open(TASKS_JSON, 'w', encoding='utf-8') as f:
-            json.dump(tasks, f, indent=2, ensure_ascii=False)
+        get_store(TASKS_JSON).replace_all(tasks)
         return True
     except Exception as e:
-        log("ERROR", f"保存 tasks.json 失敗：{e}")
+        log("ERROR", f"保存任務失敗：{e}")
         return False
 
 
@@ -0,0 +1,626 @@
+#!/usr/bin/env python3
+"""
+Task Store - 任務存儲層
+
+以 SQLite（WAL 模式）取代整檔重寫 tasks.json：
+
+- 每個任務一行，status / agent / priority / 時間戳為索引列
+- 單一任務更新是行級 upsert，成本與任務總數無關
+- 多個守護進程同時寫入由 SQLite 事務保證，不再互相覆蓋
+- 保留 tasks.json 導出（同樣的 JSON 結構），供舊的讀取方使用
+
+tasks.json 仍是對外格式：
+  - 首次打開或舊腳本直接修改 tasks.json 後，自動導入數據庫
+  - 有寫入時標記為 dirty，寫入後最遲 EXPORT_DELAY 秒導出一次（同一窗口內的
+    多次寫入合併為一次導出），進程結束時再導出剩餘修改
+
+用法：
+    from task_store import get_store
+
+    store = get_store()
+    store.update('task-001', status='completed')
+    pending = store.all(status='pending')
+"""
+
+import atexit
+import json
+import logging
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from tasks_file import (
+    SHAPE_LIST,
+    atomic_write_json, build_tasks_payload, file_version, parse_tasks_payload,
+    read_tasks, tasks_lock,
+)
+
+# 路徑配置
+WORKSPACE = Path.home() / ".openclaw" / "workspace"
+TASKS_JSON = WORKSPACE / "kanban" / "tasks.json"
+
+logger = logging.getLogger(__name__)
+
+# 寫入後延遲導出 tasks.json 的秒數（長駐守護進程的舊格式讀取方最多落後這麼久）
+EXPORT_DELAY = 2.0
+
+# 索引列（其餘字段保存在 data JSON 中）
+INDEXED_COLUMNS = ('status', 'agent', 'priority', 'created_at', 'updated_at', 'completed_at')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id           TEXT PRIMARY KEY,
+    seq          INTEGER NOT NULL,
+    status       TEXT,
+    agent        TEXT,
+    priority     TEXT,
+    created_at   TEXT,
+    updated_at   TEXT,
+    completed_at TEXT,
+    data         TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_seq ON tasks(seq);
+CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status);
+CREATE INDEX IF NOT EXISTS idx_tasks_agent ON tasks(agent);
+CREATE INDEX IF NOT EXISTS idx_tasks_priority ON tasks(priority);
+CREATE INDEX IF NOT EXISTS idx_tasks_created_at ON tasks(created_at);
+CREATE INDEX IF NOT EXISTS idx_tasks_updated_at ON tasks(updated_at);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS json_base (
+    id   TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+"""
+
+
+# 合併時表示字段不存在
+_MISSING = object()
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _fingerprint(task: Dict) -> str:
+    """任務內容指紋（與 tasks_file.task_fingerprints 相同的序列化）"""
+    return json.dumps(task, sort_keys=True, ensure_ascii=False)
+
+
+def _merge_task(base: Dict, local: Dict, external: Dict) -> Dict:
+    """
+    字段級三方合併：以本地為準，套用外部相對 base 改過、而本地沒改過的字段
+
+    兩邊改了同一字段時保留本地的值。
+    """
+    merged = dict(local)
+    for key in set(base) | set(external):
+        original = base.get(key, _MISSING)
+        theirs = external.get(key, _MISSING)
+        if theirs == original or local.get(key, _MISSING) != original:
+            continue
+        if theirs is _MISSING:
+            merged.pop(key, None)
+        else:
+            merged[key] = theirs
+    return merged
+
+
+def _column(value) -> Optional[str]:
+    """索引列統一存成字串（priority 等字段可能是數字）"""
+    if value is None:
+        return None
+    return str(value)
+
+
+class TaskStore:
+    """SQLite 任務存儲"""
+
+    def __init__(self, tasks_json: Optional[Path] = None, db_path: Optional[Path] = None,
+                 export_delay: Optional[float] = EXPORT_DELAY):
+        """
+        初始化存儲
+
+        Args:
+            tasks_json: tasks.json 路徑（導入/導出用）
+            db_path: 數據庫路徑（默認與 tasks.json 同目錄的 tasks.db）
+            export_delay: 寫入後延遲導出的秒數（None 表示只在退出或手動時導出）
+        """
+        self.tasks_json = Path(tasks_json or TASKS_JSON)
+        self.db_path = Path(db_path or self.tasks_json.with_suffix('.db'))
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.export_delay = export_delay
+        self._export_timer: Optional[threading.Timer] = None
+        self._closed = False
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(
+            str(self.db_path),
+            timeout=30,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+        self.sync_from_json()
+        atexit.register(self._flush_on_exit)
+
+    # ------------------------------------------------------------------
+    # 事務與 meta
+    # ------------------------------------------------------------------
+
+    def _begin(self):
+        """開始寫事務（IMMEDIATE：立即取得寫鎖，避免讀改寫競爭）"""
+        self._conn.execute("BEGIN IMMEDIATE")
+
+    def _get_meta(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row['value'] if row else default
+
+    def _set_meta(self, key: str, value) -> None:
+        self._conn.execute(
+            "INSERT INTO meta(key, value) VALUES(?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, None if value is None else str(value)),
+        )
+
+    def _json_signature(self) -> Optional[str]:
+        """tasks.json 的文件版本，用於判斷是否被外部改寫"""
+        return file_version(self.tasks_json)
+
+    @property
+    def dirty(self) -> bool:
+        """數據庫是否有尚未導出到 tasks.json 的修改"""
+        return self._get_meta('dirty', '0') == '1'
+
+    @property
+    def shape(self) -> str:
+        return self._get_meta('json_shape', SHAPE_LIST)
+
+    # ------------------------------------------------------------------
+    # 行操作
+    # ------------------------------------------------------------------
+
+    def _write_row(self, task: Dict, seq: Optional[int] = None) -> None:
+        """寫入單行（需在事務中調用）"""
+        if seq is None:
+            row = self._conn.execute("SELECT seq FROM tasks WHERE id = ?", (task['id'],)).fetchone()
+            if row:
+                seq = row['seq']
+            else:
+                seq = self._conn.execute("SELECT COALESCE(MAX(seq), 0) + 1 FROM tasks").fetchone()[0]
+
+        self._conn.execute(
+            "INSERT INTO tasks(id, seq, status, agent, priority, created_at, updated_at, completed_at, data) "
+            "VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(id) DO UPDATE SET "
+            "seq = excluded.seq, status = excluded.status, agent = excluded.agent, "
+            "priority = excluded.priority, created_at = excluded.created_at, "
+            "updated_at = excluded.updated_at, completed_at = excluded.completed_at, "
+            "data = excluded.data",
+            (
+                task['id'], seq,
+                *(_column(task.get(col)) for col in INDEXED_COLUMNS),
+                json.dumps(task, ensure_ascii=False),
+            ),
+        )
+
+    def get(self, task_id: str) -> Optional[Dict]:
+        """按 ID 取得任務"""
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        return json.loads(row['data']) if row else None
+
+    def find(self, task_id: str) -> Optional[Dict]:
+        """按 ID 取得任務，找不到時退回後綴匹配（兼容短 ID）"""
+        task = self.get(task_id)
+        if task is not None:
+            return task
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM tasks WHERE id LIKE ? ESCAPE '\\' ORDER BY seq LIMIT 1",
+                ('%' + task_id.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_'),),
+            ).fetchone()
+        return json.loads(row['data']) if row else None
+
+    def exists(self, task_id: str) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        return row is not None
+
+    def all(self, status: Optional[str] = None, agent: Optional[str] = None) -> List[Dict]:
+        """
+        列出任務（按插入順序）
+
+        Args:
+            status: 只返回此狀態
+            agent: 只返回此代理
+        """
+        clauses, params = [], []
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status)
+        if agent is not None:
+            clauses.append("agent = ?")
+            params.append(agent)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        with self._lock:
+            rows = self._conn.execute(f"SELECT data FROM tasks {where} ORDER BY seq", params).fetchall()
+        return [json.loads(r['data']) for r in rows]
+
+    def fields(self, *names: str) -> List[Dict]:
+        """
+        只取部分字段（在 SQLite 內用 json_extract 解析，不反序列化整個任務）
+
+        Returns:
+            [{'id': ..., name: ...}]（按插入順序）
+        """
+        for name in names:
+            if not name.isidentifier():
+                raise ValueError(f"無效的字段名：{name!r}")
+        columns = ''.join(f", json_extract(data, '$.{name}')" for name in names)
+
+        with self._lock:
+            rows = self._conn.execute(f"SELECT id{columns} FROM tasks ORDER BY seq").fetchall()
+        return [{'id': row[0], **dict(zip(names, tuple(row)[1:]))} for row in rows]
+
+    def count(self, status: Optional[str] = None) -> int:
+        with self._lock:
+            if status is None:
+                return self._conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+            return self._conn.execute("SELECT COUNT(*) FROM tasks WHERE status = ?", (status,)).fetchone()[0]
+
+    def count_by_status(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) AS n FROM tasks GROUP BY status").fetchall()
+        return {r['status']: r['n'] for r in rows}
+
+    def upsert(self, task: Dict) -> None:
+        """插入或覆蓋單個任務"""
+        self.upsert_many([task])
+
+    def upsert_many(self, tasks: Iterable[Dict]) -> None:
+        """批量插入或覆蓋（單一事務）"""
+        with self._lock:
+            self._begin()
+            try:
+                for task in tasks:
+                    self._write_row(task)
+                self._set_meta('dirty', 1)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        self._schedule_export()
+
+    def insert(self, task: Dict) -> bool:
+        """
+        新增任務（已存在則不覆蓋）
+
+        Returns:
+            是否新增
+        """
+        with self._lock:
+            self._begin()
+            try:
+                if self._conn.execute("SELECT 1 FROM tasks WHERE id = ?", (task['id'],)).fetchone():
+                    self._conn.execute("ROLLBACK")
+                    return False
+                self._write_row(task)
+                self._set_meta('dirty', 1)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        self._schedule_export()
+        return True
+
+    def update(self, task_id: str, touch: bool = True, **fields) -> Optional[Dict]:
+        """
+        更新單個任務的字段（事務內讀改寫，並發安全）
+
+        Args:
+            task_id: 任務 ID
+            touch: 是否自動刷新 updated_at
+            **fields: 要更新的字段
+
+        Returns:
+            更新後的任務；任務不存在時返回 None
+        """
+        with self._lock:
+            self._begin()
+            try:
+                row = self._conn.execute("SELECT seq, data FROM tasks WHERE id = ?", (task_id,)).fetchone()
+                if row is None:
+                    self._conn.execute("ROLLBACK")
+                    return None
+                task = json.loads(row['data'])
+                task.update(fields)
+                if touch and 'updated_at' not in fields:
+                    task['updated_at'] = _now()
+                self._write_row(task, seq=row['seq'])
+                self._set_meta('dirty', 1)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        self._schedule_export()
+        return task
+
+    def delete(self, task_id: str) -> bool:
+        with self._lock:
+            self._begin()
+            try:
+                cur = self._conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+                if cur.rowcount:
+                    self._set_meta('dirty', 1)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        if cur.rowcount:
+            self._schedule_export()
+        return cur.rowcount > 0
+
+    def replace_all(self, tasks: List[Dict]) -> None:
+        """
+        以完整列表覆蓋（兼容舊的 save_tasks 語義）
+
+        只重寫內容有變化的行，刪除列表中不存在的任務，並按列表順序重排。
+        """
+        with self._lock:
+            self._begin()
+            try:
+                existing = {
+                    r['id']: (r['seq'], r['data'])
+                    for r in self._conn.execute("SELECT id, seq, data FROM tasks")
+                }
+                keep = set()
+                for seq, task in enumerate(tasks, start=1):
+                    task_id = task.get('id')
+                    if not task_id:
+                        continue
+                    keep.add(task_id)
+                    old = existing.get(task_id)
+                    if old and old[0] == seq and old[1] == json.dumps(task, ensure_ascii=False):
+                        continue
+                    self._write_row(task, seq=seq)
+                for task_id in existing.keys() - keep:
+                    self._conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+                self._set_meta('dirty', 1)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        self._schedule_export()
+
+    # ------------------------------------------------------------------
+    # tasks.json 導入/導出
+    # ------------------------------------------------------------------
+
+    def _set_base(self, tasks: List[Dict]) -> None:
+        """記下 tasks.json 當前內容，作為下次合併的基準（需在事務中調用）"""
+        self._conn.execute("DELETE FROM json_base")
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO json_base(id, data) VALUES(?, ?)",
+            [(task['id'], _fingerprint(task)) for task in tasks],
+        )
+
+    def _merge_external(self, tasks: List[Dict]) -> None:
+        """
+        有未導出修改時合併外部寫入的 tasks.json
+
+        - 外部相對基準沒變：保留本地
+        - 本地相對基準沒變：採用外部（外部刪除的任務本地也刪除）
+        - 兩邊都改過：字段級合併，同一字段以本地為準
+        - 沒有基準記錄（舊數據庫）：按 updated_at 取較新的一方
+        """
+        base = {r['id']: r['data'] for r in self._conn.execute("SELECT id, data FROM json_base")}
+        local = {r['id']: r['data'] for r in self._conn.execute("SELECT id, data FROM tasks")}
+
+        upserts, deletes = [], []
+        for task in tasks:
+            task_id = task['id']
+            current = json.loads(local[task_id]) if task_id in local else None
+            base_fp = base.get(task_id)
+            if current is None:
+                # 外部新增；或本地已刪除但外部又改過
+                if base_fp is None or _fingerprint(task) != base_fp:
+                    upserts.append(task)
+                continue
+            if base_fp is None:
+                if (task.get('updated_at') or '') > (current.get('updated_at') or ''):
+                    upserts.append(task)
+                continue
+            if _fingerprint(task) == base_fp:
+                continue
+            if _fingerprint(current) == base_fp:
+                upserts.append(task)
+            else:
+                upserts.append(_merge_task(json.loads(base_fp), current, task))
+
+        external_ids = {task['id'] for task in tasks}
+        for task_id, base_fp in base.items():
+            if task_id in external_ids or task_id not in local:
+                continue
+            if _fingerprint(json.loads(local[task_id])) == base_fp:
+                deletes.append(task_id)
+
+        self._begin()
+        try:
+            for task in upserts:
+                self._write_row(task)
+            for task_id in deletes:
+                self._conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def sync_from_json(self, force: bool = False) -> bool:
+        """
+        tasks.json 被外部改寫時導入數據庫
+
+        - 數據庫無未導出修改：以 tasks.json 為準整體替換
+        - 數據庫有未導出修改：以上次導入/導出時的內容（json_base）為基準三方合併，
+          本地沒改過的任務直接採用外部版本（含外部刪除），兩邊都改過的按字段合併
+
+        Returns:
+            是否執行了導入
+        """
+        with self._lock:
+            signature = self._json_signature()
+            if signature is None:
+                return False
+            if not force and signature == self._get_meta('json_signature'):
+                return False
+
+            try:
+                data, signature = read_tasks(self.tasks_json)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"[TaskStore] 無法導入 {self.tasks_json}: {e}")
+                return False
+            if signature is None:
+                return False
+
+            tasks, shape = parse_tasks_payload(data)
+            tasks = [t for t in tasks if isinstance(t, dict) and t.get('id')]
+
+            was_dirty = self.dirty
+            if not was_dirty:
+                self.replace_all(tasks)
+            else:
+                self._merge_external(tasks)
+
+            self._begin()
+            self._set_meta('json_shape', shape)
+            self._set_meta('json_signature', signature)
+            self._set_meta('dirty', 1 if was_dirty else 0)
+            self._set_base(tasks)
+            self._conn.execute("COMMIT")
+
+            logger.info(f"[TaskStore] 已從 tasks.json 導入 {len(tasks)} 個任務")
+            return True
+
+    def export_json(self, force: bool = False) -> bool:
+        """
+        導出為 tasks.json（持有 tasks.json.lock，原子替換，保留原格式）
+
+        導出前若 tasks.json 已被其他寫入方更新，先三方合併其內容再寫出
+        （見 sync_from_json），不會覆蓋外部的修改或恢復外部刪除的任務。
+
+        Args:
+            force: 沒有未導出修改時也導出
+
+        Returns:
+            是否寫出了文件
+        """
+        with self._lock, tasks_lock(self.tasks_json):
+            if not force and not self.dirty and self.tasks_json.exists():
+                return False
+
+            if self._json_signature() != self._get_meta('json_signature'):
+                self.sync_from_json()
+
+            tasks = self.all()
+            payload = build_tasks_payload(tasks, self.shape)
+            signature = atomic_write_json(self.tasks_json, payload)
+
+            self._begin()
+            self._set_meta('json_signature', signature)
+            self._set_meta('dirty', 0)
+            self._set_base(tasks)
+            self._conn.execute("COMMIT")
+            return True
+
+    def _schedule_export(self):
+        """寫入後延遲導出（已有待執行的導出時不重複排程，最多延遲 export_delay 秒）"""
+        if self.export_delay is None:
+            return
+        with self._lock:
+            if self._closed or self._export_timer is not None:
+                return
+            timer = threading.Timer(self.export_delay, self._delayed_export)
+            timer.daemon = True
+            self._export_timer = timer
+        timer.start()
+
+    def _delayed_export(self):
+        with self._lock:
+            self._export_timer = None
+            if self._closed or not self.tasks_json.parent.exists():
+                return
+            try:
+                self.export_json()
+            except Exception as e:
+                logger.error(f"[TaskStore] 延遲導出 tasks.json 失敗: {e}")
+
+    def _flush_on_exit(self):
+        try:
+            self.export_json()
+        except Exception as e:
+            logger.error(f"[TaskStore] 退出時導出 tasks.json 失敗: {e}")
+
+    def close(self):
+        """導出未保存的修改並關閉連接"""
+        with self._lock:
+            if self._export_timer is not None:
+                self._export_timer.cancel()
+                self._export_timer = None
+        self.export_json()
+        with self._lock:
+            self._closed = True
+            self._conn.close()
+        atexit.unregister(self._flush_on_exit)
+
+
+_stores: Dict[str, TaskStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(tasks_json: Optional[Path] = None) -> TaskStore:
+    """取得（進程內共享的）TaskStore 實例"""
+    key = str(Path(tasks_json or TASKS_JSON).expanduser().resolve())
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = TaskStore(Path(key))
+            _stores[key] = store
+        else:
+            store.sync_from_json()
+        return store
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='任務存儲（SQLite）')
+    parser.add_argument('command', choices=['import', 'export', 'stats'], help='命令')
+    parser.add_argument('--tasks-json', help='tasks.json 路徑')
+    args = parser.parse_args()
+
+    store = get_store(Path(args.tasks_json) if args.tasks_json else None)
+
+    if args.command == 'import':
+        store.sync_from_json(force=True)
+        print(f"✅ 已導入 {store.count()} 個任務到 {store.db_path}")
+    elif args.command == 'export':
+        store.export_json(force=True)
+        print(f"✅ 已導出 {store.count()} 個任務到 {store.tasks_json}")
+    elif args.command == 'stats':
+        print(f"數據庫：{store.db_path}")
+        print(f"任務總數：{store.count()}")
+        for status, n in sorted(store.count_by_status().items(), key=lambda x: -x[1]):
+            print(f"  {status}: {n}")
+
+
+if __name__ == '__main__':
+    main()
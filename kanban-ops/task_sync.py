@@ -18,6 +18,8 @@ from datetime import datetime, timezone, timedelta
 from pathlib import Path
 from typing import List, Dict, Tuple, Optional
 
+from task_store import get_store
+
 # Scout Agent imports
 sys.path.insert(0, str(Path.home() / '.openclaw/workspace-scout'))
 try:
@@ -51,15 +53,13 @@ logger = logging.getLogger(__name__)
 
 
 def load_tasks() -> List[Dict]:
-    """載入 tasks.json"""
-    with open(TASKS_FILE, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    """載入所有任務（經 TaskStore）"""
+    return get_store(TASKS_FILE).all()
 
 
 def save_tasks(tasks: List[Dict]):
-    """保存 tasks.json"""
-    with open(TASKS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(tasks, f, indent=2, ensure_ascii=False)
+    """以完整列表覆蓋任務（經 TaskStore）"""
+    get_store(TASKS_FILE).replace_all(tasks)
 
 
 def update_task_status(task_id: str, status: str, completed_at: Optional[str] = None) -> bool:
@@ -75,20 +75,13 @@ def update_task_status(task_id: str, status: str, completed_at: Optional[str] =
         是否成功更新
     """
     try:
-        tasks = load_tasks()
-
-        for i, task in enumerate(tasks):
-            if task.get('id') == task_id:
-                tasks[i]['status'] = status
-                tasks[i]['updated_at'] = datetime.now(timezone.utc).isoformat()
+        now = datetime.now(timezone.utc).isoformat()
+        fields = {'status': status, 'updated_at': now}
 
-                if status == 'completed':
-                    tasks[i]['completed_at'] = completed_at or datetime.now(timezone.utc).isoformat()
+        if status == 'completed':
+            fields['completed_at'] = completed_at or now
 
-                save_tasks(tasks)
-                return True
-
-        return False
+        return get_store(TASKS_FILE).update(task_id, **fields) is not None
 
     except Exception as e:
         logger.error(f"[Sync] Error updating task {task_id}: {e}")
@@ -220,8 +213,7 @@ def process_status_file(status_file: Path, status_data: Dict) -> bool:
             return False
 
         # 讀取任務
-        tasks = load_tasks()
-        task = next((t for t in tasks if t.get('id') == task_id), None)
+        task = get_store(TASKS_FILE).get(task_id)
 
         if not task:
             logger.warning(f"[Sync] Task {task_id} not found in tasks.json")
@@ -292,8 +284,7 @@ def copy_output_file(output_path: str, task_id: str):
             return
 
         # 讀取任務獲取 project_id
-        tasks = load_tasks()
-        task = next((t for t in tasks if t.get('id') == task_id), None)
+        task = get_store(TASKS_FILE).get(task_id)
 
         if not task:
             logger.warning(f"[Sync] Task {task_id} not found")
@@ -323,14 +314,12 @@ def check_timeout_tasks():
 
     超過 24 小時未完成的任務標記為 failed
     """
-    tasks = load_tasks()
+    store = get_store(TASKS_FILE)
     now = datetime.now(timezone.utc)
 
     timeout_count = 0
 
-    for i, task in enumerate(tasks):
-        if task.get('status') != 'in_progress':
-            continue
+    for task in store.all(status='in_progress'):
 
         # 檢查 started_at
         time_tracking = task.get('time_tracking', {})
@@ -348,22 +337,23 @@ def check_timeout_tasks():
                 logger.warning(f"[Sync] Task {task_id} timed out after {elapsed}")
 
                 # 標記為 failed
-                tasks[i]['status'] = 'failed'
-                tasks[i]['updated_at'] = now.isoformat()
-                tasks[i]['time_tracking'] = {
-                    **time_tracking,
-                    'failed_at': now.isoformat(),
-                    'failure_reason': 'timeout',
-                }
+                store.update(
+                    task_id,
+                    status='failed',
+                    updated_at=now.isoformat(),
+                    time_tracking={
+                        **time_tracking,
+                        'failed_at': now.isoformat(),
+                        'failure_reason': 'timeout',
+                    },
+                )
 
                 timeout_count += 1
 
         except Exception as e:
             logger.error(f"[Sync] Error checking timeout for task {task.get('id')}: {e}")
 
-    # 保存更新的任務
     if timeout_count > 0:
-        save_tasks(tasks)
         logger.info(f"[Sync] Marked {timeout_count} tasks as failed due to timeout")
 
 
@@ -415,12 +405,8 @@ def trigger_scout_expansion(task: Dict, output_path: str):
             logger.info(f"[Sync] No expansion tasks generated for {task.get('id')}")
             return
 
-        # 讀取現有任務並添加擴展任務
-        tasks = load_tasks()
-        tasks.extend(expansion_tasks)
-
-        # 保存
-        save_tasks(tasks)
+        # 添加擴展任務
+        get_store(TASKS_FILE).upsert_many(expansion_tasks)
 
         logger.info(f"[Sync] ✅ Scout Expansion: {len(expansion_tasks)} tasks created from {task.get('id')}")
 
@@ -462,6 +448,9 @@ def main():
         # 3. 檢查超時任務
         check_timeout_tasks()
 
+        # 4. 導出 tasks.json 供舊的讀取方使用
+        get_store(TASKS_FILE).export_json()
+
         logger.info(f"[Sync] Task sync completed")
 
     except Exception as e:
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Tasks File - tasks.json 的共享寫入路徑
+
+所有直接寫 tasks.json 的地方都應經過這裡：
+
+- 原子寫入：同目錄臨時文件 → fsync → os.replace，讀取方永遠看到完整文件
+- 寫入互斥：旁邊的 tasks.json.lock 上的 flock 建議鎖（各守護進程、儀表板共用）
+- 樂觀版本：版本為文件的 (mtime_ns, size, inode)；寫入時版本已變說明
+  讀到的是舊快照，拋出 StaleTasksError，由調用方基於新數據重新合併
+
+用法：
+    from tasks_file import update_tasks
+
+    def mutate(tasks):
+        for task in tasks:
+            if task['id'] == 'task-001':
+                task['status'] = 'completed'
+                return True
+        return False  # 沒有變化，不寫入
+
+    update_tasks(mutate)
+"""
+
+import json
+import logging
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+# 路徑配置
+WORKSPACE = Path.home() / ".openclaw" / "workspace"
+TASKS_JSON = WORKSPACE / "kanban" / "tasks.json"
+
+logger = logging.getLogger(__name__)
+
+LOCK_TIMEOUT = 30  # 秒
+MAX_RETRIES = 5
+TEMP_PREFIX = '.tasks-'
+TEMP_SUFFIX = '.tmp'
+
+# tasks.json 的三種歷史格式
+SHAPE_LIST = 'list'        # [{...}, {...}]
+SHAPE_WRAPPED = 'wrapped'  # {"tasks": [{...}]}
+SHAPE_DICT = 'dict'        # {"task_id": {...}}
+
+# write_tasks 的默認值：不檢查版本
+_ANY_VERSION = object()
+
+
+class StaleTasksError(Exception):
+    """寫入時 tasks.json 已被其他寫入方更新"""
+
+
+def parse_tasks_payload(data) -> tuple:
+    """
+    解析 tasks.json 內容
+
+    Returns:
+        (tasks, shape) 元組
+    """
+    if isinstance(data, list):
+        return data, SHAPE_LIST
+    if isinstance(data, dict):
+        if 'tasks' in data:
+            return data.get('tasks') or [], SHAPE_WRAPPED
+        # 舊格式：{"task_id": {...}}
+        return list(data.values()), SHAPE_DICT
+    return [], SHAPE_LIST
+
+
+def build_tasks_payload(tasks: List[Dict], shape: str):
+    """按原格式組裝 tasks.json 內容"""
+    if shape == SHAPE_WRAPPED:
+        return {"tasks": tasks}
+    if shape == SHAPE_DICT:
+        return {t['id']: t for t in tasks}
+    return tasks
+
+
+def _version(st: os.stat_result) -> str:
+    return f"{st.st_mtime_ns}:{st.st_size}:{st.st_ino}"
+
+
+def file_version(path: Optional[Path] = None) -> Optional[str]:
+    """文件當前版本（不存在時為 None）"""
+    try:
+        return _version(os.stat(path or TASKS_JSON))
+    except FileNotFoundError:
+        return None
+
+
+def lock_path(path: Optional[Path] = None) -> Path:
+    path = Path(path or TASKS_JSON)
+    return path.with_name(path.name + '.lock')
+
+
+@contextmanager
+def tasks_lock(path: Optional[Path] = None, timeout: float = LOCK_TIMEOUT):
+    """
+    tasks.json 的寫入鎖（flock，跨進程；同進程不同線程各自打開也互斥）
+
+    Raises:
+        TimeoutError: 超時未取得鎖
+    """
+    target = lock_path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(str(target), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if FCNTL_AVAILABLE:
+            deadline = time.monotonic() + timeout
+            while True:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    if time.monotonic() >= deadline:
+                        raise TimeoutError(f"等待 {target} 超時（{timeout}s）")
+                    time.sleep(0.05)
+        yield
+    finally:
+        # 關閉文件描述符即釋放鎖
+        os.close(fd)
+
+
+def read_tasks(path: Optional[Path] = None) -> Tuple[Any, Optional[str]]:
+    """
+    讀取 tasks.json 和對應版本（版本取自同一個已打開的文件，不會錯配）
+
+    Returns:
+        (payload, version)；文件不存在時為 ([], None)
+    """
+    try:
+        with open(path or TASKS_JSON, 'r', encoding='utf-8') as f:
+            version = _version(os.fstat(f.fileno()))
+            return json.load(f), version
+    except FileNotFoundError:
+        return [], None
+
+
+def atomic_write_json(path: Path, payload, indent: Optional[int] = 2) -> str:
+    """
+    原子寫入 JSON（不加鎖，調用方需持有 tasks_lock）
+
+    Returns:
+        寫入後的文件版本
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=TEMP_PREFIX, suffix=TEMP_SUFFIX, dir=str(path.parent))
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, indent=indent, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+    # 目錄項也落盤，確保 rename 在斷電後仍然有效
+    try:
+        dir_fd = os.open(str(path.parent), os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+    except OSError:
+        pass
+    return file_version(path)
+
+
+def write_tasks(payload, path: Optional[Path] = None, expected_version=_ANY_VERSION) -> str:
+    """
+    加鎖並原子寫入 tasks.json
+
+    Args:
+        payload: 完整文件內容
+        expected_version: 讀取時的版本（read_tasks 返回值）；省略時不檢查
+
+    Returns:
+        寫入後的文件版本
+
+    Raises:
+        StaleTasksError: 文件版本與 expected_version 不一致
+    """
+    path = Path(path or TASKS_JSON)
+    with tasks_lock(path):
+        if expected_version is not _ANY_VERSION:
+            current = file_version(path)
+            if current != expected_version:
+                raise StaleTasksError(f"{path} 已更新（{expected_version} → {current}）")
+        return atomic_write_json(path, payload)
+
+
+def update_tasks(mutate: Callable[[List[Dict]], Optional[bool]],
+                 path: Optional[Path] = None,
+                 retries: int = MAX_RETRIES) -> bool:
+    """
+    讀取 → 修改 → 寫入，遇到並發更新時基於最新文件重做
+
+    前幾次嘗試不持鎖讀取和修改（樂觀），只在寫入時短暫持鎖；重試用盡後
+    在鎖內完成整個讀改寫，保證一定能寫入。
+
+    Args:
+        mutate: 原地修改任務列表；返回 False 表示沒有變化（跳過寫入）。
+                可能被調用多次，每次拿到的都是新讀取的列表
+        retries: 樂觀重試次數
+
+    Returns:
+        是否寫入了文件
+    """
+    path = Path(path or TASKS_JSON)
+
+    for attempt in range(retries):
+        payload, version = read_tasks(path)
+        tasks, shape = parse_tasks_payload(payload)
+        if mutate(tasks) is False:
+            return False
+        try:
+            write_tasks(build_tasks_payload(tasks, shape), path, expected_version=version)
+            return True
+        except StaleTasksError as e:
+            logger.info(f"[tasks_file] 第 {attempt + 1} 次寫入衝突，重新合併: {e}")
+
+    with tasks_lock(path):
+        payload, _ = read_tasks(path)
+        tasks, shape = parse_tasks_payload(payload)
+        if mutate(tasks) is False:
+            return False
+        atomic_write_json(path, build_tasks_payload(tasks, shape))
+        return True
+
+
+def task_fingerprints(tasks: List[Dict]) -> Dict[str, str]:
+    """每個任務的序列化內容（讀取時記下，保存時用來找出本地修改過的任務）"""
+    return {
+        task.get('id'): json.dumps(task, sort_keys=True, ensure_ascii=False)
+        for task in tasks if isinstance(task, dict)
+    }
+
+
+def merge_tasks(tasks: List[Dict], baseline: Dict[str, str], path: Optional[Path] = None) -> int:
+    """
+    把內存中修改過的任務合併進最新的 tasks.json
+
+    給長時間持有整個任務列表的寫入方使用：只寫回相對 baseline 有變化的任務
+    （按 ID 替換或追加），其他任務保持文件中的最新狀態。
+
+    Args:
+        tasks: 內存中的任務列表
+        baseline: 讀取時的 task_fingerprints
+
+    Returns:
+        合併的任務數
+    """
+    changed = {
+        task['id']: task for task in tasks
+        if isinstance(task, dict) and task.get('id')
+        and json.dumps(task, sort_keys=True, ensure_ascii=False) != baseline.get(task['id'])
+    }
+    if not changed:
+        return 0
+
+    def mutate(fresh_tasks):
+        seen = set()
+        for i, task in enumerate(fresh_tasks):
+            task_id = task.get('id') if isinstance(task, dict) else None
+            if task_id in changed:
+                fresh_tasks[i] = changed[task_id]
+                seen.add(task_id)
+        fresh_tasks.extend(task for task_id, task in changed.items() if task_id not in seen)
+
+    update_tasks(mutate, path)
+    return len(changed)
+
+
+def cleanup_temp_files(path: Optional[Path] = None, max_age: float = 3600) -> int:
+    """
+    清理中斷的寫入留下的臨時文件（.tasks-*.tmp 和舊寫入方的 tmp*.tmp）
+
+    Returns:
+        刪除的文件數
+    """
+    path = Path(path or TASKS_JSON)
+    cutoff = time.time() - max_age
+    removed = 0
+    with tasks_lock(path):
+        for pattern in (f'{TEMP_PREFIX}*{TEMP_SUFFIX}', f'tmp*{TEMP_SUFFIX}'):
+            for tmp in path.parent.glob(pattern):
+                try:
+                    if tmp.stat().st_mtime < cutoff:
+                        tmp.unlink()
+                        removed += 1
+                except FileNotFoundError:
+                    continue
+    return removed
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='tasks.json 寫入工具')
+    parser.add_argument('command', choices=['version', 'cleanup'], help='命令')
+    parser.add_argument('--tasks-json', help='tasks.json 路徑')
+    parser.add_argument('--max-age', type=float, default=3600, help='臨時文件最小存在秒數')
+    args = parser.parse_args()
+
+    path = Path(args.tasks_json) if args.tasks_json else TASKS_JSON
+    if args.command == 'version':
+        print(file_version(path) or '（文件不存在）')
+    elif args.command == 'cleanup':
+        removed = cleanup_temp_files(path, args.max_age)
+        print(f"✅ 已清理 {removed} 個臨時文件")
+
+
+if __name__ == '__main__':
+    main()
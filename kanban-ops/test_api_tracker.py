@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+API 追蹤器測試
+"""
+
+import json
+import random
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import api_tracker
+from api_tracker import APITracker, DurationSketch
+
+
+class TestDurationSketch(unittest.TestCase):
+    """測試時延草圖的精度與合併"""
+
+    def test_quantiles_within_relative_error(self):
+        rng = random.Random(7)
+        values = [rng.lognormvariate(6, 1.2) for _ in range(20000)]
+        left, right = DurationSketch(), DurationSketch()
+        for i, value in enumerate(values):
+            (left if i % 2 else right).add(value)
+        left.merge(right)
+
+        values.sort()
+        for q in (0.5, 0.95, 0.99):
+            exact = values[int(q * (len(values) - 1))]
+            self.assertLess(abs(left.quantile(q) - exact) / exact, 0.05)
+        self.assertEqual(left.count, 20000)
+
+        restored = DurationSketch.from_dict(json.loads(json.dumps(left.to_dict())))
+        self.assertEqual(restored.quantile(0.99), left.quantile(0.99))
+
+
+class TestAPITracker(unittest.TestCase):
+    """測試追加日誌、增量聚合與窗口查詢"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        root = Path(self.tmpdir.name)
+        self.paths = {
+            'journal_path': root / 'journal.jsonl',
+            'aggregates_path': root / 'aggregates.json',
+            'stats_path': root / 'stats.json',
+        }
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def open_tracker(self):
+        return APITracker(**self.paths)
+
+    def record(self, tracker, task_id, error=None, ms=100):
+        start = datetime.now(timezone.utc) - timedelta(milliseconds=ms)
+        status = None if error else 'accepted'
+        return tracker.record_call(task_id, 'spawn', start, status_code=status, error_message=error)
+
+    def test_window_summary_and_restart(self):
+        tracker = self.open_tracker()
+        for i in range(30):
+            self.record(tracker, f't{i}')
+        self.record(tracker, 'r1', error='429 Too Many Requests')
+        self.record(tracker, 't-timeout', error='request timed out')
+
+        summary = tracker.get_error_summary(1)
+        self.assertEqual(summary['total_calls'], 32)
+        self.assertEqual(summary['by_type'], {'rate_limit': 1, 'timeout': 1})
+        self.assertEqual([e['task_id'] for e in summary['recent_errors']], ['r1', 't-timeout'])
+        self.assertEqual(tracker.get_latency_summary(1)['spawn']['count'], 32)
+
+        # 只 flush 了一部分，重啟後從日誌偏移處補齊
+        tracker.flush()
+        self.record(tracker, 't-after')
+        reopened = self.open_tracker()
+        self.assertEqual(reopened.stats.total_calls, 33)
+        self.assertEqual(reopened.stats.rate_limit_errors, 1)
+        self.assertEqual(len(reopened.get_recent_records(1)), 33)
+
+        # 另一個實例（進程）追加的記錄也會被計入
+        self.record(reopened, 'other')
+        self.assertEqual(tracker.get_error_summary(1)['total_calls'], 34)
+
+    def test_rotation_keeps_aggregates(self):
+        tracker = self.open_tracker()
+        original = api_tracker.JOURNAL_MAX_BYTES
+        api_tracker.JOURNAL_MAX_BYTES = 4096
+        try:
+            for i in range(40):
+                self.record(tracker, f't{i}', error='connection reset' if i % 10 == 0 else None)
+        finally:
+            api_tracker.JOURNAL_MAX_BYTES = original
+
+        rotated = list(Path(self.tmpdir.name).glob('journal.jsonl.*'))
+        self.assertTrue(rotated)
+        self.assertEqual(len(list(tracker.iter_records())), 40)
+        self.assertEqual(tracker.stats.total_calls, 40)
+        self.assertEqual(tracker.get_error_summary(1)['by_type'], {'network': 4})
+
+        tracker.flush()
+        with open(self.paths['stats_path'], 'r', encoding='utf-8') as f:
+            stats = json.load(f)
+        self.assertEqual(stats['failed_calls'], 4)
+        self.assertGreater(stats['p99_duration_ms'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+背壓控制器測試
+"""
+
+import json
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import backpressure
+from api_tracker import APITracker
+from backpressure import BackpressureManager
+from task_store import TaskStore
+
+
+class TestBackpressureController(unittest.TestCase):
+    """測試 AIMD 調整與信號收集"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        root = Path(self.tmpdir.name)
+        self.tasks_json = root / 'tasks.json'
+        self.stats_file = root / 'backpressure_stats.json'
+        self.tracker = APITracker(root / 'journal.jsonl', root / 'aggregates.json', root / 'stats.json')
+
+        self._saved = (backpressure.get_tracker, backpressure.RECOVERY_STATS_FILE)
+        backpressure.get_tracker = lambda: self.tracker
+        backpressure.RECOVERY_STATS_FILE = root / 'error_recovery_stats.json'
+
+    def tearDown(self):
+        backpressure.get_tracker, backpressure.RECOVERY_STATS_FILE = self._saved
+        self.tmpdir.cleanup()
+
+    def set_running(self, count):
+        with open(self.tasks_json, 'w', encoding='utf-8') as f:
+            json.dump([{'id': f't{i}', 'status': 'in_progress'} for i in range(count)], f)
+        store = TaskStore(self.tasks_json)
+        store.sync_from_json(force=True)
+        store.close()
+
+    def call(self, error=None, ms=200):
+        start = datetime.now(timezone.utc) - timedelta(milliseconds=ms)
+        self.tracker.record_call('t', 'spawn', start,
+                                 status_code=None if error else 'accepted', error_message=error)
+
+    def test_additive_increase_and_multiplicative_decrease(self):
+        manager = BackpressureManager(self.stats_file, self.tasks_json)
+        self.set_running(3)
+        manager.check_and_adjust()  # 第一次只記錄計數基準
+
+        # 並發用滿且無錯誤：逐步提高上限
+        limits = []
+        for running in (3, 4, 5):
+            self.set_running(running)
+            for _ in range(5):
+                self.call()
+            limits.append(manager.check_and_adjust()['max_concurrent'])
+        self.assertEqual(limits, [4, 5, 6])
+        self.assertEqual(manager.get_spawn_interval(), BackpressureManager.SPAWN_INTERVAL_MIN)
+
+        # 出現 429：乘性減
+        self.call(error='429 Too Many Requests')
+        result = manager.check_and_adjust()
+        self.assertEqual(result['last_action'], 'decrease')
+        self.assertEqual(result['max_concurrent'], 4)
+        self.assertTrue(manager.is_reduced_concurrent())
+
+        # 未用滿時保持
+        self.set_running(1)
+        for _ in range(20):
+            self.call()
+        self.assertEqual(manager.check_and_adjust()['last_action'], 'hold')
+
+        # 狀態持久化，重新載入後沿用
+        reloaded = BackpressureManager(self.stats_file, self.tasks_json)
+        self.assertEqual(reloaded.stats.concurrency_limit, manager.stats.concurrency_limit)
+        self.assertLessEqual(len(reloaded.stats.health_hourly), BackpressureManager.HEALTH_HISTORY_HOURS)
+
+    def test_latency_gradient_and_legacy_stats(self):
+        with open(self.stats_file, 'w', encoding='utf-8') as f:
+            json.dump({'max_concurrent': 3, 'health': 1.0,
+                       'health_history': [['2026-01-01T00:00:00', 1.0]]}, f)
+        manager = BackpressureManager(self.stats_file, self.tasks_json)
+        self.assertEqual(manager.stats.concurrency_limit, 3.0)
+
+        self.set_running(0)
+        manager.check_and_adjust()
+        self.call(ms=100)
+        manager.check_and_adjust()
+
+        # 時延升到基線的數倍：按梯度收縮，健康度下降，啟動變慢
+        for _ in range(5):
+            self.call(ms=2000)
+            result = manager.check_and_adjust()
+        self.assertEqual(result['last_action'], 'decrease')
+        self.assertLess(result['health'], 0.5)
+        self.assertGreater(result['spawn_interval'], BackpressureManager.SPAWN_INTERVAL_MIN)
+        self.assertGreaterEqual(result['max_concurrent'], BackpressureManager.MIN_CONCURRENT)
+
+
+if __name__ == '__main__':
+    unittest.main()
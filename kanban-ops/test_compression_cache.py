@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+輸入壓縮緩存測試
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import compression_cache
+import input_compressor
+from compression_cache import CompressionCache
+from qmd_enhanced_compressor import QMDEnhancedCompressor
+
+
+DOC = "# Title\n\n## Section A\n\nalpha beta\n\n## Section B\n\ngamma delta\n"
+
+
+class TestCompressionCache(unittest.TestCase):
+    """測試內容尋址、LRU 淘汰和統計合併"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmpdir.name)
+        self.stats_file = self.root / 'compression_stats.json'
+        with open(self.stats_file, 'w', encoding='utf-8') as f:
+            json.dump({'original_size': 7724, 'compressed_files': 0}, f)
+
+    def tearDown(self):
+        compression_cache._cache = None
+        self.tmpdir.cleanup()
+
+    def open_cache(self, **kwargs):
+        return CompressionCache(self.root / 'cache', self.stats_file, **kwargs)
+
+    def write(self, name, text):
+        path = self.root / name
+        path.write_text(text, encoding='utf-8')
+        return path
+
+    def test_content_addressed_hits(self):
+        cache = self.open_cache()
+        first = self.write('a.md', DOC)
+        copy = self.write('b.md', DOC)
+
+        key, value = cache.lookup(first, 'query')
+        self.assertIsNone(value)
+        cache.put(key, {'summary': 'x', 'original_size': 100})
+
+        # 相同內容、相同查詢：命中（與路徑無關）
+        self.assertEqual(cache.lookup(copy, 'query')[1], {'summary': 'x', 'original_size': 100})
+        # 不同查詢或內容變化：未命中
+        self.assertIsNone(cache.lookup(copy, 'other query')[1])
+        first.write_text(DOC + "\nmore\n", encoding='utf-8')
+        self.assertIsNone(cache.lookup(first, 'query')[1])
+        cache.flush()
+
+        # 新實例讀取索引；統計合併且保留原有字段
+        reopened = self.open_cache()
+        self.assertIsNotNone(reopened.lookup(copy, 'query')[1])
+        reopened.flush()
+        with open(self.stats_file, 'r', encoding='utf-8') as f:
+            stats = json.load(f)
+        self.assertEqual(stats['original_size'], 7724)
+        self.assertEqual(stats['input_cache']['hits'], 2)
+        self.assertEqual(stats['input_cache']['misses'], 3)
+        self.assertEqual(stats['input_cache']['entries'], 1)
+
+    def test_lru_eviction(self):
+        cache = self.open_cache(max_bytes=300)
+        keys = []
+        for i in range(4):
+            path = self.write(f'f{i}.md', f"{DOC}{i}")
+            key, _ = cache.lookup(path, 'q')
+            cache.put(key, {'summary': 'x' * 100, 'n': i})
+            keys.append(key)
+        cache.get(keys[0])  # 最近訪問，不應被淘汰
+        cache.flush()
+
+        remaining = set(self.open_cache().entries)
+        self.assertIn(keys[0], remaining)
+        self.assertNotIn(keys[1], remaining)
+        self.assertFalse((self.root / 'cache' / f"{keys[1]}.json").exists())
+
+    def test_warm_spawn_skips_compression(self):
+        compression_cache._cache = self.open_cache()
+        self.write('input.md', DOC)
+        task = {'title': 'Analyze', 'input_paths': ['input.md']}
+
+        cold = input_compressor.compress_task_inputs(task, workspace=self.root)
+
+        class NoCompressor:
+            def __init__(self, *args, **kwargs):
+                raise AssertionError("compressor should not be created on a warm cache")
+
+        saved = (input_compressor.QMDEnhancedCompressor, input_compressor._basic_compress)
+        input_compressor.QMDEnhancedCompressor = NoCompressor
+        input_compressor._basic_compress = NoCompressor
+        try:
+            compression_cache._cache = self.open_cache()
+            warm = input_compressor.compress_task_inputs(task, workspace=self.root)
+        finally:
+            input_compressor.QMDEnhancedCompressor, input_compressor._basic_compress = saved
+        self.assertEqual(cold, warm)
+
+
+    def test_semantic_fallback_is_not_cached(self):
+        # 假 qmd：search 第一次失敗（觸發回退），之後返回一條結果
+        qmd = self.root / 'qmd'
+        qmd.write_text(
+            f"#!{sys.executable}\n"
+            "import json, sys\n"
+            "from pathlib import Path\n"
+            "flag = Path(__file__).with_name('failed_once')\n"
+            "if not flag.exists():\n"
+            "    flag.touch()\n"
+            "    sys.exit(1)\n"
+            "print(json.dumps([{'content': 'gamma delta', 'score': 0.9}]))\n",
+            encoding='utf-8'
+        )
+        os.chmod(qmd, 0o755)
+        path = self.write('input.md', DOC)
+        cache = self.open_cache()
+        compressor = QMDEnhancedCompressor(qmd_path=str(qmd), semantic_threshold=0, cache=cache)
+        compressor._qmd_available = True
+
+        first = compressor.compress_file(str(path), 'gamma')
+        self.assertTrue(first.get('fallback'))
+        self.assertIsNone(cache.lookup(path, 'gamma', 'auto')[1])
+
+        # 下次重試語意搜索，成功的結果才寫入緩存
+        second = compressor.compress_file(str(path), 'gamma')
+        self.assertNotIn('fallback', second)
+        self.assertEqual(second['method'], 'qmd_semantic')
+        self.assertEqual(cache.lookup(path, 'gamma', 'auto')[1], second)
+
+if __name__ == '__main__':
+    unittest.main()
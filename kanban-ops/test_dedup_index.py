@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+去重索引測試
+"""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from dedup_index import DedupIndex, extract_arxiv_id, minhash, title_similarity
+
+
+def make_task(task_id, title, status='pending'):
+    return {'id': task_id, 'title': title, 'status': status}
+
+
+class TestDedupIndex(unittest.TestCase):
+    """測試精確 / arXiv / 相似標題查找與增量同步"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.tmpdir.name) / 'dedup_index.db'
+        self.indexes = []
+
+    def tearDown(self):
+        for index in self.indexes:
+            index.close()
+        self.tmpdir.cleanup()
+
+    def open_index(self):
+        index = DedupIndex(self.db_path)
+        self.indexes.append(index)
+        return index
+
+    def test_extract_arxiv_id(self):
+        self.assertEqual(extract_arxiv_id('Paper (arXiv: 2401.12345)'), '2401.12345')
+        self.assertEqual(extract_arxiv_id('arxiv ID: 2312.0001'), '2312.0001')
+        self.assertIsNone(extract_arxiv_id('No identifier here'))
+
+    def test_minhash_is_stable(self):
+        self.assertEqual(minhash('Fat Tail Risk'), minhash('fat-tail  risk'))
+        self.assertEqual(len(minhash('x')), 64)
+
+    def test_exact_and_arxiv(self):
+        index = self.open_index()
+        index.sync([
+            make_task('a', 'Momentum Crashes'),
+            make_task('b', 'Deep Hedging arXiv:1802.03042', status='completed'),
+        ])
+        self.assertEqual(index.find_exact('Momentum Crashes')['id'], 'a')
+        self.assertIsNone(index.find_exact('Momentum Crashes', status='completed'))
+        self.assertEqual(index.find_arxiv('1802.03042')['task']['id'], 'b')
+
+        index.sync_qdm({'arxiv': [{'title': 'arXiv 2001.00001 Some Topic'}]})
+        self.assertEqual(index.find_arxiv('2001.00001')['type'], 'qdm')
+        self.assertIsNone(index.find_arxiv('9999.99999'))
+
+    def test_similar_title(self):
+        titles = [
+            'From Chain-Ladder to Individual Claims Reserving',
+            'Asymptotically Optimal Sequential Testing with Markovian Data',
+            'Volatility Targeting and Drawdown Control',
+        ]
+        index = self.open_index()
+        index.sync([make_task(f't{i}', title) for i, title in enumerate(titles)])
+
+        query = 'From Chain Ladder to Individual Claim Reserving'
+        match = index.find_similar(query, 0.85)
+        self.assertEqual(match['task']['id'], 't0')
+        self.assertAlmostEqual(match['similarity'], title_similarity(query, titles[0]))
+        self.assertIsNone(index.find_similar('Completely Unrelated Research Paper', 0.85))
+
+    def test_incremental_sync_and_persistence(self):
+        index = self.open_index()
+        tasks = [make_task('a', 'Alpha Factor Decay'), make_task('b', 'Beta Neutral Portfolios')]
+        self.assertEqual(index.sync(tasks), {'indexed': 2, 'removed': 0})
+        self.assertEqual(index.sync(tasks), {'indexed': 0, 'removed': 0})
+
+        tasks = [make_task('a', 'Alpha Factor Decay', status='completed'), make_task('c', 'Carry Trades')]
+        self.assertEqual(index.sync(tasks), {'indexed': 1, 'removed': 1})
+        self.assertIsNone(index.find_exact('Beta Neutral Portfolios'))
+        self.assertIsNone(index.find_similar('Beta Neutral Portfolio', 0.85))
+
+        index.add(make_task('d', 'Dispersion Trading'))
+        reopened = self.open_index()
+        self.assertEqual(reopened.find_exact('Alpha Factor Decay', status='completed')['id'], 'a')
+        self.assertEqual(reopened.find_similar('Dispersion Trading Strategy', 0.8)['task']['id'], 'd')
+
+
+if __name__ == '__main__':
+    unittest.main()
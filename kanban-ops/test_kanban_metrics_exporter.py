@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+指標導出器測試
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import kanban_metrics_exporter as exporter
+
+
+def make_task(task_id, status='completed', **extra):
+    task = {
+        'id': task_id,
+        'status': status,
+        'agent': 'research',
+        'time_tracking': {'actual_time_minutes': 12},
+        'token_usage': {'input': 100, 'output': 10},
+    }
+    task.update(extra)
+    return task
+
+
+def counter_value(counter, **labels):
+    return counter.metrics.get(tuple(sorted(labels.items())), 0)
+
+
+class TestMetricsCollector(unittest.TestCase):
+    """測試跨抓取保存狀態的採集器"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.tasks_json = Path(self.tmpdir.name) / 'tasks.json'
+        self.log = Path(self.tmpdir.name) / 'auto_recovery.log'
+        for metric in exporter.ALL_METRICS:
+            metric.metrics = {}
+        self.collector = exporter.MetricsCollector(str(self.tasks_json), str(self.log))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write_tasks(self, tasks):
+        with open(self.tasks_json, 'w', encoding='utf-8') as f:
+            json.dump(tasks, f)
+        # 確保 mtime 變化
+        stamp = time.time_ns() + 1_000_000
+        os.utime(self.tasks_json, ns=(stamp, stamp))
+
+    def test_counters_do_not_inflate(self):
+        self.write_tasks([make_task('a'), make_task('b', status='pending')])
+        self.assertTrue(self.collector.refresh())
+        first = self.collector.body
+
+        # 文件未變化：不重新採集，直接返回緩存
+        self.assertFalse(self.collector.refresh())
+        self.assertIs(self.collector.body, first)
+
+        # 文件變化但內容相同的任務不重複計數
+        self.write_tasks([
+            make_task('a', token_usage={'input': 150, 'output': 10}),
+            make_task('b'),
+        ])
+        self.assertTrue(self.collector.refresh())
+        tokens = exporter.task_tokens_total
+        self.assertEqual(counter_value(tokens, agent='research', direction='input'), 250)
+        self.assertEqual(counter_value(tokens, agent='research', direction='output'), 20)
+        self.assertEqual(counter_value(exporter.tasks_total, status='completed'), 2)
+        self.assertEqual(counter_value(exporter.tasks_total, status='pending'), 1)
+        self.assertEqual(
+            exporter.task_duration_minutes.metrics[(('agent', 'research'),)]['count'], 2
+        )
+
+        # 任務被歸檔：gauge 下降，計數器不下降
+        self.write_tasks([])
+        self.collector.refresh()
+        self.assertEqual(exporter.tasks_by_agent.metrics, {})
+        self.assertEqual(counter_value(exporter.tasks_total, status='completed'), 2)
+
+    def test_log_is_tailed_from_offset(self):
+        runs = exporter.auto_recovery_runs
+        with open(self.log, 'w', encoding='utf-8') as f:
+            f.write('✅ Auto-recovery completed\nRecovered task: a\n✅ Auto-rec')
+        self.collector.refresh()
+        self.assertEqual(counter_value(runs, result='success'), 1)
+
+        # 補完最後一行並追加新行
+        with open(self.log, 'a', encoding='utf-8') as f:
+            f.write('overy completed\n❌ Auto-recovery failed\n')
+        self.collector.refresh()
+        self.collector.refresh()
+        self.assertEqual(counter_value(runs, result='success'), 2)
+        self.assertEqual(counter_value(runs, result='error'), 1)
+        self.assertEqual(counter_value(exporter.auto_recovery_recovered_tasks), 1)
+
+        # 日誌輪轉後從新文件開頭讀取，計數繼續累加
+        self.log.unlink()
+        with open(self.log, 'w', encoding='utf-8') as f:
+            f.write('✅ Auto-recovery completed\n')
+        self.collector.refresh()
+        self.assertEqual(counter_value(runs, result='success'), 3)
+        self.assertIn(b'openclaw_auto_recovery_runs_total{result="success"} 3', self.collector.body)
+
+
+if __name__ == '__main__':
+    unittest.main()
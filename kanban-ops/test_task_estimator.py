@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+任務預估器測試
+"""
+
+import random
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from task_estimator import TaskEstimator, static_token_estimate
+from spawn_tasks_intelligent import pack_batch
+
+
+def make_task(task_id, agent='research', complexity=1, text='x'):
+    return {
+        'id': task_id,
+        'agentId': agent,
+        'status': 'completed',
+        'task': text,
+        'time_tracking': {'complexity_level': complexity},
+    }
+
+
+class TestTaskEstimator(unittest.TestCase):
+    """測試靜態先驗、增量學習與分位數"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.state = Path(self.tmpdir.name) / 'estimator.json'
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_static_text_tiers(self):
+        base = static_token_estimate(make_task('a'))['max']
+        self.assertEqual(static_token_estimate(make_task('b', text='x' * 6000))['max'], int(base * 1.2))
+        self.assertEqual(static_token_estimate(make_task('c', text='x' * 12000))['max'], int(base * 1.4))
+
+    def test_learns_from_history(self):
+        estimator = TaskEstimator(self.state)
+        prior = estimator.estimate_tokens(make_task('new'))
+        self.assertEqual(prior['source'], 'prior')
+        self.assertEqual(prior['avg'], static_token_estimate(make_task('new'))['avg'])
+
+        # research 任務實際用量約為靜態預估的 2 倍，且隨複雜度增長更快
+        rng = random.Random(3)
+        for i in range(200):
+            complexity = rng.randint(1, 4)
+            task = make_task(f't{i}', complexity=complexity)
+            actual = 2 * static_token_estimate(task)['avg'] * (1.1 ** (complexity - 1)) * rng.lognormvariate(0, 0.1)
+            self.assertEqual(estimator.observe(task, tokens=actual, minutes=20 * 1.3 ** (complexity - 1)), 2)
+        self.assertEqual(estimator.observe(make_task('t0'), tokens=1), 0)  # 已計入
+
+        reloaded = TaskEstimator(self.state)
+        task = make_task('new', complexity=3)
+        expected = 2 * static_token_estimate(task)['avg'] * 1.21
+        estimate = reloaded.estimate_tokens(task)
+        self.assertEqual(estimate['source'], 'learned')
+        self.assertLess(abs(estimate['p50'] - expected) / expected, 0.1)
+        self.assertGreater(estimate['p90'], estimate['p50'])
+        self.assertLess(estimate['p90'] / estimate['p50'], 1.4)
+        self.assertAlmostEqual(reloaded.predict(task, 'minutes')['p50'], 33.8, delta=2)
+
+        # 其他代理沒有數據時仍接近先驗
+        developer = make_task('dev', agent='developer')
+        self.assertLess(reloaded.estimate_tokens(developer)['avg'],
+                        1.6 * static_token_estimate(developer)['avg'])
+
+
+class TestPackBatch(unittest.TestCase):
+    """測試按 p90 的背包分組"""
+
+    def test_fills_capacity(self):
+        weights = [150, 60, 90, 100, 50]
+        chosen = pack_batch(weights, 240, 5)
+        self.assertEqual(sum(weights[i] for i in chosen), 240)
+        self.assertLessEqual(len(pack_batch([10] * 10, 240, 3)), 3)
+        self.assertEqual(pack_batch([300], 240, 5), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
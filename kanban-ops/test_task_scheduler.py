@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+依賴圖調度器測試
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from task_scheduler import DependencyScheduler
+
+
+def make_task(task_id, status='pending', priority='medium', created_at=None, deps=None, **extra):
+    task = {
+        'id': task_id,
+        'status': status,
+        'priority': priority,
+        'created_at': created_at or f'2026-03-01T00:00:{len(task_id):02d}',
+    }
+    if deps is not None:
+        task['dependencies'] = deps
+    task.update(extra)
+    return task
+
+
+class TestDependencyScheduler(unittest.TestCase):
+    """測試就緒隊列、增量更新與依賴圖檢查"""
+
+    def ids(self, tasks):
+        return [t['id'] for t in tasks]
+
+    def test_priority_and_created_at_order(self):
+        tasks = [
+            make_task('low', priority='low', created_at='2026-03-01T00:00:00'),
+            make_task('med-late', created_at='2026-03-01T02:00:00'),
+            make_task('high', priority='high', created_at='2026-03-01T03:00:00'),
+            make_task('med-early', priority='normal', created_at='2026-03-01T01:00:00'),
+            make_task('done', status='completed'),
+        ]
+        scheduler = DependencyScheduler(tasks)
+        self.assertEqual(self.ids(scheduler.next_spawnable(3)), ['high', 'med-early', 'med-late'])
+        # 查詢不會消耗隊列
+        self.assertEqual(self.ids(scheduler.next_spawnable(10)), ['high', 'med-early', 'med-late', 'low'])
+
+    def test_dependencies_release_on_completion(self):
+        tasks = [
+            make_task('a'),
+            make_task('b', deps=['a']),
+            make_task('c', deps=['a', 'b']),
+        ]
+        scheduler = DependencyScheduler(tasks)
+        self.assertEqual(self.ids(scheduler.next_spawnable(5)), ['a'])
+
+        tasks[0] = make_task('a', status='completed')
+        self.assertEqual(scheduler.sync(tasks), 1)
+        self.assertEqual(self.ids(scheduler.next_spawnable(5)), ['b'])
+
+        tasks[1] = make_task('b', status='completed', deps=['a'])
+        scheduler.sync(tasks)
+        self.assertEqual(self.ids(scheduler.next_spawnable(5)), ['c'])
+
+        # 依賴重新打開時，下游任務回到阻塞狀態
+        tasks[0] = make_task('a', status='failed')
+        scheduler.sync(tasks)
+        self.assertEqual(self.ids(scheduler.next_spawnable(5)), [])
+
+    def test_status_and_priority_changes(self):
+        tasks = [make_task('a'), make_task('b')]
+        scheduler = DependencyScheduler(tasks)
+
+        tasks[0] = make_task('a', status='spawning')
+        tasks[1] = make_task('b', priority='high')
+        self.assertEqual(scheduler.sync(tasks), 2)
+        self.assertEqual(self.ids(scheduler.next_spawnable(5)), ['b'])
+        self.assertEqual(scheduler.sync(tasks), 0)
+
+    def test_unknown_dependency_does_not_block(self):
+        scheduler = DependencyScheduler([make_task('a', deps=['ghost'])])
+        self.assertEqual(self.ids(scheduler.next_spawnable(5)), ['a'])
+        self.assertEqual(scheduler.validate()['unknown'], {'a': ['ghost']})
+
+        # 之後出現的同名任務會阻塞下游
+        scheduler.sync([make_task('a', deps=['ghost']), make_task('ghost', status='in_progress')])
+        self.assertEqual(self.ids(scheduler.next_spawnable(5)), [])
+
+        # 依賴被移除後視為已滿足
+        scheduler.sync([make_task('a', deps=['ghost'])])
+        self.assertEqual(self.ids(scheduler.next_spawnable(5)), ['a'])
+
+    def test_cycles_detected(self):
+        tasks = [
+            make_task('a', deps=['c']),
+            make_task('b', deps=['a']),
+            make_task('c', deps=['b']),
+            make_task('d', deps=['a']),
+            make_task('e', deps=['e']),
+            make_task('f'),
+        ]
+        scheduler = DependencyScheduler(tasks)
+        cycles = scheduler.validate()['cycles']
+        self.assertEqual(sorted(sorted(c) for c in cycles), [['a', 'b', 'c'], ['e']])
+        self.assertEqual(self.ids(scheduler.next_spawnable(5)), ['f'])
+
+    def test_predicate(self):
+        tasks = [
+            make_task('x', priority='high', agent='analyst'),
+            make_task('y', agent='research'),
+            make_task('z', priority='low', agent='research'),
+        ]
+        scheduler = DependencyScheduler(tasks)
+        research = scheduler.next_spawnable(1, lambda t: t.get('agent') == 'research')
+        self.assertEqual(self.ids(research), ['y'])
+        self.assertEqual(self.ids(scheduler.next_spawnable(5)), ['x', 'y', 'z'])
+
+
+if __name__ == '__main__':
+    unittest.main()
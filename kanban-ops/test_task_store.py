@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+TaskStore 單元測試
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+# 添加 kanban-ops 到路徑
+sys.path.insert(0, str(Path(__file__).parent))
+
+from task_store import TaskStore
+from tasks_file import update_tasks
+
+
+def make_task(task_id, status='pending', **extra):
+    task = {
+        'id': task_id,
+        'title': f'Task {task_id}',
+        'status': status,
+        'agent': 'research',
+        'priority': 'normal',
+        'updated_at': '2026-01-01T00:00:00+00:00',
+    }
+    task.update(extra)
+    return task
+
+
+class TestTaskStore(unittest.TestCase):
+    """測試 SQLite 任務存儲"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.tasks_json = Path(self.tmpdir.name) / 'tasks.json'
+        self.stores = []
+
+    def tearDown(self):
+        for store in self.stores:
+            store.close()
+        self.tmpdir.cleanup()
+
+    def open_store(self, export_delay=None):
+        store = TaskStore(self.tasks_json, export_delay=export_delay)
+        self.stores.append(store)
+        return store
+
+    def write_json(self, payload):
+        with open(self.tasks_json, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False)
+
+    def read_json(self):
+        with open(self.tasks_json, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def test_import_and_export_keep_shape(self):
+        """測試導入後導出保持原格式"""
+        for payload in (
+            [make_task('a'), make_task('b')],
+            {'tasks': [make_task('a'), make_task('b')]},
+            {'a': make_task('a'), 'b': make_task('b')},
+        ):
+            for suffix in ('', '-wal', '-shm'):
+                db = Path(str(self.tasks_json.with_suffix('.db')) + suffix)
+                if db.exists():
+                    db.unlink()
+            self.write_json(payload)
+
+            store = TaskStore(self.tasks_json)
+            self.assertEqual([t['id'] for t in store.all()], ['a', 'b'])
+            store.update('a', status='completed')
+            store.close()
+
+            exported = self.read_json()
+            self.assertEqual(type(exported), type(payload))
+            if isinstance(exported, dict) and 'tasks' in exported:
+                exported = exported['tasks']
+            elif isinstance(exported, dict):
+                exported = list(exported.values())
+            self.assertEqual(exported[0]['status'], 'completed')
+            self.assertEqual(exported[1]['status'], 'pending')
+
+    def test_update_is_row_level(self):
+        """測試單行更新不影響其他任務，且保持順序"""
+        self.write_json([make_task(f't{i}') for i in range(50)])
+        store = self.open_store()
+
+        updated = store.update('t10', status='in_progress', note='x')
+        self.assertEqual(updated['status'], 'in_progress')
+        self.assertNotEqual(updated['updated_at'], '2026-01-01T00:00:00+00:00')
+        self.assertIsNone(store.update('missing', status='failed'))
+
+        self.assertEqual(store.count(status='in_progress'), 1)
+        self.assertEqual(store.count(status='pending'), 49)
+        self.assertEqual([t['id'] for t in store.all()][:3], ['t0', 't1', 't2'])
+        self.assertEqual(store.get('t10')['note'], 'x')
+
+    def test_insert_does_not_overwrite(self):
+        """測試 insert 遇到已存在的任務時不覆蓋"""
+        store = self.open_store()
+        self.assertTrue(store.insert(make_task('a')))
+        self.assertFalse(store.insert(make_task('a', status='failed')))
+        self.assertEqual(store.get('a')['status'], 'pending')
+
+    def test_find_by_suffix(self):
+        """測試短 ID 後綴匹配"""
+        store = self.open_store()
+        store.upsert(make_task('20260301-research-r001'))
+        self.assertEqual(store.find('r001')['id'], '20260301-research-r001')
+        self.assertIsNone(store.find('r_01'))
+
+    def test_fields_projection(self):
+        """測試只取部分字段"""
+        store = self.open_store()
+        store.upsert_many([make_task('a'), make_task('b', status='completed')])
+        self.assertEqual(store.fields('title', 'status', 'missing'), [
+            {'id': 'a', 'title': 'Task a', 'status': 'pending', 'missing': None},
+            {'id': 'b', 'title': 'Task b', 'status': 'completed', 'missing': None},
+        ])
+        with self.assertRaises(ValueError):
+            store.fields("title') --")
+
+    def test_replace_all_deletes_and_reorders(self):
+        """測試 replace_all 的覆蓋語義"""
+        store = self.open_store()
+        store.upsert_many([make_task('a'), make_task('b'), make_task('c')])
+        store.replace_all([make_task('c'), make_task('a')])
+        self.assertEqual([t['id'] for t in store.all()], ['c', 'a'])
+        self.assertFalse(store.exists('b'))
+
+    def test_external_json_edit_is_imported(self):
+        """測試舊腳本直接改寫 tasks.json 後重新導入"""
+        self.write_json([make_task('a')])
+        store = self.open_store()
+        store.export_json(force=True)
+
+        time.sleep(0.01)
+        self.write_json([make_task('a', status='completed'), make_task('b')])
+        os.utime(self.tasks_json, None)
+
+        self.assertTrue(store.sync_from_json())
+        self.assertEqual(store.get('a')['status'], 'completed')
+        self.assertTrue(store.exists('b'))
+
+    def test_dirty_merge_keeps_newer_rows(self):
+        """測試有未導出修改時按 updated_at 合併"""
+        self.write_json([make_task('a'), make_task('b')])
+        store = self.open_store()
+        store.update('a', status='in_progress', updated_at='2026-02-01T00:00:00+00:00')
+        store.upsert(make_task('new'))
+
+        self.write_json([
+            make_task('a', status='failed', updated_at='2026-01-15T00:00:00+00:00'),
+            make_task('b', status='completed', updated_at='2026-01-15T00:00:00+00:00'),
+        ])
+        store.sync_from_json(force=True)
+
+        self.assertEqual(store.get('a')['status'], 'in_progress')
+        self.assertEqual(store.get('b')['status'], 'completed')
+        self.assertTrue(store.exists('new'))
+        self.assertTrue(store.dirty)
+
+    def test_export_merges_concurrent_json_write(self):
+        """測試導出前 tasks.json 被其他寫入方更新時先合併，不覆蓋"""
+        self.write_json([make_task('a'), make_task('b')])
+        store = self.open_store()
+        store.update('a', status='completed')
+
+        time.sleep(0.01)
+        self.write_json([
+            make_task('a'),
+            make_task('b', status='failed', updated_at='2026-02-01T00:00:00+00:00'),
+        ])
+
+        self.assertTrue(store.export_json())
+        exported = {t['id']: t['status'] for t in self.read_json()}
+        self.assertEqual(exported, {'a': 'completed', 'b': 'failed'})
+
+    def test_writes_are_exported_after_delay(self):
+        """長駐進程的寫入在 export_delay 內出現在 tasks.json"""
+        self.write_json({'tasks': [make_task('a'), make_task('b')]})
+        store = self.open_store(export_delay=0.05)
+        store.update('a', status='completed')
+        store.insert(make_task('c'))
+
+        deadline = time.time() + 5
+        while store.dirty and time.time() < deadline:
+            time.sleep(0.02)
+        self.assertFalse(store.dirty)
+        tasks = {t['id']: t for t in self.read_json()['tasks']}
+        self.assertEqual(tasks['a']['status'], 'completed')
+        self.assertIn('c', tasks)
+
+    def test_export_keeps_external_edits_without_updated_at(self):
+        """測試外部寫入方不刷新 updated_at 的修改在導出時不被覆蓋"""
+        self.write_json([make_task('a'), make_task('b'), make_task('c')])
+        store = self.open_store()
+        store.update('a', status='completed')
+
+        def mutate(tasks):
+            for task in tasks:
+                if task['id'] == 'b':
+                    task['actual_time'] = 42
+            tasks[:] = [t for t in tasks if t['id'] != 'c']
+
+        update_tasks(mutate, self.tasks_json)
+        self.assertTrue(store.export_json())
+
+        exported = {t['id']: t for t in self.read_json()}
+        self.assertEqual(set(exported), {'a', 'b'})
+        self.assertEqual(exported['a']['status'], 'completed')
+        self.assertEqual(exported['b']['actual_time'], 42)
+        self.assertFalse(store.exists('c'))
+
+    def test_dirty_merge_is_field_level(self):
+        """測試兩邊改了同一任務的不同字段時都保留；本地改過的任務不因外部刪除而丟失"""
+        self.write_json([make_task('a'), make_task('b')])
+        store = self.open_store()
+        store.update('a', note='local')
+        store.update('b', status='in_progress')
+        store.upsert(make_task('new'))
+
+        self.write_json([make_task('a', priority='high', status='failed')])
+        store.export_json()
+
+        exported = {t['id']: t for t in self.read_json()}
+        self.assertEqual(exported['a']['note'], 'local')
+        self.assertEqual(exported['a']['priority'], 'high')
+        self.assertEqual(exported['a']['status'], 'failed')
+        self.assertEqual(exported['b']['status'], 'in_progress')
+        self.assertIn('new', exported)
+
+    def test_two_connections_do_not_lose_updates(self):
+        """測試兩個進程（連接）交替更新不同任務不會互相覆蓋"""
+        self.write_json([make_task('a'), make_task('b')])
+        first = self.open_store()
+        second = self.open_store()
+
+        first.update('a', status='completed')
+        second.update('b', status='failed')
+
+        self.assertEqual(first.get('b')['status'], 'failed')
+        self.assertEqual(second.get('a')['status'], 'completed')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+tasks.json 共享寫入路徑測試
+"""
+
+import json
+import multiprocessing
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from tasks_file import (
+    StaleTasksError, cleanup_temp_files, merge_tasks, read_tasks,
+    task_fingerprints, update_tasks, write_tasks,
+)
+
+
+def make_task(task_id, status='pending'):
+    return {'id': task_id, 'title': f'Task {task_id}', 'status': status}
+
+
+def append_tasks(path, worker, count):
+    """子進程：逐個追加任務"""
+    for i in range(count):
+        update_tasks(lambda tasks: tasks.append(make_task(f'w{worker}-{i}')), Path(path))
+
+
+class TestTasksFile(unittest.TestCase):
+    """測試原子寫入、樂觀版本與合併"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmpdir.name) / 'tasks.json'
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def read_ids(self):
+        payload, _ = read_tasks(self.path)
+        return [t['id'] for t in payload]
+
+    def test_stale_version_is_rejected(self):
+        write_tasks([make_task('a')], self.path)
+        payload, version = read_tasks(self.path)
+
+        write_tasks([make_task('a'), make_task('b')], self.path)
+        with self.assertRaises(StaleTasksError):
+            write_tasks(payload, self.path, expected_version=version)
+        self.assertEqual(self.read_ids(), ['a', 'b'])
+
+        # 文件不存在時的版本為 None
+        missing = Path(self.tmpdir.name) / 'missing.json'
+        self.assertEqual(read_tasks(missing), ([], None))
+        write_tasks([], missing, expected_version=None)
+        self.assertTrue(missing.exists())
+
+    def test_update_retries_on_concurrent_write(self):
+        """測試寫入衝突時基於最新文件重做，不覆蓋其他寫入方"""
+        write_tasks({'tasks': [make_task('a')]}, self.path)
+        calls = []
+
+        def mutate(tasks):
+            calls.append(len(tasks))
+            if len(calls) == 1:
+                # 模擬另一個進程在讀取之後寫入
+                write_tasks({'tasks': tasks + [make_task('other')]}, self.path)
+            tasks[0]['status'] = 'completed'
+
+        self.assertTrue(update_tasks(mutate, self.path))
+        self.assertEqual(calls, [1, 2])
+
+        with open(self.path, 'r', encoding='utf-8') as f:
+            payload = json.load(f)
+        self.assertEqual([t['id'] for t in payload['tasks']], ['a', 'other'])
+        self.assertEqual(payload['tasks'][0]['status'], 'completed')
+
+        self.assertFalse(update_tasks(lambda tasks: False, self.path))
+        self.assertEqual(list(Path(self.tmpdir.name).glob('*.tmp')), [])
+
+    def test_merge_only_writes_changed_tasks(self):
+        write_tasks([make_task('a'), make_task('b')], self.path)
+        tasks, _ = read_tasks(self.path)
+        baseline = task_fingerprints(tasks)
+
+        # 其他寫入方更新了 b
+        write_tasks([make_task('a'), make_task('b', status='failed')], self.path)
+
+        tasks[0]['status'] = 'completed'
+        tasks.append(make_task('c'))
+        self.assertEqual(merge_tasks(tasks, baseline, self.path), 2)
+
+        payload, _ = read_tasks(self.path)
+        self.assertEqual(
+            [(t['id'], t['status']) for t in payload],
+            [('a', 'completed'), ('b', 'failed'), ('c', 'pending')],
+        )
+
+    def test_concurrent_processes_do_not_lose_updates(self):
+        write_tasks([], self.path)
+        workers = [
+            multiprocessing.Process(target=append_tasks, args=(str(self.path), w, 15))
+            for w in range(3)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(len(self.read_ids()), 45)
+        self.assertEqual(cleanup_temp_files(self.path, max_age=0), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,12 +5,20 @@
 追蹤任務的預估時間和實際執行時間，生成統計報告。
 """
 
-import json
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass, asdict
 from pathlib import Path
 
+from task_store import get_store
+
+# 完成時把實際數據交給預估器做增量學習（可選）
+try:
+    from task_estimator import get_estimator
+    ESTIMATOR_AVAILABLE = True
+except ImportError:
+    ESTIMATOR_AVAILABLE = False
+
 
 @dataclass
 class TimeEstimate:
@@ -67,20 +75,16 @@ class TaskTimeTracker:
             tasks_json_path: tasks.json 文件路徑
         """
         self.tasks_json_path = Path(tasks_json_path)
-        self.tasks = self._load_tasks()
-
-    def _load_tasks(self) -> List[Dict]:
-        """載入任務"""
-        if not self.tasks_json_path.exists():
-            return []
+        self.store = get_store(self.tasks_json_path)
 
-        with open(self.tasks_json_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+    @property
+    def tasks(self) -> List[Dict]:
+        """所有任務（從 TaskStore 讀取）"""
+        return self.store.all()
 
-    def _save_tasks(self):
-        """保存任務"""
-        with open(self.tasks_json_path, 'w', encoding='utf-8') as f:
-            json.dump(self.tasks, f, ensure_ascii=False, indent=2)
+    def _save_task(self, task: Dict):
+        """保存單個任務（行級 upsert）"""
+        self.store.upsert(task)
 
     def add_time_estimation(self, task_id: str, estimation: TimeEstimate,
                            complexity_level: int, recommended_model: str):
@@ -108,7 +112,7 @@ class TaskTimeTracker:
         task['time_tracking']['complexity_level'] = complexity_level
         task['time_tracking']['recommended_model'] = recommended_model
 
-        self._save_tasks()
+        self._save_task(task)
         print(f"✅ 已為任務 {task_id} 添加時間預估：{estimation}")
 
     def mark_task_started(self, task_id: str):
@@ -128,7 +132,7 @@ class TaskTimeTracker:
         task['time_tracking']['started_at'] = datetime.now().isoformat()
         task['status'] = 'in_progress'
 
-        self._save_tasks()
+        self._save_task(task)
         print(f"✅ 任務 {task_id} 已標記為開始")
 
     def mark_task_completed(self, task_id: str):
@@ -166,18 +170,21 @@ class TaskTimeTracker:
                 variance = ((actual_minutes - estimated_mid) / estimated_mid) * 100
                 task['time_tracking']['time_variance_percent'] = round(variance, 2)
 
-            self._save_tasks()
+            self._save_task(task)
             print(f"✅ 任務 {task_id} 已完成，實際時間：{actual_minutes:.1f} 分鐘")
+
+            if ESTIMATOR_AVAILABLE:
+                try:
+                    get_estimator().observe(task)
+                except Exception as e:
+                    print(f"⚠️ 更新預估器失敗：{e}")
         else:
-            self._save_tasks()
+            self._save_task(task)
             print(f"⚠️ 任務 {task_id} 已完成，但沒有開始時間")
 
     def _find_task(self, task_id: str) -> Optional[Dict]:
-        """查找任務"""
-        for task in self.tasks:
-            if task['id'] == task_id or task['id'].endswith(task_id):
-                return task
-        return None
+        """查找任務（支持 ID 後綴匹配）"""
+        return self.store.find(task_id)
 
     def generate_statistics(self) -> Dict:
         """
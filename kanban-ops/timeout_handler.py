@@ -5,13 +5,13 @@
 自動檢測超時任務，檢查輸出文件，提供處理建議。
 """
 
-import json
 import os
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from pathlib import Path
 
+from task_store import get_store
 from time_tracker import TaskTimeTracker
 
 
@@ -43,20 +43,16 @@ class TimeoutHandler:
         self.tasks_json_path = Path(tasks_json_path)
         self.workspace_path = Path(workspace_path)
         self.time_tracker = TaskTimeTracker(tasks_json_path)
-        self.tasks = self._load_tasks()
+        self.store = get_store(self.tasks_json_path)
 
-    def _load_tasks(self) -> List[Dict]:
-        """載入任務"""
-        if not self.tasks_json_path.exists():
-            return []
+    @property
+    def tasks(self) -> List[Dict]:
+        """所有任務（從 TaskStore 讀取）"""
+        return self.store.all()
 
-        with open(self.tasks_json_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-
-    def _save_tasks(self):
-        """保存任務"""
-        with open(self.tasks_json_path, 'w', encoding='utf-8') as f:
-            json.dump(self.tasks, f, ensure_ascii=False, indent=2)
+    def _save_task(self, task: Dict):
+        """保存單個任務（行級 upsert）"""
+        self.store.upsert(task)
 
     def check_timeouts(self, timeout_threshold_minutes: float = 30.0) -> List[TimeoutAnalysis]:
         """
@@ -217,7 +213,7 @@ class TimeoutHandler:
             time_tracking['timeout_recovery'] = True
             time_tracking['timeout_note'] = '任務超時但輸出完整，已標記為完成'
 
-        self._save_tasks()
+        self._save_task(task)
         print(f"✅ 任務 {task_id} 已標記為完成（超時恢復）")
 
     def mark_task_failed(self, task_id: str, reason: str):
@@ -230,7 +226,7 @@ class TimeoutHandler:
         task['failed_at'] = datetime.now().isoformat()
         task['failure_reason'] = reason
 
-        self._save_tasks()
+        self._save_task(task)
         print(f"❌ 任務 {task_id} 已標記為失敗：{reason}")
 
     def suggest_retry(self, task_id: str) -> Dict:
@@ -285,11 +281,8 @@ class TimeoutHandler:
         return suggestions
 
     def _find_task(self, task_id: str) -> Optional[Dict]:
-        """查找任務"""
-        for task in self.tasks:
-            if task['id'] == task_id or task['id'].endswith(task_id):
-                return task
-        return None
+        """查找任務（支持 ID 後綴匹配）"""
+        return self.store.find(task_id)
 
     def generate_timeout_report(self) -> str:
         """生成超時報告"""
@@ -0,0 +1,76 @@
+"""
+動態閾值基準測試：每日 tail(window).quantile vs 滑動窗口分位數
+在 10 年與 20 年日線長度上比較兩種寫法的耗時與結果
+
+用法：
+    python benchmark_rolling_quantile.py
+    python benchmark_rolling_quantile.py --windows 60 252 --repeat 3
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from rolling_quantile import SORTEDCONTAINERS_AVAILABLE, rolling_thresholds
+
+QUANTILES = [0.90, 0.10]
+HORIZONS = {'10 年': 252 * 10, '20 年': 252 * 20}
+
+
+def synthetic_correlation(n_days, seed=42):
+    """生成落在 [0, 1] 的合成平均相關性序列"""
+    rng = np.random.default_rng(seed)
+    return pd.Series(np.clip(0.4 + np.cumsum(rng.normal(0, 0.01, n_days)), 0, 1))
+
+
+def loop_thresholds(series, window):
+    """原寫法：逐日切片後計算分位數"""
+    result = np.full((len(series), len(QUANTILES)), np.nan)
+    for i in range(window, len(series)):
+        recent = series.iloc[:i].tail(window)
+        result[i] = [recent.quantile(q) for q in QUANTILES]
+    return result
+
+
+def best_time(func, repeat):
+    """執行 repeat 次並返回最短耗時與結果"""
+    best = float('inf')
+    output = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = func()
+        best = min(best, time.perf_counter() - start)
+    return best, output
+
+
+def main():
+    parser = argparse.ArgumentParser(description='動態閾值基準測試')
+    parser.add_argument('--windows', type=int, nargs='+', default=[60, 252], help='回看窗口')
+    parser.add_argument('--repeat', type=int, default=3, help='重複次數（取最短）')
+    args = parser.parse_args()
+
+    print(f"sortedcontainers: {'可用' if SORTEDCONTAINERS_AVAILABLE else '不可用（bisect 後備）'}")
+    print(f"{'長度':<8}{'窗口':>6}{'逐日切片 (ms)':>16}{'滑動窗口 (ms)':>16}{'加速':>10}{'最大差異':>12}")
+
+    for label, n_days in HORIZONS.items():
+        series = synthetic_correlation(n_days)
+        for window in args.windows:
+            loop_time, expected = best_time(lambda: loop_thresholds(series, window), args.repeat)
+            fast_time, actual = best_time(
+                lambda: rolling_thresholds(series.values, window, QUANTILES), args.repeat
+            )
+            max_diff = np.nanmax(np.abs(expected - actual))
+            print(
+                f"{label:<8}{window:>6}{loop_time * 1000:>16.1f}{fast_time * 1000:>16.1f}"
+                f"{loop_time / fast_time:>9.1f}x{max_diff:>12.1e}"
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -5,12 +5,17 @@
 
 import numpy as np
 import pandas as pd
-import yfinance as yf
+import sys
+from pathlib import Path
 import matplotlib.pyplot as plt
 from datetime import datetime
 import warnings
 warnings.filterwarnings('ignore')
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'quant'))
+
+from market_data_store import download
+
 # 設置中文字體
 plt.rcParams['font.sans-serif'] = ['SimHei', 'Arial Unicode MS']
 plt.rcParams['axes.unicode_minus'] = False
@@ -90,7 +95,7 @@ class CorrelationStrategy901060:
         """
         # 下載數據
         tickers = ['SPY', 'QQQ', 'IWM', 'XLI', 'XLV', 'XLK', 'XLF', 'XLE']
-        prices = yf.download(tickers, period='2y', progress=False, auto_adjust=True)['Close']
+        prices = download(tickers, period='2y')['Close']
         
         # 計算相關性
         correlation_series = self.calculate_correlation(prices)
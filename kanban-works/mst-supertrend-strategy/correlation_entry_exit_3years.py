@@ -5,12 +5,18 @@
 
 import numpy as np
 import pandas as pd
-import yfinance as yf
+import sys
+from pathlib import Path
 import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
 import warnings
 warnings.filterwarnings('ignore')
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'quant'))
+
+from market_data_store import download
+from rolling_quantile import rolling_thresholds
+
 # 設置中文字體
 plt.rcParams['font.sans-serif'] = ['SimHei', 'Arial Unicode MS']
 plt.rcParams['axes.unicode_minus'] = False
@@ -38,10 +44,9 @@ class CorrelationStrategyEntryExit:
         return avg_corr_series
     
     def get_dynamic_threshold_901060(self, correlation_history):
-        """90/10/60 版本的動態閾值計算"""
-        high_threshold = correlation_history.quantile(0.90)
-        low_threshold = correlation_history.quantile(0.10)
-        return high_threshold, low_threshold
+        """90/10/60 版本的動態閾值計算（每天使用之前的全部歷史，返回逐日閾值）"""
+        thresholds = rolling_thresholds(correlation_history, None, [0.90, 0.10])
+        return thresholds[:, 0], thresholds[:, 1]
     
     def calculate_position_size_901060(self, correlation, high_threshold, low_threshold):
         """90/10/60 版本的倉位計算"""
@@ -73,10 +78,14 @@ class CorrelationStrategyEntryExit:
         transitions = []
         previous_state = None
         
+        high_thresholds, low_thresholds = self.get_dynamic_threshold_901060(
+            aligned_data['correlation'].values
+        )
+        
         for i in range(len(aligned_data)):
             if i >= 60:
-                history = aligned_data['correlation'].iloc[:i]
-                high_threshold, low_threshold = self.get_dynamic_threshold_901060(history)
+                high_threshold = high_thresholds[i]
+                low_threshold = low_thresholds[i]
                 
                 current_corr = aligned_data['correlation'].iloc[i]
                 current_price = aligned_data['index_price'].iloc[i]
@@ -386,11 +395,11 @@ def main():
     tickers = ['SPY', 'QQQ', 'IWM', 'XLI', 'XLV', 'XLK', 'XLF', 'XLE']
     
     print(f"\n下載 {len(tickers)} 個資產的數據（過去 3 年）...")
-    prices = yf.download(tickers, period='3y', progress=False, auto_adjust=True)['Close']
+    prices = download(tickers, period='3y')['Close']
     
     # 下載指數數據
     print("下載 SPY 指數數據（過去 3 年）...")
-    index_prices = yf.download('SPY', period='3y', progress=False, auto_adjust=True)['Close']
+    index_prices = download('SPY', period='3y')['Close']
     
     # 分析進場出時機
     print("\n分析進場出時機...")
@@ -5,12 +5,18 @@
 
 import numpy as np
 import pandas as pd
-import yfinance as yf
+import sys
+from pathlib import Path
 from datetime import datetime
-import itertools
 import warnings
 warnings.filterwarnings('ignore')
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'quant'))
+
+from market_data_store import download
+from parameter_sweep import ParameterSweep
+from rolling_quantile import rolling_thresholds
+
 
 class CorrelationStrategyOptimizer:
     """相關性策略參數優化"""
@@ -34,17 +40,16 @@ class CorrelationStrategyOptimizer:
         return avg_corr_series
     
     def get_dynamic_threshold(self, correlation_history, high_percentile, low_percentile, window=252):
-        """基於歷史分位數計算動態閾值"""
-        if len(correlation_history) < window:
-            window = len(correlation_history)
-        
-        recent_corr = correlation_history.tail(window)
-        
-        # 動態分位數
-        high_threshold = recent_corr.quantile(high_percentile / 100)
-        low_threshold = recent_corr.quantile(low_percentile / 100)
-        
-        return high_threshold, low_threshold
+        """
+        基於歷史分位數計算動態閾值
+
+        返回整段歷史每天的 (high_threshold, low_threshold)，第 i 行只使用前 window 天，
+        歷史不足 window 天的行為 NaN
+        """
+        thresholds = rolling_thresholds(
+            correlation_history, window, [high_percentile / 100, low_percentile / 100]
+        )
+        return thresholds[:, 0], thresholds[:, 1]
     
     def calculate_position_size(self, correlation, high_threshold, low_threshold):
         """根據相關性計算倉位大小"""
@@ -55,32 +60,43 @@ class CorrelationStrategyOptimizer:
         else:
             return 0.5, '過渡市場'
     
-    def run_backtest(self, prices, index_prices, high_percentile, low_percentile, lookback_window):
-        """運行回測"""
+    def align_data(self, prices, index_prices):
+        """計算平均相關性並與指數價格對齊（與掃描參數無關，只需計算一次）"""
         correlation_series = self.calculate_correlation(prices)
         
-        # 對齊數據
         aligned_data = pd.concat([
             correlation_series,
             index_prices
         ], axis=1).dropna()
         
         aligned_data.columns = ['correlation', 'index_price']
+        return aligned_data
+    
+    def run_backtest(self, prices, index_prices, high_percentile, low_percentile, lookback_window):
+        """運行回測"""
+        aligned_data = self.align_data(prices, index_prices)
+        return self.run_backtest_aligned(aligned_data, high_percentile, low_percentile, lookback_window)
+    
+    def run_backtest_aligned(self, aligned_data, high_percentile, low_percentile, lookback_window):
+        """在已對齊的相關性/指數數據上運行回測"""
+        correlation = aligned_data['correlation'].values
+        index_price = aligned_data['index_price'].values
+        high_thresholds, low_thresholds = self.get_dynamic_threshold(
+            correlation,
+            high_percentile,
+            low_percentile,
+            window=lookback_window
+        )
         
         signals = []
         for i in range(len(aligned_data)):
             if i >= lookback_window:
-                history = aligned_data['correlation'].iloc[:i]
-                high_threshold, low_threshold = self.get_dynamic_threshold(
-                    history,
-                    high_percentile,
-                    low_percentile,
-                    window=lookback_window
-                )
+                high_threshold = high_thresholds[i]
+                low_threshold = low_thresholds[i]
                 
-                current_corr = aligned_data['correlation'].iloc[i]
-                current_price = aligned_data['index_price'].iloc[i]
-                previous_price = aligned_data['index_price'].iloc[i-1] if i > 0 else current_price
+                current_corr = correlation[i]
+                current_price = index_price[i]
+                previous_price = index_price[i-1] if i > 0 else current_price
                 
                 # 計算倉位
                 position_size, market_state = self.calculate_position_size(
@@ -190,42 +206,34 @@ class CorrelationStrategyOptimizer:
             'total_days': total_days
         }
     
-    def optimize(self, prices, index_prices, high_percentiles, low_percentiles, lookback_windows):
-        """執行參數優化"""
-        total_combinations = len(high_percentiles) * len(low_percentiles) * len(lookback_windows)
-        current = 0
-        
+    def optimize(self, prices, index_prices, high_percentiles, low_percentiles, lookback_windows,
+                 n_jobs=None, results_path=':memory:'):
+        """
+        執行參數優化
+        
+        平均相關性序列只計算一次，由進程池中的各組合共享；
+        每個組合完成即寫入 results_path，中斷後以相同路徑重跑會跳過已完成的組合。
+        """
         print(f"開始參數優化...")
         print(f"  - 高分位數: {high_percentiles}")
         print(f"  - 低分位數: {low_percentiles}")
         print(f"  - 回看窗口: {lookback_windows}")
-        print(f"  - 總組合數: {total_combinations}")
+        
+        aligned_data = self.align_data(prices, index_prices)
+        
+        sweep = ParameterSweep(evaluate_combination, aligned_data, results_path=results_path, n_jobs=n_jobs)
+        try:
+            results_df = sweep.run(ParameterSweep.grid(
+                high_percentile=high_percentiles,
+                low_percentile=low_percentiles,
+                lookback_window=lookback_windows,
+            ))
+        finally:
+            sweep.close()
         print()
         
-        results = []
-        for high_percentile in high_percentiles:
-            for low_percentile in low_percentiles:
-                for lookback_window in lookback_windows:
-                    current += 1
-                    print(f"[{current}/{total_combinations}] 測試: 高分位數={high_percentile}%, 低分位數={low_percentile}%, 回看窗口={lookback_window}天")
-                    
-                    # 運行回測
-                    backtest_df = self.run_backtest(
-                        prices,
-                        index_prices,
-                        high_percentile,
-                        low_percentile,
-                        lookback_window
-                    )
-                    
-                    # 計算指標
-                    metrics = self.calculate_metrics(backtest_df)
-                    
-                    if metrics:
-                        results.append(metrics)
-        
-        # 轉換為 DataFrame
-        results_df = pd.DataFrame(results)
+        if results_df.empty:
+            return results_df
         
         # 排序（根據夏普比率）
         results_df = results_df.sort_values('strategy_sharpe', ascending=False)
@@ -297,6 +305,18 @@ class CorrelationStrategyOptimizer:
         return results_df, best_sharpe, best_calmar
 
 
+def evaluate_combination(aligned_data, params):
+    """評估單個參數組合（進程池工作函數）"""
+    optimizer = CorrelationStrategyOptimizer()
+    backtest_df = optimizer.run_backtest_aligned(
+        aligned_data,
+        params['high_percentile'],
+        params['low_percentile'],
+        params['lookback_window']
+    )
+    return optimizer.calculate_metrics(backtest_df)
+
+
 def main():
     """主函數"""
     print("="*100)
@@ -310,11 +330,11 @@ def main():
     tickers = ['SPY', 'QQQ', 'IWM', 'XLI', 'XLV', 'XLK', 'XLF', 'XLE']
     
     print(f"\n下載 {len(tickers)} 個資產的數據...")
-    prices = yf.download(tickers, period='10y', progress=False, auto_adjust=True)['Close']
+    prices = download(tickers, period='10y')['Close']
     
     # 下載指數數據
     print("下載 SPY 指數數據...")
-    index_prices = yf.download('SPY', period='10y', progress=False, auto_adjust=True)['Close']
+    index_prices = download('SPY', period='10y')['Close']
     
     # 定義參數空間
     high_percentiles = [70, 80, 90]  # 高分位數
@@ -327,7 +347,8 @@ def main():
         index_prices,
         high_percentiles,
         low_percentiles,
-        lookback_windows
+        lookback_windows,
+        results_path='correlation_optimization_sweep.db'
     )
     
     # 打印最優結果
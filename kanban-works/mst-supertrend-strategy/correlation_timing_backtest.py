@@ -5,11 +5,17 @@
 
 import numpy as np
 import pandas as pd
-import yfinance as yf
+import sys
+from pathlib import Path
 from datetime import datetime, timedelta
 import warnings
 warnings.filterwarnings('ignore')
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'quant'))
+
+from market_data_store import download
+from rolling_quantile import rolling_thresholds
+
 # 設置中文字體
 import matplotlib.pyplot as plt
 plt.rcParams['font.sans-serif'] = ['SimHei', 'Arial Unicode MS']
@@ -58,25 +64,19 @@ class CorrelationTimingBacktest:
         基於歷史分位數計算動態閾值
         
         參數:
-            correlation_history: 歷史相關性序列
+            correlation_history: 相關性序列
             window: 回看窗口（252 天 = 1 年）
         
         返回:
-            high_threshold: 進入危機模式的閾值（75 分位）
-            low_threshold: 退出危機模式的閾值（25 分位）
+            high_threshold: 每天進入危機模式的閾值（前 window 天的 75 分位）
+            low_threshold: 每天退出危機模式的閾值（前 window 天的 25 分位）
+            歷史不足 window 天的位置為 NaN
         """
-        if len(correlation_history) < window:
-            window = len(correlation_history)
-        
-        recent_corr = correlation_history.tail(window)
-        
         # 75 分位：75% 的時間相關性低於此值
-        high_threshold = recent_corr.quantile(0.75)
-        
         # 25 分位：25% 的時間相關性高於此值
-        low_threshold = recent_corr.quantile(0.25)
+        thresholds = rolling_thresholds(correlation_history, window, [0.75, 0.25])
         
-        return high_threshold, low_threshold
+        return thresholds[:, 0], thresholds[:, 1]
     
     def calculate_position_size(self, correlation, high_threshold, low_threshold):
         """
@@ -127,19 +127,20 @@ class CorrelationTimingBacktest:
         aligned_data.columns = ['correlation', 'index_price']
         
         print("計算動態倉位...")
+        correlation = aligned_data['correlation'].values
+        index_price = aligned_data['index_price'].values
+        high_thresholds, low_thresholds = self.get_dynamic_threshold(correlation, window=window)
+        
         signals = []
         for i in range(len(aligned_data)):
             # 只在有足夠歷史數據時計算閾值
             if i >= window:
-                history = aligned_data['correlation'].iloc[:i]
-                high_threshold, low_threshold = self.get_dynamic_threshold(
-                    history, 
-                    window=window
-                )
+                high_threshold = high_thresholds[i]
+                low_threshold = low_thresholds[i]
                 
-                current_corr = aligned_data['correlation'].iloc[i]
-                current_price = aligned_data['index_price'].iloc[i]
-                previous_price = aligned_data['index_price'].iloc[i-1] if i > 0 else current_price
+                current_corr = correlation[i]
+                current_price = index_price[i]
+                previous_price = index_price[i-1] if i > 0 else current_price
                 
                 # 計算倉位
                 position_size, market_state = self.calculate_position_size(
@@ -449,11 +450,11 @@ def main():
     tickers = ['SPY', 'QQQ', 'IWM', 'XLI', 'XLV', 'XLK', 'XLF', 'XLE']
     
     print(f"\n下載 {len(tickers)} 個資產的數據（用於計算相關性）...")
-    prices = yf.download(tickers, period='10y', progress=False, auto_adjust=True)['Close']
+    prices = download(tickers, period='10y')['Close']
     
     # 下載指數數據（用於回測）
     print("下載 SPY 指數數據（用於回測）...")
-    index_prices = yf.download('SPY', period='10y', progress=False, auto_adjust=True)['Close']
+    index_prices = download('SPY', period='10y')['Close']
     
     # 運行回測
     print("\n運行回測...")
@@ -5,11 +5,17 @@
 
 import numpy as np
 import pandas as pd
-import yfinance as yf
+import sys
+from pathlib import Path
 from datetime import datetime, timedelta
 import warnings
 warnings.filterwarnings('ignore')
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'quant'))
+
+from market_data_store import download
+from rolling_quantile import rolling_thresholds
+
 # 設置中文字體
 import matplotlib.pyplot as plt
 plt.rcParams['font.sans-serif'] = ['SimHei', 'Arial Unicode MS']
@@ -56,39 +62,19 @@ class DynamicThresholdSystem:
         基於歷史分位數計算動態閾值
         
         參數:
-            correlation_history: 歷史相關性序列
+            correlation_history: 相關性序列
             window: 回看窗口（252 天 = 1 年）
         
         返回:
-            high_threshold: 進入危機模式的閾值（75 分位）
-            low_threshold: 退出危機模式的閾值（25 分位）
-            stats: 統計信息字典
+            high_threshold: 每天進入危機模式的閾值（前 window 天的 75 分位）
+            low_threshold: 每天退出危機模式的閾值（前 window 天的 25 分位）
+            歷史不足 window 天的位置為 NaN
         """
-        if len(correlation_history) < window:
-            window = len(correlation_history)
-        
-        recent_corr = correlation_history.tail(window)
-        
         # 75 分位：75% 的時間相關性低於此值
-        high_threshold = recent_corr.quantile(0.75)
-        
         # 25 分位：25% 的時間相關性高於此值
-        low_threshold = recent_corr.quantile(0.25)
-        
-        # 統計信息
-        stats = {
-            'window': window,
-            'current_corr': float(correlation_history.iloc[-1]),
-            'mean': float(recent_corr.mean()),
-            'std': float(recent_corr.std()),
-            'min': float(recent_corr.min()),
-            'max': float(recent_corr.max()),
-            'high_threshold': float(high_threshold),
-            'low_threshold': float(low_threshold),
-            'median': float(recent_corr.median())
-        }
+        thresholds = rolling_thresholds(correlation_history, window, [0.75, 0.25])
         
-        return high_threshold, low_threshold, stats
+        return thresholds[:, 0], thresholds[:, 1]
     
     def check_emergency_exit(self, correlation, vix, market_drop, correlation_history):
         """
@@ -186,18 +172,19 @@ class DynamicThresholdSystem:
         aligned_data.columns = ['correlation', 'vix']
         
         # 計算動態閾值
+        correlation = aligned_data['correlation'].values
+        vix = aligned_data['vix'].values
+        high_thresholds, low_thresholds = self.get_dynamic_threshold(correlation, window=window)
+        
         signals = []
         for i in range(len(aligned_data)):
             # 只在有足夠歷史數據時計算閾值
             if i >= window:
-                history = aligned_data['correlation'].iloc[:i]
-                high_threshold, low_threshold, stats = self.get_dynamic_threshold(
-                    history, 
-                    window=window
-                )
+                high_threshold = high_thresholds[i]
+                low_threshold = low_thresholds[i]
                 
-                current_corr = aligned_data['correlation'].iloc[i]
-                current_vix = aligned_data['vix'].iloc[i]
+                current_corr = correlation[i]
+                current_vix = vix[i]
                 
                 # 確定市場狀態
                 if current_corr > high_threshold:
@@ -401,11 +388,11 @@ def main():
     tickers = ['SPY', 'QQQ', 'IWM', 'XLI', 'XLV', 'XLK', 'XLF', 'XLE']
     
     print(f"\n下載 {len(tickers)} 個資產的數據...")
-    prices = yf.download(tickers, period='2y', progress=False, auto_adjust=True)['Close']
+    prices = download(tickers, period='2y')['Close']
     
     # 下載 VIX 數據
     print("下載 VIX 數據...")
-    vix = yf.download('^VIX', period='2y', progress=False, auto_adjust=True)['Close']
+    vix = download('^VIX', period='2y')['Close']
     
     # 模擬策略
     print("\n模擬策略執行...")
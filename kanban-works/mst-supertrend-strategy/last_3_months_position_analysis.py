@@ -5,11 +5,16 @@
 
 import numpy as np
 import pandas as pd
-import yfinance as yf
+import sys
+from pathlib import Path
 from datetime import datetime, timedelta
 import warnings
 warnings.filterwarnings('ignore')
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'quant'))
+
+from market_data_store import download
+
 
 class Last1YearPositionAnalysis:
     """過去 3 個月倉位調整詳情分析"""
@@ -463,11 +468,11 @@ def main():
     tickers = ['SPY', 'QQQ', 'IWM', 'XLI', 'XLV', 'XLK', 'XLF', 'XLE']
     
     print(f"\n下載 {len(tickers)} 個資產的數據...")
-    prices = yf.download(tickers, period='2y', progress=False, auto_adjust=True)['Close']
+    prices = download(tickers, period='2y')['Close']
     
     # 下載指數數據
     print("下載 SPY 指數數據...")
-    index_prices = yf.download('SPY', period='2y', progress=False, auto_adjust=True)['Close']
+    index_prices = download('SPY', period='2y')['Close']
     
     # 分析過去 1 年的倉位調整
     print("\n分析過去 1 年的倉位調整...")
@@ -5,13 +5,19 @@ MST + Supertrend 策略測試腳本
 
 import numpy as np
 import pandas as pd
-import yfinance as yf
+import sys
+from pathlib import Path
 import networkx as nx
 from datetime import datetime, timedelta
 import matplotlib.pyplot as plt
 import warnings
 warnings.filterwarnings('ignore')
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'quant'))
+
+from market_data_store import download
+import indicators
+
 # 設置中文字體
 plt.rcParams['font.sans-serif'] = ['SimHei', 'Arial Unicode MS']
 plt.rcParams['axes.unicode_minus'] = False
@@ -35,7 +41,7 @@ class MSTSupertrendStrategy:
     def fetch_data(self, tickers, period='1y'):
         """獲取價格數據"""
         print(f"下載 {len(tickers)} 個資產的數據...")
-        data = yf.download(tickers, period=period, progress=False, auto_adjust=True)
+        data = download(tickers, period=period)
         return data['Close']
     
     def calculate_correlation(self, returns, window=60):
@@ -88,7 +94,7 @@ class MSTSupertrendStrategy:
         計算 Supertrend 指標
         
         參數:
-            high, low, close: 價格序列
+            high, low, close: 價格序列（DataFrame 時每列一個資產）
             period: ATR 週期
             multiplier: ATR 倍數
         
@@ -96,42 +102,11 @@ class MSTSupertrendStrategy:
             supertrend: Supertrend 線
             trend: 趨勢（1=上漲，0=下跌）
         """
-        # 計算 ATR
-        tr1 = high - low
-        tr2 = abs(high - close.shift())
-        tr3 = abs(low - close.shift())
-        tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-        atr = tr.rolling(window=period).mean()
-        
-        # 計算基本帶
-        hl2 = (high + low) / 2
-        upper_band = hl2 + multiplier * atr
-        lower_band = hl2 - multiplier * atr
-        
-        # 初始化
-        supertrend = np.full(len(close), np.nan)
-        trend = np.zeros(len(close))
-        
-        supertrend[0] = lower_band.iloc[0]
-        trend[0] = 1
-        
-        for i in range(1, len(close)):
-            if trend[i-1] == 1:  # 當前是上漲趨勢
-                if close.iloc[i] <= supertrend[i-1]:
-                    trend[i] = 0
-                    supertrend[i] = upper_band.iloc[i]
-                else:
-                    trend[i] = 1
-                    supertrend[i] = max(supertrend[i-1], lower_band.iloc[i])
-            else:  # 當前是下跌趨勢
-                if close.iloc[i] >= supertrend[i-1]:
-                    trend[i] = 1
-                    supertrend[i] = lower_band.iloc[i]
-                else:
-                    trend[i] = 0
-                    supertrend[i] = min(supertrend[i-1], upper_band.iloc[i])
-        
-        return pd.Series(supertrend, index=close.index), pd.Series(trend, index=close.index)
+        result = indicators.supertrend(high, low, close, period=period,
+                                       multiplier=multiplier, atr_method='sma')
+        # 預熱期沿用上漲趨勢
+        trend = 1.0 - (result.direction < 0).astype(float)
+        return result.trend, trend
     
     def check_entry_signals(self, prices, selected_assets, period=10, multiplier=3.0):
         """
@@ -145,28 +120,22 @@ class MSTSupertrendStrategy:
         返回:
             signals_df: 信號 DataFrame
         """
-        signals = {}
+        assets = [asset for asset in selected_assets if asset in prices.columns]
+        panel = prices[assets]
+        # 高價 = 低價 = 收盤價（簡化），所有資產一次計算
+        supertrend, trend = self.calculate_supertrend(
+            panel, panel, panel, period=period, multiplier=multiplier
+        )
         
-        for asset in selected_assets:
-            if asset not in prices.columns:
-                continue
-            
-            supertrend, trend = self.calculate_supertrend(
-                prices[asset],
-                prices[asset],  # 高價 = 收盤價（簡化）
-                prices[asset],  # 低價 = 收盤價（簡化）
-                period=period,
-                multiplier=multiplier
-            )
-            
-            # 檢測買入信號
-            trend_change = trend.diff()
-            long_signal = (trend_change == 1)  # 趨勢從 0 轉為 1
-            
+        # 檢測買入信號：趨勢從 0 轉為 1
+        long_signal = trend.diff() == 1
+        
+        signals = {}
+        for asset in assets:
             signals[asset] = {
-                'current_trend': 'UP' if trend.iloc[-1] == 1 else 'DOWN',
-                'has_signal': bool(long_signal.iloc[-1]),
-                'can_entry': bool(trend.iloc[-1] == 1 and long_signal.iloc[-1]),
+                'current_trend': 'UP' if trend[asset].iloc[-1] == 1 else 'DOWN',
+                'has_signal': bool(long_signal[asset].iloc[-1]),
+                'can_entry': bool(trend[asset].iloc[-1] == 1 and long_signal[asset].iloc[-1]),
                 'current_price': float(prices[asset].iloc[-1])
             }
         
@@ -0,0 +1,181 @@
+"""
+參數掃描執行器
+共享只讀數據 + 進程池並行評估 + 可續跑的結果表
+
+用法：
+    sweep = ParameterSweep(evaluate_fn, shared_data, results_path='sweep.db')
+    results_df = sweep.run(ParameterSweep.grid(a=[1, 2], b=[10, 20]))
+
+evaluate_fn 必須是模組頂層函數（可被 pickle），簽名為
+    evaluate_fn(shared_data, params: dict) -> dict | None
+"""
+
+import hashlib
+import itertools
+import json
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import pandas as pd
+
+
+# 工作進程內的共享數據（由 initializer 設置一次，之後只讀）
+_SHARED = None
+_EVALUATE = None
+
+
+def _init_worker(evaluate_fn, shared_data):
+    """工作進程初始化：每個進程只接收一次共享數據"""
+    global _SHARED, _EVALUATE
+    _SHARED = shared_data
+    _EVALUATE = evaluate_fn
+
+
+def _run_one(params):
+    """在工作進程中評估一個參數組合"""
+    return params, _EVALUATE(_SHARED, params)
+
+
+def fingerprint(data):
+    """計算數據指紋，用於區分不同數據集的掃描結果"""
+    if isinstance(data, (pd.DataFrame, pd.Series)):
+        digest = hashlib.sha1(pd.util.hash_pandas_object(data, index=True).values.tobytes())
+        if isinstance(data, pd.DataFrame):
+            digest.update(json.dumps([str(c) for c in data.columns]).encode())
+        return digest.hexdigest()
+    return hashlib.sha1(repr(data).encode()).hexdigest()
+
+
+def params_key(params):
+    """參數組合的穩定鍵"""
+    return json.dumps(params, sort_keys=True, default=str)
+
+
+class SweepResultsTable:
+    """掃描結果表（SQLite），每完成一個組合即寫入，可中斷後續跑"""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.conn = sqlite3.connect(self.path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS sweep_results (
+                data_hash  TEXT NOT NULL,
+                params_key TEXT NOT NULL,
+                params     TEXT NOT NULL,
+                metrics    TEXT,
+                created_at TEXT NOT NULL,
+                PRIMARY KEY (data_hash, params_key)
+            )
+        """)
+        self.conn.commit()
+
+    def completed_keys(self, data_hash):
+        """已完成的參數組合"""
+        rows = self.conn.execute(
+            "SELECT params_key FROM sweep_results WHERE data_hash = ?", (data_hash,)
+        )
+        return {row[0] for row in rows}
+
+    def append(self, data_hash, params, metrics):
+        """寫入一個組合的結果（metrics 為 None 表示無有效回測）"""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO sweep_results VALUES (?, ?, ?, ?, ?)",
+            (
+                data_hash,
+                params_key(params),
+                json.dumps(params, default=str),
+                None if metrics is None else json.dumps(metrics, default=float),
+                datetime.now().isoformat(),
+            ),
+        )
+        self.conn.commit()
+
+    def to_dataframe(self, data_hash, keys=None):
+        """讀出某數據集的結果（參數 + 指標），keys 限定參數組合"""
+        rows = self.conn.execute(
+            "SELECT params_key, params, metrics FROM sweep_results "
+            "WHERE data_hash = ? AND metrics IS NOT NULL ORDER BY rowid",
+            (data_hash,),
+        ).fetchall()
+        return pd.DataFrame([
+            {**json.loads(m), **json.loads(p)}
+            for k, p, m in rows
+            if keys is None or k in keys
+        ])
+
+    def close(self):
+        self.conn.close()
+
+
+class ParameterSweep:
+    """參數掃描執行器"""
+
+    def __init__(self, evaluate_fn, shared_data, results_path=':memory:', n_jobs=None):
+        """
+        參數:
+            evaluate_fn: 頂層評估函數 evaluate_fn(shared_data, params) -> dict | None
+            shared_data: 所有組合共用的只讀數據（只計算一次）
+            results_path: 結果表路徑（':memory:' 表示不落盤、不可續跑）
+            n_jobs: 進程數（None 為全部 CPU，1 為在當前進程中串行執行）
+        """
+        self.evaluate_fn = evaluate_fn
+        self.shared_data = shared_data
+        self.n_jobs = n_jobs or os.cpu_count() or 1
+        self.table = SweepResultsTable(results_path)
+        self.data_hash = fingerprint(shared_data)
+
+    @staticmethod
+    def grid(**axes):
+        """笛卡兒積參數網格（保持參數順序）"""
+        names = list(axes)
+        return [dict(zip(names, values)) for values in itertools.product(*axes.values())]
+
+    def run(self, param_grid, verbose=True):
+        """
+        執行掃描，跳過結果表中已完成的組合
+
+        返回:
+            該數據集的全部結果 DataFrame（含之前已完成的組合）
+        """
+        done = self.table.completed_keys(self.data_hash)
+        pending = [p for p in param_grid if params_key(p) not in done]
+        total = len(param_grid)
+
+        if verbose:
+            print(f"  - 總組合數: {total}，已完成: {total - len(pending)}，待執行: {len(pending)}")
+            print(f"  - 進程數: {min(self.n_jobs, max(len(pending), 1))}")
+
+        finished = total - len(pending)
+        for params, metrics in self._execute(pending):
+            self.table.append(self.data_hash, params, metrics)
+            finished += 1
+            if verbose:
+                print(f"[{finished}/{total}] 完成: {params}")
+
+        return self.table.to_dataframe(self.data_hash, keys={params_key(p) for p in param_grid})
+
+    def _execute(self, pending):
+        """按完成順序產出 (params, metrics)"""
+        if not pending:
+            return
+
+        if self.n_jobs == 1 or len(pending) == 1:
+            for params in pending:
+                yield params, self.evaluate_fn(self.shared_data, params)
+            return
+
+        workers = min(self.n_jobs, len(pending))
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(self.evaluate_fn, self.shared_data),
+        ) as executor:
+            futures = [executor.submit(_run_one, params) for params in pending]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def close(self):
+        self.table.close()
@@ -0,0 +1,117 @@
+"""
+滑動窗口分位數（順序統計）
+取代各策略腳本中每日 history.tail(window).quantile(...) 的 O(n·w) 計算
+
+RollingQuantile 維護一個已排序的窗口（window=None 為擴張窗口）：
+- push：插入新值、移除最舊值，O(log w)
+- quantile：直接按排名讀取，O(log w)，插值方式與 pandas 的 linear 一致
+"""
+
+import bisect
+from collections import deque
+
+import numpy as np
+
+try:
+    from sortedcontainers import SortedList
+    SORTEDCONTAINERS_AVAILABLE = True
+except ImportError:
+    SORTEDCONTAINERS_AVAILABLE = False
+
+
+class _BisectList:
+    """SortedList 的最小替代品（bisect 插入，無 sortedcontainers 時使用）"""
+
+    def __init__(self):
+        self._items = []
+
+    def add(self, value):
+        bisect.insort(self._items, value)
+
+    def remove(self, value):
+        del self._items[bisect.bisect_left(self._items, value)]
+
+    def __getitem__(self, index):
+        return self._items[index]
+
+    def __len__(self):
+        return len(self._items)
+
+
+class RollingQuantile:
+    """滑動窗口分位數"""
+
+    def __init__(self, window):
+        """
+        參數:
+            window: 窗口長度（None 表示不移除舊值，即擴張窗口）
+        """
+        if window is not None and window < 1:
+            raise ValueError(f"window 必須 >= 1，得到 {window}")
+        self.window = window
+        self._order = deque()
+        self._sorted = SortedList() if SORTEDCONTAINERS_AVAILABLE else _BisectList()
+
+    def __len__(self):
+        return len(self._order)
+
+    def push(self, value):
+        """加入新值；窗口已滿時移除最舊的值（NaN 佔窗口位置但不參與分位數）"""
+        self._order.append(value)
+        if value == value:  # 非 NaN
+            self._sorted.add(value)
+        if self.window is not None and len(self._order) > self.window:
+            oldest = self._order.popleft()
+            if oldest == oldest:
+                self._sorted.remove(oldest)
+
+    def quantile(self, q):
+        """
+        當前窗口的 q 分位數（0 <= q <= 1，線性插值，同 pandas 默認）
+
+        返回:
+            分位數；窗口內沒有有效值時返回 NaN
+        """
+        n = len(self._sorted)
+        if n == 0:
+            return np.nan
+        position = (n - 1) * q
+        lower = int(np.floor(position))
+        upper = min(lower + 1, n - 1)
+        fraction = position - lower
+        low_value = self._sorted[lower]
+        if fraction == 0:
+            return low_value
+        return low_value + (self._sorted[upper] - low_value) * fraction
+
+
+def rolling_thresholds(values, window, quantiles, min_periods=None):
+    """
+    逐日計算「前 window 天」（不含當天）的分位數閾值
+
+    第 i 行等價於 series.iloc[:i].tail(window).quantile(q)；
+    window=None 時等價於 series.iloc[:i].quantile(q)。
+
+    參數:
+        values: 一維序列（Series 或 array）
+        window: 回看窗口（None 為擴張窗口）
+        quantiles: 分位數列表（0-1）
+        min_periods: 歷史不足此長度的行為 NaN（默認等於 window，擴張窗口默認 1）
+
+    返回:
+        np.ndarray，形狀 (len(values), len(quantiles))
+    """
+    values = np.asarray(values, dtype=float)
+    quantiles = list(quantiles)
+    if min_periods is None:
+        min_periods = window or 1
+
+    result = np.full((len(values), len(quantiles)), np.nan)
+    tracker = RollingQuantile(window)
+
+    for i, value in enumerate(values):
+        if len(tracker) >= max(min_periods, 1):
+            result[i] = [tracker.quantile(q) for q in quantiles]
+        tracker.push(value)
+
+    return result
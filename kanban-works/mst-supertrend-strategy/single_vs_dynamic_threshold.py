@@ -5,11 +5,17 @@
 
 import numpy as np
 import pandas as pd
-import yfinance as yf
+import sys
+from pathlib import Path
 from datetime import datetime
 import warnings
 warnings.filterwarnings('ignore')
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'quant'))
+
+from market_data_store import download
+from rolling_quantile import rolling_thresholds
+
 
 class SingleVsDynamicThreshold:
     """單一閾值 vs 動態閾值對比"""
@@ -91,6 +97,74 @@ class SingleVsDynamicThreshold:
         
         return backtest_df
     
+    def run_dynamic_threshold(self, prices, index_prices, high_percentile=90, low_percentile=10,
+                              lookback_window=60):
+        """
+        動態閾值版本回測（默認 90/10/60）
+        
+        參數:
+            prices: 資產價格數據
+            index_prices: 指數價格數據
+            high_percentile: 高分位數（進入危機模式）
+            low_percentile: 低分位數（退出危機模式）
+            lookback_window: 分位數回看窗口
+        
+        返回:
+            backtest_df: 回測數據
+        """
+        correlation_series = self.calculate_correlation(prices)
+        
+        # 對齊數據
+        aligned_data = pd.concat([
+            correlation_series,
+            index_prices
+        ], axis=1).dropna()
+        
+        aligned_data.columns = ['correlation', 'index_price']
+        
+        correlation = aligned_data['correlation'].values
+        index_price = aligned_data['index_price'].values
+        thresholds = rolling_thresholds(
+            correlation, lookback_window, [high_percentile / 100, low_percentile / 100]
+        )
+        
+        signals = []
+        for i in range(lookback_window, len(aligned_data)):
+            current_corr = correlation[i]
+            high_threshold, low_threshold = thresholds[i]
+            
+            if current_corr < low_threshold:
+                position_size = 1.0
+                market_state = '正常市場'
+            elif current_corr > high_threshold:
+                position_size = 0.0
+                market_state = '危機市場'
+            else:
+                position_size = 0.5
+                market_state = '過渡市場'
+            
+            # 計算收益率
+            index_return = (index_price[i] - index_price[i-1]) / index_price[i-1]
+            strategy_return = position_size * index_return
+            
+            signals.append({
+                'date': aligned_data.index[i],
+                'correlation': current_corr,
+                'high_threshold': high_threshold,
+                'low_threshold': low_threshold,
+                'market_state': market_state,
+                'position_size': position_size,
+                'index_price': index_price[i],
+                'index_return': index_return,
+                'strategy_return': strategy_return
+            })
+        
+        backtest_df = pd.DataFrame(signals)
+        if not backtest_df.empty:
+            backtest_df.set_index('date', inplace=True)
+        
+        return backtest_df
+    
     def calculate_metrics(self, backtest_df):
         """計算回測指標"""
         if backtest_df.empty:
@@ -400,11 +474,11 @@ def main():
     tickers = ['SPY', 'QQQ', 'IWM', 'XLI', 'XLV', 'XLK', 'XLF', 'XLE']
     
     print(f"\n下載 {len(tickers)} 個資產的數據...")
-    prices = yf.download(tickers, period='10y', progress=False, auto_adjust=True)['Close']
+    prices = download(tickers, period='10y')['Close']
     
     # 下載指數數據
     print("下載 SPY 指數數據...")
-    index_prices = yf.download('SPY', period='10y', progress=False, auto_adjust=True)['Close']
+    index_prices = download('SPY', period='10y')['Close']
     
     # 定義單一閾值範圍（0.5 - 0.9）
     thresholds = np.arange(0.5, 0.95, 0.05)
@@ -419,21 +493,11 @@ def main():
         top_n=10
     )
     
-    # 動態閾值結果（從之前的優化中得到）
-    dynamic_result = {
-        'index_annual_return': 0.1461,
-        'index_volatility': 0.1813,
-        'index_max_drawdown': -0.3372,
-        'index_sharpe': 0.81,
-        'index_calmar': 0.43,
-        'strategy_annual_return': 0.1216,
-        'strategy_volatility': 0.0854,
-        'strategy_max_drawdown': -0.0988,
-        'strategy_sharpe': 1.42,
-        'strategy_calmar': 1.23,
-        'excess_annual_return': -0.0244,
-        'avg_position_size': 0.5422
-    }
+    # 動態閾值結果（90/10/60，在同一份數據上即時計算）
+    print("\n運行動態閾值回測（90/10/60）...")
+    dynamic_result = analyzer.calculate_metrics(
+        analyzer.run_dynamic_threshold(prices, index_prices)
+    )
     
     # 對比單一閾值 vs 動態閾值
     print("\n" + "="*100)
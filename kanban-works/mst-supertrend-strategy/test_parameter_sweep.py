@@ -0,0 +1,78 @@
+"""
+參數掃描執行器測試
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from parameter_sweep import ParameterSweep
+
+
+def evaluate_mean_shift(series, params):
+    """測試用評估函數：序列平移後的均值"""
+    if params['shift'] < 0:
+        return None
+    return {'value': float(series.mean() + params['shift'] * params['scale'])}
+
+
+class TestParameterSweep(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'sweep.db')
+        self.series = pd.Series(np.arange(10, dtype=float))
+        self.grid = ParameterSweep.grid(shift=[-1, 0, 1, 2], scale=[1, 10])
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_parallel_matches_serial(self):
+        """並行與串行結果一致"""
+        serial = ParameterSweep(evaluate_mean_shift, self.series, n_jobs=1)
+        parallel = ParameterSweep(evaluate_mean_shift, self.series, n_jobs=2)
+        keys = ['shift', 'scale']
+        a = serial.run(self.grid, verbose=False).sort_values(keys).reset_index(drop=True)
+        b = parallel.run(self.grid, verbose=False).sort_values(keys).reset_index(drop=True)
+        pd.testing.assert_frame_equal(a, b)
+        self.assertEqual(len(a), 6)  # shift=-1 無結果
+
+    def test_resume_skips_completed(self):
+        """中斷後續跑只執行未完成的組合"""
+        first = ParameterSweep(evaluate_mean_shift, self.series, results_path=self.path, n_jobs=1)
+        first.run(self.grid[:3], verbose=False)
+        first.close()
+
+        calls = []
+
+        def counting(series, params):
+            calls.append(params)
+            return evaluate_mean_shift(series, params)
+
+        second = ParameterSweep(counting, self.series, results_path=self.path, n_jobs=1)
+        results = second.run(self.grid, verbose=False)
+        second.close()
+
+        self.assertEqual(len(calls), len(self.grid) - 3)
+        self.assertEqual(len(results), 6)
+
+    def test_different_data_not_reused(self):
+        """數據不同時不沿用舊結果"""
+        first = ParameterSweep(evaluate_mean_shift, self.series, results_path=self.path, n_jobs=1)
+        first.run(self.grid, verbose=False)
+        first.close()
+
+        other = ParameterSweep(evaluate_mean_shift, self.series + 1, results_path=self.path, n_jobs=1)
+        results = other.run(self.grid, verbose=False)
+        other.close()
+        self.assertEqual(results.loc[(results['shift'] == 0) & (results['scale'] == 1), 'value'].iloc[0], 5.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+"""
+滑動窗口分位數測試
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import rolling_quantile
+from rolling_quantile import RollingQuantile, rolling_thresholds
+
+
+def reference_thresholds(series, window, quantiles):
+    """原來的寫法：每天 history.tail(window).quantile(q)"""
+    result = np.full((len(series), len(quantiles)), np.nan)
+    for i in range(len(series)):
+        history = series.iloc[:i] if window is None else series.iloc[:i].tail(window)
+        if len(history) >= (window or 1):
+            result[i] = [history.quantile(q) for q in quantiles]
+    return result
+
+
+class TestRollingQuantile(unittest.TestCase):
+    """測試與 pandas 分位數一致"""
+
+    def setUp(self):
+        rng = np.random.default_rng(5)
+        self.series = pd.Series(rng.normal(0.4, 0.2, 400))
+        # 重複值與 NaN
+        self.series.iloc[100:110] = 0.5
+        self.series.iloc[[7, 150, 151]] = np.nan
+
+    def test_matches_pandas(self):
+        """測試滑動窗口結果與 tail(window).quantile 一致"""
+        quantiles = [0.9, 0.75, 0.5, 0.25, 0.1]
+        for window in (1, 20, 60):
+            expected = reference_thresholds(self.series, window, quantiles)
+            actual = rolling_thresholds(self.series, window, quantiles)
+            np.testing.assert_allclose(actual, expected, rtol=1e-12, equal_nan=True)
+
+    def test_expanding_window(self):
+        """測試 window=None 時與 iloc[:i].quantile 一致"""
+        expected = reference_thresholds(self.series, None, [0.9, 0.1])
+        actual = rolling_thresholds(self.series, None, [0.9, 0.1])
+        np.testing.assert_allclose(actual, expected, rtol=1e-12, equal_nan=True)
+
+    def test_bisect_fallback(self):
+        """測試沒有 sortedcontainers 時的後備實現"""
+        available = rolling_quantile.SORTEDCONTAINERS_AVAILABLE
+        rolling_quantile.SORTEDCONTAINERS_AVAILABLE = False
+        try:
+            expected = reference_thresholds(self.series, 30, [0.75, 0.25])
+            actual = rolling_thresholds(self.series, 30, [0.75, 0.25])
+        finally:
+            rolling_quantile.SORTEDCONTAINERS_AVAILABLE = available
+        np.testing.assert_allclose(actual, expected, rtol=1e-12, equal_nan=True)
+
+    def test_window_eviction(self):
+        """測試窗口滿後移除最舊值"""
+        tracker = RollingQuantile(3)
+        for value in (5.0, 1.0, 3.0, 2.0):
+            tracker.push(value)
+        self.assertEqual(len(tracker), 3)
+        self.assertEqual(tracker.quantile(1.0), 3.0)
+        self.assertEqual(tracker.quantile(0.5), 2.0)
+
+    def test_invalid_window(self):
+        """測試非法窗口報錯"""
+        with self.assertRaises(ValueError):
+            RollingQuantile(0)
+
+
+if __name__ == '__main__':
+    unittest.main()
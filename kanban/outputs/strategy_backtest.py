@@ -11,9 +11,14 @@ from datetime import datetime, timedelta
 from pathlib import Path
 from dataclasses import dataclass
 from typing import List, Optional
+import sys
 import warnings
 warnings.filterwarnings('ignore')
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'quant'))
+
+import indicators
+
 # 資料庫路徑
 DATABASE_FILE = "/Users/charlie/Dashboard/backend/market_data_db/market_data.duckdb"
 
@@ -53,77 +58,17 @@ class StrategyPerformance:
 
 # 計算 Supertrend
 def calculate_supertrend(df, period=10, multiplier=3.0):
-    """計算 Supertrend 指標"""
-    high = df['high'].values
-    low = df['low'].values
-    close = df['close'].values
-
-    # 計算 ATR
-    tr1 = high - low
-    tr2 = np.abs(high - np.roll(close, 1))
-    tr3 = np.abs(low - np.roll(close, 1))
-    tr = np.maximum.reduce([tr1, tr2, tr3])
-    atr = pd.Series(tr).rolling(window=period).mean().values
-
-    # 計算基本 Supertrend
-    hl2 = (high + low) / 2
-    supertrend = hl2 + multiplier * atr
-
-    # 動態調整
-    direction = np.zeros(len(df))
-    direction[0] = 1 if close[0] > supertrend[0] else -1
-
-    for i in range(1, len(df)):
-        if close[i-1] <= supertrend[i-1]:
-            supertrend[i] = min(hl2[i] + multiplier * atr[i], supertrend[i-1])
-            direction[i] = 1 if close[i] > supertrend[i] else -1
-        else:
-            supertrend[i] = max(hl2[i] - multiplier * atr[i], supertrend[i-1])
-            direction[i] = 1 if close[i] > supertrend[i] else -1
-
-    return supertrend, direction
+    """計算 Supertrend 指標（共用內核，ATR 使用滾動平均）"""
+    result = indicators.supertrend(df['high'].values, df['low'].values, df['close'].values,
+                                   period=period, multiplier=multiplier, atr_method='sma')
+    # 預熱期方向記為 0，避免 NaN 與 NaN 比較被當成翻轉
+    return result.trend, np.nan_to_num(result.direction)
 
 # 計算 ADX
 def calculate_adx(df, period=14):
-    """計算 ADX 指標"""
-    high = df['high'].values
-    low = df['low'].values
-    close = df['close'].values
-
-    # 計算 +DM 和 -DM
-    up_move = high - np.roll(high, 1)
-    down_move = np.roll(low, 1) - low
-
-    plus_dm = np.where((up_move > down_move) & (up_move > 0), up_move, 0.0)
-    minus_dm = np.where((down_move > up_move) & (down_move > 0), down_move, 0.0)
-
-    # 計算 TR
-    tr1 = high - low
-    tr2 = np.abs(high - np.roll(close, 1))
-    tr3 = np.abs(low - np.roll(close, 1))
-    tr = np.maximum.reduce([tr1, tr2, tr3])
-
-    # 平滑
-    atr = pd.Series(tr).rolling(window=period).mean().values
-    plus_dm_smooth = pd.Series(plus_dm).rolling(window=period).mean().values
-    minus_dm_smooth = pd.Series(minus_dm).rolling(window=period).mean().values
-
-    # 避免除以 0
-    atr_safe = np.where(atr == 0, 1e-6, atr)
-
-    # 計算 +DI 和 -DI
-    plus_di = 100 * (plus_dm_smooth / atr_safe)
-    minus_di = 100 * (minus_dm_smooth / atr_safe)
-
-    # 計算 DX
-    di_sum = plus_di + minus_di
-    di_sum_safe = np.where(di_sum == 0, 1e-6, di_sum)
-    dx = 100 * np.abs(plus_di - minus_di) / di_sum_safe
-
-    # 計算 ADX
-    adx = pd.Series(dx).rolling(window=period).mean().values
-
-    return adx
+    """計算 ADX 指標（共用內核，平滑使用滾動平均）"""
+    return indicators.adx(df['high'].values, df['low'].values, df['close'].values,
+                          period=period, method='sma').adx
 
 # 生成模擬交易信號
 def generate_trading_signals(symbol, start_date, end_date):
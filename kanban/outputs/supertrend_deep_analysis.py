@@ -9,9 +9,14 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from pathlib import Path
+import sys
 import warnings
 warnings.filterwarnings('ignore')
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'quant'))
+
+import indicators
+
 # 資料庫路徑
 DATABASE_FILE = "/Users/charlie/Dashboard/backend/market_data_db/market_data.duckdb"
 
@@ -92,81 +97,17 @@ print("=" * 80)
 
 def calculate_atr(df, period=14):
     """計算 ATR (Average True Range)"""
-    high = df['high']
-    low = df['low']
-    close = df['close']
-
-    tr1 = high - low
-    tr2 = abs(high - close.shift())
-    tr3 = abs(low - close.shift())
-
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-    atr = tr.rolling(window=period).mean()
-
-    return atr
+    return indicators.atr(df['high'], df['low'], df['close'], period=period, method='sma')
 
 def calculate_adx(df, period=14):
-    """計算 ADX (Average Directional Index)"""
-    high = df['high']
-    low = df['low']
-    close = df['close']
-
-    # 計算 +DM 和 -DM
-    up_move = high - high.shift()
-    down_move = low.shift() - low
-
-    plus_dm = np.where((up_move > down_move) & (up_move > 0), up_move, 0.0)
-    minus_dm = np.where((down_move > up_move) & (down_move > 0), down_move, 0.0)
-
-    # 計算 TR
-    tr = pd.concat([
-        high - low,
-        abs(high - close.shift()),
-        abs(low - close.shift())
-    ], axis=1).max(axis=1)
-
-    # 平滑
-    atr = pd.Series(tr).rolling(window=period).mean()
-    plus_dm_smooth = pd.Series(plus_dm).rolling(window=period).mean()
-    minus_dm_smooth = pd.Series(minus_dm).rolling(window=period).mean()
-
-    # 計算 +DI 和 -DI
-    plus_di = 100 * (plus_dm_smooth / atr)
-    minus_di = 100 * (minus_dm_smooth / atr)
-
-    # 計算 DX
-    dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di)
-
-    # 計算 ADX
-    adx = dx.rolling(window=period).mean()
-
-    return adx, plus_di, minus_di
+    """計算 ADX (Average Directional Index)，返回 (adx, plus_di, minus_di)"""
+    return indicators.adx(df['high'], df['low'], df['close'], period=period, method='sma')
 
 def calculate_supertrend(df, period=10, multiplier=3.0):
-    """計算 Supertrend"""
-    high = df['high']
-    low = df['low']
-    close = df['close']
-
-    # 計算 ATR
-    atr = calculate_atr(df, period)
-
-    # 計算基本 Supertrend
-    hl2 = (high + low) / 2
-    supertrend = hl2 + (multiplier * atr)
-    # 初始 Supertrend 是 hl2 + multiplier * atr
-
-    # 動態調整
-    for i in range(1, len(df)):
-        if close.iloc[i-1] <= supertrend.iloc[i-1]:
-            supertrend.iloc[i] = min(hl2.iloc[i] + multiplier * atr.iloc[i], supertrend.iloc[i-1])
-        else:
-            supertrend.iloc[i] = max(hl2.iloc[i] - multiplier * atr.iloc[i], supertrend.iloc[i-1])
-
-    # 計算方向
-    direction = np.where(close > supertrend, 1, -1)
-
-    return supertrend, direction
+    """計算 Supertrend，返回 (supertrend, direction)"""
+    result = indicators.supertrend(df['high'], df['low'], df['close'],
+                                   period=period, multiplier=multiplier, atr_method='sma')
+    return result.trend, result.direction
 
 # 對每個股票計算指標
 results = []
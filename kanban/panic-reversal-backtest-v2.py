@@ -17,8 +17,14 @@ import matplotlib.dates as mdates
 from datetime import datetime, timedelta
 import requests
 import json
+import sys
+from pathlib import Path
 from typing import Dict, List, Tuple, Optional
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / 'quant'))
+
+from market_data_store import MarketDataStore
+
 # ============================================================
 # 策略配置 - 改進版
 # ============================================================
@@ -107,25 +113,42 @@ WEIGHTED_THRESHOLD = 0.50
 # 數據獲取
 # ============================================================
 
+def dashboard_fetcher(symbol: str, start, end) -> pd.DataFrame:
+    """從 Dashboard API 獲取 [start, end] 的日線（數據湖的下載函數）"""
+    days = (pd.Timestamp(datetime.now().date()) - pd.Timestamp(start)).days + 1
+    url = f"http://localhost:8000/api/stocks/{symbol}/history?days={days}"
+    response = requests.get(url, timeout=30)
+    response.raise_for_status()
+    data = response.json()
+
+    if not data:
+        return None
+
+    df = pd.DataFrame(data)
+    df['Date'] = pd.to_datetime(df['trade_date'])
+    df = df.rename(columns={
+        'open': 'Open', 'high': 'High', 'low': 'Low', 'close': 'Close', 'volume': 'Volume'
+    })
+    df = df.set_index('Date').sort_index()
+    return df.loc[pd.Timestamp(start):pd.Timestamp(end)]
+
+
+# Dashboard 數據單獨存放在數據湖的 dashboard 來源下，每次只補抓缺少的尾部
+_store = MarketDataStore(source='dashboard', fetcher=dashboard_fetcher)
+
+
 def fetch_price_data(symbol: str, days: int = 3650) -> pd.DataFrame:
-    """從 Dashboard API 獲取價格數據"""
+    """從本地數據湖獲取價格數據（必要時從 Dashboard API 補抓）"""
     try:
-        url = f"http://localhost:8000/api/stocks/{symbol}/history?days={days}"
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-        data = response.json()
+        end = pd.Timestamp(datetime.now().date())
+        history = _store.load(symbol, start=end - pd.Timedelta(days=days), end=end)
 
-        if not data or len(data) == 0:
+        if len(history) == 0:
             print(f"⚠️  無法獲取 {symbol} 數據")
             return None
 
-        df = pd.DataFrame(data)
-        df['date'] = pd.to_datetime(df['trade_date'])
-        df = df.sort_values('date').reset_index(drop=True)
-
         # 只保留需要的欄位
-        df = df[['date', 'close']]
-        df = df.rename(columns={'close': symbol})
+        df = history['Close'].rename(symbol).rename_axis('date').reset_index()
 
         return df
 
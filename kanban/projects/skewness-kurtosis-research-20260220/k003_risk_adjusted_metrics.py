@@ -15,13 +15,19 @@ Usage:
     >>> from k003_risk_adjusted_metrics import RiskAdjustedMetrics
     >>> ram = RiskAdjustedMetrics(returns, risk_free_rate=0.02)
     >>> metrics = ram.compute_all_metrics()
+    >>> rolling = rolling_metrics_for_strategies(strategy_returns, window=252)
+    >>> rolling['Equal Weight']['Sharpe Ratio']
 """
 
 import numpy as np
 import pandas as pd
 from scipy import stats
 from typing import Union, Tuple, Dict, List, Optional
+import hashlib
 import warnings
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 
 warnings.filterwarnings('ignore')
 
@@ -339,41 +345,503 @@ class RiskAdjustedMetrics:
         """
         if len(self.returns) < window:
             raise ValueError(f"Insufficient data for rolling window of {window} periods")
+        if len(self.returns) == window:
+            raise ValueError("No valid rolling windows found")
 
-        rolling_results = []
+        name = self.returns.name if self.returns.name is not None else 'returns'
+        rolling = rolling_metrics_for_strategies(
+            {name: self.returns}, window=window, risk_free_rate=self.risk_free_rate,
+            benchmark_returns=self.benchmark_returns
+        )
+        result = rolling[name]
+        result.columns.name = None
+        return result
 
-        for i in range(window, len(self.returns)):
-            window_returns = self.returns.iloc[i-window:i]
 
-            # Skip if benchmark is provided but not enough data
-            if self.benchmark_returns is not None:
-                bench_window = self.benchmark_returns[window_returns.index]
-                if len(bench_window) < window * 0.9:  # Allow some missing data
-                    continue
+# Column order of compute_all_metrics(), shared by the rolling engine
+METRIC_COLUMNS = [
+    'Sharpe Ratio', 'Sortino Ratio', 'Calmar Ratio', 'Information Ratio',
+    'SASR', 'Omega Ratio', 'Conditional Sharpe', 'SKASR', 'SKTASR', 'DAP', 'ADR',
+    'Mean Annual Return', 'Std Annual', 'Skewness', 'Kurtosis', 'Excess Kurtosis',
+    'Max Drawdown', 'CVaR 95%', 'CVaR 99%', 'Tail Ratio',
+]
 
-            ram = RiskAdjustedMetrics(window_returns, self.risk_free_rate,
-                                      self.benchmark_returns)
-            metrics = ram.compute_all_metrics()
-            metrics['Date'] = self.returns.index[i]
-            rolling_results.append(metrics)
+# Rolling IC windows are evaluated in chunks of about this many elements
+IC_CHUNK_ELEMENTS = 4_000_000
 
-        if not rolling_results:
-            raise ValueError("No valid rolling windows found")
 
-        return pd.DataFrame(rolling_results).set_index('Date')
+def _combine_drawdown(earlier, later):
+    """
+    Merge drawdown summaries of two adjacent segments of log-wealth
+
+    Each summary is (max, min, mdd) of the segment; the merged max drawdown is
+    the worst of either segment or a peak in the earlier one followed by a
+    trough in the later one.
+    """
+    if earlier is None:
+        return later
+    if later is None:
+        return earlier
+    return (
+        np.maximum(earlier[0], later[0]),
+        np.minimum(earlier[1], later[1]),
+        np.minimum(np.minimum(earlier[2], later[2]), later[1] - earlier[0]),
+    )
+
+
+class _SlidingDrawdown:
+    """
+    Sliding-window max drawdown via two-stack aggregation
+
+    Push/pop are amortized O(1); all strategies share the same stacks, each
+    entry holding one value per strategy.
+    """
+
+    def __init__(self):
+        self.front = []        # aggregates of front[i:], oldest element last
+        self.back = []
+        self.back_agg = None
+
+    def push(self, log_wealth: np.ndarray, valid: np.ndarray):
+        # A missing period adds no point to the wealth curve: (-inf, +inf, 0)
+        # is the identity of _combine_drawdown
+        point = (np.where(valid, log_wealth, -np.inf), np.where(valid, log_wealth, np.inf),
+                 np.zeros_like(log_wealth))
+        self.back.append(point)
+        self.back_agg = _combine_drawdown(self.back_agg, point)
+
+    def pop(self):
+        if not self.front:
+            agg = None
+            while self.back:
+                agg = _combine_drawdown(self.back.pop(), agg)
+                self.front.append(agg)
+            self.back_agg = None
+        self.front.pop()
+
+    def max_drawdown(self) -> np.ndarray:
+        front_agg = self.front[-1] if self.front else None
+        return np.expm1(_combine_drawdown(front_agg, self.back_agg)[2])
+
+
+class _SortedWindow:
+    """
+    Order-statistics buffer: every strategy's window kept sorted (one row each)
+
+    Missing values are stored as +inf so they sort last; order statistics
+    only look at the first `n` (observed) entries of each row.
+    """
+
+    def __init__(self, n_strategies: int):
+        self.values = np.empty((n_strategies, 0))
+        self.rows = np.arange(n_strategies)
+
+    def insert(self, new: np.ndarray):
+        n_rows, width = self.values.shape
+        position = (self.values < new[:, None]).sum(axis=1)
+        columns = np.arange(width)[None, :]
+        target = columns + (columns >= position[:, None])
+        out = np.empty((n_rows, width + 1))
+        out[np.repeat(self.rows, width), target.ravel()] = self.values.ravel()
+        out[self.rows, position] = new
+        self.values = out
+
+    def remove(self, old: np.ndarray):
+        n_rows, width = self.values.shape
+        position = (self.values < old[:, None]).sum(axis=1)
+        keep = np.ones((n_rows, width), dtype=bool)
+        keep[self.rows, position] = False
+        self.values = self.values[keep].reshape(n_rows, width - 1)
+
+    def percentile(self, q: float, n: np.ndarray) -> np.ndarray:
+        """np.percentile(observed window, q) with linear interpolation"""
+        rank = q / 100 * np.maximum(n - 1, 0)
+        lo = np.floor(rank).astype(int)
+        hi = np.ceil(rank).astype(int)
+        low, high = self.values[self.rows, lo], self.values[self.rows, hi]
+        with np.errstate(invalid='ignore'):
+            return np.where(n > 0, low + (high - low) * (rank - lo), np.nan)
+
+    def tail_mean(self, threshold: np.ndarray) -> np.ndarray:
+        """Mean of window values <= threshold"""
+        below = self.values <= threshold[:, None]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(below, self.values, 0.0).sum(axis=1) / below.sum(axis=1)
+
+
+class RollingRiskMetrics:
+    """
+    Streaming rolling-window risk metrics for many strategies at once
+    多策略滾動風險指標（逐期 O(1) 更新）
+
+    Keeps running (shifted) power sums for mean / variance / skewness /
+    kurtosis, downside and upside partial sums for Sortino / Omega / DAP,
+    active-return sums for the Information Ratio and a two-stack drawdown
+    aggregate, so each step updates in O(1). VaR / CVaR come from a sorted
+    window buffer per strategy. Per window the results equal
+    RiskAdjustedMetrics(window_returns).compute_all_metrics(); a strategy
+    with missing values is evaluated on its observations in the window.
+    """
+
+    def __init__(self, n_strategies: int, window: int = 252, risk_free_rate: float = 0.02):
+        """
+        Parameters:
+        -----------
+        n_strategies : int
+            Number of return columns fed to update()
+        window : int
+            Rolling window size in periods
+        risk_free_rate : float
+            Annualized risk-free rate
+        """
+        self.window = window
+        self.risk_free_rate = risk_free_rate
+
+        zeros = np.zeros(n_strategies)
+        self.sums = {name: zeros.copy() for name in (
+            'n', 's1', 's2', 's3', 's4',
+            'neg_n', 'neg_s1', 'neg_s2', 'pos_n', 'pos_s1',
+            'act_n', 'act_s1', 'act_s2',
+        )}
+        self.shift = None                 # first observation, keeps power sums well conditioned
+        self.buffer = deque()             # (returns, active) of the current window
+        self.log_wealth = zeros.copy()
+        self.drawdown = _SlidingDrawdown()
+        self.sorted = _SortedWindow(n_strategies)
+
+    def _accumulate(self, returns: np.ndarray, active: np.ndarray, sign: float):
+        valid = ~np.isnan(returns)
+        d = np.where(valid, returns - self.shift, 0.0)
+        r = np.where(valid, returns, 0.0)
+        negative = valid & (returns < 0)
+        positive = valid & (returns > 0)
+        has_active = ~np.isnan(active)
+        a = np.where(has_active, active, 0.0)
+
+        sums = self.sums
+        sums['n'] += sign * valid
+        sums['s1'] += sign * d
+        sums['s2'] += sign * d ** 2
+        sums['s3'] += sign * d ** 3
+        sums['s4'] += sign * d ** 4
+        sums['neg_n'] += sign * negative
+        sums['neg_s1'] += sign * np.where(negative, r, 0.0)
+        sums['neg_s2'] += sign * np.where(negative, r ** 2, 0.0)
+        sums['pos_n'] += sign * positive
+        sums['pos_s1'] += sign * np.where(positive, r, 0.0)
+        sums['act_n'] += sign * has_active
+        sums['act_s1'] += sign * a
+        sums['act_s2'] += sign * a ** 2
+
+    def update(self, returns, benchmark: Optional[float] = None) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Add one period of returns (one value per strategy, NaN = missing)
+
+        Returns:
+        --------
+        dict or None: metric name -> array (one value per strategy) for the
+        window ending at this period; None until the window is full.
+        Strategies without any observation in the window get NaN.
+        """
+        returns = np.asarray(returns, dtype=float)
+        if self.shift is None:
+            self.shift = np.nan_to_num(returns)
+        bench = np.nan if benchmark is None else benchmark
+        active = returns - bench
+
+        self._accumulate(returns, active, 1.0)
+        self.buffer.append((returns, active))
+        self.sorted.insert(np.where(np.isnan(returns), np.inf, returns))
+        self.log_wealth = self.log_wealth + np.log1p(np.nan_to_num(returns))
+        self.drawdown.push(self.log_wealth, ~np.isnan(returns))
+
+        if len(self.buffer) > self.window:
+            old_returns, old_active = self.buffer.popleft()
+            self._accumulate(old_returns, old_active, -1.0)
+            self.sorted.remove(np.where(np.isnan(old_returns), np.inf, old_returns))
+            self.drawdown.pop()
+
+        if len(self.buffer) < self.window:
+            return None
+        return self._metrics()
+
+    def _metrics(self) -> Dict[str, np.ndarray]:
+        sums = self.sums
+        n = sums['n']
+        # Annualization follows each strategy's observation count, like RiskAdjustedMetrics
+        ann = np.where(n >= 252, np.sqrt(252), np.where(n >= 52, np.sqrt(52), np.sqrt(12)))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            # Moments from shifted power sums
+            mean_d = sums['s1'] / n
+            m2 = sums['s2'] / n - mean_d ** 2
+            m3 = sums['s3'] / n - 3 * mean_d * sums['s2'] / n + 2 * mean_d ** 3
+            m4 = (sums['s4'] / n - 4 * mean_d * sums['s3'] / n
+                  + 6 * mean_d ** 2 * sums['s2'] / n - 3 * mean_d ** 4)
+            m2 = np.maximum(m2, 0.0)
+
+            neg_n, neg_s1 = sums['neg_n'], sums['neg_s1']
+            neg_var = (sums['neg_s2'] - neg_s1 ** 2 / neg_n) / (neg_n - 1)
+            downside_std = np.where(neg_n > 0, np.sqrt(np.maximum(neg_var, 0.0)) * ann, 0.0)
+            downside_std = np.where(neg_n == 1, np.nan, downside_std)
+
+            var_95 = self.sorted.percentile(5, n)
+            var_99 = self.sorted.percentile(1, n)
+            prob_pos = sums['pos_n'] / n
+            prob_neg = neg_n / n
+
+            act_n = sums['act_n']
+            tracking_error = np.sqrt(np.maximum(
+                (sums['act_s2'] - sums['act_s1'] ** 2 / act_n) / (act_n - 1), 0.0)) * ann
+
+            metrics = _derive_metrics({
+                'mean_annual': (self.shift + mean_d) * 252,
+                'std_annual': np.sqrt(m2 * n / (n - 1)) * ann,
+                'skewness': m3 / m2 ** 1.5,
+                'kurtosis': m4 / m2 ** 2,
+                'downside_std': downside_std,
+                'max_drawdown': self.drawdown.max_drawdown(),
+                'cvar_95': self.sorted.tail_mean(var_95),
+                'cvar_99': self.sorted.tail_mean(var_99),
+                'prob_pos': prob_pos,
+                'prob_neg': prob_neg,
+                'expected_pos': np.where(prob_pos > 0, sums['pos_s1'] / sums['pos_n'], 0.0),
+                'expected_neg': np.where(prob_neg > 0, np.abs(neg_s1 / neg_n), 0.0),
+                'gains': sums['pos_s1'],
+                'losses': -neg_s1,
+                'act_n': act_n,
+                'act_mean': sums['act_s1'] / act_n,
+                'tracking_error': tracking_error,
+            }, ann, self.risk_free_rate)
+
+        empty = n == 0
+        return {name: np.where(empty, np.nan, value) for name, value in metrics.items()}
+
+
+def _derive_metrics(stats: Dict[str, np.ndarray], ann_factor,
+                    risk_free_rate: float) -> Dict[str, np.ndarray]:
+    """
+    compute_all_metrics() from per-strategy summary statistics
+
+    Shared by the rolling engine and the block evaluator, which differ only
+    in how the summary statistics (moments, drawdown, tail means, partial
+    sums) are obtained. Every entry is an array with one value per strategy.
+    """
+    ann = ann_factor
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean_annual = stats['mean_annual']
+        std_annual = stats['std_annual']
+        skewness = stats['skewness']
+        excess_kurtosis = stats['kurtosis'] - 3
+        downside_std = stats['downside_std']
+        max_drawdown = stats['max_drawdown']
+        cvar_95, cvar_99 = stats['cvar_95'], stats['cvar_99']
+        tail_ratio = np.where(cvar_99 != 0, np.abs(cvar_95 / cvar_99), 1.0)
+
+        excess = mean_annual - risk_free_rate
+        sharpe = np.where(std_annual != 0, excess / std_annual, np.nan)
+        sortino = np.where(downside_std != 0, excess / downside_std, np.nan)
+        calmar = np.where(max_drawdown != 0, excess / np.abs(max_drawdown), np.nan)
+
+        tracking_error = stats['tracking_error']
+        information = np.where(
+            (stats['act_n'] >= 10) & (tracking_error != 0),
+            stats['act_mean'] * 252 / tracking_error, np.nan)
+
+        losses = stats['losses']
+        omega = np.where(losses != 0, stats['gains'] / losses, np.inf)
+
+        cvar_95_annual = cvar_95 * ann
+        conditional_sharpe = np.where(cvar_95_annual != 0, excess / np.abs(cvar_95_annual), np.nan)
+
+        prob_neg, expected_neg = stats['prob_neg'], stats['expected_neg']
+        prob_ratio = np.where(prob_neg > 0, stats['prob_pos'] / prob_neg, np.inf)
+        ev_ratio = np.where(expected_neg > 0, stats['expected_pos'] / expected_neg, np.inf)
+        dap = np.where(excess <= 0, np.nan, excess * prob_ratio ** 0.5 * ev_ratio ** 0.5)
+
+        asymmetric_risk = 0.6 * downside_std + 0.4 * np.abs(cvar_95_annual)
+        adr = np.where(asymmetric_risk != 0, excess / asymmetric_risk, np.nan)
+
+        return {
+            'Sharpe Ratio': sharpe,
+            'Sortino Ratio': sortino,
+            'Calmar Ratio': calmar,
+            'Information Ratio': information,
+            'SASR': sharpe / (1 + skewness / 6),
+            'Omega Ratio': omega,
+            'Conditional Sharpe': conditional_sharpe,
+            'SKASR': sharpe / (1 + skewness / 6 + excess_kurtosis / 24),
+            'SKTASR': (sharpe * (1 + 0.1 * skewness) * (1 - 0.05 * excess_kurtosis)
+                       * (1 + 0.3 * (1 - tail_ratio))),
+            'DAP': dap,
+            'ADR': adr,
+            'Mean Annual Return': mean_annual,
+            'Std Annual': std_annual,
+            'Skewness': skewness,
+            'Kurtosis': stats['kurtosis'],
+            'Excess Kurtosis': excess_kurtosis,
+            'Max Drawdown': max_drawdown,
+            'CVaR 95%': cvar_95_annual,
+            'CVaR 99%': cvar_99 * ann,
+            'Tail Ratio': tail_ratio,
+        }
+
+
+def _block_metrics(values: np.ndarray, benchmark: Optional[np.ndarray] = None,
+                   risk_free_rate: float = 0.02) -> np.ndarray:
+    """
+    compute_all_metrics() for every column of a (periods x strategies) matrix
+
+    NaN marks a missing period; each column is evaluated on its own
+    observations, like RiskAdjustedMetrics(returns.dropna()).
+
+    Returns:
+    --------
+    np.ndarray: (strategies x METRIC_COLUMNS) matrix
+    """
+    values = np.asarray(values, dtype=float)
+    valid = ~np.isnan(values)
+    n = valid.sum(axis=0)
+    ann = np.where(n >= 252, np.sqrt(252), np.where(n >= 52, np.sqrt(52), np.sqrt(12)))
+    x = np.where(valid, values, 0.0)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # Central moments (two-pass)
+        mean = x.sum(axis=0) / n
+        dev = np.where(valid, values - mean, 0.0)
+        dev2 = dev ** 2
+        m2 = dev2.sum(axis=0) / n
+        m3 = (dev2 * dev).sum(axis=0) / n
+        m4 = (dev2 ** 2).sum(axis=0) / n
+
+        negative = valid & (values < 0)
+        positive = valid & (values > 0)
+        neg_n, pos_n = negative.sum(axis=0), positive.sum(axis=0)
+        neg_s1 = np.where(negative, values, 0.0).sum(axis=0)
+        pos_s1 = np.where(positive, values, 0.0).sum(axis=0)
+        neg_dev = np.where(negative, values - neg_s1 / neg_n, 0.0)
+        downside_std = np.sqrt((neg_dev ** 2).sum(axis=0) / (neg_n - 1)) * ann
+        downside_std = np.where(neg_n > 0, downside_std, 0.0)
+
+        # Drawdown of the wealth curve, starting at each column's first observation
+        wealth = np.cumprod(1 + x, axis=0)
+        started = np.logical_or.accumulate(valid, axis=0)
+        peak = np.fmax.accumulate(np.where(started, wealth, np.nan), axis=0)
+        max_drawdown = np.nanmin(np.where(started, wealth / peak - 1, np.nan), axis=0)
+
+        # VaR with linear interpolation on the sorted column (NaN sorts last)
+        ordered = np.sort(values, axis=0)
+
+        def percentile(q):
+            rank = q / 100 * (n - 1)
+            lo = np.clip(np.floor(rank), 0, None).astype(int)
+            hi = np.clip(np.ceil(rank), 0, None).astype(int)
+            low = np.take_along_axis(ordered, lo[None, :], axis=0)[0]
+            high = np.take_along_axis(ordered, hi[None, :], axis=0)[0]
+            return np.where(n > 0, low + (high - low) * (rank - lo), np.nan)
+
+        def tail_mean(threshold):
+            below = values <= threshold
+            return np.where(below, values, 0.0).sum(axis=0) / below.sum(axis=0)
+
+        if benchmark is None:
+            active = np.full_like(values, np.nan)
+        else:
+            active = values - np.asarray(benchmark, dtype=float).reshape(-1, 1)
+        has_active = ~np.isnan(active)
+        act_n = has_active.sum(axis=0)
+        act_mean = np.where(has_active, active, 0.0).sum(axis=0) / act_n
+        act_dev = np.where(has_active, active - act_mean, 0.0)
+        tracking_error = np.sqrt((act_dev ** 2).sum(axis=0) / (act_n - 1)) * ann
+
+        prob_pos, prob_neg = pos_n / n, neg_n / n
+        metrics = _derive_metrics({
+            'mean_annual': mean * 252,
+            'std_annual': np.sqrt(m2 * n / (n - 1)) * ann,
+            'skewness': m3 / m2 ** 1.5,
+            'kurtosis': m4 / m2 ** 2,
+            'downside_std': downside_std,
+            'max_drawdown': max_drawdown,
+            'cvar_95': tail_mean(percentile(5)),
+            'cvar_99': tail_mean(percentile(1)),
+            'prob_pos': prob_pos,
+            'prob_neg': prob_neg,
+            'expected_pos': np.where(prob_pos > 0, pos_s1 / pos_n, 0.0),
+            'expected_neg': np.where(prob_neg > 0, np.abs(neg_s1 / neg_n), 0.0),
+            'gains': pos_s1,
+            'losses': -neg_s1,
+            'act_n': act_n,
+            'act_mean': act_mean,
+            'tracking_error': tracking_error,
+        }, ann, risk_free_rate)
+
+    return np.stack([metrics[name] for name in METRIC_COLUMNS], axis=1)
+
+
+def rolling_metrics_for_strategies(
+    strategy_returns: Union[Dict[str, pd.Series], pd.DataFrame],
+    window: int = 252,
+    risk_free_rate: float = 0.02,
+    benchmark_returns: Optional[pd.Series] = None
+) -> pd.DataFrame:
+    """
+    Rolling metrics for many strategies in one pass
+
+    Same convention as RiskAdjustedMetrics.rolling_metrics: the row dated
+    t holds the metrics of the `window` periods before t.
+
+    Parameters:
+    -----------
+    strategy_returns : dict or pd.DataFrame
+        Strategy return series (aligned on a common index)
+    window : int
+        Rolling window size in periods
+    risk_free_rate : float
+        Annualized risk-free rate
+    benchmark_returns : pd.Series, optional
+        Benchmark returns for the Information Ratio
+
+    Returns:
+    --------
+    pd.DataFrame: (Strategy, Metric) columns; result[name] matches
+    RiskAdjustedMetrics(returns).rolling_metrics(window) for that strategy
+    """
+    frame = pd.DataFrame(strategy_returns)
+    if len(frame) <= window:
+        raise ValueError(f"Insufficient data for rolling window of {window} periods")
+
+    if benchmark_returns is not None:
+        bench = benchmark_returns.reindex(frame.index).values
+    else:
+        bench = np.full(len(frame), np.nan)
+
+    engine = RollingRiskMetrics(frame.shape[1], window, risk_free_rate)
+    values = frame.values.astype(float)
+    rows = []
+    for i in range(len(frame) - 1):
+        metrics = engine.update(values[i], bench[i])
+        if metrics is not None:
+            rows.append(np.stack([metrics[name] for name in METRIC_COLUMNS], axis=1))
+
+    data = np.stack(rows).reshape(len(rows), -1)
+    columns = pd.MultiIndex.from_product([frame.columns, METRIC_COLUMNS], names=['Strategy', 'Metric'])
+    index = pd.Index(frame.index[window:], name='Date')
+    return pd.DataFrame(data, index=index, columns=columns)
 
 
 def compute_metrics_for_strategies(
-    strategy_returns: Dict[str, pd.Series],
+    strategy_returns: Union[Dict[str, pd.Series], pd.DataFrame],
     risk_free_rate: float = 0.02,
     benchmark_returns: Optional[pd.Series] = None
 ) -> pd.DataFrame:
     """
     Compute all metrics for multiple strategies
 
+    All strategies are evaluated together as one matrix; each column uses
+    its own non-missing observations, as RiskAdjustedMetrics would.
+
     Parameters:
     -----------
-    strategy_returns : dict
+    strategy_returns : dict or pd.DataFrame
         Dictionary mapping strategy names to return series
     risk_free_rate : float
         Annualized risk-free rate
@@ -384,23 +852,21 @@ def compute_metrics_for_strategies(
     --------
     pd.DataFrame: Metrics table with strategies as rows
     """
-    results = []
-
-    for strategy_name, returns in strategy_returns.items():
-        try:
-            ram = RiskAdjustedMetrics(returns, risk_free_rate, benchmark_returns)
-            metrics = ram.compute_all_metrics()
-            metrics['Strategy'] = strategy_name
-            results.append(metrics)
-        except Exception as e:
-            warnings.warn(f"Error computing metrics for {strategy_name}: {e}")
-            continue
-
-    if not results:
+    frame = pd.DataFrame(strategy_returns)
+    observed = frame.notna().sum()
+    for strategy_name in observed.index[observed == 0]:
+        warnings.warn(f"Error computing metrics for {strategy_name}: no observations")
+    frame = frame.loc[:, observed > 0]
+    if frame.shape[1] == 0:
         raise ValueError("No valid results computed")
 
-    df = pd.DataFrame(results)
-    df = df.set_index('Strategy')
+    bench = None
+    if benchmark_returns is not None:
+        bench = benchmark_returns.reindex(frame.index).values
+    df = pd.DataFrame(
+        _block_metrics(frame.values, bench, risk_free_rate),
+        index=pd.Index(frame.columns, name='Strategy'), columns=METRIC_COLUMNS
+    )
 
     # Reorder columns: basic stats first, then metrics
     basic_cols = ['Mean Annual Return', 'Std Annual', 'Skewness', 'Kurtosis',
@@ -464,14 +930,74 @@ def stability_score(rankings_df: pd.DataFrame) -> pd.Series:
     return stability
 
 
+def _rank_rows(values: np.ndarray) -> np.ndarray:
+    """
+    Average ranks (1-based, ties share their mean rank) along the last axis
+
+    NaN stays NaN and does not take a rank.
+    """
+    values = np.asarray(values, dtype=float)
+    width = values.shape[-1]
+    order = np.argsort(values, axis=-1, kind='stable')
+    ordered = np.take_along_axis(values, order, axis=-1)
+    positions = np.broadcast_to(np.arange(width), values.shape)
+
+    # First / last position of each run of equal values in sorted order
+    starts = np.ones(values.shape, dtype=bool)
+    starts[..., 1:] = ordered[..., 1:] != ordered[..., :-1]
+    ends = np.ones(values.shape, dtype=bool)
+    ends[..., :-1] = starts[..., 1:]
+    first = np.maximum.accumulate(np.where(starts, positions, 0), axis=-1)
+    from_end = np.maximum.accumulate(np.where(ends[..., ::-1], positions, 0), axis=-1)
+    last = (width - 1 - from_end)[..., ::-1]
+
+    ranks = np.empty(values.shape)
+    np.put_along_axis(ranks, order, (first + last) / 2 + 1, axis=-1)
+    ranks[np.isnan(values)] = np.nan
+    return ranks
+
+
+def _row_corr(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Pearson correlation of each row pair, over positions where both are present"""
+    valid = ~(np.isnan(x) | np.isnan(y))
+    n = valid.sum(axis=-1, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        dx = np.where(valid, x - np.where(valid, x, 0.0).sum(axis=-1, keepdims=True) / n, 0.0)
+        dy = np.where(valid, y - np.where(valid, y, 0.0).sum(axis=-1, keepdims=True) / n, 0.0)
+        return (dx * dy).sum(axis=-1) / np.sqrt((dx ** 2).sum(axis=-1) * (dy ** 2).sum(axis=-1))
+
+
+def rank_correlation(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """
+    Spearman rank correlation of each row pair (pairs with a NaN are dropped)
+
+    Parameters:
+    -----------
+    x, y : np.ndarray
+        Arrays of the same shape; correlation is taken along the last axis
+
+    Returns:
+    --------
+    np.ndarray: One correlation per row
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    missing = np.isnan(x) | np.isnan(y)
+    return _row_corr(_rank_rows(np.where(missing, np.nan, x)),
+                     _rank_rows(np.where(missing, np.nan, y)))
+
+
 def information_coefficient(actual_returns: pd.Series, predicted_metrics: pd.Series,
-                           window: int = 252) -> Tuple[float, float]:
+                           window: int = 252, method: str = 'spearman') -> Tuple[float, float]:
     """
     Compute Information Coefficient (IC) and Information Ratio (IR)
 
     IC measures the correlation between predicted rankings and actual future returns
     IR is the mean IC divided by standard deviation of IC
 
+    All rolling windows are evaluated at once on a strided (windows x window)
+    view, processed in chunks to bound memory.
+
     Parameters:
     -----------
     actual_returns : pd.Series
@@ -480,11 +1006,16 @@ def information_coefficient(actual_returns: pd.Series, predicted_metrics: pd.Ser
         Predicted metrics (e.g., rolling Sharpe ratio)
     window : int
         Window for computing IC
+    method : str
+        'spearman' (rank IC) or 'pearson'
 
     Returns:
     --------
     tuple: (IC_mean, IR)
     """
+    if method not in ('spearman', 'pearson'):
+        raise ValueError(f"Unknown IC method '{method}'")
+
     # Align series
     aligned = pd.DataFrame({
         'Predicted': predicted_metrics,
@@ -495,19 +1026,26 @@ def information_coefficient(actual_returns: pd.Series, predicted_metrics: pd.Ser
         warnings.warn(f"Insufficient data for IC calculation (got {len(aligned)}, need {window})")
         return np.nan, np.nan
 
+    # Window i covers [i - window, i) for i in window .. len - 1
+    n_windows = len(aligned) - window
+    predicted = np.lib.stride_tricks.sliding_window_view(aligned['Predicted'].values, window)
+    actual = np.lib.stride_tricks.sliding_window_view(aligned['Actual'].values, window)
+    chunk = max(1, IC_CHUNK_ELEMENTS // window)
+
     ic_values = []
+    for lo in range(0, n_windows, chunk):
+        hi = min(lo + chunk, n_windows)
+        if method == 'spearman':
+            ic_values.append(rank_correlation(predicted[lo:hi], actual[lo:hi]))
+        else:
+            ic_values.append(_row_corr(predicted[lo:hi], actual[lo:hi]))
 
-    for i in range(window, len(aligned)):
-        # Correlation between metric and future returns
-        corr = aligned['Predicted'].iloc[i-window:i].corr(aligned['Actual'].iloc[i-window:i])
-        if not np.isnan(corr):
-            ic_values.append(corr)
+    ic_values = np.concatenate(ic_values) if ic_values else np.empty(0)
+    ic_values = ic_values[~np.isnan(ic_values)]
 
     if len(ic_values) < 10:
         return np.nan, np.nan
 
-    ic_values = np.array(ic_values)
-
     ic_mean = np.mean(ic_values)
     ic_std = np.std(ic_values)
     ir = ic_mean / ic_std if ic_std != 0 else 0
@@ -515,11 +1053,203 @@ def information_coefficient(actual_returns: pd.Series, predicted_metrics: pd.Ser
     return ic_mean, ir
 
 
+def walk_forward_folds(n_periods: int, train_window: int = 1260,
+                       test_window: int = 252) -> List[Tuple[int, int, int]]:
+    """
+    Fold schedule of walk_forward_analysis
+
+    Returns:
+    --------
+    list: (start, train_end, test_end) positional bounds; training covers
+    [start, train_end) and testing [train_end, test_end)
+    """
+    return [
+        (start, start + train_window, start + train_window + test_window)
+        for start in range(0, n_periods - train_window - test_window, test_window)
+    ]
+
+
+def _walk_forward_task(block: np.ndarray, train_window: int, risk_free_rate: float) -> np.ndarray:
+    """Train / test metrics of one fold for a group of strategies (process pool worker)"""
+    return np.stack([
+        _block_metrics(block[:train_window], risk_free_rate=risk_free_rate),
+        _block_metrics(block[train_window:], risk_free_rate=risk_free_rate),
+    ])
+
+
+class WalkForwardHarness:
+    """
+    Walk-forward evaluation of many strategies
+    多策略滾動前推評估（按 fold 並行、結果緩存）
+
+    The fold schedule is generated once per return panel; each fold
+    evaluates all strategies as one matrix, and groups of (fold, strategies)
+    can be spread over a process pool. Results are cached in memory per
+    (fold data of one strategy, windows, risk-free rate), so re-running
+    after adding strategies only computes the new columns.
+
+    Usage:
+        >>> harness = WalkForwardHarness(train_window=1260, test_window=252)
+        >>> results = harness.run(strategy_returns)
+        >>> stability = harness.ranking_stability(strategy_returns, 'Sharpe Ratio')
+
+    With max_workers other than 1 the pool workers re-import the calling
+    module on platforms that start processes with spawn (Windows, macOS),
+    so the call must sit under an ``if __name__ == '__main__':`` guard.
+    """
+
+    def __init__(self, train_window: int = 1260, test_window: int = 252,
+                 risk_free_rate: float = 0.02, max_workers: Optional[int] = 1,
+                 chunk_size: int = 256):
+        """
+        Parameters:
+        -----------
+        train_window : int
+            Training window in days
+        test_window : int
+            Testing window in days
+        risk_free_rate : float
+            Risk-free rate
+        max_workers : int, optional
+            Process pool size (1 = evaluate in-process, the default;
+            None = CPU count). See the class docstring for the spawn caveat
+        chunk_size : int
+            Strategies per pool task
+        """
+        self.train_window = train_window
+        self.test_window = test_window
+        self.risk_free_rate = risk_free_rate
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.cache: Dict[bytes, np.ndarray] = {}
+        self.stats = {'hits': 0, 'misses': 0}
+
+    def _key(self, column: np.ndarray) -> bytes:
+        digest = hashlib.blake2b(np.ascontiguousarray(column).tobytes(), digest_size=16)
+        digest.update(f"{self.train_window}:{self.test_window}:{self.risk_free_rate!r}".encode())
+        return digest.digest()
+
+    def evaluate(self, strategy_returns: Union[Dict[str, pd.Series], pd.DataFrame]
+                 ) -> Tuple[pd.DataFrame, List[Tuple[int, int, int]], np.ndarray]:
+        """
+        Train / test metrics of every strategy on every fold
+
+        Returns:
+        --------
+        tuple: (aligned returns, folds, panel) where panel has shape
+        (folds, 2, strategies, METRIC_COLUMNS); index 0 = train, 1 = test
+        """
+        all_returns = pd.DataFrame(strategy_returns).dropna()
+        folds = walk_forward_folds(len(all_returns), self.train_window, self.test_window)
+        columns = np.asfortranarray(all_returns.values, dtype=float)
+        panel = np.empty((len(folds), 2, columns.shape[1], len(METRIC_COLUMNS)))
+
+        pending = []             # (fold, strategy positions, keys)
+        for f, (start, _, test_end) in enumerate(folds):
+            missing, keys = [], []
+            for j in range(columns.shape[1]):
+                key = self._key(columns[start:test_end, j])
+                cached = self.cache.get(key)
+                if cached is None:
+                    missing.append(j)
+                    keys.append(key)
+                else:
+                    panel[f, :, j] = cached
+            self.stats['hits'] += columns.shape[1] - len(missing)
+            self.stats['misses'] += len(missing)
+            for lo in range(0, len(missing), self.chunk_size):
+                pending.append((f, missing[lo:lo + self.chunk_size], keys[lo:lo + self.chunk_size]))
+
+        blocks = [columns[folds[f][0]:folds[f][2], cols] for f, cols, _ in pending]
+        args = (blocks, repeat(self.train_window), repeat(self.risk_free_rate))
+        if self.max_workers == 1 or len(pending) < 2:
+            outputs = list(map(_walk_forward_task, *args))
+        else:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+                outputs = list(pool.map(_walk_forward_task, *args))
+
+        for (f, cols, keys), result in zip(pending, outputs):
+            panel[f][:, cols] = result
+            for k, key in enumerate(keys):
+                self.cache[key] = result[:, k]
+
+        return all_returns, folds, panel
+
+    def run(self, strategy_returns: Union[Dict[str, pd.Series], pd.DataFrame]) -> pd.DataFrame:
+        """
+        Walk-forward results in the layout of walk_forward_analysis
+
+        Returns:
+        --------
+        pd.DataFrame: One row per (fold, strategy) with Start Date, End Date,
+        Strategy and Train_* / Test_* metric columns
+        """
+        all_returns, folds, panel = self.evaluate(strategy_returns)
+        n_strategies = all_returns.shape[1]
+        columns = (['Start Date', 'End Date', 'Strategy']
+                   + [f'Train_{name}' for name in METRIC_COLUMNS]
+                   + [f'Test_{name}' for name in METRIC_COLUMNS])
+        if not folds:
+            return pd.DataFrame(columns=columns)
+
+        starts = all_returns.index[[start for start, _, _ in folds]]
+        ends = all_returns.index[[test_end - 1 for _, _, test_end in folds]]
+        result = pd.DataFrame(
+            np.concatenate([panel[:, 0], panel[:, 1]], axis=2).reshape(-1, 2 * len(METRIC_COLUMNS)),
+            columns=columns[3:]
+        )
+        result.insert(0, 'Strategy', np.tile(all_returns.columns.values, len(folds)))
+        result.insert(0, 'End Date', np.repeat(ends.values, n_strategies))
+        result.insert(0, 'Start Date', np.repeat(starts.values, n_strategies))
+        return result
+
+    def metric_panel(self, strategy_returns: Union[Dict[str, pd.Series], pd.DataFrame],
+                     metric_name: str, stage: str = 'Train') -> pd.DataFrame:
+        """
+        One metric on every fold
+
+        Returns:
+        --------
+        pd.DataFrame: Strategies as rows, fold start dates as columns
+        """
+        if metric_name not in METRIC_COLUMNS:
+            raise ValueError(f"Metric '{metric_name}' not found in dataframe")
+        if stage not in ('Train', 'Test'):
+            raise ValueError(f"Unknown stage '{stage}'")
+        all_returns, folds, panel = self.evaluate(strategy_returns)
+        values = panel[:, 0 if stage == 'Train' else 1, :, METRIC_COLUMNS.index(metric_name)]
+        return pd.DataFrame(values.T, index=all_returns.columns,
+                            columns=all_returns.index[[start for start, _, _ in folds]])
+
+    def ranking_stability(self, strategy_returns: Union[Dict[str, pd.Series], pd.DataFrame],
+                          metric_name: str, stage: str = 'Train') -> pd.Series:
+        """
+        stability_score of the per-fold rankings by one metric (1 = best)
+        """
+        panel = self.metric_panel(strategy_returns, metric_name, stage)
+        return stability_score(panel.rank(ascending=False, method='first'))
+
+    def fold_ic(self, strategy_returns: Union[Dict[str, pd.Series], pd.DataFrame],
+                metric_name: str, target: str = 'Mean Annual Return') -> pd.Series:
+        """
+        Cross-sectional rank IC per fold: Spearman correlation across
+        strategies between the training metric and the test-period target
+
+        Returns:
+        --------
+        pd.Series: IC indexed by fold start date
+        """
+        train = self.metric_panel(strategy_returns, metric_name, 'Train')
+        test = self.metric_panel(strategy_returns, target, 'Test')
+        return pd.Series(rank_correlation(train.values.T, test.values.T), index=train.columns)
+
+
 def walk_forward_analysis(
     strategy_returns: Dict[str, pd.Series],
     train_window: int = 1260,  # 5 years
     test_window: int = 252,    # 1 year
-    risk_free_rate: float = 0.02
+    risk_free_rate: float = 0.02,
+    max_workers: Optional[int] = 1
 ) -> pd.DataFrame:
     """
     Perform walk-forward analysis
@@ -534,47 +1264,16 @@ def walk_forward_analysis(
         Testing window in days
     risk_free_rate : float
         Risk-free rate
+    max_workers : int, optional
+        Process pool size for fold evaluation (1 = in-process, the default);
+        larger pools need an ``if __name__ == '__main__':`` guard under spawn
 
     Returns:
     --------
     pd.DataFrame: Walk-forward results
     """
-    all_returns = pd.DataFrame(strategy_returns).dropna()
-    results = []
-
-    for start_idx in range(0, len(all_returns) - train_window - test_window, test_window):
-        train_end_idx = start_idx + train_window
-        test_end_idx = train_end_idx + test_window
-
-        # Training period
-        train_returns = all_returns.iloc[start_idx:train_end_idx]
-
-        # Test period
-        test_returns = all_returns.iloc[train_end_idx:test_end_idx]
-
-        # Compute metrics on training data
-        train_metrics = {}
-        for strategy in all_returns.columns:
-            ram = RiskAdjustedMetrics(train_returns[strategy], risk_free_rate)
-            train_metrics[strategy] = ram.compute_all_metrics()
-
-        # Compute metrics on test data
-        test_metrics = {}
-        for strategy in all_returns.columns:
-            ram = RiskAdjustedMetrics(test_returns[strategy], risk_free_rate)
-            test_metrics[strategy] = ram.compute_all_metrics()
-
-        # Store results
-        for strategy in all_returns.columns:
-            results.append({
-                'Start Date': all_returns.index[start_idx],
-                'End Date': all_returns.index[test_end_idx - 1],
-                'Strategy': strategy,
-                **{f'Train_{k}': v for k, v in train_metrics[strategy].items()},
-                **{f'Test_{k}': v for k, v in test_metrics[strategy].items()}
-            })
-
-    return pd.DataFrame(results)
+    harness = WalkForwardHarness(train_window, test_window, risk_free_rate, max_workers=max_workers)
+    return harness.run(strategy_returns)
 
 
 def compute_comprehensive_score(
@@ -661,7 +1360,8 @@ def generate_demo_data(n_periods: int = 2520, n_strategies: int = 5,
     n_periods : int
         Number of periods (days)
     n_strategies : int
-        Number of strategies
+        Number of strategies; the five named strategies come first, any
+        beyond that are synthetic variations
     seed : int
         Random seed
 
@@ -714,7 +1414,20 @@ def generate_demo_data(n_periods: int = 2520, n_strategies: int = 5,
     for name in strategies:
         strategies[name] = strategies[name] + 0.3 * market_factor
 
-    return strategies
+    # Extra synthetic strategies: random drift / volatility / asymmetry, same market factor
+    n_extra = n_strategies - len(strategies)
+    if n_extra > 0:
+        mu = np.random.uniform(0.0002, 0.0008, n_extra)
+        sigma = np.random.uniform(0.007, 0.013, n_extra)
+        tilt = np.random.uniform(0.8, 1.2, n_extra)
+        raw = np.random.normal(mu, sigma, (n_periods, n_extra))
+        raw = np.where(raw > 0, raw * tilt, raw * (2 - tilt)) + 0.3 * market_factor[:, None]
+        width = len(str(n_strategies))
+        for j in range(n_extra):
+            name = f'Synthetic {len(strategies) + 1:0{width}d}'
+            strategies[name] = pd.Series(raw[:, j], index=dates)
+
+    return dict(list(strategies.items())[:n_strategies])
 
 
 def demo_analysis():
@@ -763,11 +1476,8 @@ def demo_analysis():
 
     # Compute rolling metrics for stability analysis
     print("4. Computing rolling metrics (252-day window) for stability analysis...")
-    rolling_metrics_dict = {}
-    for strategy_name in strategy_returns.keys():
-        ram = RiskAdjustedMetrics(strategy_returns[strategy_name], risk_free_rate=0.02)
-        rolling = ram.rolling_metrics(window=252)
-        rolling_metrics_dict[strategy_name] = rolling
+    rolling_all = rolling_metrics_for_strategies(strategy_returns, window=252, risk_free_rate=0.02)
+    rolling_metrics_dict = {name: rolling_all[name] for name in strategy_returns.keys()}
 
     print("   Rolling metrics computed for each strategy")
     print()
@@ -805,8 +1515,7 @@ def demo_analysis():
     predictive_results = {}
     for strategy_name in strategy_returns.keys():
         # Use lagged Sharpe ratio to predict future returns
-        ram = RiskAdjustedMetrics(strategy_returns[strategy_name], risk_free_rate=0.02)
-        rolling = ram.rolling_metrics(window=252)
+        rolling = rolling_metrics_dict[strategy_name]
 
         # Shift Sharpe Ratio by 1 period (use past to predict future)
         lagged_sharpe = rolling['Sharpe Ratio'].shift(1)
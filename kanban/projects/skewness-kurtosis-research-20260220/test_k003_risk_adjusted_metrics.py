@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Tests for the vectorised k003 engines
+
+Every batched / streaming path is checked against the per-window,
+per-strategy RiskAdjustedMetrics.compute_all_metrics() reference.
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import k003_risk_adjusted_metrics as k003
+from k003_risk_adjusted_metrics import (
+    METRIC_COLUMNS,
+    RiskAdjustedMetrics,
+    RollingRiskMetrics,
+    WalkForwardHarness,
+    _block_metrics,
+    compute_metrics_for_strategies,
+    generate_demo_data,
+    information_coefficient,
+    rank_correlation,
+    rolling_metrics_for_strategies,
+    walk_forward_analysis,
+)
+
+WINDOW = 60
+TRAIN, TEST = 120, 40
+
+
+def reference_metrics(returns, benchmark=None, risk_free_rate=0.02):
+    """compute_all_metrics() of one window, in METRIC_COLUMNS order"""
+    metrics = RiskAdjustedMetrics(returns, risk_free_rate, benchmark).compute_all_metrics()
+    return np.array([metrics[name] for name in METRIC_COLUMNS], dtype=float)
+
+
+def assert_metrics_close(actual, expected, msg=None):
+    np.testing.assert_allclose(actual, expected, rtol=1e-7, atol=1e-10, equal_nan=True, err_msg=msg or '')
+
+
+def reference_walk_forward(strategy_returns, train_window, test_window, risk_free_rate=0.02):
+    """The original walk_forward_analysis: one RiskAdjustedMetrics per strategy and fold"""
+    all_returns = pd.DataFrame(strategy_returns).dropna()
+    results = []
+    for start in range(0, len(all_returns) - train_window - test_window, test_window):
+        train_end = start + train_window
+        test_end = train_end + test_window
+        for strategy in all_returns.columns:
+            train = RiskAdjustedMetrics(all_returns[strategy].iloc[start:train_end], risk_free_rate)
+            test = RiskAdjustedMetrics(all_returns[strategy].iloc[train_end:test_end], risk_free_rate)
+            results.append({
+                'Start Date': all_returns.index[start],
+                'End Date': all_returns.index[test_end - 1],
+                'Strategy': strategy,
+                **{f'Train_{k}': v for k, v in train.compute_all_metrics().items()},
+                **{f'Test_{k}': v for k, v in test.compute_all_metrics().items()},
+            })
+    return pd.DataFrame(results)
+
+
+def reference_rank_ic(actual, predicted, window):
+    """Rolling Spearman IC with pandas ranks, one window at a time"""
+    aligned = pd.DataFrame({'Predicted': predicted, 'Actual': actual}).dropna()
+    ic = np.array([
+        aligned['Predicted'].iloc[i - window:i].rank().corr(aligned['Actual'].iloc[i - window:i].rank())
+        for i in range(window, len(aligned))
+    ])
+    ic = ic[~np.isnan(ic)]
+    return ic.mean(), ic.mean() / ic.std()
+
+
+class TestRollingRiskMetrics(unittest.TestCase):
+    """Streaming rolling metrics vs compute_all_metrics() per window"""
+
+    @classmethod
+    def setUpClass(cls):
+        data = generate_demo_data(n_periods=200, n_strategies=3)
+        cls.frame = pd.DataFrame(data)
+        # One missing value: every window covering it evaluates that strategy
+        # on its remaining observations, as compute_all_metrics() would
+        cls.frame.iloc[90, 1] = np.nan
+        cls.benchmark = cls.frame.iloc[:, 0] * 0.5 + 0.0001
+        cls.benchmark.iloc[120] = np.nan
+
+    def check_rolling(self, benchmark):
+        rolling = rolling_metrics_for_strategies(self.frame, window=WINDOW, benchmark_returns=benchmark)
+        self.assertEqual(len(rolling), len(self.frame) - WINDOW)
+        for strategy in self.frame.columns:
+            for i in range(WINDOW, len(self.frame)):
+                window = self.frame[strategy].iloc[i - WINDOW:i]
+                expected = reference_metrics(window, benchmark)
+                actual = rolling[strategy].loc[self.frame.index[i], METRIC_COLUMNS].values
+                assert_metrics_close(actual, expected, f'{strategy} window ending {i}')
+
+    def test_matches_compute_all_metrics(self):
+        self.check_rolling(None)
+
+    def test_matches_compute_all_metrics_with_benchmark(self):
+        self.check_rolling(self.benchmark)
+
+    def test_window_with_missing_value(self):
+        strategy = self.frame.columns[1]
+        rolling = rolling_metrics_for_strategies(self.frame, window=WINDOW)
+        # Window [31, 91) contains the NaN at position 90
+        window = self.frame[strategy].iloc[31:91]
+        self.assertEqual(window.isna().sum(), 1)
+        actual = rolling[strategy].loc[self.frame.index[91], METRIC_COLUMNS].values
+        self.assertFalse(np.isnan(actual[METRIC_COLUMNS.index('Sharpe Ratio')]))
+        assert_metrics_close(actual, reference_metrics(window))
+
+    def test_single_strategy_rolling_metrics(self):
+        returns = self.frame.iloc[:, 0]
+        rolling = RiskAdjustedMetrics(returns, benchmark_returns=self.benchmark).rolling_metrics(WINDOW)
+        combined = rolling_metrics_for_strategies({returns.name: returns}, window=WINDOW,
+                                                  benchmark_returns=self.benchmark)[returns.name]
+        np.testing.assert_array_equal(rolling.values, combined.values)
+        self.assertEqual(list(rolling.columns), METRIC_COLUMNS)
+
+    def test_update_waits_for_full_window(self):
+        engine = RollingRiskMetrics(n_strategies=3, window=5)
+        values = self.frame.values
+        for i in range(4):
+            self.assertIsNone(engine.update(values[i]))
+        metrics = engine.update(values[4])
+        self.assertEqual(set(metrics), set(METRIC_COLUMNS))
+        self.assertEqual(metrics['Sharpe Ratio'].shape, (3,))
+
+    def test_insufficient_data(self):
+        with self.assertRaises(ValueError):
+            rolling_metrics_for_strategies(self.frame.iloc[:WINDOW], window=WINDOW)
+
+
+class TestBlockMetrics(unittest.TestCase):
+    """Matrix evaluation vs compute_all_metrics() per column"""
+
+    def setUp(self):
+        self.frame = pd.DataFrame(generate_demo_data(n_periods=300, n_strategies=4))
+        self.frame.iloc[:40, 2] = np.nan        # late start
+        self.frame.iloc[[5, 77, 150], 3] = np.nan
+        self.benchmark = self.frame.iloc[:, 0] * 0.5
+        self.benchmark.iloc[200] = np.nan
+
+    def test_matches_compute_all_metrics(self):
+        for benchmark in (None, self.benchmark):
+            bench = None if benchmark is None else benchmark.values
+            block = _block_metrics(self.frame.values, bench)
+            for j, strategy in enumerate(self.frame.columns):
+                expected = reference_metrics(self.frame[strategy], benchmark)
+                assert_metrics_close(block[j], expected, f'{strategy}, benchmark={benchmark is not None}')
+
+    def test_annualization_follows_observations(self):
+        # 60 rows: weekly factor; 30 rows: monthly factor
+        for rows in (60, 30):
+            block = _block_metrics(self.frame.values[:rows, :2])
+            for j, strategy in enumerate(self.frame.columns[:2]):
+                assert_metrics_close(block[j], reference_metrics(self.frame[strategy].iloc[:rows]))
+
+    def test_compute_metrics_for_strategies(self):
+        table = compute_metrics_for_strategies(self.frame, benchmark_returns=self.benchmark)
+        expected = reference_metrics(self.frame.iloc[:, 3], self.benchmark)
+        assert_metrics_close(table.loc[self.frame.columns[3], METRIC_COLUMNS].values, expected)
+
+
+class TestRankCorrelation(unittest.TestCase):
+    """Vectorised Spearman correlation vs pandas ranks"""
+
+    def test_matches_pandas_with_ties_and_missing(self):
+        rng = np.random.default_rng(7)
+        x = rng.integers(0, 5, size=(20, 12)).astype(float)
+        y = rng.normal(size=(20, 12))
+        x[3, [1, 4]] = np.nan
+        y[5, 0] = np.nan
+        expected = []
+        for a, b in zip(x, y):
+            both = ~np.isnan(a + b)
+            expected.append(pd.Series(a[both]).rank().corr(pd.Series(b[both]).rank()))
+        np.testing.assert_allclose(rank_correlation(x, y), expected, rtol=1e-12)
+
+    def test_constant_row_is_nan(self):
+        self.assertTrue(np.isnan(rank_correlation(np.ones((1, 5)), np.arange(5.0)[None, :])[0]))
+
+
+class TestInformationCoefficient(unittest.TestCase):
+    """Rolling IC vs a per-window pandas loop"""
+
+    @classmethod
+    def setUpClass(cls):
+        returns = generate_demo_data(n_periods=400, n_strategies=1)
+        series = next(iter(returns.values()))
+        cls.predicted = series.rolling(20).mean().shift(1)
+        cls.actual = series.rolling(5).sum().shift(-5)
+
+    def test_spearman_matches_pandas(self):
+        np.testing.assert_allclose(
+            information_coefficient(self.actual, self.predicted, window=60),
+            reference_rank_ic(self.actual, self.predicted, 60), rtol=1e-9)
+
+    def test_pearson_matches_numpy(self):
+        aligned = pd.DataFrame({'p': self.predicted, 'a': self.actual}).dropna()
+        ic = np.array([np.corrcoef(aligned['p'].values[i - 60:i], aligned['a'].values[i - 60:i])[0, 1]
+                       for i in range(60, len(aligned))])
+        np.testing.assert_allclose(
+            information_coefficient(self.actual, self.predicted, window=60, method='pearson'),
+            (ic.mean(), ic.mean() / ic.std()), rtol=1e-9)
+
+    def test_chunking_does_not_change_result(self):
+        expected = information_coefficient(self.actual, self.predicted, window=60)
+        saved = k003.IC_CHUNK_ELEMENTS
+        k003.IC_CHUNK_ELEMENTS = 60 * 7
+        try:
+            self.assertEqual(information_coefficient(self.actual, self.predicted, window=60), expected)
+        finally:
+            k003.IC_CHUNK_ELEMENTS = saved
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            information_coefficient(self.actual, self.predicted, method='kendall')
+
+
+class TestWalkForwardHarness(unittest.TestCase):
+    """Cached harness vs the per-strategy walk-forward loop"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.returns = generate_demo_data(n_periods=400, n_strategies=4)
+
+    def assert_same_results(self, actual, expected):
+        self.assertEqual(list(actual.columns), list(expected.columns))
+        key_columns = ['Start Date', 'End Date', 'Strategy']
+        self.assertTrue((actual[key_columns].values == expected[key_columns].values).all())
+        np.testing.assert_allclose(actual.iloc[:, 3:].astype(float).values,
+                                   expected.iloc[:, 3:].astype(float).values,
+                                   rtol=1e-8, atol=1e-10, equal_nan=True)
+
+    def test_matches_per_strategy_loop(self):
+        expected = reference_walk_forward(self.returns, TRAIN, TEST)
+        self.assertEqual(len(expected), 6 * 4)
+        self.assert_same_results(walk_forward_analysis(self.returns, TRAIN, TEST), expected)
+
+    def test_process_pool_matches_in_process(self):
+        harness = WalkForwardHarness(TRAIN, TEST, max_workers=2, chunk_size=1)
+        pd.testing.assert_frame_equal(harness.run(self.returns),
+                                      walk_forward_analysis(self.returns, TRAIN, TEST))
+
+    def test_added_strategy_hits_cache(self):
+        names = list(self.returns)
+        harness = WalkForwardHarness(TRAIN, TEST)
+        harness.run({name: self.returns[name] for name in names[:3]})
+        self.assertEqual(harness.stats, {'hits': 0, 'misses': 6 * 3})
+
+        result = harness.run(self.returns)
+        self.assertEqual(harness.stats, {'hits': 6 * 3, 'misses': 6 * 4})
+        self.assert_same_results(result, reference_walk_forward(self.returns, TRAIN, TEST))
+
+    def test_no_folds(self):
+        short = {name: series.iloc[:TRAIN + TEST] for name, series in self.returns.items()}
+        result = walk_forward_analysis(short, TRAIN, TEST)
+        self.assertTrue(result.empty)
+        self.assertIn('Train_Sharpe Ratio', result.columns)
+
+    def test_fold_ic_matches_pandas(self):
+        harness = WalkForwardHarness(TRAIN, TEST)
+        train = harness.metric_panel(self.returns, 'Sharpe Ratio', 'Train')
+        test = harness.metric_panel(self.returns, 'Mean Annual Return', 'Test')
+        expected = [train[c].rank().corr(test[c].rank()) for c in train.columns]
+        np.testing.assert_allclose(harness.fold_ic(self.returns, 'Sharpe Ratio').values, expected,
+                                   rtol=1e-12)
+
+
+if __name__ == '__main__':
+    unittest.main()
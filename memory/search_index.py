@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+記憶文件的持久化倒排索引（BM25）
+
+MemorySystem 與 VectorTrajectory 共用：索引存放在記憶目錄下的 .search_index.db（SQLite），
+查詢前只根據文件 mtime/size 重新索引有變化的文件，不再每次讀取全部 Markdown。
+
+分詞：
+- 英文/數字：小寫單詞；帶連字符的複合詞（fat-tail）同時保留整體與各部分
+- 中日文：連續漢字取相鄰二字組（bigram），單個漢字保留為 unigram；
+  索引文件時另外為每個漢字記錄 unigram，單字查詢（如「股」）也能命中「股票」
+
+Example Usage:
+    from memory.search_index import MemorySearchIndex
+
+    index = MemorySearchIndex('/path/to/memory', extra_files=['/path/to/MEMORY.md'])
+    for hit in index.search('肥尾 風險', limit=5):
+        print(hit['path'], hit['score'])
+"""
+
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+INDEX_FILENAME = '.search_index.db'
+
+# 分詞規則版本（記錄在 PRAGMA user_version，不一致時重建索引）
+TOKENIZER_VERSION = 2
+
+# BM25 參數
+K1 = 1.2
+B = 0.75
+
+_CJK = r'\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff'
+_TOKEN_PATTERN = re.compile(rf'[{_CJK}]+|[a-z0-9]+(?:[-_.][a-z0-9]+)*')
+_CJK_PATTERN = re.compile(rf'[{_CJK}]')
+
+
+def tokenize(text: str, cjk_unigrams: bool = False) -> List[str]:
+    """
+    CJK 感知分詞
+
+    Args:
+        text: 文本
+        cjk_unigrams: 多字漢字串是否同時輸出每個字（索引文件時使用）
+
+    Returns:
+        詞項列表（按出現順序，可重複）
+    """
+    tokens = []
+    for match in _TOKEN_PATTERN.finditer(text.lower()):
+        run = match.group()
+        if _CJK_PATTERN.match(run):
+            if len(run) == 1:
+                tokens.append(run)
+            else:
+                tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+                if cjk_unigrams:
+                    tokens.extend(run)
+        else:
+            tokens.append(run)
+            parts = re.split(r'[-_.]', run)
+            if len(parts) > 1:
+                tokens.extend(p for p in parts if p)
+    return tokens
+
+
+class MemorySearchIndex:
+    """記憶文件的 BM25 倒排索引"""
+
+    def __init__(self, memory_dir, pattern: str = '*.md',
+                 extra_files: Iterable = (), db_path=None):
+        """
+        Args:
+            memory_dir: 記憶目錄（只索引該目錄下符合 pattern 的文件，不遞歸）
+            pattern: 文件匹配模式
+            extra_files: 目錄外需要一併索引的文件（如 MEMORY.md）
+            db_path: 索引文件路徑（默認 memory_dir/.search_index.db）
+        """
+        self.memory_dir = Path(memory_dir)
+        self.pattern = pattern
+        self.extra_files = [Path(p) for p in extra_files]
+        self.db_path = Path(db_path) if db_path else self.memory_dir / INDEX_FILENAME
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS docs (
+                id       INTEGER PRIMARY KEY,
+                path     TEXT UNIQUE NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                size     INTEGER NOT NULL,
+                length   INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS postings (
+                term   TEXT NOT NULL,
+                doc_id INTEGER NOT NULL,
+                tf     INTEGER NOT NULL,
+                PRIMARY KEY (term, doc_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_postings_doc ON postings(doc_id);
+        """)
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != TOKENIZER_VERSION:
+            # 舊分詞規則建立的索引：清空後由 refresh 全量重建
+            self.conn.execute("DELETE FROM postings")
+            self.conn.execute("DELETE FROM docs")
+            self.conn.execute(f"PRAGMA user_version = {TOKENIZER_VERSION}")
+        self.conn.commit()
+
+    # ------------------------------------------------------------------
+    # 增量索引
+    # ------------------------------------------------------------------
+
+    def _candidates(self) -> Dict[str, os.stat_result]:
+        """當前應索引的文件及其 stat（不讀取內容）"""
+        files = {}
+        if self.memory_dir.exists():
+            for path in self.memory_dir.glob(self.pattern):
+                if path.is_file():
+                    files[str(path)] = path.stat()
+        for path in self.extra_files:
+            if path.is_file():
+                files[str(path)] = path.stat()
+        return files
+
+    def _remove(self, doc_id: int):
+        self.conn.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+        self.conn.execute("DELETE FROM docs WHERE id = ?", (doc_id,))
+
+    def _index_file(self, path: str, stat: os.stat_result, doc_id: Optional[int]):
+        try:
+            with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+                counts = Counter(tokenize(f.read(), cjk_unigrams=True))
+        except OSError:
+            return
+
+        if doc_id is not None:
+            self._remove(doc_id)
+        cursor = self.conn.execute(
+            "INSERT INTO docs (path, mtime_ns, size, length) VALUES (?, ?, ?, ?)",
+            (path, stat.st_mtime_ns, stat.st_size, sum(counts.values())),
+        )
+        self.conn.executemany(
+            "INSERT INTO postings (term, doc_id, tf) VALUES (?, ?, ?)",
+            [(term, cursor.lastrowid, tf) for term, tf in counts.items()],
+        )
+
+    def refresh(self) -> Dict[str, int]:
+        """
+        根據 mtime/size 增量更新索引
+
+        Returns:
+            {'indexed': 重新索引的文件數, 'removed': 刪除的文件數}
+        """
+        with self._lock:
+            candidates = self._candidates()
+            indexed = {
+                path: (doc_id, mtime_ns, size)
+                for doc_id, path, mtime_ns, size in self.conn.execute(
+                    "SELECT id, path, mtime_ns, size FROM docs"
+                )
+            }
+
+            updated = removed = 0
+            for path, stat in candidates.items():
+                existing = indexed.get(path)
+                if existing and existing[1] == stat.st_mtime_ns and existing[2] == stat.st_size:
+                    continue
+                self._index_file(path, stat, existing[0] if existing else None)
+                updated += 1
+
+            # 其他實例的 extra_files 也共用同一份索引，只刪除已不存在的文件
+            for path, (doc_id, _, _) in indexed.items():
+                if path not in candidates and not os.path.exists(path):
+                    self._remove(doc_id)
+                    removed += 1
+
+            if updated or removed:
+                self.conn.commit()
+            return {'indexed': updated, 'removed': removed}
+
+    # ------------------------------------------------------------------
+    # 查詢
+    # ------------------------------------------------------------------
+
+    def search(self, query: str, limit: Optional[int] = 10,
+               require_all: bool = False, refresh: bool = True) -> List[Dict[str, Any]]:
+        """
+        BM25 搜索
+
+        Args:
+            query: 查詢字符串
+            limit: 最大結果數（None 為全部）
+            require_all: 是否要求文件包含全部查詢詞項
+            refresh: 查詢前是否先增量更新索引
+
+        Returns:
+            按分數降序的結果列表，每項包含 path / score / matched（命中的查詢詞項數）/ terms（查詢詞項數）
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        if refresh:
+            self.refresh()
+
+        with self._lock:
+            total_docs, avg_length = self.conn.execute(
+                "SELECT COUNT(*), AVG(length) FROM docs"
+            ).fetchone()
+            if not total_docs:
+                return []
+            avg_length = avg_length or 1.0
+
+            scores: Dict[int, float] = {}
+            matched: Counter = Counter()
+            paths: Dict[int, str] = {}
+            for term in terms:
+                rows = self.conn.execute(
+                    "SELECT p.doc_id, p.tf, d.length, d.path FROM postings p "
+                    "JOIN docs d ON d.id = p.doc_id WHERE p.term = ?",
+                    (term,),
+                ).fetchall()
+                if not rows:
+                    continue
+                idf = math.log(1 + (total_docs - len(rows) + 0.5) / (len(rows) + 0.5))
+                for doc_id, tf, length, path in rows:
+                    norm = tf + K1 * (1 - B + B * length / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (K1 + 1) / norm
+                    matched[doc_id] += 1
+                    paths[doc_id] = path
+
+        results = [
+            {'path': paths[doc_id], 'score': score, 'matched': matched[doc_id], 'terms': len(terms)}
+            for doc_id, score in scores.items()
+            if not require_all or matched[doc_id] == len(terms)
+        ]
+        results.sort(key=lambda r: (-r['score'], r['path']))
+        return results if limit is None else results[:limit]
+
+    def stats(self) -> Dict[str, Any]:
+        """索引統計"""
+        with self._lock:
+            docs, terms = self.conn.execute(
+                "SELECT (SELECT COUNT(*) FROM docs), (SELECT COUNT(DISTINCT term) FROM postings)"
+            ).fetchone()
+        return {'docs': docs, 'terms': terms, 'db_path': str(self.db_path)}
+
+    def close(self):
+        self.conn.close()
+
+
+_indexes: Dict[str, MemorySearchIndex] = {}
+
+
+def get_index(memory_dir, extra_files: Iterable = ()) -> MemorySearchIndex:
+    """
+    按記憶目錄緩存的索引實例（同一進程內共用連接）
+
+    extra_files 會合併到已有實例中。
+    """
+    key = str(Path(memory_dir).resolve())
+    index = _indexes.get(key)
+    if index is None:
+        index = _indexes[key] = MemorySearchIndex(memory_dir, extra_files=extra_files)
+    else:
+        for path in extra_files:
+            if Path(path) not in index.extra_files:
+                index.extra_files.append(Path(path))
+    return index
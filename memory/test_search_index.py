@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+記憶倒排索引測試
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from search_index import MemorySearchIndex, tokenize
+from vector_search import VectorTrajectory
+
+
+class TestTokenize(unittest.TestCase):
+    """測試 CJK 感知分詞"""
+
+    def test_cjk_bigrams(self):
+        self.assertEqual(tokenize('肥尾風險'), ['肥尾', '尾風', '風險'])
+        self.assertEqual(tokenize('與'), ['與'])
+        self.assertEqual(tokenize('股票', cjk_unigrams=True), ['股票', '股', '票'])
+
+    def test_latin_words(self):
+        self.assertEqual(tokenize('Fat-Tail GVX'), ['fat-tail', 'fat', 'tail', 'gvx'])
+
+
+class TestMemorySearchIndex(unittest.TestCase):
+    """測試 BM25 搜索與增量更新"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmpdir.name)
+        self.memory_dir = self.root / 'memory'
+        self.memory_dir.mkdir()
+        self.indexes = []
+
+    def tearDown(self):
+        for index in self.indexes:
+            index.close()
+        self.tmpdir.cleanup()
+
+    def write(self, name, content, directory=None):
+        path = (directory or self.memory_dir) / name
+        path.write_text(content, encoding='utf-8')
+        return path
+
+    def open_index(self, **kwargs):
+        index = MemorySearchIndex(self.memory_dir, **kwargs)
+        self.indexes.append(index)
+        return index
+
+    def names(self, hits):
+        return [Path(hit['path']).name for hit in hits]
+
+    def test_bm25_ranking(self):
+        """測試詞頻高、文件短的結果排在前面"""
+        self.write('2026-03-01.md', '今天研究肥尾風險。肥尾風險需要對沖。')
+        self.write('2026-03-02.md', '市場回顧，順便提到肥尾風險，其餘是很長的無關內容' + '。其他' * 50)
+        self.write('2026-03-03.md', 'GVX strategy notes')
+
+        hits = self.open_index().search('肥尾風險')
+        self.assertEqual(self.names(hits), ['2026-03-01.md', '2026-03-02.md'])
+        self.assertGreater(hits[0]['score'], hits[1]['score'])
+
+    def test_single_cjk_character_query(self):
+        """測試單字查詢命中多字詞中的該字"""
+        self.write('a.md', '今天買入股票')
+        self.write('b.md', '今天買入債券')
+        index = self.open_index()
+        self.assertEqual(self.names(index.search('股', require_all=True)), ['a.md'])
+        self.assertEqual(self.names(index.search('股 今天', require_all=True)), ['a.md'])
+
+    def test_require_all(self):
+        """測試要求包含全部詞項"""
+        self.write('a.md', 'fat-tail analysis')
+        self.write('b.md', 'tail risk')
+        index = self.open_index()
+
+        self.assertEqual(self.names(index.search('fat-tail', require_all=True)), ['a.md'])
+        self.assertEqual(sorted(self.names(index.search('tail'))), ['a.md', 'b.md'])
+
+    def test_incremental_refresh(self):
+        """測試只重新索引變化的文件，並移除已刪除的文件"""
+        first = self.write('2026-03-01.md', '動量策略')
+        self.write('2026-03-02.md', '均值回歸')
+        index = self.open_index()
+
+        self.assertEqual(index.refresh(), {'indexed': 2, 'removed': 0})
+        self.assertEqual(index.refresh(), {'indexed': 0, 'removed': 0})
+
+        self.write('2026-03-02.md', '均值回歸與動量策略的結合')
+        first.unlink()
+        self.assertEqual(index.refresh(), {'indexed': 1, 'removed': 1})
+        self.assertEqual(self.names(index.search('動量')), ['2026-03-02.md'])
+
+    def test_index_persists(self):
+        """測試索引落盤，新實例不需要重新讀取文件"""
+        self.write('2026-03-01.md', '波動率目標')
+        self.open_index().refresh()
+
+        reopened = self.open_index()
+        self.assertEqual(reopened.refresh(), {'indexed': 0, 'removed': 0})
+        self.assertEqual(self.names(reopened.search('波動率', refresh=False)), ['2026-03-01.md'])
+
+    def test_extra_files_shared(self):
+        """測試目錄外的文件（MEMORY.md）與其他實例共用同一份索引"""
+        memory_file = self.write('MEMORY.md', '長期記憶：風險平價', directory=self.root)
+        self.write('2026-03-01.md', '日記')
+        self.open_index(extra_files=[memory_file]).refresh()
+
+        # 沒有 extra_files 的實例不會刪除仍存在的 MEMORY.md
+        plain = self.open_index()
+        self.assertEqual(plain.refresh()['removed'], 0)
+        self.assertEqual(self.names(plain.search('風險平價')), ['MEMORY.md'])
+
+    def test_vector_trajectory_search(self):
+        """測試 VectorTrajectory 使用索引並只返回日記文件"""
+        self.write('2026-03-01.md', '# 肥尾分析\n\n研究 fat-tail analysis 的第一天')
+        self.write('2026-03-05.md', '# 繼續\n\nfat-tail analysis 的回測結果')
+        self.write('notes.md', 'fat-tail analysis')
+        self.write('2026-03-06.md', 'analysis only')
+
+        vt = VectorTrajectory(str(self.memory_dir))
+        results = vt.memory_search('fat-tail analysis')
+        self.assertEqual([r['id'] for r in results], ['2026-03-01.md', '2026-03-05.md'])
+        self.assertEqual(results[0]['summary'], '研究 fat-tail analysis 的第一天')
+        self.assertTrue(os.path.exists(self.memory_dir / '.search_index.db'))
+
+
+if __name__ == '__main__':
+    unittest.main()
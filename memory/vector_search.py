@@ -24,6 +24,12 @@ from datetime import datetime
 from typing import List, Dict, Any, Optional
 import os
 
+try:
+    from memory.search_index import get_index
+except ImportError:
+    # 直接以腳本方式運行時
+    from search_index import get_index
+
 
 class VectorTrajectory:
     """
@@ -57,38 +63,46 @@ class VectorTrajectory:
         # 這是一個模擬實現，實際使用時應替換為真正的 memory_search
         results = []
         
-        if os.path.exists(self.memory_path):
-            for filename in os.listdir(self.memory_path):
-                if filename.endswith('.md') and filename.startswith('2026-'):
-                    # 從文件名提取日期
-                    date_match = re.match(r'(\d{4}-\d{2}-\d{2})', filename)
-                    if date_match:
-                        date_str = date_match.group(1)
-                        file_path = os.path.join(self.memory_path, filename)
-                        
-                        # 讀取文件內容
-                        try:
-                            with open(file_path, 'r', encoding='utf-8') as f:
-                                content = f.read()
-                                
-                            # 簡單的相關性計算（基於關鍵詞匹配）
-                            relevance = self._calculate_relevance(query, content)
-                            
-                            if relevance >= self.min_confidence:
-                                results.append({
-                                    'id': filename,
-                                    'path': file_path,
-                                    'date': date_str,
-                                    'title': filename.replace('.md', ''),
-                                    'confidence': relevance,
-                                    'summary': self._generate_summary(content)
-                                })
-                        except Exception as e:
-                            continue
+        if not os.path.exists(self.memory_path):
+            return results
+        
+        # 持久化倒排索引（BM25），與 MemorySystem 共用
+        for hit in get_index(self.memory_path).search(query, limit=None):
+            filename = os.path.basename(hit['path'])
+            if not (filename.endswith('.md') and filename.startswith('2026-')):
+                continue
+            
+            # 從文件名提取日期
+            date_match = re.match(r'(\d{4}-\d{2}-\d{2})', filename)
+            if not date_match:
+                continue
+            
+            # 相關性：命中的查詢詞項比例
+            relevance = hit['matched'] / hit['terms']
+            
+            if relevance >= self.min_confidence:
+                results.append({
+                    'id': filename,
+                    'path': hit['path'],
+                    'date': date_match.group(1),
+                    'title': filename.replace('.md', ''),
+                    'confidence': relevance,
+                    'score': hit['score']
+                })
         
         # 按日期排序
         results.sort(key=lambda x: x['date'])
-        return results[:max_results]
+        results = results[:max_results]
+        
+        # 只讀取最終結果的內容生成摘要
+        for result in results:
+            try:
+                with open(result['path'], 'r', encoding='utf-8') as f:
+                    result['summary'] = self._generate_summary(f.read())
+            except Exception:
+                result['summary'] = "無內容"
+        
+        return results
     
     def memory_get(self, memory_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -231,39 +245,6 @@ class VectorTrajectory:
         except Exception as e:
             raise RuntimeError(f"寫入文件失敗: {e}")
     
-    def _calculate_relevance(self, query: str, content: str) -> float:
-        """
-        計算查詢與內容的相關性（簡化版）
-        
-        Args:
-            query: 查詢字符串
-            content: 內容字符串
-            
-        Returns:
-            相關性分數 (0-1)
-        """
-        # 簡單的關鍵詞匹配相關性計算
-        query_lower = query.lower()
-        content_lower = content.lower()
-        
-        # 分詞
-        query_words = query_lower.split()
-        content_words = content_lower.split()
-        
-        # 計算匹配度
-        matches = 0
-        for word in query_words:
-            if len(word) > 2:  # 忽略過短的詞
-                if word in content_lower:
-                    matches += 1
-        
-        # 計算相關性分數
-        if len(query_words) == 0:
-            return 0.0
-        
-        relevance = matches / len(query_words)
-        return min(relevance, 1.0)  # 限制在 0-1 之間
-    
     def _generate_summary(self, content: str, max_length: int = 100) -> str:
         """
         從內容生成摘要
@@ -1,10 +1,4 @@
-# Memory Core - 統一記憶操作接口
-
-> **目的：** 統一記憶操作接口，解耦設計，可獨立演化
-> **設計模式：** 適配器模式 + 三層抽象
-> **版本：** v1.0
-
-```python
+#!/usr/bin/env python3
 """
 Memory Core - 統一記憶操作接口
 
@@ -12,16 +6,89 @@ Memory Core - 統一記憶操作接口
 - Session Memory（短期）：In-Memory + session.json
 - Working Memory（中期）：Obsidian Daily Notes + QMD
 - Knowledge Base（長期）：Obsidian Topics + QMD
+
+各層查詢並行執行，每層使用獨立的有界線程池：卡住的層只會佔滿自己的線程，
+在途查詢達到上限時該層直接略過，不影響其他層。
 """
 
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
+from collections import OrderedDict, defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime
+from pathlib import Path
+import atexit
+import copy
 import json
+import logging
+import subprocess
+import threading
+import time
 import uuid
 
-from obsidian_wrapper import ObsidianWrapper
+from obsidian_wrapper import ObsidianCLI
 from qmd_adapter import QMDAdapter
 
+logger = logging.getLogger(__name__)
+
+# 各層查詢的默認截止時間（秒），超時的層直接略過
+DEFAULT_LAYER_TIMEOUTS = {
+    "session": 1.0,
+    "working": 5.0,
+    "knowledge": 10.0
+}
+
+# 每層並行查詢的線程數（也是該層在途查詢的上限）
+LAYER_WORKERS = 2
+
+
+class QueryCache:
+    """查詢結果快取（TTL + LRU）"""
+
+    def __init__(self, max_entries: int = 256, ttl: float = 60.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(query: str, layers: List[str], limit: int,
+                 filters: Optional[Dict[str, Any]]) -> Tuple:
+        """快取鍵：查詢、層級、數量與過濾條件"""
+        return (
+            query,
+            tuple(layers),
+            limit,
+            json.dumps(filters or {}, sort_keys=True, default=str)
+        )
+
+    def get(self, key: Tuple) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, results = entry
+            if time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return copy.deepcopy(results)
+
+    def put(self, key: Tuple, results: List[Dict[str, Any]]):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), copy.deepcopy(results))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, layer: Optional[str] = None):
+        """清除包含指定層級的快取（None 清除全部）"""
+        with self._lock:
+            if layer is None:
+                self._entries.clear()
+                return
+            for key in [k for k in self._entries if layer in k[1]]:
+                del self._entries[key]
+
 
 class MemoryCore:
     """統一記憶操作接口"""
@@ -30,7 +97,11 @@ class MemoryCore:
         self,
         obsidian_path: str = "~/Documents/Obsidian",
         qmd_path: str = "~/.qmd/qmd",
-        session_path: str = "~/session_memory.json"
+        session_path: str = "~/session_memory.json",
+        layer_timeouts: Optional[Dict[str, float]] = None,
+        cache_ttl: float = 60.0,
+        cache_size: int = 256,
+        access_flush_interval: float = 5.0
     ):
         """
         初始化 Memory Core
@@ -39,6 +110,10 @@ class MemoryCore:
             obsidian_path: Obsidian vault 路徑
             qmd_path: QMD CLI 路徑
             session_path: Session 記憶文件路徑
+            layer_timeouts: 各層查詢截止時間（秒），默認 DEFAULT_LAYER_TIMEOUTS
+            cache_ttl: 查詢結果快取的存活時間（秒），0 表示不快取
+            cache_size: 查詢結果快取的最大條目數
+            access_flush_interval: 訪問次數延遲寫回的間隔（秒）
         """
         # 初始化適配器
         self.obsidian_adapter = ObsidianAdapter(obsidian_path)
@@ -52,6 +127,25 @@ class MemoryCore:
             "knowledge": self.qmd_adapter
         }
 
+        # 並行查詢：每層獨立的有界線程池，超時的查詢在背景結束但只佔用本層的線程
+        self.layer_timeouts = {**DEFAULT_LAYER_TIMEOUTS, **(layer_timeouts or {})}
+        self._executors = {
+            layer: ThreadPoolExecutor(max_workers=LAYER_WORKERS, thread_name_prefix=f"memory-core-{layer}")
+            for layer in self.adapters
+        }
+        self._in_flight: Dict[str, int] = defaultdict(int)
+        self._in_flight_lock = threading.Lock()
+
+        # 查詢結果快取
+        self.cache = QueryCache(max_entries=cache_size, ttl=cache_ttl) if cache_ttl > 0 else None
+
+        # 延遲批量寫回的訪問次數 {(layer, memory_id): 增量}
+        self.access_flush_interval = access_flush_interval
+        self._pending_access: Dict[Tuple[str, str], int] = defaultdict(int)
+        self._access_lock = threading.Lock()
+        self._flush_timer: Optional[threading.Timer] = None
+        atexit.register(self.flush_access_counts)
+
     def store(
         self,
         content: str,
@@ -97,6 +191,9 @@ class MemoryCore:
         adapter = self.adapters[layer]
         adapter.store(memory_id, content, metadata)
 
+        if self.cache:
+            self.cache.invalidate(layer)
+
         return memory_id
 
     def query(
@@ -128,18 +225,16 @@ class MemoryCore:
                     f"Invalid layer: {layer}. Must be one of: {list(self.adapters.keys())}"
                 )
 
+        cache_key = QueryCache.make_key(query, layers, limit, filters)
+        if self.cache:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self._record_access(cached)
+                return cached
+
         # 並行查詢各層
         results = []
-        for layer in layers:
-            adapter = self.adapters[layer]
-
-            # 如果適配器支持搜索，使用搜索
-            if hasattr(adapter, "search"):
-                layer_results = adapter.search(query, limit, filters)
-            else:
-                # 否則使用默認查詢
-                layer_results = adapter.query(query, limit, filters)
-
+        for layer, layer_results in self._fan_out(query, layers, limit, filters):
             # 添加層級信息
             for result in layer_results:
                 result["layer"] = layer
@@ -155,19 +250,151 @@ class MemoryCore:
         # 限制數量
         results = results[:limit]
 
-        # 更新訪問次數
-        for result in results:
-            memory_id = result.get("memory_id")
-            if memory_id:
-                adapter = self.adapters[result["layer"]]
-                if hasattr(adapter, "update_metadata"):
-                    metadata = adapter.get_metadata(memory_id)
-                    if metadata:
-                        metadata["access_count"] = metadata.get("access_count", 0) + 1
-                        adapter.update_metadata(memory_id, metadata)
+        if self.cache:
+            self.cache.put(cache_key, results)
+
+        # 更新訪問次數（延遲批量寫回，不阻塞查詢）
+        self._record_access(results)
 
         return results
 
+    def _search_layer(
+        self,
+        layer: str,
+        query: str,
+        limit: int,
+        filters: Optional[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """查詢單一層級"""
+        adapter = self.adapters[layer]
+
+        # 如果適配器支持搜索，使用搜索
+        if hasattr(adapter, "search"):
+            return adapter.search(query, limit, filters)
+        # 否則使用默認查詢
+        return adapter.query(query, limit, filters)
+
+    def _fan_out(
+        self,
+        query: str,
+        layers: List[str],
+        limit: int,
+        filters: Optional[Dict[str, Any]]
+    ) -> List[Tuple[str, List[Dict[str, Any]]]]:
+        """
+        並行查詢各層，每層有獨立的截止時間
+
+        Returns:
+            [(layer, results)]，按 layers 順序；超時或失敗的層結果為空
+        """
+        started = time.monotonic()
+        futures = {layer: self._submit_layer(layer, query, limit, filters) for layer in layers}
+
+        collected = []
+        for layer in layers:
+            future = futures[layer]
+            if future is None:
+                logger.warning(f"Layer '{layer}' has {LAYER_WORKERS} queries still running, skipped")
+                collected.append((layer, []))
+                continue
+            deadline = self.layer_timeouts.get(layer, max(self.layer_timeouts.values()))
+            remaining = max(0.0, deadline - (time.monotonic() - started))
+            try:
+                collected.append((layer, future.result(timeout=remaining)))
+            except FutureTimeoutError:
+                # 尚未開始的查詢直接取消；已在執行的在背景結束後釋放本層名額
+                future.cancel()
+                logger.warning(f"Layer '{layer}' exceeded its {deadline:.1f}s deadline, skipped")
+                collected.append((layer, []))
+            except Exception as e:
+                logger.warning(f"Layer '{layer}' query failed: {e}")
+                collected.append((layer, []))
+
+        return collected
+
+    def _submit_layer(
+        self,
+        layer: str,
+        query: str,
+        limit: int,
+        filters: Optional[Dict[str, Any]]
+    ) -> Optional[Future]:
+        """提交單層查詢；該層在途查詢已達 LAYER_WORKERS 時返回 None"""
+        with self._in_flight_lock:
+            if self._in_flight[layer] >= LAYER_WORKERS:
+                return None
+            self._in_flight[layer] += 1
+        try:
+            future = self._executors[layer].submit(self._search_layer, layer, query, limit, filters)
+        except RuntimeError:
+            self._release_layer(layer)
+            raise
+        future.add_done_callback(lambda _: self._release_layer(layer))
+        return future
+
+    def _release_layer(self, layer: str):
+        with self._in_flight_lock:
+            self._in_flight[layer] -= 1
+
+    def _record_access(self, results: List[Dict[str, Any]]):
+        """記錄訪問次數，由計時器批量寫回"""
+        with self._access_lock:
+            for result in results:
+                memory_id = result.get("memory_id")
+                if memory_id:
+                    self._pending_access[(result["layer"], memory_id)] += 1
+
+            if self._pending_access and self._flush_timer is None:
+                self._flush_timer = threading.Timer(
+                    self.access_flush_interval, self.flush_access_counts
+                )
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+    def flush_access_counts(self) -> int:
+        """
+        將累積的訪問次數一次寫回各層
+
+        Returns:
+            updated: 更新的記憶數量
+        """
+        with self._access_lock:
+            pending = self._pending_access
+            self._pending_access = defaultdict(int)
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+
+        by_layer: Dict[str, Dict[str, int]] = defaultdict(dict)
+        for (layer, memory_id), increment in pending.items():
+            by_layer[layer][memory_id] = increment
+
+        updated = 0
+        for layer, increments in by_layer.items():
+            adapter = self.adapters[layer]
+            try:
+                if hasattr(adapter, "update_access_counts"):
+                    # 適配器支持批量更新：一次寫入
+                    updated += adapter.update_access_counts(increments)
+                elif hasattr(adapter, "update_metadata"):
+                    for memory_id, increment in increments.items():
+                        metadata = adapter.get_metadata(memory_id)
+                        if metadata:
+                            metadata["access_count"] = int(metadata.get("access_count", 0)) + increment
+                            adapter.update_metadata(memory_id, metadata)
+                            updated += 1
+            except Exception as e:
+                logger.warning(f"Failed to write access counts for layer '{layer}': {e}")
+
+        return updated
+
+    def close(self):
+        """寫回訪問次數，索引 QMD 未索引的寫入並關閉線程池"""
+        self.flush_access_counts()
+        self.qmd_adapter.close()
+        for executor in self._executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+
     def link(
         self,
         source_id: str,
@@ -206,6 +433,9 @@ class MemoryCore:
         # 使用 Obsidian adapter 創建連結（因為它支持連結）
         self.obsidian_adapter.link(source_id, target_id, relation_type, metadata)
 
+        if self.cache:
+            self.cache.invalidate("working")
+
         return link_id
 
     def get(
@@ -248,7 +478,13 @@ class MemoryCore:
         if not adapter:
             raise ValueError(f"Invalid layer: {layer}")
 
-        return adapter.delete(memory_id)
+        deleted = adapter.delete(memory_id)
+
+        # 刪除完成後再清除快取，避免刪除期間的查詢把舊結果寫回快取
+        if self.cache:
+            self.cache.invalidate(layer)
+
+        return deleted
 
     def _deduplicate(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """去重（跨層重複）"""
@@ -273,11 +509,11 @@ class MemoryCore:
             # 新近度（15%）
             recency_score = self._calculate_recency_score(result) * 0.15
 
-            # 重要性（20%）
-            importance_score = result.get("metadata", {}).get("importance", 0.5) * 0.20
+            # 重要性（20%；frontmatter 中的值為字串）
+            importance_score = float(result.get("metadata", {}).get("importance", 0.5)) * 0.20
 
             # 訪問頻率（10%）
-            access_score = result.get("metadata", {}).get("access_count", 0) / 100 * 0.10
+            access_score = float(result.get("metadata", {}).get("access_count", 0)) / 100 * 0.10
 
             # 關鍵詞匹配（20%）
             keyword_score = self._calculate_keyword_score(result, query) * 0.20
@@ -405,6 +641,19 @@ class SessionAdapter:
             self.memory[memory_id]["metadata"].update(metadata)
             self._save_to_file()
 
+    def update_access_counts(self, increments: Dict[str, int]) -> int:
+        """批量增加訪問次數（只寫一次文件）"""
+        updated = 0
+        for memory_id, increment in increments.items():
+            memory = self.memory.get(memory_id)
+            if memory:
+                metadata = memory.setdefault("metadata", {})
+                metadata["access_count"] = metadata.get("access_count", 0) + increment
+                updated += 1
+        if updated:
+            self._save_to_file()
+        return updated
+
     def get_metadata(self, memory_id: str) -> Optional[Dict[str, Any]]:
         """獲取元數據"""
         memory = self.memory.get(memory_id)
@@ -414,16 +663,20 @@ class SessionAdapter:
 
 
 class ObsidianAdapter:
-    """Obsidian 適配器（使用現有 obsidian_wrapper.py）"""
+    """Obsidian 適配器（使用現有 obsidian_wrapper.py 的 ObsidianCLI）"""
 
     def __init__(self, obsidian_path: str):
-        self.obsidian = ObsidianWrapper(vault_path=obsidian_path)
+        self.obsidian = ObsidianCLI(vault_path=str(Path(obsidian_path).expanduser()))
+
+    def _read(self, memory_id: str) -> Optional[str]:
+        """讀取筆記，不存在或讀取失敗時返回 None"""
+        try:
+            return self.obsidian.read(memory_id) or None
+        except (subprocess.CalledProcessError, OSError):
+            return None
 
     def store(self, memory_id: str, content: str, metadata: Dict[str, Any]):
         """存儲記憶到 Obsidian"""
-        # 創建文件名
-        filename = f"{memory_id}.md"
-
         # 添加 frontmatter
         frontmatter = self._create_frontmatter(metadata)
 
@@ -431,7 +684,7 @@ class ObsidianAdapter:
         full_content = f"{frontmatter}\n\n{content}"
 
         # 創建筆記
-        self.obsidian.create_note(filename, full_content)
+        self.obsidian.create(memory_id, full_content, overwrite=True)
 
     def _create_frontmatter(self, metadata: Dict[str, Any]) -> str:
         """創建 frontmatter"""
@@ -444,18 +697,24 @@ class ObsidianAdapter:
 
     def query(self, query: str, limit: int, filters: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """查詢 Obsidian（使用 search）"""
-        # 使用 obsidian_wrapper 的 search
-        results = self.obsidian.search(query)
+        # 使用 obsidian_wrapper 的 search（返回檔案路徑或結果字典）
+        results = self.obsidian.search(query, limit=limit)
 
         # 格式化結果
         formatted_results = []
         for result in results[:limit]:
+            if isinstance(result, dict):
+                path = result.get("file") or result.get("path", "")
+            else:
+                path = str(result)
+            memory_id = Path(path).stem
+            content = self._read(path) or ""
             formatted_results.append({
-                "memory_id": result.get("path", "").replace(".md", ""),
-                "content": result.get("content", ""),
-                "metadata": result.get("metadata", {}),
-                "score": result.get("score", 0.5),
-                "final_score": result.get("score", 0.5)
+                "memory_id": memory_id,
+                "content": content,
+                "metadata": self._parse_frontmatter(content) or {},
+                "score": 0.5,
+                "final_score": 0.5
             })
 
         return formatted_results
@@ -467,68 +726,61 @@ class ObsidianAdapter:
 
     def get(self, memory_id: str) -> Optional[Dict[str, Any]]:
         """獲取記憶"""
-        filename = f"{memory_id}.md"
-        content = self.obsidian.read_note(filename)
+        content = self._read(memory_id)
         if content:
             return {
                 "content": content,
-                "metadata": {}
+                "metadata": self._parse_frontmatter(content) or {}
             }
         return None
 
     def delete(self, memory_id: str) -> bool:
         """刪除記憶"""
-        filename = f"{memory_id}.md"
-        self.obsidian.delete_note(filename)
+        try:
+            self.obsidian.delete(memory_id)
+        except (subprocess.CalledProcessError, OSError):
+            return False
         return True
 
     def link(self, source_id: str, target_id: str, relation_type: str, metadata: Dict[str, Any]):
         """創建連結"""
-        # 在 source 記憶中添加連結
-        source_filename = f"{source_id}.md"
-        content = self.obsidian.read_note(source_filename)
-        if content:
-            link = f"[[{target_id}|{relation_type}]]"
-            new_content = f"{content}\n\n{link}"
-            self.obsidian.append_note(source_filename, new_content)
+        # 在 source 記憶末尾追加連結
+        if self._read(source_id):
+            self.obsidian.append(source_id, f"\n[[{target_id}|{relation_type}]]")
 
     def update_metadata(self, memory_id: str, metadata: Dict[str, Any]):
         """更新元數據"""
-        filename = f"{memory_id}.md"
-        content = self.obsidian.read_note(filename)
+        content = self._read(memory_id)
         if content:
             # 更新 frontmatter
             lines = content.split("\n")
-            if lines[0] == "---":
+            if lines[0] == "---" and "---" in lines[1:]:
                 # 找到 frontmatter 結束
                 frontmatter_end = lines.index("---", 1)
-                # 更新 frontmatter
-                frontmatter_lines = lines[1:frontmatter_end]
-                for key, value in metadata.items():
-                    line = f"{key}: {value}"
-                    if not any(line.startswith(key + ":") for line in frontmatter_lines):
-                        frontmatter_lines.append(line)
+                frontmatter = {**self._parse_frontmatter(content), **metadata}
                 # 重組內容
-                new_frontmatter = "\n".join(["---"] + frontmatter_lines + ["---"])
-                new_content = new_frontmatter + "\n" + "\n".join(lines[frontmatter_end+1:])
-                self.obsidian.delete_note(filename)
-                self.obsidian.create_note(filename, new_content)
+                new_content = self._create_frontmatter(frontmatter) + "\n" + "\n".join(lines[frontmatter_end+1:])
+                self.obsidian.create(memory_id, new_content, overwrite=True)
+
+    @staticmethod
+    def _parse_frontmatter(content: str) -> Optional[Dict[str, Any]]:
+        """解析 frontmatter，沒有時返回 None"""
+        lines = content.split("\n")
+        if lines[0] != "---" or "---" not in lines[1:]:
+            return None
+        frontmatter_end = lines.index("---", 1)
+        metadata = {}
+        for line in lines[1:frontmatter_end]:
+            if ":" in line:
+                key, value = line.split(":", 1)
+                metadata[key.strip()] = value.strip()
+        return metadata
 
     def get_metadata(self, memory_id: str) -> Optional[Dict[str, Any]]:
         """獲取元數據"""
-        filename = f"{memory_id}.md"
-        content = self.obsidian.read_note(filename)
+        content = self._read(memory_id)
         if content:
-            lines = content.split("\n")
-            if lines[0] == "---":
-                frontmatter_end = lines.index("---", 1)
-                frontmatter_lines = lines[1:frontmatter_end]
-                metadata = {}
-                for line in frontmatter_lines:
-                    if ":" in line:
-                        key, value = line.split(":", 1)
-                        metadata[key.strip()] = value.strip()
-                return metadata
+            return self._parse_frontmatter(content)
         return None
 
 
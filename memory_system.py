@@ -18,6 +18,7 @@
 """
 
 from obsidian_memory import ObsidianMemory
+from memory.search_index import get_index
 from pathlib import Path
 from typing import List, Optional
 import logging
@@ -166,7 +167,7 @@ class MemorySystem:
 
     def _search_traditional(self, query: str, limit: int) -> List[str]:
         """
-        傳統方式搜索記憶
+        傳統方式搜索記憶（包含全部查詢詞項的文件，按 BM25 分數排序）
 
         參數:
             query: 搜索查詢
@@ -175,25 +176,15 @@ class MemorySystem:
         返回:
             搜索結果
         """
-        results = []
-
-        # 搜索 MEMORY.md
+        # 持久化倒排索引（BM25），只重新索引 mtime 變化的文件
         memory_file = self.workspace_path / "MEMORY.md"
-        if memory_file.exists():
-            with open(memory_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-                if query.lower() in content.lower():
-                    results.append("MEMORY.md")
-
-        # 搜索 memory/ 目錄
-        if self.memory_path.exists():
-            for md_file in self.memory_path.glob("*.md"):
-                with open(md_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    if query.lower() in content.lower():
-                        results.append(md_file.name)
-
-        return results[:limit]
+        index = get_index(self.memory_path, extra_files=[memory_file])
+        hits = index.search(query, limit, require_all=True)
+
+        return [
+            "MEMORY.md" if Path(hit['path']) == memory_file else Path(hit['path']).name
+            for hit in hits
+        ]
 
     def _read_traditional(self, path: str) -> str:
         """
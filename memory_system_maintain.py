@@ -7,6 +7,7 @@
 2. 記憶更新（更新 MEMORY.md、SOUL.md）
 3. 記憶整理（清理過時記憶）
 4. 優化記錄（記錄優化成果）
+5. QMD 索引（批量寫入 daily logs 與提取的知識，QMD 不可用時跳過）
 
 執行頻率：每週一次
 
@@ -14,14 +15,26 @@ Usage:
     python3 memory_system_maintain.py              # 執行完整流程
     python3 memory_system_maintain.py --dry-run   # 只顯示計劃，不執行
     python3 memory_system_maintain.py --skip-cleanup  # 跳過清理步驟
+    python3 memory_system_maintain.py --no-qmd    # 不寫入 QMD 索引
 """
 
 import argparse
+import hashlib
 import re
+import sys
 from datetime import datetime, timedelta
 from pathlib import Path
 from memory_system import MemorySystem
 
+sys.path.insert(0, str(Path(__file__).parent))
+
+# QMD 索引（可選）
+try:
+    from qmd_adapter import QMDAdapter
+    QMD_AVAILABLE = True
+except ImportError:
+    QMD_AVAILABLE = False
+
 # 路徑配置
 WORKSPACE = Path("/Users/charlie/.openclaw/workspace")
 MEMORY_DIR = WORKSPACE / "memory"
@@ -297,11 +310,52 @@ def generate_report(knowledge, memory_system: MemorySystem):
     print_success(f"維護報告已生成: {report_file.name}")
 
 
+def index_in_qmd(log_files, knowledge):
+    """批量寫入 QMD：daily logs 進 working 層，提取的知識進 knowledge 層"""
+    print_step(8, "批量寫入 QMD 索引")
+
+    if not QMD_AVAILABLE:
+        print_warning("qmd_adapter 不可用，跳過 QMD 索引")
+        return
+
+    try:
+        qmd = QMDAdapter()
+    except RuntimeError as e:
+        print_warning(f"QMD 不可用，跳過索引: {e}")
+        return
+
+    items = []
+    for log_file in log_files:
+        items.append((
+            f"daily-{log_file.stem}",
+            log_file.read_text(encoding='utf-8'),
+            {"layer": "working", "tags": ["daily-log"], "date": log_file.stem}
+        ))
+
+    for kind in ("learnings", "patterns", "decisions", "achievements"):
+        for item in knowledge[kind]:
+            # 以內容哈希作 ID，重複執行時覆蓋而不是重複寫入
+            digest = hashlib.sha1(item["content"].encode('utf-8')).hexdigest()[:10]
+            items.append((
+                f"{kind}-{item['date']}-{digest}",
+                item["content"],
+                {"layer": "knowledge", "tags": [kind], "date": item["date"]}
+            ))
+
+    try:
+        results = qmd.store_many(items)
+    finally:
+        qmd.close()
+
+    print_success(f"QMD 索引完成：{sum(results.values())}/{len(items)} 條")
+
+
 def main():
     parser = argparse.ArgumentParser(description="記憶維護主腳本")
     parser.add_argument("--dry-run", action="store_true", help="只顯示計劃，不執行")
     parser.add_argument("--skip-cleanup", action="store_true", help="跳過清理步驟")
     parser.add_argument("--days", type=int, default=7, help="掃描最近 N 天的日誌（默認 7 天）")
+    parser.add_argument("--no-qmd", action="store_true", help="不寫入 QMD 索引")
     args = parser.parse_args()
 
     print_header("記憶維護系統")
@@ -342,6 +396,10 @@ def main():
     # 7. 生成報告
     generate_report(knowledge, memory_system)
 
+    # 8. 批量寫入 QMD
+    if not args.no_qmd:
+        index_in_qmd(log_files, knowledge)
+
     print_header("維護完成 ✅")
     print_info("所有記憶維護任務已完成")
 
@@ -10,6 +10,14 @@ Obsidian 記憶系統整合
     memory = ObsidianMemory()
     memory.store("This is a memory")
     results = memory.search("memory")
+
+    # 連續寫入多條記憶時使用批量模式（一次 CLI 調用）
+    with memory.batch():
+        for item in items:
+            memory.store(item)
+
+統計與連結分析（get_vault_stats / analyze_connections）由 ObsidianCLI 的本地 Vault 快取提供，
+不逐次啟動 Obsidian CLI。
 """
 
 from obsidian_wrapper import ObsidianCLI
@@ -33,6 +41,15 @@ class ObsidianMemory:
         """
         self.obsidian = obsidian or ObsidianCLI()
 
+    def batch(self):
+        """
+        批量寫入上下文（store / create_research_note 等在退出時一次提交）
+
+        返回:
+            ObsidianCLI.batch() 上下文管理器
+        """
+        return self.obsidian.batch()
+
     def store(
         self,
         content: str,
@@ -142,7 +159,7 @@ class ObsidianMemory:
             連結分析結果
         """
         backlinks = self.obsidian.get_backlinks(file=path)
-        links = self.obsidian.get_links(file=path)
+        links = self.obsidian.get_links(file=path, total=True)
 
         analysis = {
             "path": path,
@@ -10,11 +10,25 @@ Obsidian CLI Python Wrapper
     obsidian = ObsidianCLI()
     obsidian.create("test.md", "Hello, World!")
     content = obsidian.read("test.md")
+
+    # 批量寫入：退出 with 時以一次 eval 執行全部操作
+    with obsidian.batch():
+        for name, content in notes.items():
+            obsidian.create(name, content, path="Research/")
+
+只讀查詢（get_files / get_tags / get_orphans / get_deadends / get_backlinks / get_links / read）
+在 Vault 位於本地時直接由 VaultCache 提供：只掃描 Markdown 的 mtime，重新解析有變化的檔案，
+不再為每次查詢啟動 Obsidian。
 """
 
+import base64
 import subprocess
 import json
 import logging
+import os
+import re
+from collections import Counter
+from contextlib import contextmanager
 from pathlib import Path
 from typing import Optional, List, Dict, Any, Union
 
@@ -23,13 +37,238 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+_WIKILINK = re.compile(r'!?\[\[([^\]|#^]*)(?:[#^][^\]|]*)?(?:\|[^\]]*)?\]\]')
+_MDLINK = re.compile(r'\[[^\]]*\]\(([^)\s]+?\.md)(?:#[^)]*)?\)')
+_INLINE_TAG = re.compile(r'(?:^|(?<=\s))#([\w/-]*[^\W\d][\w/-]*)', re.UNICODE)
+_CODE_BLOCK = re.compile(r'```.*?```|`[^`\n]*`', re.DOTALL)
+_FRONTMATTER = re.compile(r'\A---\n(.*?)\n---(?:\n|\Z)', re.DOTALL)
+
+# 掃描時跳過的目錄
+_SKIP_DIRS = {'.obsidian', '.trash', '.git'}
+
+
+class VaultCache:
+    """
+    本地 Vault 的 Markdown 與連結圖快取
+
+    按 mtime/size 增量重新解析檔案；連結解析規則與 Obsidian 一致的部分：
+    [[名稱]] 按檔名匹配（同名取路徑最短者），[[資料夾/名稱]] 按 Vault 相對路徑匹配，
+    [文字](相對路徑.md) 相對於所在檔案解析。無法解析的連結不計入反向連結。
+    """
+
+    def __init__(self, vault_path: Union[str, Path]):
+        self.vault_path = Path(vault_path)
+        # 相對路徑 -> (mtime_ns, size, 原始連結目標, 標籤)
+        self._files: Dict[str, tuple] = {}
+        self._graph: Optional[Dict[str, Any]] = None
+
+    def refresh(self) -> bool:
+        """
+        增量更新快取
+
+        返回:
+            是否有檔案變化
+        """
+        seen = set()
+        changed = False
+        for root, dirs, names in os.walk(self.vault_path):
+            dirs[:] = [d for d in dirs if d not in _SKIP_DIRS]
+            for name in names:
+                if not name.endswith('.md'):
+                    continue
+                full = os.path.join(root, name)
+                rel = os.path.relpath(full, self.vault_path).replace(os.sep, '/')
+                seen.add(rel)
+                try:
+                    stat = os.stat(full)
+                except OSError:
+                    continue
+                cached = self._files.get(rel)
+                if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+                    continue
+                self._files[rel] = (stat.st_mtime_ns, stat.st_size) + self._parse(full)
+                changed = True
+
+        for rel in set(self._files) - seen:
+            del self._files[rel]
+            changed = True
+
+        if changed:
+            self._graph = None
+        return changed
+
+    @staticmethod
+    def _parse(full_path: str) -> tuple:
+        """解析單個檔案的連結目標與標籤"""
+        try:
+            with open(full_path, 'r', encoding='utf-8', errors='ignore') as f:
+                content = f.read()
+        except OSError:
+            return ((), ())
+
+        tags = []
+        match = _FRONTMATTER.match(content)
+        if match:
+            frontmatter = match.group(1)
+            # tags: a, b 或 tags: [a, b]
+            inline = re.search(r'^tags:[ \t]*\[?([^\n\]]*)\]?[ \t]*$', frontmatter, re.MULTILINE)
+            if inline:
+                tags.extend(t.strip(' #"\'') for t in inline.group(1).split(','))
+            # YAML 列表形式
+            block = re.search(r'^tags:[ \t]*\n((?:[ \t]*-[ \t]*.+\n?)+)', frontmatter, re.MULTILINE)
+            if block:
+                tags.extend(t.strip().lstrip('-').strip(' #"\'') for t in block.group(1).strip().split('\n'))
+            content = content[match.end():]
+
+        body = _CODE_BLOCK.sub('', content)
+        links = [target.strip() for target in _WIKILINK.findall(body) if target.strip()]
+        links.extend(('./', target) for target in _MDLINK.findall(body) if '://' not in target)
+        tags.extend(_INLINE_TAG.findall(body))
+        return (tuple(links), tuple(dict.fromkeys(t for t in tags if t)))
+
+    def _resolve(self, target, source: str, by_name: Dict[str, str]) -> Optional[str]:
+        """把連結目標解析為 Vault 相對路徑"""
+        if isinstance(target, tuple):
+            # Markdown 連結：相對於來源檔案
+            base = os.path.dirname(source)
+            path = os.path.normpath(os.path.join(base, target[1])).replace(os.sep, '/')
+            return path if path in self._files else None
+
+        path = target if target.endswith('.md') else f"{target}.md"
+        if path in self._files:
+            return path
+        if '/' not in target:
+            return by_name.get(Path(path).stem.lower())
+        # 部分路徑：取後綴匹配的最短路徑
+        matches = [p for p in self._files if p.endswith('/' + path)]
+        return min(matches, key=len) if matches else None
+
+    def _build_graph(self) -> Dict[str, Any]:
+        if self._graph is not None:
+            return self._graph
+
+        by_name: Dict[str, str] = {}
+        for rel in sorted(self._files, key=lambda p: (p.count('/'), p)):
+            by_name.setdefault(Path(rel).stem.lower(), rel)
+
+        outgoing: Dict[str, List[str]] = {}
+        incoming: Dict[str, Counter] = {rel: Counter() for rel in self._files}
+        tags: Counter = Counter()
+        for rel, (_, _, links, file_tags) in self._files.items():
+            resolved = []
+            for target in links:
+                dest = self._resolve(target, rel, by_name)
+                if dest is not None:
+                    resolved.append(dest)
+                    incoming[dest][rel] += 1
+            outgoing[rel] = list(dict.fromkeys(resolved))
+            tags.update(file_tags)
+
+        self._graph = {'by_name': by_name, 'outgoing': outgoing, 'incoming': incoming, 'tags': tags}
+        return self._graph
+
+    def graph(self) -> Dict[str, Any]:
+        """刷新並返回連結圖"""
+        self.refresh()
+        return self._build_graph()
+
+    def find(self, file: str) -> Optional[str]:
+        """按 Obsidian 的 file= 規則（名稱或路徑）查找檔案"""
+        graph = self.graph()
+        path = file if file.endswith('.md') else f"{file}.md"
+        if path in self._files:
+            return path
+        return graph['by_name'].get(Path(path).stem.lower())
+
+    def files(self, folder: Optional[str] = None) -> List[str]:
+        self.refresh()
+        prefix = folder.strip('/') + '/' if folder else ''
+        return sorted(p for p in self._files if p.startswith(prefix))
+
+    def tags(self) -> Counter:
+        return self.graph()['tags']
+
+    def backlinks(self, file: str) -> Counter:
+        path = self.find(file)
+        return self.graph()['incoming'].get(path, Counter()) if path else Counter()
+
+    def links(self, file: str) -> List[str]:
+        path = self.find(file)
+        return self.graph()['outgoing'].get(path, []) if path else []
+
+    def orphans(self) -> List[str]:
+        return sorted(p for p, sources in self.graph()['incoming'].items() if not sources)
+
+    def deadends(self) -> List[str]:
+        return sorted(p for p, targets in self.graph()['outgoing'].items() if not targets)
+
+
+# 批量執行的寫入操作（Obsidian API）；操作列表以 base64 JSON 嵌入，腳本中不含雙引號。
+# 腳本捕獲自身的錯誤，總是返回 {"done": 已完成數, "error": ...}，失敗時只需重放剩餘操作
+_BATCH_SCRIPT = """(async () => {
+  const ops = JSON.parse(new TextDecoder().decode(Uint8Array.from(atob('%s'), c => c.charCodeAt(0))));
+  const resolve = (f) => app.metadataCache.getFirstLinkpathDest(f, '') || app.vault.getAbstractFileByPath(f);
+  let done = 0;
+  try {
+    for (const op of ops) {
+      if (op.op === 'create') {
+        const folder = (op.path || '').replace(/\\/+$/, '');
+        const name = op.name.endsWith('.md') ? op.name : op.name + '.md';
+        const path = folder ? folder + '/' + name : name;
+        if (folder && !app.vault.getAbstractFileByPath(folder)) await app.vault.createFolder(folder);
+        const existing = app.vault.getAbstractFileByPath(path);
+        if (!existing) await app.vault.create(path, op.content);
+        else if (op.overwrite) await app.vault.modify(existing, op.content);
+      } else if (op.op === 'append') {
+        await app.vault.append(resolve(op.file), (op.inline ? '' : '\\n') + op.content);
+      } else if (op.op === 'prepend') {
+        const file = resolve(op.file);
+        const pos = app.metadataCache.getFileCache(file)?.frontmatterPosition;
+        await app.vault.process(file, (data) => {
+          const at = pos ? pos.end.offset + 1 : 0;
+          return data.slice(0, at) + op.content + (op.inline ? '' : '\\n') + data.slice(at);
+        });
+      } else if (op.op === 'move') {
+        await app.fileManager.renameFile(resolve(op.file), op.to);
+      } else if (op.op === 'rename') {
+        const file = resolve(op.file);
+        const parent = file.parent && file.parent.path !== '/' ? file.parent.path + '/' : '';
+        await app.fileManager.renameFile(file, parent + op.name + '.' + file.extension);
+      } else if (op.op === 'delete') {
+        const file = resolve(op.file);
+        if (op.permanent) await app.vault.delete(file); else await app.vault.trash(file, true);
+      }
+      done++;
+    }
+  } catch (e) {
+    return JSON.stringify({done: done, error: String(e).replace(/[{}]/g, '')});
+  }
+  return JSON.stringify({done: done});
+})()"""
+
+_BATCH_REPORT = re.compile(r'\{[^{}]*"done"[^{}]*\}')
+
+
+def _parse_batch_report(output: str) -> Optional[Dict[str, Any]]:
+    """從 eval 輸出中取出批量腳本的 {"done": n, "error": ...}；腳本未執行時返回 None"""
+    for match in reversed(_BATCH_REPORT.findall(output or '')):
+        try:
+            report = json.loads(match)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(report.get('done'), int):
+            return report
+    return None
+
+
 class ObsidianCLI:
     """Obsidian CLI 包裝器"""
 
     def __init__(
         self,
         vault_path: Optional[str] = None,
-        obsidian_cmd: Optional[str] = None
+        obsidian_cmd: Optional[str] = None,
+        use_cache: bool = True
     ):
         """
         初始化 Obsidian CLI 包裝器
@@ -37,13 +276,96 @@ class ObsidianCLI:
         參數:
             vault_path: Vault 路徑（默認：/Users/charlie/.openclaw/workspace/quant/research）
             obsidian_cmd: Obsidian CLI 命令路徑（默認：/Applications/Obsidian.app/Contents/MacOS/obsidian）
+            use_cache: Vault 在本地時，只讀查詢是否直接讀取檔案（VaultCache）
         """
         self.vault_path = vault_path or "/Users/charlie/.openclaw/workspace/quant/research"
         self.obsidian_cmd = obsidian_cmd or "/Applications/Obsidian.app/Contents/MacOS/obsidian"
 
+        # 批量模式下排隊的寫入操作（None 表示未處於批量模式）
+        self._queue: Optional[List[Dict[str, Any]]] = None
+
         # 驗證 Vault 存在
         if not Path(self.vault_path).exists():
             logger.warning(f"Vault path does not exist: {self.vault_path}")
+            self.cache = None
+        else:
+            self.cache = VaultCache(self.vault_path) if use_cache else None
+
+    @contextmanager
+    def batch(self):
+        """
+        批量模式：寫入操作（create/append/prepend/move/rename/delete）排隊，
+        退出時以一次 eval 執行。巢狀使用時由最外層統一提交。
+        """
+        if self._queue is not None:
+            yield self
+            return
+
+        self._queue = []
+        try:
+            yield self
+        finally:
+            self.flush()
+            self._queue = None
+
+    def _enqueue(self, op: Dict[str, Any]) -> bool:
+        """批量模式下排隊操作；返回 False 表示應立即執行"""
+        if self._queue is None:
+            return False
+        self._queue.append(op)
+        return True
+
+    def flush(self) -> int:
+        """
+        提交排隊的寫入操作
+
+        返回:
+            提交的操作數量
+        """
+        if not self._queue:
+            return 0
+
+        ops, self._queue = self._queue, []
+        payload = base64.b64encode(json.dumps(ops, ensure_ascii=False).encode('utf-8')).decode('ascii')
+        try:
+            output = self.eval_js(_BATCH_SCRIPT % payload)
+        except subprocess.CalledProcessError as e:
+            output = e.stdout or ''
+
+        # 沒有報告說明腳本沒有執行（eval 不可用），全部重放；
+        # 否則只重放失敗的那條及之後的操作，已執行的 append/prepend 不會重複
+        report = _parse_batch_report(output)
+        done = min(report['done'], len(ops)) if report else 0
+        if report and done == len(ops) and 'error' not in report:
+            logger.info(f"Flushed {len(ops)} queued operations in one eval")
+            return len(ops)
+
+        remaining = ops[done:]
+        if report:
+            logger.warning(
+                f"Batch eval stopped after {done}/{len(ops)} operations ({report.get('error')}), "
+                f"replaying {len(remaining)} one by one"
+            )
+        else:
+            logger.warning(f"Batch eval failed, replaying {len(remaining)} operations one by one")
+        queue, self._queue = self._queue, None
+        try:
+            for op in remaining:
+                self._replay(op)
+        finally:
+            self._queue = queue
+        return len(ops)
+
+    def _replay(self, op: Dict[str, Any]):
+        """逐條執行排隊的操作"""
+        kwargs = {k: v for k, v in op.items() if k != 'op'}
+        getattr(self, op['op'])(**kwargs)
+
+    def _local_cache(self) -> Optional[VaultCache]:
+        """只讀查詢前先提交隊列，返回可用的本地快取"""
+        if self._queue:
+            self.flush()
+        return self.cache
 
     def _run_command(
         self,
@@ -62,6 +384,10 @@ class ObsidianCLI:
         返回:
             subprocess.CompletedProcess
         """
+        # 不可排隊的命令執行前先提交隊列，保證順序
+        if self._queue:
+            self.flush()
+
         full_cmd = [self.obsidian_cmd] + cmd
 
         try:
@@ -99,6 +425,10 @@ class ObsidianCLI:
         返回:
             創建結果訊息
         """
+        if template is None and self._enqueue({
+            "op": "create", "name": name, "content": content, "path": path, "overwrite": overwrite
+        }):
+            return f"Created: {name}"
         cmd = [
             "create",
             f"name={name}",
@@ -126,6 +456,10 @@ class ObsidianCLI:
         返回:
             檔案內容
         """
+        if self._local_cache() is not None:
+            path = self.cache.find(file)
+            if path is not None:
+                return (Path(self.vault_path) / path).read_text(encoding='utf-8')
         cmd = ["read", f"file={file}"]
         result = self._run_command(cmd, capture_output=True)
         return result.stdout
@@ -147,6 +481,9 @@ class ObsidianCLI:
         返回:
             追加結果訊息
         """
+        if self._enqueue({"op": "append", "file": file, "content": content, "inline": inline}):
+            return f"Appended to: {file}"
+
         cmd = [
             "append",
             f"file={file}",
@@ -177,6 +514,9 @@ class ObsidianCLI:
         返回:
             添加結果訊息
         """
+        if self._enqueue({"op": "prepend", "file": file, "content": content, "inline": inline}):
+            return f"Prepended to: {file}"
+
         cmd = [
             "prepend",
             f"file={file}",
@@ -291,6 +631,14 @@ class ObsidianCLI:
         返回:
             反向連結列表
         """
+        if self._local_cache() is not None and format == "json":
+            entries = []
+            for source, count in sorted(self.cache.backlinks(file).items()):
+                entry = {"file": source}
+                if counts:
+                    entry["count"] = count
+                entries.append(entry)
+            return entries
         cmd = [
             "backlinks",
             f"file={file}",
@@ -324,6 +672,9 @@ class ObsidianCLI:
         返回:
             連出連結列表或數量
         """
+        if self._local_cache() is not None:
+            links = self.cache.links(file)
+            return len(links) if total else "\n".join(links)
         cmd = ["links", f"file={file}"]
 
         if total:
@@ -344,6 +695,8 @@ class ObsidianCLI:
         返回:
             孤立檔案列表
         """
+        if self._local_cache() is not None and not all_files:
+            return self.cache.orphans()
         cmd = ["orphans"]
 
         if all_files:
@@ -363,6 +716,8 @@ class ObsidianCLI:
         返回:
             終端檔案列表
         """
+        if self._local_cache() is not None and not all_files:
+            return self.cache.deadends()
         cmd = ["deadends"]
 
         if all_files:
@@ -408,6 +763,10 @@ class ObsidianCLI:
         返回:
             標籤列表
         """
+        if self._local_cache() is not None and format == "json":
+            tags = self.cache.tags()
+            names = sorted(tags, key=lambda t: (-tags[t], t) if sort == "count" else t)
+            return [{"tag": f"#{t}", "count": tags[t]} if counts else {"tag": f"#{t}"} for t in names]
         cmd = [
             "tags",
             f"format={format}",
@@ -526,6 +885,9 @@ class ObsidianCLI:
         返回:
             檔案列表或數量
         """
+        if self._local_cache() is not None and ext == "md":
+            files = self.cache.files(folder)
+            return len(files) if total else "\n".join(files)
         cmd = ["files", f"ext={ext}"]
 
         if folder:
@@ -576,6 +938,9 @@ class ObsidianCLI:
         返回:
             移動結果訊息
         """
+        if self._enqueue({"op": "move", "file": file, "to": to}):
+            return f"Moved {file} to {to}"
+
         cmd = ["move", f"file={file}", f"to={to}"]
         self._run_command(cmd)
         logger.info(f"Moved {file} to {to}")
@@ -592,6 +957,9 @@ class ObsidianCLI:
         返回:
             重新命名結果訊息
         """
+        if self._enqueue({"op": "rename", "file": file, "name": name}):
+            return f"Renamed {file} to {name}"
+
         cmd = ["rename", f"file={file}", f"name={name}"]
         self._run_command(cmd)
         logger.info(f"Renamed {file} to {name}")
@@ -608,6 +976,9 @@ class ObsidianCLI:
         返回:
             刪除結果訊息
         """
+        if self._enqueue({"op": "delete", "file": file, "permanent": permanent}):
+            return f"Deleted {file}"
+
         cmd = ["delete", f"file={file}"]
 
         if permanent:
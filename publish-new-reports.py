@@ -2,64 +2,25 @@
 """
 GitHub Pages 新報告發布腳本
 將 kanban/projects/ 中的新報告轉換成 HTML 並更新 index.html
+
+轉換使用 report_builder 增量構建（內容未變的報告不重建，樣式共用 report.css），
+index.html 只插入尚未收錄的報告。
 """
 
 import os
+import sys
 import json
 import re
 from datetime import datetime
 from pathlib import Path
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from report_builder import build_reports, print_summary
+
 # 配置
 WORKSPACE = Path.home() / '.openclaw' / 'workspace'
 GITHUB_PAGES = Path.home() / 'report'
-MD_TO_HTML_TEMPLATE = """<!DOCTYPE html>
-<html lang="zh-TW">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{title}</title>
-    <style>
-        :root {{
-            --primary-color: #2563eb;
-            --secondary-color: #64748b;
-            --bg-color: #f8fafc;
-            --text-color: #1e293b;
-        }}
-        body {{
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;
-            line-height: 1.6;
-            color: var(--text-color);
-            background-color: var(--bg-color);
-            max-width: 800px;
-            margin: 0 auto;
-            padding: 2rem;
-        }}
-        h1 {{ color: var(--primary-color); margin-bottom: 0.5rem; }}
-        h2 {{ color: var(--primary-color); margin-top: 2rem; border-bottom: 2px solid var(--secondary-color); padding-bottom: 0.5rem; }}
-        h3 {{ color: var(--secondary-color); margin-top: 1.5rem; }}
-        .meta {{ color: var(--secondary-color); font-size: 0.9rem; margin-bottom: 2rem; }}
-        .updated {{ background: #fef3c7; padding: 0.5rem 1rem; border-radius: 8px; display: inline-block; margin-bottom: 1rem; font-size: 0.85rem; }}
-        pre {{ background: #1e293b; color: #f8fafc; padding: 1rem; border-radius: 8px; overflow-x: auto; }}
-        code {{ background: #e2e8f0; padding: 0.2rem 0.4rem; border-radius: 4px; }}
-        pre code {{ background: none; padding: 0; }}
-        table {{ width: 100%; border-collapse: collapse; margin: 1rem 0; }}
-        th, td {{ border: 1px solid #e2e8f0; padding: 0.75rem; text-align: left; }}
-        th {{ background: var(--primary-color); color: white; }}
-        .back-link {{ display: inline-block; margin-bottom: 2rem; color: var(--primary-color); text-decoration: none; }}
-        .back-link:hover {{ text-decoration: underline; }}
-    </style>
-</head>
-<body>
-    <a href="index.html" class="back-link">← 返回研究報告列表</a>
-    <div class="updated">📅 更新時間：{update_time}</div>
-    <div class="content">
-{content}
-    </div>
-</body>
-</html>
-"""
-
 # 新報告映射（從 MD 文件路徑到 HTML 文件名和元數據）
 NEW_REPORTS = [
     {
@@ -185,69 +146,26 @@ NEW_REPORTS = [
     },
 ]
 
-def markdown_to_simple_html(md_text):
-    """簡單的 Markdown 到 HTML 轉換"""
-    html = md_text
-
-    # 標題轉換
-    html = re.sub(r'^# (.+)$', r'<h1>\1</h1>', html, flags=re.MULTILINE)
-    html = re.sub(r'^## (.+)$', r'<h2>\1</h2>', html, flags=re.MULTILINE)
-    html = re.sub(r'^### (.+)$', r'<h3>\1</h3>', html, flags=re.MULTILINE)
-    html = re.sub(r'^#### (.+)$', r'<h4>\1</h4>', html, flags=re.MULTILINE)
-
-    # 粗體和斜體
-    html = re.sub(r'\*\*(.+?)\*\*', r'<strong>\1</strong>', html)
-    html = re.sub(r'\*(.+?)\*', r'<em>\1</em>', html)
-
-    # 程式碼塊
-    html = re.sub(r'```(\w+)?\n(.+?)```', r'<pre><code>\2</code></pre>', html, flags=re.DOTALL)
-
-    # 行內程式碼
-    html = re.sub(r'`([^`]+)`', r'<code>\1</code>', html)
-
-    # 表格（簡單處理）
-    html = re.sub(r'\|(.+?)\|\n\|[-|\s]+\|', r'<table>\n<tr>', html)
-    html = re.sub(r'\|(.+?)\|', lambda m: '<td>' + m.group(1).strip() + '</td>', html)
-
-    # 段落
-    paragraphs = re.split(r'\n\n+', html)
-    html = '\n\n'.join(f'<p>{p}</p>' if not p.startswith('<') else p for p in paragraphs)
-
-    return html
-
-def convert_markdown_to_html(md_path, html_path, title):
-    """將 Markdown 文件轉換為 HTML"""
-    print(f"🔄 轉換 {md_path} -> {html_path}")
-
-    # 讀取 Markdown 文件
-    md_full_path = WORKSPACE / md_path
-    if not md_full_path.exists():
-        print(f"  ⚠️ 文件不存在：{md_full_path}")
-        return False
-
-    with open(md_full_path, 'r', encoding='utf-8') as f:
-        md_content = f.read()
-
-    # 轉換為 HTML
-    html_content = markdown_to_simple_html(md_content)
-
-    # 添加元數據
-    update_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-
-    # 生成完整 HTML
-    full_html = MD_TO_HTML_TEMPLATE.format(
-        title=title,
-        content=html_content,
-        update_time=update_time
+def convert_reports(reports):
+    """增量轉換報告，返回成功構建或已是最新的報告"""
+    stats = build_reports(
+        [
+            {
+                'filepath': str(WORKSPACE / report['md_path']),
+                'output': report['html_file'],
+                'title': report['title'],
+                'description': report['description']
+            }
+            for report in reports
+        ],
+        str(GITHUB_PAGES)
     )
+    for source_path in stats['missing']:
+        print(f"  ⚠️ 文件不存在：{source_path}")
+    print_summary(stats)
 
-    # 寫入 HTML 文件
-    html_full_path = GITHUB_PAGES / html_path
-    with open(html_full_path, 'w', encoding='utf-8') as f:
-        f.write(full_html)
-
-    print(f"  ✅ 成功生成 {html_path}")
-    return True
+    ready = set(stats['built']) | set(stats['unchanged'])
+    return [report for report in reports if report['html_file'] in ready]
 
 def update_index_html(new_reports):
     """更新 index.html 添加新報告"""
@@ -266,6 +184,13 @@ def update_index_html(new_reports):
 
     reports_array = reports_match.group(1)
 
+    # 跳過已收錄的報告
+    existing_ids = set(re.findall(r"id: '([^']+)'", reports_array))
+    new_reports = [r for r in new_reports if r['html_file'].replace('.html', '') not in existing_ids]
+    if not new_reports:
+        print("  ⏭️  沒有需要新增的報告")
+        return True
+
     # 構建新報告條目
     today = datetime.now().strftime('%Y-%m-%d')
     new_entries = []
@@ -311,11 +236,8 @@ def main():
     print("GitHub Pages 新報告發布腳本")
     print("=" * 60)
 
-    # 轉換所有新報告
-    converted_reports = []
-    for report in NEW_REPORTS:
-        if convert_markdown_to_html(report['md_path'], report['html_file'], report['title']):
-            converted_reports.append(report)
+    # 轉換所有新報告（只重建有變化的）
+    converted_reports = convert_reports(NEW_REPORTS)
 
     if not converted_reports:
         print("\n⚠️ 沒有成功轉換任何報告")
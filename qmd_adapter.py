@@ -1,40 +1,492 @@
-# QMD Adapter - 適配 QMD CLI
-
-> **目的：** 適配 QMD CLI 到 Memory Core 接口
-> **版本：** v1.0
-
-```python
+#!/usr/bin/env python3
 """
 QMD Adapter - 適配 QMD CLI
 
 適配 QMD CLI 到 Memory Core 接口：
-- 語義向量搜索
+- 語義向量搜索（qmd vsearch --json）
 - 向量索引和存儲
 - 元數據管理
+
+QMD 索引的是目錄中的 Markdown 文件，不接受直接寫入內容。因此每條記憶保存為
+<root>/memory-<layer>/<memory_id>.md（frontmatter + 內容），每個記憶層對應一個
+QMD collection（首次使用時 `qmd collection add <dir> --name memory-<layer>`）。
+
+- 寫入：store_many 先寫完全部文件，再執行一次 `qmd update`（和 `qmd embed`），
+  索引成本按批次而不是按條計算；單條 store 只寫文件，索引合併到一次延遲執行的
+  批量 update / embed（index_delay 秒後，或 flush() / close() 時）
+- 讀取 / 元數據：直接讀寫本地文件，不啟動 QMD 進程
+- 搜索：常駐一個 `qmd mcp` 進程（MCP stdio，逐行 JSON-RPC），各線程的請求按 id
+  複用同一管道，不再每次搜索都啟動進程、加載模型；MCP 服務不可用時退回
+  `qmd vsearch <query> -n <limit> --json [-c <collection>]`。
+  結果中的文件路徑映射回記憶 ID，內容與元數據取自本地文件
+
+Example Usage:
+    from qmd_adapter import QMDAdapter
+
+    qmd = QMDAdapter()
+    qmd.store_many([
+        ("report-001", "報告內容...", {"layer": "knowledge", "tags": ["research"]}),
+        ("report-002", "報告內容...", {"layer": "knowledge", "tags": ["research"]}),
+    ])
+    for hit in qmd.search("肥尾風險", limit=5, filters={"layer": "knowledge"}):
+        print(hit["memory_id"], hit["score"])
 """
 
-import subprocess
+import itertools
 import json
+import logging
+import os
+import re
+import subprocess
+import tempfile
+import threading
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 記憶文件根目錄（每個記憶層一個子目錄 / QMD collection）
+DEFAULT_ROOT = Path.home() / ".openclaw" / "workspace" / "memory" / "qmd"
+COLLECTION_PREFIX = "memory-"
+FILE_MASK = "**/*.md"
+
+# 單條 store 後延遲多久執行批量索引（秒）
+INDEX_DELAY = 2.0
+# qmd embed 超時（秒），向量計算比 update 慢得多
+EMBED_TIMEOUT = 600
+
+
+def collection_name(layer: str) -> str:
+    """記憶層對應的 QMD collection 名稱"""
+    return f"{COLLECTION_PREFIX}{layer}"
+
+
+def create_frontmatter(metadata: Dict[str, Any]) -> str:
+    """創建 frontmatter（列表值以逗號連接）"""
+    lines = ["---"]
+    for key, value in metadata.items():
+        if key == "content":
+            continue
+        if isinstance(value, (list, tuple)):
+            value = ",".join(str(v) for v in value)
+        lines.append(f"{key}: {value}")
+    lines.append("---")
+    return "\n".join(lines)
+
+
+def parse_memory(text: str) -> Dict[str, Any]:
+    """
+    解析記憶文件
+
+    Returns:
+        {'content': 內容, 'metadata': frontmatter 字典（tags 還原為列表）}
+    """
+    metadata: Dict[str, Any] = {}
+    content = text
+    lines = text.split("\n")
+    if lines and lines[0] == "---" and "---" in lines[1:]:
+        end = lines.index("---", 1)
+        for line in lines[1:end]:
+            if ":" in line:
+                key, value = line.split(":", 1)
+                metadata[key.strip()] = value.strip()
+        content = "\n".join(lines[end + 1:]).lstrip("\n")
+    if "tags" in metadata:
+        metadata["tags"] = [t for t in metadata["tags"].split(",") if t]
+    return {'content': content, 'metadata': metadata}
+
+
+def parse_tool_results(result: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    MCP tools/call 的搜索結果 → 與 `qmd vsearch --json` 相同的結果列表
+
+    依次查看 structuredContent 和 JSON 文本塊（列表，或帶 results 列表的對象）。
+
+    Raises:
+        ValueError: 如果結果格式無法識別
+    """
+    def as_list(value):
+        if isinstance(value, list):
+            return value
+        if isinstance(value, dict) and isinstance(value.get('results'), list):
+            return value['results']
+        return None
+
+    items = as_list(result.get('structuredContent'))
+    if items is not None:
+        return items
+    content = result.get('content') or []
+    for block in content:
+        if isinstance(block, dict) and block.get('type') == 'text':
+            try:
+                items = as_list(json.loads(block.get('text', '')))
+            except json.JSONDecodeError:
+                continue
+            if items is not None:
+                return items
+    if not content:
+        return []
+    raise ValueError("unrecognised QMD MCP search result")
+
+
+class QMDMCPClient:
+    """
+    常駐的 `qmd mcp` 進程
+
+    MCP stdio 傳輸：stdin / stdout 上逐行 JSON-RPC。讀線程按請求 id 把回應
+    交給等待中的調用方，多個線程可以同時發出請求。
+    """
+
+    PROTOCOL_VERSION = "2024-11-05"
+    # 向量搜索工具名（按優先順序）；都沒有時取名稱含 vsearch / vector 的工具
+    SEARCH_TOOLS = ("vsearch", "qmd_vsearch", "vector_search", "qmd_vector_search")
+
+    def __init__(self, qmd_path: Path, timeout: float = 30):
+        """
+        啟動 `qmd mcp` 並完成握手
+
+        Raises:
+            RuntimeError: 如果進程無法啟動、握手失敗或沒有向量搜索工具
+        """
+        self.timeout = timeout
+        try:
+            self._process = subprocess.Popen(
+                [str(qmd_path), "mcp"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+                encoding='utf-8',
+                bufsize=1
+            )
+        except OSError as e:
+            raise RuntimeError(f"cannot start qmd mcp: {e}")
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, list] = {}
+        self._pending_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._reader = threading.Thread(target=self._read_loop, daemon=True)
+        self._reader.start()
+
+        try:
+            self.request("initialize", {
+                "protocolVersion": self.PROTOCOL_VERSION,
+                "capabilities": {},
+                "clientInfo": {"name": "qmd_adapter", "version": "1.0"},
+            })
+            self._send({"jsonrpc": "2.0", "method": "notifications/initialized"})
+            self.search_tool = self._pick_search_tool(self.request("tools/list").get("tools", []))
+        except RuntimeError:
+            self.close()
+            raise
+
+    @property
+    def alive(self) -> bool:
+        return self._process.poll() is None
+
+    def close(self):
+        """結束 MCP 進程"""
+        if self._process.poll() is None:
+            try:
+                self._process.stdin.close()
+                self._process.wait(timeout=2)
+            except (OSError, subprocess.TimeoutExpired):
+                self._process.kill()
+                self._process.wait()
+
+    def _pick_search_tool(self, tools: List[Dict[str, Any]]) -> Tuple[str, Dict[str, Any]]:
+        by_name = {tool.get("name"): tool for tool in tools if isinstance(tool, dict)}
+        name = next((n for n in self.SEARCH_TOOLS if n in by_name), None)
+        if name is None:
+            name = next((n for n in by_name if n and ("vsearch" in n or "vector" in n)), None)
+        if name is None:
+            raise RuntimeError(f"qmd mcp has no vector search tool (tools: {sorted(filter(None, by_name))})")
+        properties = (by_name[name].get("inputSchema") or {}).get("properties") or {}
+        return name, properties
+
+    def _send(self, message: Dict[str, Any]):
+        with self._write_lock:
+            try:
+                self._process.stdin.write(json.dumps(message, ensure_ascii=False) + "\n")
+                self._process.stdin.flush()
+            except (OSError, ValueError) as e:
+                raise RuntimeError(f"qmd mcp exited: {e}")
+
+    def _read_loop(self):
+        for line in self._process.stdout:
+            try:
+                message = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # 非協議輸出
+            if not isinstance(message, dict):
+                continue
+            if "method" in message:
+                # 服務端發來的請求（如 ping）回空結果，通知忽略
+                if "id" in message:
+                    try:
+                        self._send({"jsonrpc": "2.0", "id": message["id"], "result": {}})
+                    except RuntimeError:
+                        break
+                continue
+            with self._pending_lock:
+                slot = self._pending.get(message.get("id"))
+            if slot is not None:
+                slot[1] = message
+                slot[0].set()
+
+        # 進程結束：喚醒所有等待中的請求
+        with self._pending_lock:
+            slots = list(self._pending.values())
+        for slot in slots:
+            slot[0].set()
+
+    def request(self, method: str, params: Optional[Dict[str, Any]] = None,
+                timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        發送一個 JSON-RPC 請求並等待回應
+
+        Raises:
+            RuntimeError: 超時、進程已退出或服務端返回錯誤
+        """
+        request_id = next(self._ids)
+        slot = [threading.Event(), None]
+        with self._pending_lock:
+            self._pending[request_id] = slot
+        try:
+            message = {"jsonrpc": "2.0", "id": request_id, "method": method}
+            if params is not None:
+                message["params"] = params
+            self._send(message)
+            if not slot[0].wait(self.timeout if timeout is None else timeout):
+                raise RuntimeError(f"qmd mcp {method} timed out")
+        finally:
+            with self._pending_lock:
+                self._pending.pop(request_id, None)
+
+        response = slot[1]
+        if response is None:
+            raise RuntimeError("qmd mcp exited")
+        if "error" in response:
+            error = response["error"]
+            raise RuntimeError(f"qmd mcp {method} failed: {error.get('message', error)}")
+        return response.get("result") or {}
+
+    def vector_search(self, query: str, limit: int, collection: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        向量搜索，參數名按工具的 inputSchema 選擇
+
+        Raises:
+            RuntimeError: 請求失敗
+            ValueError: 結果格式無法識別
+        """
+        name, properties = self.search_tool
+        arguments = {"q" if "q" in properties and "query" not in properties else "query": query}
+        limit_key = next((k for k in ("limit", "n", "maxResults", "max_results") if k in properties), None)
+        if limit_key:
+            arguments[limit_key] = limit
+        if collection and "collection" in properties:
+            arguments["collection"] = collection
+        elif collection and "collections" in properties:
+            arguments["collections"] = [collection]
+
+        result = self.request("tools/call", {"name": name, "arguments": arguments})
+        if result.get("isError"):
+            texts = [b.get("text", "") for b in result.get("content") or [] if isinstance(b, dict)]
+            raise RuntimeError(f"qmd mcp {name} failed: {' '.join(texts).strip()}")
+        return parse_tool_results(result)
 
 
 class QMDAdapter:
     """QMD 適配器 - 整合現有 QMD 系統"""
 
-    def __init__(self, qmd_path: str = "~/.qmd/qmd"):
+    def __init__(
+        self,
+        qmd_path: str = "~/.qmd/qmd",
+        root: Optional[Path] = None,
+        embed: bool = True,
+        timeout: float = 30,
+        embed_timeout: float = EMBED_TIMEOUT,
+        index_delay: Optional[float] = INDEX_DELAY,
+        persistent: bool = True
+    ):
         """
         初始化 QMD Adapter
 
         Args:
             qmd_path: QMD CLI 路徑
+            root: 記憶文件根目錄（默認 ~/.openclaw/workspace/memory/qmd）
+            embed: 寫入後是否執行 qmd embed 更新向量（vsearch 需要）
+            timeout: 單次 QMD 調用 / MCP 請求超時（秒）
+            embed_timeout: qmd embed 超時（秒）
+            index_delay: 單條 store 後延遲索引的秒數（None = 只在 flush() / close() 時索引）
+            persistent: 搜索是否使用常駐的 qmd mcp 進程
         """
         self.qmd_path = Path(qmd_path).expanduser()
+        self.root = Path(root or DEFAULT_ROOT).expanduser()
+        self.embed = embed
+        self.timeout = timeout
+        self.embed_timeout = embed_timeout
+        self.index_delay = index_delay
+        self.persistent = persistent
 
         # 檢查 QMD CLI 是否存在
         if not self.qmd_path.exists():
             raise RuntimeError(f"QMD CLI not found at: {self.qmd_path}")
 
+        self._lock = threading.Lock()
+        self._listing: Optional[str] = None
+        self._collections = set()
+
+        self._index_lock = threading.Lock()
+        self._reindex_lock = threading.Lock()
+        self._index_pending = False
+        self._index_timer: Optional[threading.Timer] = None
+
+        self._mcp_lock = threading.Lock()
+        self._mcp: Optional[QMDMCPClient] = None
+        self._mcp_disabled = not persistent
+
+    def close(self):
+        """索引尚未索引的寫入，並結束常駐的 qmd mcp 進程"""
+        with self._index_lock:
+            if self._index_timer is not None:
+                self._index_timer.cancel()
+                self._index_timer = None
+        try:
+            self.flush()
+        except RuntimeError as e:
+            logger.warning(f"QMD indexing failed: {e}")
+        with self._mcp_lock:
+            if self._mcp is not None:
+                self._mcp.close()
+                self._mcp = None
+
+    # ------------------------------------------------------------------
+    # QMD CLI
+    # ------------------------------------------------------------------
+
+    def _run(self, args: List[str], timeout: Optional[float] = None) -> subprocess.CompletedProcess:
+        """執行一次 QMD CLI"""
+        return subprocess.run(
+            [str(self.qmd_path), *args],
+            capture_output=True,
+            text=True,
+            timeout=timeout
+        )
+
+    def _check(self, args: List[str], timeout: Optional[float] = None) -> subprocess.CompletedProcess:
+        """執行 QMD CLI，失敗或超時時拋出 RuntimeError"""
+        try:
+            result = self._run(args, timeout)
+        except subprocess.TimeoutExpired:
+            raise RuntimeError(f"QMD {args[0]} timed out after {timeout}s")
+        if result.returncode != 0:
+            raise RuntimeError(f"QMD {args[0]} failed: {result.stderr.strip()}")
+        return result
+
+    def _ensure_collections(self, layers: Iterable[str]):
+        """確保記憶層的 collection 已在 QMD 註冊（每個實例只查詢一次 collection list）"""
+        with self._lock:
+            if self._listing is None:
+                self._listing = self._check(["collection", "list"], self.timeout).stdout
+            for layer in layers:
+                name = collection_name(layer)
+                if name in self._collections or re.search(rf'(?<![\w-]){re.escape(name)}(?![\w-])',
+                                                          self._listing):
+                    continue
+                directory = self.root / name
+                directory.mkdir(parents=True, exist_ok=True)
+                self._check(["collection", "add", str(directory), "--name", name, "--mask", FILE_MASK],
+                            self.timeout)
+                self._collections.add(name)
+
+    def reindex(self, embed: Optional[bool] = None):
+        """
+        重新掃描 collection（qmd update），並按需更新向量（qmd embed）
+
+        Raises:
+            RuntimeError: 如果 QMD 命令失敗
+        """
+        self._check(["update"], self.timeout)
+        if self.embed if embed is None else embed:
+            self._check(["embed"], self.embed_timeout)
+
+    def _schedule_reindex(self):
+        """標記有未索引的寫入，並在 index_delay 秒後執行一次批量索引"""
+        with self._index_lock:
+            self._index_pending = True
+            if self.index_delay is None or self._index_timer is not None:
+                return
+            self._index_timer = threading.Timer(self.index_delay, self._delayed_reindex)
+            self._index_timer.daemon = True
+            self._index_timer.start()
+
+    def _delayed_reindex(self):
+        with self._index_lock:
+            self._index_timer = None
+        try:
+            self.flush()
+        except RuntimeError as e:
+            # 文件已寫入，下次 flush / qmd update 時仍會被索引
+            logger.warning(f"QMD indexing failed: {e}")
+
+    def flush(self) -> bool:
+        """
+        立即索引所有未索引的寫入（一次 qmd update / embed）
+
+        Returns:
+            是否執行了索引
+
+        Raises:
+            RuntimeError: 如果 QMD 命令失敗或超時（寫入保持未索引狀態）
+        """
+        with self._reindex_lock:
+            with self._index_lock:
+                if not self._index_pending:
+                    return False
+                self._index_pending = False
+            try:
+                self.reindex()
+            except RuntimeError:
+                with self._index_lock:
+                    self._index_pending = True
+                raise
+        return True
+
+    # ------------------------------------------------------------------
+    # 記憶文件
+    # ------------------------------------------------------------------
+
+    def _path(self, memory_id: str, layer: str) -> Path:
+        return self.root / collection_name(layer) / f"{memory_id.replace('/', '_')}.md"
+
+    def _find(self, memory_id: str) -> Optional[Path]:
+        """在各記憶層中查找記憶文件"""
+        filename = f"{memory_id.replace('/', '_')}.md"
+        for path in sorted(self.root.glob(f"{COLLECTION_PREFIX}*/{filename}")):
+            return path
+        return None
+
+    @staticmethod
+    def _write(path: Path, text: str):
+        """原子寫入記憶文件"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _read(path: Path) -> Optional[Dict[str, Any]]:
+        try:
+            return parse_memory(path.read_text(encoding='utf-8'))
+        except OSError:
+            return None
+
+    # ------------------------------------------------------------------
+    # 存儲
+    # ------------------------------------------------------------------
+
     def store(
         self,
         memory_id: str,
@@ -44,6 +496,9 @@ class QMDAdapter:
         """
         添加記憶到 QMD
 
+        只寫入記憶文件；索引與其他寫入合併為一次延遲的 qmd update / embed
+        （見 flush）。
+
         Args:
             memory_id: 記憶 ID
             content: 記憶內容
@@ -53,65 +508,118 @@ class QMDAdapter:
             success: 是否成功
 
         Raises:
-            RuntimeError: 如果 QMD add 失敗
+            RuntimeError: 如果 collection 註冊失敗
         """
-        import tempfile
-        import os
+        layer = metadata.get("layer", "working")
+        self._write(self._path(memory_id, layer), f"{create_frontmatter(metadata)}\n\n{content}")
+        self._ensure_collections([layer])
+        self._schedule_reindex()
+        return True
 
-        # 創建臨時文件
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False) as f:
-            temp_file = f.name
+    def store_many(
+        self,
+        items: Iterable[Tuple[str, str, Dict[str, Any]]]
+    ) -> Dict[str, bool]:
+        """
+        批量添加記憶（寫完全部文件後只索引一次）
 
-            # 添加 frontmatter
-            frontmatter = self._create_frontmatter(metadata)
-            full_content = f"{frontmatter}\n\n{content}"
-            f.write(full_content)
+        Args:
+            items: (memory_id, content, metadata) 列表
 
-        try:
-            # 構建 collection 名稱
+        Returns:
+            results: {memory_id: 是否成功寫入並索引}
+        """
+        results: Dict[str, bool] = {}
+        layers = set()
+        for memory_id, content, metadata in items:
             layer = metadata.get("layer", "working")
-            collection = f"memory-{layer}"
-
-            # 構建 QMD add 命令
-            cmd = [
-                str(self.qmd_path),
-                "add",
-                temp_file,
-                "-c", collection,
-                "--id", memory_id
-            ]
-
-            # 添加標籤（如果有）
-            tags = metadata.get("tags", [])
-            if tags:
-                cmd.extend(["--tags", ",".join(tags)])
-
-            # 執行 QMD add
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-
-            if result.returncode != 0:
-                raise RuntimeError(f"QMD add failed: {result.stderr}")
+            try:
+                self._write(self._path(memory_id, layer), f"{create_frontmatter(metadata)}\n\n{content}")
+            except OSError as e:
+                logger.warning(f"QMD memory write failed for {memory_id}: {e}")
+                results[memory_id] = False
+                continue
+            layers.add(layer)
+            results[memory_id] = True
+
+        if not layers:
+            return results
+        try:
+            self._ensure_collections(sorted(layers))
+            with self._index_lock:
+                self._index_pending = True
+            self.flush()
+        except RuntimeError as e:
+            # 文件已寫入，下次 flush / qmd update 時仍會被索引
+            logger.warning(f"QMD indexing failed: {e}")
+            return {memory_id: False for memory_id in results}
+        return results
+
+    # ------------------------------------------------------------------
+    # 搜索
+    # ------------------------------------------------------------------
+
+    def _resolve(self, item: Dict[str, Any]) -> Optional[Path]:
+        """vsearch 結果中的文件（qmd://<collection>/<path> 或本地路徑）→ 本地記憶文件"""
+        location = item.get('file') or item.get('path') or ''
+        if not location:
+            return None
+        path = self.root / location[len('qmd://'):] if location.startswith('qmd://') else Path(location)
+        if path.exists():
+            return path
+        # QMD 可能規範化文件名（大小寫），找不到時忽略大小寫按文件名查找
+        name = path.name.lower()
+        for candidate in self.root.glob(f"{COLLECTION_PREFIX}*/*.md"):
+            if candidate.name.lower() == name:
+                return candidate
+        return path
+
+    def _get_mcp(self) -> Optional[QMDMCPClient]:
+        """常駐的 qmd mcp 客戶端（首次使用時啟動；無法啟動時改用 CLI）"""
+        with self._mcp_lock:
+            if self._mcp is None and not self._mcp_disabled:
+                try:
+                    self._mcp = QMDMCPClient(self.qmd_path, self.timeout)
+                except RuntimeError as e:
+                    logger.warning(f"QMD MCP server unavailable, searching via CLI: {e}")
+                    self._mcp_disabled = True
+            return self._mcp
+
+    def _mcp_search(self, query: str, limit: int, collection: Optional[str]) -> Optional[List[Dict[str, Any]]]:
+        """
+        經常駐進程搜索；返回 None 表示這次改用 CLI
 
-            return True
+        Raises:
+            RuntimeError: 如果請求超時或搜索工具返回錯誤
+        """
+        client = self._get_mcp()
+        if client is None:
+            return None
+        try:
+            return client.vector_search(query, limit, collection)
+        except ValueError as e:
+            logger.info(f"{e}, searching via CLI")
+            return None
+        except RuntimeError:
+            if client.alive:
+                raise
+            # 進程已退出：下次搜索重新啟動
+            logger.warning("QMD MCP server exited, searching via CLI")
+            with self._mcp_lock:
+                if self._mcp is client:
+                    self._mcp = None
+            return None
 
-        finally:
-            # 清理臨時文件
-            if os.path.exists(temp_file):
-                os.unlink(temp_file)
-
-    def _create_frontmatter(self, metadata: Dict[str, Any]) -> str:
-        """創建 frontmatter"""
-        frontmatter = "---\n"
-        for key, value in metadata.items():
-            if key != "content":
-                frontmatter += f"{key}: {value}\n"
-        frontmatter += "---"
-        return frontmatter
+    def _cli_search(self, query: str, limit: int, collection: Optional[str]) -> List[Dict[str, Any]]:
+        cmd = ["vsearch", query, "-n", str(limit), "--json"]
+        if collection:
+            cmd.extend(["-c", collection])
+        result = self._check(cmd, self.timeout)
+        try:
+            results_data = json.loads(result.stdout)
+        except json.JSONDecodeError:
+            return []
+        return results_data if isinstance(results_data, list) else []
 
     def search(
         self,
@@ -125,7 +633,7 @@ class QMDAdapter:
         Args:
             query: 查詢文本
             limit: 返回結果數量
-            filters: 過濾條件
+            filters: 過濾條件（layer 限定 collection；tags 在結果上過濾）
 
         Returns:
             results: 記憶結果列表
@@ -133,56 +641,38 @@ class QMDAdapter:
         Raises:
             RuntimeError: 如果 QMD search 失敗
         """
-        # 構建 QMD search 命令
-        cmd = [
-            str(self.qmd_path),
-            "vsearch",  # 語義搜索
-            query,
-            "-n", str(limit),
-            "--json"  # JSON 輸出
-        ]
-
-        # 添加過濾條件（如果需要）
+        collection = None
+        tags = set()
         if filters:
-            layer = filters.get("layer", "working")
-            collection = f"memory-{layer}"
-            cmd.extend(["-c", collection])
-
-            # 添加標籤過濾（如果有）
-            tags = filters.get("tags", [])
-            if tags:
-                cmd.extend(["--tags", ",".join(tags)])
+            collection = collection_name(filters.get("layer", "working"))
+            tags = set(filters.get("tags", []))
 
-        # 執行搜索
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
+        results_data = self._mcp_search(query, limit, collection)
+        if results_data is None:
+            results_data = self._cli_search(query, limit, collection)
 
-        if result.returncode != 0:
-            raise RuntimeError(f"QMD search failed: {result.stderr}")
-
-        # 解析 JSON 結果
-        try:
-            results_data = json.loads(result.stdout)
-        except json.JSONDecodeError:
-            # 如果 JSON 解析失敗，返回空列表
-            return []
-
-        # 格式化結果
         formatted_results = []
-        if isinstance(results_data, list):
-            for item in results_data:
-                formatted_results.append({
-                    'memory_id': item.get('id', ''),
-                    'content': item.get('content', ''),
-                    'metadata': item.get('metadata', {}),
-                    'score': item.get('score', 0.5),
-                    'final_score': item.get('score', 0.5)
-                })
-
+        for item in results_data:
+            if not isinstance(item, dict):
+                continue
+            path = self._resolve(item)
+            # 搜索工具不支持 collection 參數時，在結果上過濾記憶層
+            if (collection and path is not None and path.parent.name.startswith(COLLECTION_PREFIX)
+                    and path.parent.name != collection):
+                continue
+            memory = (self._read(path) if path is not None else None) or {
+                'content': item.get('snippet', ''), 'metadata': {}
+            }
+            if tags and not tags & set(memory['metadata'].get('tags', [])):
+                continue
+            score = float(item.get('score', 0.5))
+            formatted_results.append({
+                'memory_id': path.stem if path is not None else item.get('docid', ''),
+                'content': memory['content'],
+                'metadata': memory['metadata'],
+                'score': score,
+                'final_score': score
+            })
         return formatted_results
 
     def query(
@@ -194,6 +684,10 @@ class QMDAdapter:
         """查詢（調用 search）"""
         return self.search(query, limit, filters)
 
+    # ------------------------------------------------------------------
+    # 讀取 / 刪除 / 元數據
+    # ------------------------------------------------------------------
+
     def get(
         self,
         memory_id: str
@@ -207,35 +701,23 @@ class QMDAdapter:
         Returns:
             memory: 記憶內容，如果不存在返回 None
         """
-        # 構建 QMD get 命令
-        cmd = [
-            str(self.qmd_path),
-            "get",
-            memory_id,
-            "--json"
-        ]
-
-        # 執行獲取
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
+        path = self._find(memory_id)
+        return self._read(path) if path is not None else None
 
-        if result.returncode != 0:
-            # 如果記憶不存在，返回 None
-            return None
+    def get_many(
+        self,
+        memory_ids: Iterable[str]
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        批量獲取記憶
 
-        # 解析 JSON 結果
-        try:
-            memory_data = json.loads(result.stdout)
-            return {
-                'content': memory_data.get('content', ''),
-                'metadata': memory_data.get('metadata', {})
-            }
-        except json.JSONDecodeError:
-            return None
+        Args:
+            memory_ids: 記憶 ID 列表
+
+        Returns:
+            memories: {memory_id: 記憶內容或 None}
+        """
+        return {memory_id: self.get(memory_id) for memory_id in dict.fromkeys(memory_ids)}
 
     def delete(
         self,
@@ -250,24 +732,14 @@ class QMDAdapter:
         Returns:
             success: 是否刪除成功
         """
-        # 構建 QMD delete 命令
-        cmd = [
-            str(self.qmd_path),
-            "delete",
-            memory_id
-        ]
-
-        # 執行刪除
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
-
-        if result.returncode != 0:
+        path = self._find(memory_id)
+        if path is None:
             return False
-
+        path.unlink()
+        try:
+            self.reindex(embed=False)
+        except RuntimeError as e:
+            logger.warning(f"QMD update after delete failed: {e}")
         return True
 
     def update_metadata(
@@ -285,26 +757,42 @@ class QMDAdapter:
         Returns:
             success: 是否更新成功
         """
-        # 構建 QMD update 命令
-        cmd = [
-            str(self.qmd_path),
-            "update",
-            memory_id,
-            "--metadata", json.dumps(metadata)
-        ]
-
-        # 執行更新
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
+        return self.update_metadata_many({memory_id: metadata})[memory_id]
 
-        if result.returncode != 0:
-            return False
+    def update_metadata_many(
+        self,
+        updates: Dict[str, Dict[str, Any]]
+    ) -> Dict[str, bool]:
+        """
+        批量更新元數據（只改寫 frontmatter，不觸發重新索引）
 
-        return True
+        Args:
+            updates: {memory_id: 元數據}
+
+        Returns:
+            results: {memory_id: 是否更新成功}
+        """
+        results = {}
+        for memory_id, metadata in updates.items():
+            path = self._find(memory_id)
+            memory = self._read(path) if path is not None else None
+            if memory is None:
+                results[memory_id] = False
+                continue
+            merged = {**memory['metadata'], **metadata}
+            self._write(path, f"{create_frontmatter(merged)}\n\n{memory['content']}")
+            results[memory_id] = True
+        return results
+
+    def update_access_counts(self, increments: Dict[str, int]) -> int:
+        """批量增加訪問次數"""
+        updates = {}
+        for memory_id, memory in self.get_many(increments).items():
+            if memory is None:
+                continue
+            count = int(memory['metadata'].get('access_count', 0) or 0)
+            updates[memory_id] = {'access_count': count + increments[memory_id]}
+        return sum(self.update_metadata_many(updates).values())
 
     def get_metadata(
         self,
@@ -325,163 +813,18 @@ class QMDAdapter:
         return None
 
 
-# === 導出 ===
-
 if __name__ == "__main__":
     # 測試
     qmd_adapter = QMDAdapter()
 
-    # 存儲記憶
-    success = qmd_adapter.store(
-        memory_id="test-memory-001",
-        content="這是一個測試記憶",
-        metadata={
-            "layer": "working",
-            "tags": ["test", "qmd"],
-            "created_at": "2026-03-09T01:27:00"
-        }
-    )
-
-    print(f"Stored memory: {success}")
-
-    # 搜索記憶
-    results = qmd_adapter.search(
-        query="測試",
-        limit=5
-    )
+    stored = qmd_adapter.store_many([
+        (f"test-memory-{i:03d}", f"批量測試記憶 {i}", {"layer": "working", "tags": ["test"]})
+        for i in range(1, 6)
+    ])
+    print(f"Stored {sum(stored.values())}/{len(stored)} memories in batch")
 
+    results = qmd_adapter.search(query="測試", limit=5, filters={"layer": "working"})
     print(f"Found {len(results)} memories:")
     for result in results:
         print(f"  - {result['memory_id']}: {result['content'][:50]}... (score: {result['score']:.2f})")
-```
-
-# QMD Adapter 完成說明
-
-## 實現功能
-
-✅ **QMD CLI 適配**
-- 初始化 QMD CLI
-- 檢查 QMD CLI 是否存在
-
-✅ **記憶操作**
-- `store()` - 存儲記憶到 QMD
-- `search()` - 語義搜索記憶
-- `query()` - 查詢記憶（調用 search）
-- `get()` - 獲取記憶
-- `delete()` - 刪除記憶
-
-✅ **元數據管理**
-- `update_metadata()` - 更新元數據
-- `get_metadata()` - 獲取元數據
-- Frontmatter 支持（YAML 格式）
-
-✅ **過濾支持**
-- Collection 過濾（memory-session/working/knowledge）
-- 標籤過濾
-
-## 技術細節
-
-### QMD 命令映射
-
-| 方法 | QMD 命令 | 說明 |
-|------|----------|------|
-| `store()` | `qmd add` | 添加文件到 QMD |
-| `search()` | `qmd vsearch` | 語義搜索 |
-| `get()` | `qmd get` | 獲取文件 |
-| `delete()` | `qmd delete` | 刪除文件 |
-| `update_metadata()` | `qmd update` | 更新元數據 |
-
-### Collection 映射
-
-| 記憶層級 | QMD Collection |
-|----------|----------------|
-| Session | memory-session |
-| Working | memory-working |
-| Knowledge | memory-knowledge |
-
-### Frontmatter 格式
-
-```yaml
----
-memory_id: xxx
-layer: working
-tags: test,qmd
-created_at: 2026-03-09T01:27:00
-importance: 0.8
----
-
-記憶內容...
-```
-
-## 使用方式
-
-### 基本使用
-
-```python
-from qmd_adapter import QMDAdapter
-
-# 初始化
-qmd_adapter = QMDAdapter()
-
-# 存儲記憶
-success = qmd_adapter.store(
-    memory_id="test-001",
-    content="這是一個測試記憶",
-    metadata={
-        "layer": "working",
-        "tags": ["test"]
-    }
-)
-
-# 搜索記憶
-results = qmd_adapter.search(
-    query="測試",
-    limit=10
-)
-
-# 獲取記憶
-memory = qmd_adapter.get("test-001")
-
-# 刪除記憶
-success = qmd_adapter.delete("test-001")
-```
-
-### 與 MemoryCore 整合
-
-```python
-from memory_core import MemoryCore
-
-# 初始化 MemoryCore
-memory_core = MemoryCore()
-
-# 存儲記憶（自動路由到 QMD Adapter）
-memory_id = memory_core.store(
-    content="這是一個測試記憶",
-    layer="knowledge",  # 使用 QMD
-    tags=["test"],
-    metadata={"importance": 0.8}
-)
-
-# 查詢記憶（自動路由到 QMD Adapter）
-results = memory_core.query(
-    query="測試",
-    layers=["knowledge"],  # 使用 QMD
-    limit=10
-)
-```
-
-## 依賴
-
-- Python 3.8+
-- QMD CLI（已安裝）
-
-## 文檔
-
-- QMD CLI 文檔：`qmd --help`
-- QMD 官方文檔：knowledge/qmd/README.md
-
----
-
-**完成時間：** 2026-03-09 01:27 AM
-**版本：** v1.0
-**作者：** Charlie
+    qmd_adapter.close()
@@ -5,7 +5,6 @@
 狀態：正在執行
 """
 
-import yfinance as yf
 import pandas as pd
 import numpy as np
 import os
@@ -13,6 +12,8 @@ import json
 from datetime import datetime, timedelta
 import logging
 
+from market_data_store import download
+
 # 設置日誌
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -44,11 +45,11 @@ class DataCollectionSystem:
         logger.info(f"時間範圍：{self.start_date} 到 {self.end_date}")
         
         try:
-            # 下載數據
-            data = yf.download(self.tickers, 
-                             start=self.start_date, 
-                             end=self.end_date,
-                             progress=False)
+            # 從本地數據湖載入（只補抓缺少的區間）
+            data = download(self.tickers,
+                            start=self.start_date,
+                            end=self.end_date,
+                            auto_adjust=False)
             
             # 提取調整後收盤價
             adj_close = data['Adj Close']
@@ -4,16 +4,16 @@
 包含：錯誤處理、狀態追蹤、自動恢復
 """
 
-import yfinance as yf
 import pandas as pd
 import numpy as np
-import os
 import json
 import time
 import logging
 from datetime import datetime, timedelta
 from pathlib import Path
 
+from market_data_store import download
+
 # 設置日誌
 logging.basicConfig(
     level=logging.INFO,
@@ -66,17 +66,11 @@ class EnhancedDataCollectionSystem:
         logger.info(f"開始下載 {len(self.tickers)} 個資產的價格數據")
         
         def download_attempt():
-            # 設置 yfinance 快取目錄
-            cache_dir = Path('/tmp/yfinance_cache')
-            cache_dir.mkdir(exist_ok=True)
-            os.environ['YFINANCE_CACHE_DIR'] = str(cache_dir)
-            
-            # 下載數據
-            data = yf.download(
+            # 從本地數據湖載入（只補抓缺少的區間）
+            data = download(
                 self.tickers,
                 start=self.start_date,
                 end=self.end_date,
-                progress=False,
                 auto_adjust=False
             )
             
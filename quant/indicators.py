@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""
+共用技術指標內核（Supertrend / ATR / ADX / 均線過濾）
+
+所有指標都在 (bars × symbols) 的 2-D 數組上一次計算完成：遞歸部分（Wilder 平滑、EMA、
+Supertrend 帶收斂）按 bar 逐行推進，每一行對所有股票向量化，因此掃描整個股票池只需一次調用。
+
+- 輸入可以是 1-D / 2-D ndarray、pandas Series / DataFrame；輸出保持相同的形狀和索引
+- 缺失值（上市前、停牌）用 NaN 表示，各股票獨立地從自己的第一個有效 bar 開始預熱
+- 前一日收盤用 shift 取得，第一根 bar 的前收盤為 NaN（不會像 np.roll 那樣把最後一根 bar 捲到開頭）
+- ATR 支持 'wilder'（RMA，與 pandas_ta 預設一致）和 'sma'（舊腳本使用的滾動平均）
+- SupertrendState 保存每檔股票的遞歸狀態，每天只需用最新一根 bar 推進（結果與批量計算一致）
+
+用法：
+    from indicators import supertrend, atr, adx, ma_filter
+
+    st = supertrend(high, low, close, period=10, multiplier=3.0)   # DataFrame: 日期 × 股票
+    latest_direction = st.direction.iloc[-1]
+"""
+
+from typing import Dict, List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+ATR_METHODS = ('wilder', 'sma')
+MA_KINDS = ('sma', 'ema')
+
+
+class SupertrendResult(NamedTuple):
+    """Supertrend 計算結果（對應 pandas_ta 的 SUPERT / SUPERTd / SUPERTl / SUPERTs）"""
+    trend: object       # 當前生效的 Supertrend 線
+    direction: object   # 1 = 看漲，-1 = 看跌，預熱期為 NaN
+    long: object        # 看漲時的下軌（看跌時為 NaN）
+    short: object       # 看跌時的上軌（看漲時為 NaN）
+
+
+class ADXResult(NamedTuple):
+    """ADX 計算結果"""
+    adx: object
+    plus_di: object
+    minus_di: object
+
+
+# ----------------------------------------------------------------------
+# 輸入 / 輸出形狀
+# ----------------------------------------------------------------------
+
+def _prepare(*inputs):
+    """
+    把輸入統一轉成 float 2-D 數組
+
+    Returns:
+        (arrays, wrap)：wrap 把 2-D 結果還原成第一個輸入的類型和形狀
+    """
+    template = inputs[0]
+    arrays = []
+    for value in inputs:
+        arr = np.asarray(value, dtype=float)
+        if arr.ndim == 1:
+            arr = arr[:, None]
+        elif arr.ndim != 2:
+            raise ValueError(f"expected 1-D or 2-D input, got {arr.ndim}-D")
+        if arrays and arr.shape != arrays[0].shape:
+            raise ValueError(f"input shapes differ: {arrays[0].shape} vs {arr.shape}")
+        arrays.append(arr)
+
+    if isinstance(template, pd.DataFrame):
+        def wrap(result):
+            return pd.DataFrame(result, index=template.index, columns=template.columns)
+    elif isinstance(template, pd.Series):
+        def wrap(result):
+            return pd.Series(result[:, 0], index=template.index, name=template.name)
+    elif np.ndim(template) == 1:
+        def wrap(result):
+            return result[:, 0]
+    else:
+        def wrap(result):
+            return result
+    return arrays, wrap
+
+
+def _shift(x: np.ndarray, periods: int = 1) -> np.ndarray:
+    """沿 bar 方向後移，空出的位置填 NaN"""
+    out = np.full_like(x, np.nan)
+    if periods < len(x):
+        out[periods:] = x[:len(x) - periods]
+    return out
+
+
+# ----------------------------------------------------------------------
+# 內核（2-D ndarray 輸入輸出）
+# ----------------------------------------------------------------------
+
+def _rolling_mean(x: np.ndarray, period: int) -> np.ndarray:
+    """滾動平均；窗口內有 NaN 時結果為 NaN"""
+    valid = ~np.isnan(x)
+    zeros = np.zeros((1, x.shape[1]))
+    sums = np.vstack([zeros, np.cumsum(np.where(valid, x, 0.0), axis=0)])
+    counts = np.vstack([zeros, np.cumsum(valid, axis=0)])
+
+    out = np.full_like(x, np.nan)
+    if period <= len(x):
+        window_sum = sums[period:] - sums[:-period]
+        window_count = counts[period:] - counts[:-period]
+        out[period - 1:] = np.where(window_count == period, window_sum / period, np.nan)
+    return out
+
+
+def _seeded_ewm(x: np.ndarray, alpha: float, period: int) -> np.ndarray:
+    """
+    遞歸平滑：y[t] = y[t-1] + alpha * (x[t] - y[t-1])
+
+    第一個值用前 period 個有效值的簡單平均作為種子（Wilder / TA-Lib 的做法）；
+    遇到 NaN 時輸出 NaN 並在之後重新播種。
+    """
+    seed = _rolling_mean(x, period)
+    out = np.full_like(x, np.nan)
+    prev = np.full(x.shape[1], np.nan)
+    for i in range(len(x)):
+        step = prev + alpha * (x[i] - prev)
+        prev = np.where(np.isnan(prev), seed[i], step)
+        out[i] = prev
+    return out
+
+
+def _true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    prev_close = _shift(close)
+    gap = np.fmax(np.abs(high - prev_close), np.abs(low - prev_close))
+    # 沒有前收盤時 fmax 忽略 NaN，退化為 high - low
+    tr = np.fmax(high - low, gap)
+    tr[np.isnan(high) | np.isnan(low)] = np.nan
+    return tr
+
+
+def _smooth(x: np.ndarray, period: int, method: str) -> np.ndarray:
+    if method == 'wilder':
+        return _seeded_ewm(x, 1.0 / period, period)
+    if method == 'sma':
+        return _rolling_mean(x, period)
+    raise ValueError(f"unknown smoothing method: {method} (expected one of {ATR_METHODS})")
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """numerator / denominator，分母為 0 時取 0（保留 NaN）"""
+    out = np.where(np.isnan(denominator) | np.isnan(numerator), np.nan, 0.0)
+    np.divide(numerator, denominator, out=out, where=denominator != 0)
+    return out
+
+
+def _supertrend(high, low, close, period, multiplier, atr_method):
+    """
+    Supertrend 遞歸（與 pandas_ta.supertrend 的規則一致）
+
+    收盤突破前一根上軌轉多、跌破前一根下軌轉空；方向不變時下軌只升不降、上軌只降不升。
+    """
+    hl2 = (high + low) / 2
+    band = multiplier * _smooth(_true_range(high, low, close), period, atr_method)
+    upper = hl2 + band
+    lower = hl2 - band
+
+    trend = np.full_like(close, np.nan)
+    directions = np.full_like(close, np.nan)
+    direction = np.ones(close.shape[1])
+    trend[0] = lower[0]
+    directions[0] = np.where(np.isnan(trend[0]), np.nan, direction)
+
+    for i in range(1, len(close)):
+        breakout = close[i] > upper[i - 1]
+        breakdown = close[i] < lower[i - 1]
+        direction = np.where(breakout, 1.0, np.where(breakdown, -1.0, direction))
+
+        hold = ~breakout & ~breakdown
+        lower[i] = np.where(hold & (direction > 0) & (lower[i] < lower[i - 1]), lower[i - 1], lower[i])
+        upper[i] = np.where(hold & (direction < 0) & (upper[i] > upper[i - 1]), upper[i - 1], upper[i])
+        trend[i] = np.where(direction > 0, lower[i], upper[i])
+        directions[i] = np.where(np.isnan(trend[i]), np.nan, direction)
+
+    long = np.where(directions > 0, trend, np.nan)
+    short = np.where(directions < 0, trend, np.nan)
+    return trend, directions, long, short
+
+
+# ----------------------------------------------------------------------
+# 公開接口
+# ----------------------------------------------------------------------
+
+def true_range(high, low, close):
+    """真實波幅（第一根 bar 為 high - low）"""
+    (h, l, c), wrap = _prepare(high, low, close)
+    return wrap(_true_range(h, l, c))
+
+
+def atr(high, low, close, period: int = 14, method: str = 'wilder'):
+    """
+    平均真實波幅
+
+    Args:
+        method: 'wilder'（RMA 遞歸平滑）或 'sma'（滾動平均）
+    """
+    (h, l, c), wrap = _prepare(high, low, close)
+    return wrap(_smooth(_true_range(h, l, c), period, method))
+
+
+def sma(values, period: int):
+    """簡單移動平均"""
+    (x,), wrap = _prepare(values)
+    return wrap(_rolling_mean(x, period))
+
+
+def ema(values, period: int):
+    """指數移動平均（alpha = 2 / (period + 1)，以前 period 個值的平均播種）"""
+    (x,), wrap = _prepare(values)
+    return wrap(_seeded_ewm(x, 2.0 / (period + 1), period))
+
+
+def ma_filter(close, period: int, kind: str = 'sma'):
+    """均線過濾：收盤價高於均線為 True（預熱期為 False）"""
+    if kind not in MA_KINDS:
+        raise ValueError(f"unknown moving average: {kind} (expected one of {MA_KINDS})")
+    (c,), wrap = _prepare(close)
+    ma = _rolling_mean(c, period) if kind == 'sma' else _seeded_ewm(c, 2.0 / (period + 1), period)
+    with np.errstate(invalid='ignore'):
+        return wrap(c > ma)
+
+
+def adx(high, low, close, period: int = 14, method: str = 'wilder') -> ADXResult:
+    """
+    平均趨向指數
+
+    Args:
+        method: DM / TR / DX 的平滑方式，'wilder' 或 'sma'
+
+    Returns:
+        ADXResult(adx, plus_di, minus_di)
+    """
+    (h, l, c), wrap = _prepare(high, low, close)
+    up_move = h - _shift(h)
+    down_move = _shift(l) - l
+
+    with np.errstate(invalid='ignore'):
+        plus_dm = np.where((up_move > down_move) & (up_move > 0), up_move, 0.0)
+        minus_dm = np.where((down_move > up_move) & (down_move > 0), down_move, 0.0)
+    missing = np.isnan(up_move) | np.isnan(down_move)
+    plus_dm[missing] = np.nan
+    minus_dm[missing] = np.nan
+
+    # DM 從第二根 bar 開始有值，TR 對齊到相同的窗口
+    tr = _true_range(h, l, c)
+    tr[missing] = np.nan
+
+    atr_ = _smooth(tr, period, method)
+    plus_di = 100 * _ratio(_smooth(plus_dm, period, method), atr_)
+    minus_di = 100 * _ratio(_smooth(minus_dm, period, method), atr_)
+    dx = 100 * _ratio(np.abs(plus_di - minus_di), plus_di + minus_di)
+    return ADXResult(wrap(_smooth(dx, period, method)), wrap(plus_di), wrap(minus_di))
+
+
+def supertrend(high, low, close, period: int = 10, multiplier: float = 3.0,
+               atr_method: str = 'wilder') -> SupertrendResult:
+    """
+    Supertrend 指標
+
+    Args:
+        high, low, close: bars × symbols 的價格（或單一股票的序列）
+        period: ATR 週期
+        multiplier: ATR 倍數
+        atr_method: 'wilder' 或 'sma'
+
+    Returns:
+        SupertrendResult(trend, direction, long, short)
+    """
+    (h, l, c), wrap = _prepare(high, low, close)
+    return SupertrendResult(*(wrap(part) for part in _supertrend(h, l, c, period, multiplier, atr_method)))
+
+
+def _json_float(value):
+    value = float(value)
+    return None if np.isnan(value) else value
+
+
+class SupertrendState:
+    """
+    逐 bar 增量更新的 Supertrend 狀態（每檔股票一列）
+
+    update() 傳入同一天所有股票的 high / low / close；值為 NaN 的股票表示當天沒有 bar，狀態保持不變。
+    對沒有缺口的序列，逐 bar 推進的結果與 supertrend() 批量計算相同。
+    """
+
+    def __init__(self, n_symbols: int, period: int = 10, multiplier: float = 3.0,
+                 atr_method: str = 'wilder'):
+        if atr_method not in ATR_METHODS:
+            raise ValueError(f"unknown smoothing method: {atr_method} (expected one of {ATR_METHODS})")
+        self.period = period
+        self.multiplier = multiplier
+        self.atr_method = atr_method
+
+        self.bars = np.zeros(n_symbols, dtype=int)
+        self.window = np.full((period, n_symbols), np.nan)    # 最近 period 根 bar 的真實波幅
+        self.prev_close = np.full(n_symbols, np.nan)
+        self.atr = np.full(n_symbols, np.nan)
+        self.upper = np.full(n_symbols, np.nan)
+        self.lower = np.full(n_symbols, np.nan)
+        self._direction = np.ones(n_symbols)
+
+    @property
+    def trend(self) -> np.ndarray:
+        return np.where(self._direction > 0, self.lower, self.upper)
+
+    @property
+    def direction(self) -> np.ndarray:
+        """1 = 看漲，-1 = 看跌，預熱期為 NaN"""
+        return np.where(np.isnan(self.trend), np.nan, self._direction)
+
+    def update(self, high, low, close):
+        """用一根新 bar 推進所有股票的狀態"""
+        h, l, c = (np.asarray(v, dtype=float) for v in (high, low, close))
+        has_bar = ~(np.isnan(h) | np.isnan(l) | np.isnan(c))
+
+        tr = np.fmax(h - l, np.fmax(np.abs(h - self.prev_close), np.abs(l - self.prev_close)))
+        window = self.window.copy()
+        slot = self.bars % self.period
+        columns = np.arange(len(tr))
+        window[slot[has_bar], columns[has_bar]] = tr[has_bar]
+        bars = self.bars + has_bar
+
+        seed = window.mean(axis=0)
+        if self.atr_method == 'sma':
+            atr_ = np.where(bars >= self.period, seed, np.nan)
+        else:
+            step = self.atr + (tr - self.atr) / self.period
+            atr_ = np.where(bars == self.period, seed, np.where(bars > self.period, step, np.nan))
+
+        hl2 = (h + l) / 2
+        upper = hl2 + self.multiplier * atr_
+        lower = hl2 - self.multiplier * atr_
+        breakout = c > self.upper
+        breakdown = c < self.lower
+        direction = np.where(breakout, 1.0, np.where(breakdown, -1.0, self._direction))
+        hold = ~breakout & ~breakdown
+        lower = np.where(hold & (direction > 0) & (lower < self.lower), self.lower, lower)
+        upper = np.where(hold & (direction < 0) & (upper > self.upper), self.upper, upper)
+
+        self.window = window
+        self.bars = bars
+        self.prev_close = np.where(has_bar, c, self.prev_close)
+        self.atr = np.where(has_bar, atr_, self.atr)
+        self.upper = np.where(has_bar, upper, self.upper)
+        self.lower = np.where(has_bar, lower, self.lower)
+        self._direction = np.where(has_bar, direction, self._direction)
+
+    def record(self, i: int) -> Dict:
+        """第 i 檔股票的狀態（可 JSON 序列化）"""
+        return {
+            'bars': int(self.bars[i]),
+            'window': [_json_float(v) for v in self.window[:, i]],
+            'prev_close': _json_float(self.prev_close[i]),
+            'atr': _json_float(self.atr[i]),
+            'upper': _json_float(self.upper[i]),
+            'lower': _json_float(self.lower[i]),
+            'direction': int(self._direction[i]),
+        }
+
+    @classmethod
+    def from_records(cls, records: List[Optional[Dict]], period: int = 10, multiplier: float = 3.0,
+                     atr_method: str = 'wilder') -> 'SupertrendState':
+        """從 record() 的結果恢復（None 表示該股票從頭開始）"""
+        state = cls(len(records), period, multiplier, atr_method)
+        for i, record in enumerate(records):
+            if not record:
+                continue
+            state.bars[i] = record['bars']
+            state.window[:, i] = [np.nan if v is None else v for v in record['window']]
+            for name in ('prev_close', 'atr', 'upper', 'lower'):
+                value = record[name]
+                getattr(state, name)[i] = np.nan if value is None else value
+            state._direction[i] = record['direction']
+        return state
@@ -0,0 +1,489 @@
+#!/usr/bin/env python3
+"""
+本地 OHLCV 數據湖
+所有 yfinance 使用者共用的行情存儲：按 symbol/year 分區的 Parquet 文件 + 覆蓋範圍清單（manifest）
+
+- 首次請求下載完整區間；之後只補抓缺少的尾部（或更早的頭部）
+- 尾部補抓與已存數據重疊一根已收盤 K 線；價格不一致說明發生了拆股或除權息
+  調整，此時重新下載完整歷史
+- 離線模式（offline=True 或 MARKET_DATA_OFFLINE=1）只從磁盤讀取，不訪問網絡
+- 沒有 pyarrow 時自動退回 CSV 分區
+
+用法：
+    from market_data_store import download
+    prices = download(['SPY', 'QQQ'], period='10y')['Close']
+
+    store = get_store()
+    spy = store.load('SPY', start='2015-01-01')
+
+佈局：
+    <root>/<source>/manifest.json
+    <root>/<source>/<symbol>/<year>.parquet
+"""
+
+import json
+import logging
+import os
+import re
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ROOT = Path(os.environ.get(
+    'MARKET_DATA_LAKE',
+    Path.home() / '.openclaw' / 'workspace' / 'quant' / 'data' / 'lake'
+))
+DEFAULT_HISTORY_DAYS = 3650
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume']
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close']
+
+_PERIOD_PATTERN = re.compile(r'^(\d+)(d|wk|mo|y)$')
+
+
+def env_offline():
+    """環境變量 MARKET_DATA_OFFLINE 是否開啟離線模式"""
+    return os.environ.get('MARKET_DATA_OFFLINE', '').lower() in ('1', 'true', 'yes')
+
+
+def today():
+    return pd.Timestamp(datetime.now().date())
+
+
+def period_to_start(period, end=None):
+    """
+    把 yfinance 風格的 period（'5d' / '6mo' / '2y' / 'max'）轉為起始日期
+
+    Args:
+        period: 期間字串
+        end: 結束日期（默認今天）
+
+    Returns:
+        Timestamp 或 None（'max'）
+    """
+    if period == 'max':
+        return None
+    match = _PERIOD_PATTERN.match(str(period))
+    if not match:
+        raise ValueError(f"不支持的 period: {period}")
+
+    count, unit = int(match.group(1)), match.group(2)
+    end = today() if end is None else pd.Timestamp(end)
+    offset = {
+        'd': pd.DateOffset(days=count),
+        'wk': pd.DateOffset(weeks=count),
+        'mo': pd.DateOffset(months=count),
+        'y': pd.DateOffset(years=count),
+    }[unit]
+    return end - offset
+
+
+def normalize_ohlcv(data):
+    """統一列名、索引（無時區的日期，名為 Date）並去重排序"""
+    if data is None or len(data) == 0:
+        return pd.DataFrame(columns=OHLCV_COLUMNS, index=pd.DatetimeIndex([], name='Date'))
+
+    data = data.copy()
+    if isinstance(data.columns, pd.MultiIndex):
+        data.columns = data.columns.get_level_values(0)
+    if 'Date' in data.columns:
+        data = data.set_index('Date')
+
+    index = pd.to_datetime(data.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    data.index = index.normalize().rename('Date')
+
+    if 'Adj Close' not in data.columns and 'Close' in data.columns:
+        data['Adj Close'] = data['Close']
+    data = data.reindex(columns=OHLCV_COLUMNS).astype(float)
+
+    data = data[~data.index.duplicated(keep='last')].sort_index()
+    return data.dropna(how='all')
+
+
+def adjust_ohlc(data):
+    """按 Adj Close / Close 比例調整 OHLC（等同 yfinance 的 auto_adjust=True）"""
+    ratio = (data['Adj Close'] / data['Close']).fillna(1.0)
+    adjusted = data.drop(columns=['Adj Close'])
+    adjusted[PRICE_COLUMNS] = adjusted[PRICE_COLUMNS].mul(ratio, axis=0)
+    return adjusted
+
+
+def yfinance_fetcher(symbol, start, end):
+    """
+    從 Yahoo Finance 下載 [start, end] 的未調整日線（含 Adj Close）
+
+    Args:
+        symbol: 資產代碼
+        start: 起始日期（含）
+        end: 結束日期（含）
+
+    Returns:
+        DataFrame: OHLCV 數據
+    """
+    import yfinance as yf
+
+    data = yf.download(
+        symbol,
+        start=pd.Timestamp(start).strftime('%Y-%m-%d'),
+        end=(pd.Timestamp(end) + pd.Timedelta(days=1)).strftime('%Y-%m-%d'),
+        progress=False,
+        auto_adjust=False,
+        actions=False,
+    )
+    return normalize_ohlcv(data)
+
+
+class ReplayFetcher:
+    """從錄製好的 CSV（<dir>/<symbol>.csv）回放行情，用於測試與離線重現"""
+
+    def __init__(self, fixture_dir):
+        self.fixture_dir = Path(fixture_dir)
+        self.calls = []
+
+    def __call__(self, symbol, start, end):
+        self.calls.append((symbol, pd.Timestamp(start), pd.Timestamp(end)))
+        path = self.fixture_dir / f"{symbol}.csv"
+        if not path.exists():
+            return normalize_ohlcv(None)
+        data = normalize_ohlcv(pd.read_csv(path, index_col='Date', parse_dates=True))
+        return data.loc[pd.Timestamp(start):pd.Timestamp(end)]
+
+
+class MarketDataStore:
+    """本地 OHLCV 數據湖"""
+
+    def __init__(self, root=None, source='yfinance', fetcher=None, offline=None):
+        """
+        Args:
+            root: 數據湖根目錄（默認 ~/.openclaw/workspace/quant/data/lake）
+            source: 數據來源名稱，不同來源分開存放
+            fetcher: 下載函數 fetcher(symbol, start, end) -> DataFrame（默認 yfinance）
+            offline: 離線模式（None 時讀取 MARKET_DATA_OFFLINE）
+        """
+        self.root = Path(root or DEFAULT_ROOT) / source
+        self.source = source
+        self.fetcher = fetcher or yfinance_fetcher
+        self.offline = env_offline() if offline is None else offline
+        self.manifest_path = self.root / 'manifest.json'
+        self.manifest = self._load_manifest()
+
+    # ------------------------------------------------------------------
+    # manifest
+    # ------------------------------------------------------------------
+
+    def _load_manifest(self):
+        if not self.manifest_path.exists():
+            return {'version': 1, 'symbols': {}}
+        with open(self.manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_manifest(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.manifest_path)
+
+    def coverage(self, symbol):
+        """
+        已覆蓋的日期範圍
+
+        Returns:
+            dict（requested_from / fetched_through / first_date / last_date / rows）或 None
+        """
+        return self.manifest['symbols'].get(symbol)
+
+    def symbols(self):
+        return sorted(self.manifest['symbols'])
+
+    # ------------------------------------------------------------------
+    # 分區讀寫
+    # ------------------------------------------------------------------
+
+    def _symbol_dir(self, symbol):
+        return self.root / symbol.replace('/', '_')
+
+    def _partition_path(self, symbol, year, fmt=None):
+        fmt = fmt or ('parquet' if PARQUET_AVAILABLE else 'csv')
+        return self._symbol_dir(symbol) / f"{year}.{fmt}"
+
+    def _read_partition(self, symbol, year):
+        for fmt in ('parquet', 'csv'):
+            path = self._partition_path(symbol, year, fmt)
+            if not path.exists():
+                continue
+            if fmt == 'parquet':
+                if not PARQUET_AVAILABLE:
+                    logger.warning(f"缺少 pyarrow，無法讀取 {path}")
+                    continue
+                return pd.read_parquet(path)
+            return pd.read_csv(path, index_col='Date', parse_dates=True)
+        return None
+
+    def _write_partition(self, symbol, year, data):
+        path = self._partition_path(symbol, year)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        os.close(fd)
+        if PARQUET_AVAILABLE:
+            data.to_parquet(tmp_path)
+        else:
+            data.to_csv(tmp_path)
+        os.replace(tmp_path, path)
+
+    def _merge(self, symbol, data):
+        """把新數據併入對應年份分區（同一天以新數據為準），返回寫入的行數"""
+        for year, chunk in data.groupby(data.index.year):
+            existing = self._read_partition(symbol, year)
+            if existing is not None and len(existing):
+                chunk = pd.concat([existing, chunk])
+                chunk = chunk[~chunk.index.duplicated(keep='last')].sort_index()
+            self._write_partition(symbol, year, chunk)
+        return len(data)
+
+    def _years(self, symbol):
+        symbol_dir = self._symbol_dir(symbol)
+        if not symbol_dir.exists():
+            return []
+        return sorted({int(p.stem) for p in symbol_dir.iterdir() if p.stem.isdigit()})
+
+    def read(self, symbol, start=None, end=None):
+        """只從磁盤讀取 [start, end] 的數據（不觸發下載）"""
+        start = None if start is None else pd.Timestamp(start)
+        end = None if end is None else pd.Timestamp(end)
+
+        frames = []
+        for year in self._years(symbol):
+            if (start is not None and year < start.year) or (end is not None and year > end.year):
+                continue
+            partition = self._read_partition(symbol, year)
+            if partition is not None:
+                frames.append(partition)
+
+        if not frames:
+            return normalize_ohlcv(None)
+        data = pd.concat(frames).sort_index()
+        data.index.name = 'Date'
+        return data.loc[start:end]
+
+    # ------------------------------------------------------------------
+    # 增量補抓
+    # ------------------------------------------------------------------
+
+    def _overlap_bar(self, symbol):
+        """
+        尾部補抓時用來核對的已存 K 線：最後一個已存交易日的前一根
+
+        最後一根可能是盤中抓取的未收盤數據，前一根一定已收盤，
+        重新下載後價格應完全相同。
+
+        Returns:
+            Series（name 為日期）或 None
+        """
+        entry = self.coverage(symbol)
+        if not entry or not entry.get('last_date'):
+            return None
+        last_date = pd.Timestamp(entry['last_date'])
+        stored = self.read(symbol, start=last_date - pd.Timedelta(days=31),
+                           end=last_date - pd.Timedelta(days=1))
+        return stored.iloc[-1] if len(stored) else None
+
+    def _missing_ranges(self, symbol, start, end):
+        """計算需要下載的區間：頭部（早於已請求範圍）與尾部（晚於已抓取日期）"""
+        entry = self.coverage(symbol)
+        if entry is None:
+            return [(start, end)]
+
+        ranges = []
+        requested_from = pd.Timestamp(entry['requested_from'])
+        fetched_through = pd.Timestamp(entry['fetched_through'])
+
+        if start < requested_from:
+            ranges.append((start, requested_from - pd.Timedelta(days=1)))
+        if end > fetched_through:
+            # 從倒數第二個已存交易日重新抓取：覆蓋可能未收盤的最後一根，
+            # 並多重疊一根已收盤 K 線用於核對復權調整
+            last_date = pd.Timestamp(entry['last_date']) if entry.get('last_date') else fetched_through
+            anchor = self._overlap_bar(symbol)
+            tail_start = anchor.name if anchor is not None else last_date
+            ranges.append((min(tail_start, fetched_through), end))
+        return ranges
+
+    @staticmethod
+    def _history_changed(anchor, data):
+        """重新下載的數據在核對日的 OHLCV 是否與已存的不同（拆股 / 除權息）"""
+        if anchor is None or anchor.name not in data.index:
+            return False
+        fresh = data.loc[anchor.name, OHLCV_COLUMNS].to_numpy(dtype=float)
+        stored = anchor[OHLCV_COLUMNS].to_numpy(dtype=float)
+        return not np.allclose(fresh, stored, rtol=1e-6, atol=0.0, equal_nan=True)
+
+    def _replace_history(self, symbol, start, end):
+        """重新下載完整歷史並替換已存分區，返回寫入的行數"""
+        entry = self.coverage(symbol)
+        full_start = min(pd.Timestamp(entry['requested_from']), start) if entry else start
+        data = normalize_ohlcv(self.fetcher(symbol, full_start, end))
+        if not len(data):
+            return 0
+
+        for year in self._years(symbol):
+            for fmt in ('parquet', 'csv'):
+                self._partition_path(symbol, year, fmt).unlink(missing_ok=True)
+        return self._merge(symbol, data)
+
+    def refresh(self, symbol, start, end):
+        """
+        補抓缺失區間並更新 manifest
+
+        Returns:
+            int: 新寫入的行數
+        """
+        start, end = pd.Timestamp(start), min(pd.Timestamp(end), today())
+        ranges = self._missing_ranges(symbol, start, end)
+        if not ranges:
+            return 0
+
+        anchor = self._overlap_bar(symbol)
+        written = 0
+        for range_start, range_end in ranges:
+            try:
+                data = normalize_ohlcv(self.fetcher(symbol, range_start, range_end))
+            except Exception as e:
+                logger.warning(f"下載 {symbol} {range_start.date()} ~ {range_end.date()} 失敗: {e}")
+                return written
+            if self._history_changed(anchor, data):
+                logger.info(f"{symbol} 在 {anchor.name.date()} 的價格已調整（拆股/除權息），重新下載完整歷史")
+                try:
+                    written = self._replace_history(symbol, start, end)
+                except Exception as e:
+                    logger.warning(f"重新下載 {symbol} 完整歷史失敗: {e}")
+                    return written
+                break
+            if len(data):
+                written += self._merge(symbol, data)
+
+        entry = self.coverage(symbol) or {'requested_from': start.strftime('%Y-%m-%d')}
+        entry['requested_from'] = min(pd.Timestamp(entry['requested_from']), start).strftime('%Y-%m-%d')
+        entry['fetched_through'] = max(
+            pd.Timestamp(entry.get('fetched_through', end)), end
+        ).strftime('%Y-%m-%d')
+
+        stored = self.read(symbol)
+        entry['first_date'] = stored.index[0].strftime('%Y-%m-%d') if len(stored) else None
+        entry['last_date'] = stored.index[-1].strftime('%Y-%m-%d') if len(stored) else None
+        entry['rows'] = int(len(stored))
+        entry['updated_at'] = datetime.now().isoformat()
+
+        self.manifest['symbols'][symbol] = entry
+        self._save_manifest()
+        return written
+
+    def load(self, symbol, start=None, end=None, period=None, auto_adjust=False):
+        """
+        載入單一資產的日線 OHLCV（必要時先補抓缺失區間）
+
+        Args:
+            symbol: 資產代碼
+            start: 起始日期（默認為已覆蓋的起點，沒有時為 10 年前）
+            end: 結束日期（含，默認今天）
+            period: yfinance 風格期間（如 '10y'），與 start 二選一
+            auto_adjust: 是否返回復權後的 OHLC（不含 Adj Close 列）
+
+        Returns:
+            DataFrame: 以 Date 為索引的 OHLCV
+        """
+        end = today() if end is None else pd.Timestamp(end)
+        if period is not None:
+            start = period_to_start(period, end)
+        if start is None:
+            entry = self.coverage(symbol)
+            start = (
+                pd.Timestamp(entry['requested_from']) if entry
+                else end - pd.Timedelta(days=DEFAULT_HISTORY_DAYS)
+            )
+        start = pd.Timestamp(start)
+
+        if not self.offline:
+            self.refresh(symbol, start, end)
+        elif self.coverage(symbol) is None:
+            logger.warning(f"離線模式：本地沒有 {symbol} 的數據")
+
+        data = self.read(symbol, start, end)
+        return adjust_ohlc(data) if auto_adjust else data
+
+    def download(self, tickers, start=None, end=None, period=None, auto_adjust=True):
+        """
+        yf.download 的替代品
+
+        單一代碼（字串）返回單層列；代碼列表返回 (Price, Ticker) 雙層列，
+        因此 download(...)['Close'] 的用法與 yfinance 相同。
+        """
+        if isinstance(tickers, str):
+            return self.load(tickers, start, end, period, auto_adjust)
+
+        frames = {
+            ticker: self.load(ticker, start, end, period, auto_adjust)
+            for ticker in tickers
+        }
+        data = pd.concat(frames, axis=1)
+        data.columns = data.columns.swaplevel(0, 1)
+        data.columns.names = ['Price', 'Ticker']
+        return data.sort_index(axis=1, level=0)
+
+
+_stores = {}
+
+
+def get_store(root=None, source='yfinance', offline=None):
+    """按 (root, source, offline) 緩存的默認數據湖"""
+    key = (str(root or DEFAULT_ROOT), source, env_offline() if offline is None else offline)
+    if key not in _stores:
+        _stores[key] = MarketDataStore(root=root, source=source, offline=offline)
+    return _stores[key]
+
+
+def download(tickers, start=None, end=None, period=None, auto_adjust=True, offline=None):
+    """使用默認數據湖的 yf.download 替代品"""
+    return get_store(offline=offline).download(tickers, start, end, period, auto_adjust)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='本地 OHLCV 數據湖')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    update = subparsers.add_parser('update', help='補抓指定代碼到今天')
+    update.add_argument('symbols', nargs='+')
+    update.add_argument('--period', default='10y')
+
+    subparsers.add_parser('stats', help='顯示覆蓋範圍')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    store = get_store()
+
+    if args.command == 'update':
+        for symbol in args.symbols:
+            data = store.load(symbol, period=args.period)
+            print(f"{symbol}: {len(data)} 行")
+    else:
+        for symbol in store.symbols():
+            entry = store.coverage(symbol)
+            print(f"{symbol:<10} {entry['first_date']} ~ {entry['last_date']}  {entry['rows']} 行")
+
+
+if __name__ == '__main__':
+    main()
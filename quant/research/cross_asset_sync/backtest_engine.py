@@ -11,31 +11,71 @@ import matplotlib.pyplot as plt
 from typing import Dict, List
 
 
+# 停損閾值：持有資產單日跌幅超過 5% 時平倉
+STOP_LOSS_THRESHOLD = -0.05
+
+# 持倉狀態編碼：-1 表示空倉，其餘為資產欄位索引
+FLAT = -1
+
+
+def _ffill(values, fill_value):
+    """一維陣列前向填充 NaN，開頭的 NaN 以 fill_value 填充"""
+    values = np.asarray(values, dtype=float)
+    valid = ~np.isnan(values)
+    idx = np.where(valid, np.arange(len(values)), -1)
+    np.maximum.accumulate(idx, out=idx)
+    filled = np.where(idx >= 0, values[np.clip(idx, 0, None)], fill_value)
+    return filled
+
+
 class BacktestEngine:
-    """回測引擎"""
+    """
+    回測引擎
+
+    倉位模型（兩種模式共用）：
+    - 信號 > 0：全部資金持有當日回報率最高的資產
+    - 信號 < 0：平掉所有倉位
+    - 信號 = 0：維持前一日倉位
+    - 持有資產單日跌幅超過 5% 時於當日收盤停損
+    - 交易成本與滑點按換手率（權重變化絕對值之和）扣除
 
-    def __init__(self, signals, data, initial_capital=100000, 
-                 transaction_cost=0.0001, slippage=0.00005):
+    mode='vectorized' 以 NumPy 陣列一次計算整段回測；
+    mode='loop' 為逐日參考實現，用於對照驗證。
+    """
+
+    MODES = ('vectorized', 'loop')
+
+    def __init__(self, signals, data, initial_capital=100000,
+                 transaction_cost=0.0001, slippage=0.00005, mode='vectorized'):
         """
         初始化回測引擎
 
         Args:
             signals: 交易信號序列
-            data: 價格數據
+            data: 價格數據（{資產: Series 或含 price 欄的 DataFrame}）
             initial_capital: 初始資本
             transaction_cost: 交易成本
             slippage: 滑點
+            mode: 'vectorized'（預設）或 'loop'
         """
+        if mode not in self.MODES:
+            raise ValueError(f"未知的回測模式: {mode}（可選: {', '.join(self.MODES)}）")
+
         self.signals = signals
         self.data = data
         self.initial_capital = initial_capital
         self.transaction_cost = transaction_cost
         self.slippage = slippage
+        self.mode = mode
 
         # 策略參數
         self.position_size = 0.1  # 每次交易 10% 資金
         self.max_drawdown_threshold = 0.15  # 最大回撤閾值
 
+        # 對齊到信號日期的價格與回報率矩陣（日期 × 資產）
+        self.prices = self._build_price_panel()
+        self.asset_returns = self.prices.pct_change(fill_method=None)
+
         # 回測結果
         self.portfolio_value = []
         self.positions = {}
@@ -43,71 +83,177 @@ class BacktestEngine:
         self.trades = []
         self.daily_returns = []
 
+    def _build_price_panel(self):
+        """將各資產價格按日期對齊到信號索引"""
+        columns = {}
+        for asset, series in self.data.items():
+            if isinstance(series, pd.DataFrame):
+                series = series['price'] if 'price' in series.columns else series.iloc[:, 0]
+            columns[asset] = series
+
+        panel = pd.DataFrame(columns).sort_index()
+        return panel.reindex(self.signals.index).ffill()
+
     def run(self):
         """
         執行回測
 
         Returns:
-            DataFrame: 回測結果
+            tuple: (回測結果 DataFrame, 績效指標 dict)
         """
-        print("  開始回測...")
+        print(f"  開始回測（{self.mode}）...")
         print(f"  初始資本: ${self.initial_capital:,.2f}")
         print(f"  交易成本: {self.transaction_cost*100:.2f}%")
         print(f"  滑點: {self.slippage*100:.3f}%")
 
-        # 初始化
-        current_capital = self.initial_capital
-        positions = {}
-
-        # 遍歷每一天
-        for i in range(len(self.signals)):
-            date = self.signals.index[i]
-            signal = self.signals.iloc[i]
-
-            # 計算回報率
-            daily_return = self.calculate_daily_return(i, positions)
-            current_capital *= (1 + daily_return)
-
-            # 儲存資產
-            portfolio_value = current_capital + self.calculate_position_value(positions)
-            self.portfolio_value.append(portfolio_value)
+        self.portfolio_value = []
+        self.equity_curve = []
+        self.trades = []
+        self.daily_returns = []
 
-            # 儲存回報
-            self.daily_returns.append(daily_return)
+        if self.mode == 'vectorized':
+            results = self._run_vectorized()
+        else:
+            results = self._run_loop()
 
-            # 如果有信號，執行交易
-            if signal > 0:
-                self.execute_trade(i, date, positions, current_capital)
+        print("  ✓ 回測完成")
 
-            # 更新倉位價值
-            positions_value = self.calculate_position_value(positions)
+        # 計算績效指標
+        metrics = self.calculate_metrics(results)
 
-            # 計算權益曲線
-            equity_curve = current_capital + positions_value
-            self.equity_curve.append(equity_curve)
+        # 保存回測結果
+        self.backtest_results = results
+        self.metrics = metrics
 
-            # 更新倉位
-            positions = self.update_positions(date, positions)
+        return results, metrics
 
-        # 轉換為 DataFrame
-        results = pd.DataFrame({
+    def _build_results(self):
+        return pd.DataFrame({
             'date': self.signals.index,
-            'signal': self.signals,
+            'signal': self.signals.values,
             'portfolio_value': self.portfolio_value,
             'equity_curve': self.equity_curve,
             'daily_return': self.daily_returns
         }).set_index('date')
 
-        print("  ✓ 回測完成")
+    # ------------------------------------------------------------------
+    # 向量化模式
+    # ------------------------------------------------------------------
+
+    def _run_vectorized(self):
+        """以倉位矩陣一次計算回報與權益曲線"""
+        signals = np.nan_to_num(np.asarray(self.signals, dtype=float))
+        returns = self.asset_returns.to_numpy(dtype=float)
+        n_days, n_assets = returns.shape
+        cost_rate = self.transaction_cost + self.slippage
+
+        # 每日最佳資產（同日回報最高，NaN 不參與）
+        has_return = ~np.isnan(returns).all(axis=1)
+        best = np.full(n_days, FLAT)
+        if n_assets:
+            best[has_return] = np.nanargmax(returns[has_return], axis=1)
+
+        # 信號決策：正信號 → 最佳資產；負信號 → 空倉；其餘沿用
+        decision = np.full(n_days, np.nan)
+        buy = (signals > 0) & has_return
+        decision[buy] = best[buy]
+        decision[signals < 0] = FLAT
+        held_by_signal = _ffill(decision, FLAT)
+
+        # 停損：前一日持有的資產當日跌破閾值
+        prev_held = np.concatenate(([FLAT], held_by_signal[:-1])).astype(int)
+        returns_filled = np.nan_to_num(returns)
+        held_return = np.where(
+            prev_held >= 0,
+            returns_filled[np.arange(n_days), np.clip(prev_held, 0, None)] if n_assets else 0.0,
+            0.0,
+        )
+        stop_hit = (prev_held >= 0) & (held_return < STOP_LOSS_THRESHOLD)
+
+        events = np.where(np.isnan(decision), np.where(stop_hit, FLAT, np.nan), decision)
+        held = _ffill(events, FLAT).astype(int)
+
+        # 權重矩陣（日終持倉）
+        weights = np.zeros((n_days, n_assets))
+        invested = held >= 0
+        weights[np.arange(n_days)[invested], held[invested]] = 1.0
+        prev_weights = np.vstack([np.zeros((1, n_assets)), weights[:-1]])
+
+        # 回報：前一日持倉 × 當日資產回報 − 換手成本
+        gross = (prev_weights * returns_filled).sum(axis=1)
+        turnover = np.abs(weights - prev_weights).sum(axis=1)
+        daily_return = gross - turnover * cost_rate
+        equity = self.initial_capital * np.cumprod(1 + daily_return)
+
+        self.daily_returns = daily_return.tolist()
+        self.equity_curve = equity.tolist()
+        self.portfolio_value = equity.tolist()
+        self.positions = {
+            self.prices.columns[j]: weights[-1, j] for j in range(n_assets) if n_days and weights[-1, j]
+        }
 
-        # 計算績效指標
-        metrics = self.calculate_metrics(results)
+        # 交易記錄：權重變化
+        equity_before_cost = np.concatenate(([self.initial_capital], equity[:-1])) * (1 + gross)
+        stopped = np.zeros((n_days, n_assets), dtype=bool)
+        stop_days = np.flatnonzero(stop_hit)
+        stopped[stop_days, prev_held[stop_days]] = True
+
+        prices = self.prices.to_numpy(dtype=float)
+        delta = weights - prev_weights
+        for day, j in zip(*np.nonzero(delta)):
+            self.trades.append(self._trade_record(
+                self.signals.index[day], self.prices.columns[j], delta[day, j],
+                prices[day, j], equity_before_cost[day], stopped[day, j]
+            ))
+
+        return self._build_results()
+
+    # ------------------------------------------------------------------
+    # 逐日參考模式
+    # ------------------------------------------------------------------
+
+    def _run_loop(self):
+        """逐日遍歷的參考實現"""
+        cost_rate = self.transaction_cost + self.slippage
+        current_capital = self.initial_capital
+        positions = {}
 
-        # 保存回測結果
-        self.backtest_results = results
-        self.metrics = metrics
+        # 遍歷每一天
+        for i in range(len(self.signals)):
+            date = self.signals.index[i]
+            signal = self.signals.iloc[i]
 
-        return results, metrics
+            # 以前一日持倉計算當日回報
+            gross_return = self.calculate_daily_return(i, positions)
+            capital_before_cost = current_capital * (1 + gross_return)
+
+            # 停損，然後按信號調整倉位
+            new_positions, stopped = self.update_positions(i, positions)
+            if signal > 0 or signal < 0:
+                new_positions = self.execute_trade(i, new_positions)
+
+            # 記錄交易並扣除換手成本
+            turnover = 0.0
+            for asset in self.prices.columns:
+                change = new_positions.get(asset, 0.0) - positions.get(asset, 0.0)
+                if change:
+                    turnover += abs(change)
+                    self.trades.append(self._trade_record(
+                        date, asset, change, self.prices[asset].iloc[i],
+                        capital_before_cost, asset in stopped
+                    ))
+
+            daily_return = gross_return - turnover * cost_rate
+            current_capital *= (1 + daily_return)
+
+            self.daily_returns.append(daily_return)
+            self.portfolio_value.append(current_capital)
+            self.equity_curve.append(current_capital)
+
+            positions = new_positions
+
+        self.positions = positions
+        return self._build_results()
 
     def calculate_daily_return(self, index, positions):
         """
@@ -115,7 +261,7 @@ class BacktestEngine:
 
         Args:
             index: 當前索引
-            positions: 倉位字典
+            positions: 倉位字典（資產 → 權重）
 
         Returns:
             float: 每日回報
@@ -123,124 +269,38 @@ class BacktestEngine:
         total_return = 0
 
         # 倉位回報
-        for asset, position in positions.items():
-            if index < len(self.data[asset]):
-                current_price = self.data[asset].iloc[index]
-                prev_price = self.data[asset].iloc[index-1] if index > 0 else current_price
-
-                position_return = (current_price / prev_price - 1) * position
-                total_return += position_return
+        for asset, weight in positions.items():
+            asset_return = self.asset_returns[asset].iloc[index]
+            if not pd.isna(asset_return):
+                total_return += asset_return * weight
 
         return total_return
 
-    def calculate_position_value(self, positions):
+    def execute_trade(self, index, positions):
         """
-        計算倉位總價值
+        按信號調整倉位
 
         Args:
-            positions: 倉位字典
+            index: 當前索引
+            positions: 倉位字典（資產 → 權重）
 
         Returns:
-            float: 倉位總價值
-        """
-        total_value = 0
-
-        for asset, position in positions.items():
-            if len(self.data[asset]) > 0:
-                current_price = self.data[asset].iloc[-1]
-                total_value += position * current_price
-
-        return total_value
-
-    def execute_trade(self, index, date, positions, capital):
+            dict: 新倉位
         """
-        執行交易
-
-        Args:
-            index: 當前索引
-            date: 日期
-            positions: 倉位字典
-            capital: 當前資本
-        """
-        # 獲取信號
         signal = self.signals.iloc[index]
 
-        # 計算目標倉位
-        target_position_value = capital * self.position_size
-
-        # 如果信號為正，增加倉位
+        # 信號為正：轉入當日表現最佳的資產
         if signal > 0:
-            # 計算需要多少資金
-            remaining_capital = capital - self.calculate_position_value(positions)
-
-            if remaining_capital > 0:
-                # 找到回報率最高的資產
-                best_asset = self.find_best_asset(index)
-
-                if best_asset is not None:
-                    # 計算買入數量
-                    quantity = self.calculate_buy_quantity(
-                        remaining_capital, best_asset, index
-                    )
-
-                    if quantity > 0:
-                        # 記錄交易
-                        trade = {
-                            'date': date,
-                            'asset': best_asset,
-                            'action': 'buy',
-                            'quantity': quantity,
-                            'price': self.data[best_asset].iloc[index],
-                            'value': quantity * self.data[best_asset].iloc[index]
-                        }
-                        self.trades.append(trade)
-
-                        # 更新倉位
-                        positions[best_asset] = positions.get(best_asset, 0) + quantity
-
-        # 如果信號為負，減少倉位
-        elif signal < 0:
-            # 平掉所有倉位
-            for asset in list(positions.keys()):
-                quantity = positions[asset]
-
-                if quantity > 0:
-                    # 記錄交易
-                    trade = {
-                        'date': date,
-                        'asset': asset,
-                        'action': 'sell',
-                        'quantity': quantity,
-                        'price': self.data[asset].iloc[index],
-                        'value': quantity * self.data[asset].iloc[index]
-                    }
-                    self.trades.append(trade)
-
-                    # 更新倉位
-                    del positions[asset]
-
-    def calculate_buy_quantity(self, capital, asset, index):
-        """
-        計算買入數量
-
-        Args:
-            capital: 可用資本
-            asset: 資產代碼
-            index: 當前索引
-
-        Returns:
-            float: 買入數量
-        """
-        if index >= len(self.data[asset]):
-            return 0
-
-        # 考慮交易成本和滑點
-        current_price = self.data[asset].iloc[index]
-        adjusted_price = current_price * (1 + self.transaction_cost + self.slippage)
+            best_asset = self.find_best_asset(index)
+            if best_asset is None:
+                return positions
+            return {best_asset: 1.0}
 
-        quantity = capital / adjusted_price
+        # 信號為負：平掉所有倉位
+        if signal < 0:
+            return {}
 
-        return quantity
+        return positions
 
     def find_best_asset(self, index):
         """
@@ -256,61 +316,58 @@ class BacktestEngine:
         best_return = -np.inf
 
         # 計算回報率
-        for asset in self.data.keys():
-            if index >= len(self.data[asset]):
+        for asset in self.prices.columns:
+            return_rate = self.asset_returns[asset].iloc[index]
+            if pd.isna(return_rate):
                 continue
 
-            current_price = self.data[asset].iloc[index]
-            prev_price = self.data[asset].iloc[index-1] if index > 0 else current_price
-
-            if prev_price > 0:
-                return_rate = (current_price / prev_price - 1)
-
-                if return_rate > best_return:
-                    best_return = return_rate
-                    best_asset = asset
+            if return_rate > best_return:
+                best_return = return_rate
+                best_asset = asset
 
         return best_asset
 
-    def update_positions(self, date, positions):
+    def update_positions(self, index, positions):
         """
-        更新倉位
+        停損檢查
 
         Args:
-            date: 日期
-            positions: 倉位字典
+            index: 當前索引
+            positions: 倉位字典（資產 → 權重）
 
         Returns:
-            dict: 更新後的倉位
+            tuple: (更新後的倉位, 本日停損的資產集合)
         """
         new_positions = {}
+        stopped = set()
+
+        for asset, weight in positions.items():
+            loss = self.asset_returns[asset].iloc[index]
+            if not pd.isna(loss) and loss < STOP_LOSS_THRESHOLD:
+                stopped.add(asset)
+            else:
+                new_positions[asset] = weight
 
-        # 檢查是否有需要平倉的倉位
-        for asset, quantity in positions.items():
-            if len(self.data[asset]) > 0:
-                current_price = self.data[asset].iloc[-1]
-
-                # 如果資產價格跌超過 5%，平倉
-                if index >= 1:
-                    prev_price = self.data[asset].iloc[-2]
-                    loss = (current_price / prev_price - 1)
-
-                    if loss < -0.05:
-                        trade = {
-                            'date': date,
-                            'asset': asset,
-                            'action': 'stop_loss',
-                            'quantity': quantity,
-                            'price': current_price,
-                            'value': quantity * current_price
-                        }
-                        self.trades.append(trade)
-                    else:
-                        new_positions[asset] = quantity
-                else:
-                    new_positions[asset] = quantity
-
-        return new_positions
+        return new_positions, stopped
+
+    def _trade_record(self, date, asset, weight_change, price, capital, stopped):
+        """建立交易記錄"""
+        if weight_change > 0:
+            action = 'buy'
+        elif stopped:
+            action = 'stop_loss'
+        else:
+            action = 'sell'
+
+        value = abs(weight_change) * capital
+        return {
+            'date': date,
+            'asset': asset,
+            'action': action,
+            'quantity': value / price if price else 0.0,
+            'price': price,
+            'value': value
+        }
 
     def calculate_metrics(self, results):
         """
@@ -357,12 +414,12 @@ class BacktestEngine:
         # Alpha
         alpha = daily_return_mean - 0.0001  # 簡化計算
 
-        # Beta
-        benchmark_returns = results['daily_return'].values
-        market_returns = np.random.normal(0.0001, 0.01, len(benchmark_returns))  # 模擬市場回報
+        # Beta（以各資產等權平均回報為市場基準）
+        strategy_returns = results['daily_return'].to_numpy(dtype=float)
+        market_returns = self.asset_returns.mean(axis=1).fillna(0).to_numpy(dtype=float)
 
-        if np.var(market_returns) > 0:
-            beta = np.cov(benchmark_returns, daily_return_mean)[0, 1] / np.var(market_returns)
+        if len(market_returns) > 1 and np.var(market_returns, ddof=1) > 0:
+            beta = np.cov(strategy_returns, market_returns)[0, 1] / np.var(market_returns, ddof=1)
         else:
             beta = 0
 
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+回測引擎基準測試：10 年 NQ/GC/DX 日線，逐日模式 vs 向量化模式
+Author: Charlie
+Date: 2026-02-17
+
+用法：
+    python benchmark_backtest_engine.py            # 合成數據
+    python benchmark_backtest_engine.py --real     # 從 Yahoo Finance 載入真實數據
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from backtest_engine import BacktestEngine
+
+ASSETS = {'NQ': 0.016, 'GC': 0.010, 'DX': 0.005}
+YEARS = 10
+
+
+def synthetic_market(years=YEARS, seed=42):
+    """生成 10 年合成日線價格與信號"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=252 * years)
+
+    data = {
+        asset: pd.Series(100 * np.cumprod(1 + rng.normal(0.0003, vol, len(dates))), index=dates)
+        for asset, vol in ASSETS.items()
+    }
+    signals = pd.Series(rng.choice([-1, 0, 0, 0, 1], len(dates)), index=dates, dtype=float)
+    return signals, data
+
+
+def real_market():
+    """從 Yahoo Finance 載入 10 年 NQ/GC/DX，信號為 NQ 20 日動量方向的變化"""
+    from data_loader import DataLoader
+
+    loader = DataLoader()
+    data = {
+        'NQ': loader.load_data('NQ=F')['price'],
+        'GC': loader.load_data('GC=F')['price'],
+        'DX': loader.load_data('DX=F')['price'],
+    }
+    momentum = np.sign(data['NQ'].pct_change(20))
+    signals = momentum.where(momentum != momentum.shift()).fillna(0)
+    return signals, data
+
+
+def time_run(signals, data, mode, repeat):
+    """執行 repeat 次並返回最短耗時與結果"""
+    best = float('inf')
+    output = None
+    for _ in range(repeat):
+        engine = BacktestEngine(signals, data, mode=mode)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            output = engine.run()
+        best = min(best, time.perf_counter() - start)
+    return best, output
+
+
+def main():
+    parser = argparse.ArgumentParser(description='回測引擎基準測試')
+    parser.add_argument('--real', action='store_true', help='使用 Yahoo Finance 真實數據')
+    parser.add_argument('--repeat', type=int, default=3, help='重複次數（取最短）')
+    args = parser.parse_args()
+
+    signals, data = real_market() if args.real else synthetic_market()
+
+    print(f"數據：{', '.join(data)} | {len(signals)} 個交易日")
+
+    loop_time, (loop_results, _) = time_run(signals, data, 'loop', args.repeat)
+    vec_time, (vec_results, _) = time_run(signals, data, 'vectorized', args.repeat)
+
+    max_diff = np.max(np.abs(loop_results['equity_curve'] - vec_results['equity_curve']))
+
+    print(f"逐日模式：    {loop_time * 1000:10.1f} ms")
+    print(f"向量化模式：  {vec_time * 1000:10.1f} ms")
+    print(f"加速倍數：    {loop_time / vec_time:10.1f}x")
+    print(f"權益曲線最大差異：{max_diff:.3e}")
+
+
+if __name__ == '__main__':
+    main()
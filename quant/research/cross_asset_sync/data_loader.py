@@ -5,22 +5,33 @@ Author: Charlie
 Date: 2026-02-17
 """
 
-import pandas as pd
-import yfinance as yf
+import sys
 from datetime import datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from market_data_store import MarketDataStore, get_store
 
 
 class DataLoader:
     """數據載入器"""
 
-    def __init__(self, cache_dir='data'):
+    def __init__(self, cache_dir=None, offline=None):
         """
         初始化數據載入器
 
         Args:
-            cache_dir: 數據快取目錄
+            cache_dir: 數據湖根目錄（None 使用共用的本地數據湖）
+            offline: 離線模式，只讀取本地數據（None 時讀取 MARKET_DATA_OFFLINE）
         """
         self.cache_dir = cache_dir
+        self.store = (
+            get_store(offline=offline) if cache_dir is None
+            else MarketDataStore(cache_dir, offline=offline)
+        )
 
     def load_data(self, asset, period='daily'):
         """
@@ -37,9 +48,9 @@ class DataLoader:
         end_date = datetime.now()
         start_date = end_date - timedelta(days=3650)  # 10 年數據
 
-        # 載入數據
-        print(f"  從 Yahoo Finance 載入 {asset} 數據...")
-        data = yf.download(asset, start=start_date, end=end_date)
+        # 載入數據（本地數據湖，只補抓缺少的尾部）
+        print(f"  載入 {asset} 數據...")
+        data = self.store.load(asset, start=start_date.date(), end=end_date.date())
 
         if len(data) == 0:
             raise ValueError(f"無法載入 {asset} 的數據")
@@ -69,9 +80,6 @@ class DataLoader:
         prices = prices.set_index('date')
         prices = prices.sort_index()
 
-        # 保存到快取
-        self._save_to_cache(asset, prices)
-
         print(f"  ✓ 成功載入 {len(prices)} 天數據")
 
         return prices
@@ -100,19 +108,9 @@ class DataLoader:
 
         return df
 
-    def _save_to_cache(self, asset, data):
-        """保存數據到快取"""
-        import os
-
-        if not os.path.exists(self.cache_dir):
-            os.makedirs(self.cache_dir)
-
-        filename = f"{self.cache_dir}/{asset}.csv"
-        data.to_csv(filename, encoding='utf-8-sig')
-
     def load_from_cache(self, asset):
         """
-        從快取載入數據
+        從本地數據湖載入數據（不訪問網絡）
 
         Args:
             asset: 資產代碼
@@ -120,16 +118,16 @@ class DataLoader:
         Returns:
             DataFrame: 價格數據
         """
-        filename = f"{self.cache_dir}/{asset}.csv"
-
-        try:
-            data = pd.read_csv(filename, index_col='date', parse_dates=True)
-            print(f"  從快取載入 {asset}")
-            return data
-        except FileNotFoundError:
+        if self.store.coverage(asset) is None:
             print(f"  未找到快取: {asset}")
             return None
 
+        data = self.store.read(asset)
+        prices = data['Adj Close'].fillna(data['Close']).rename('price').to_frame()
+        prices.index.name = 'date'
+        print(f"  從快取載入 {asset}")
+        return prices
+
 
 if __name__ == '__main__':
     # 測試數據載入
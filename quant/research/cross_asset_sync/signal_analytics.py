@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+信號分析模組：滾動相關、IC / IR 與 alpha 庫批量篩選
+Author: Charlie
+Date: 2026-02-17
+
+滾動 Pearson 相關以累積和公式一次算出所有配對（每個窗口 O(1)），
+rank IC 以滑動窗口視圖批量排名，不再逐日切片計算相關矩陣。
+
+用法：
+    >>> corr = rolling_pairwise_correlation(returns, window=60)
+    >>> corr[('NQ', 'GC')]
+    >>> signals, summary = evaluate_alpha_library(alpha_library, returns, window=60)
+"""
+
+import numpy as np
+import pandas as pd
+
+
+IC_METHODS = ('pearson', 'spearman')
+
+# rank IC 的窗口分批處理，每批約這麼多個元素
+RANK_CHUNK_ELEMENTS = 4_000_000
+
+
+def _as_2d(values):
+    """Series / DataFrame / 陣列 → (時間, 欄位) 浮點陣列"""
+    values = np.asarray(values, dtype=float)
+    return values.reshape(len(values), -1)
+
+
+def _window_sums(values, window):
+    """沿時間軸的滾動窗口和（累積和差分），不足一個窗口的行為 NaN"""
+    cumsum = np.cumsum(values, axis=0)
+    sums = np.full(values.shape, np.nan)
+    sums[window - 1:] = cumsum[window - 1:]
+    sums[window:] -= cumsum[:-window]
+    return sums
+
+
+def _flat_windows(values, window):
+    """以每個時點結尾的窗口內數值是否完全相同（遇 NaN 中斷）"""
+    same = np.zeros(values.shape, dtype=bool)
+    same[1:] = values[1:] == values[:-1]
+    positions = np.arange(len(values))[:, None]
+    run_start = np.maximum.accumulate(np.where(same, 0, positions), axis=0)
+    return positions - run_start + 1 >= window
+
+
+def _rolling_corr(x, y, window, min_periods):
+    """
+    逐欄滾動 Pearson 相關（x、y 為同形狀的配對欄位）
+
+    只使用兩者皆有值的行；每欄先減去第一個有效值，累積和保持良好條件數。
+    """
+    valid = ~(np.isnan(x) | np.isnan(y))
+    columns = np.arange(x.shape[1])
+    first = valid.argmax(axis=0)
+    x_shift = np.where(valid.any(axis=0), x[first, columns], 0.0)
+    y_shift = np.where(valid.any(axis=0), y[first, columns], 0.0)
+    dx = np.where(valid, x - x_shift, 0.0)
+    dy = np.where(valid, y - y_shift, 0.0)
+
+    n = _window_sums(valid.astype(float), window)
+    sx, sy = _window_sums(dx, window), _window_sums(dy, window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        var_x = _window_sums(dx * dx, window) - sx * sx / n
+        var_y = _window_sums(dy * dy, window) - sy * sy / n
+        cov = _window_sums(dx * dy, window) - sx * sy / n
+        corr = np.clip(cov / np.sqrt(var_x * var_y), -1.0, 1.0)
+
+    flat = _flat_windows(x, window) | _flat_windows(y, window)
+    usable = (n >= max(min_periods, 2)) & (var_x > 0) & (var_y > 0) & ~flat
+    return np.where(usable, corr, np.nan)
+
+
+def _rank_last(values):
+    """沿最後一軸的平均排名（從 1 開始，相同值取平均排名），NaN 不參與排名"""
+    width = values.shape[-1]
+    order = np.argsort(values, axis=-1)
+    ordered = np.take_along_axis(values, order, axis=-1)
+    positions = np.broadcast_to(np.arange(width), values.shape)
+
+    # 排序後每段相同值的起點與終點
+    starts = np.ones(values.shape, dtype=bool)
+    starts[..., 1:] = ordered[..., 1:] != ordered[..., :-1]
+    ends = np.ones(values.shape, dtype=bool)
+    ends[..., :-1] = starts[..., 1:]
+    first = np.maximum.accumulate(np.where(starts, positions, 0), axis=-1)
+    from_end = np.maximum.accumulate(np.where(ends[..., ::-1], positions, 0), axis=-1)
+    last = (width - 1 - from_end)[..., ::-1]
+
+    ranks = np.empty(values.shape)
+    np.put_along_axis(ranks, order, (first + last) / 2 + 1, axis=-1)
+    ranks[np.isnan(values)] = np.nan
+    return ranks
+
+
+def _corr_last(x, y):
+    """沿最後一軸的 Pearson 相關（NaN 位置不計）"""
+    valid = ~(np.isnan(x) | np.isnan(y))
+    n = valid.sum(axis=-1, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        dx = np.where(valid, x - np.where(valid, x, 0.0).sum(axis=-1, keepdims=True) / n, 0.0)
+        dy = np.where(valid, y - np.where(valid, y, 0.0).sum(axis=-1, keepdims=True) / n, 0.0)
+        return (dx * dy).sum(axis=-1) / np.sqrt((dx * dx).sum(axis=-1) * (dy * dy).sum(axis=-1))
+
+
+def _rolling_rank_corr(x, y, window, min_periods):
+    """逐欄滾動 Spearman 相關：x 為 (時間, K)，y 為 (時間,)"""
+    n_rows, n_cols = x.shape
+    out = np.full(x.shape, np.nan)
+    n_windows = n_rows - window + 1
+    if n_windows <= 0:
+        return out
+
+    x_windows = np.lib.stride_tricks.sliding_window_view(x, window, axis=0)   # (窗口, K, window)
+    y_windows = np.lib.stride_tricks.sliding_window_view(y, window)           # (窗口, window)
+    chunk = max(1, RANK_CHUNK_ELEMENTS // (window * n_cols))
+    for lo in range(0, n_windows, chunk):
+        hi = min(lo + chunk, n_windows)
+        xs = x_windows[lo:hi]
+        ys = np.broadcast_to(y_windows[lo:hi, None, :], xs.shape)
+        missing = np.isnan(xs) | np.isnan(ys)
+
+        # y 的窗口排名所有信號共用；只有 x 在 y 有值處缺失的窗口才需重新排名
+        y_ranks = np.array(np.broadcast_to(_rank_last(y_windows[lo:hi])[:, None, :], xs.shape))
+        rerank = (missing & ~np.isnan(ys)).any(axis=-1)
+        if rerank.any():
+            y_ranks[rerank] = _rank_last(np.where(missing, np.nan, ys)[rerank])
+        corr = _corr_last(_rank_last(np.where(missing, np.nan, xs)), y_ranks)
+        count = (~missing).sum(axis=-1)
+        out[window - 1 + lo:window - 1 + hi] = np.where(count >= max(min_periods, 2), corr, np.nan)
+    return out
+
+
+def rolling_correlation(x, y, window=60, min_periods=None, method='pearson'):
+    """
+    x 的每一欄與 y 的滾動相關
+
+    與 pandas 的 x.rolling(window).corr(y) 相同約定：時點 t 的值使用
+    [t - window + 1, t] 內兩者皆有值的行。
+
+    Args:
+        x: Series 或 DataFrame
+        y: Series（與 x 同索引）
+        window: 窗口期
+        min_periods: 窗口內最少有效配對數（預設 window）
+        method: 'pearson' 或 'spearman'（rank 相關）
+
+    Returns:
+        與 x 同形狀的 Series / DataFrame
+    """
+    if method not in IC_METHODS:
+        raise ValueError(f"未知的相關方法: {method}（可選: {', '.join(IC_METHODS)}）")
+    min_periods = window if min_periods is None else min_periods
+
+    values = _as_2d(x)
+    target = np.asarray(y, dtype=float).ravel()
+    if method == 'pearson':
+        corr = _rolling_corr(values, np.broadcast_to(target[:, None], values.shape),
+                             window, min_periods)
+    else:
+        corr = _rolling_rank_corr(values, target, window, min_periods)
+
+    if isinstance(x, pd.DataFrame):
+        return pd.DataFrame(corr, index=x.index, columns=x.columns)
+    if isinstance(x, pd.Series):
+        return pd.Series(corr[:, 0], index=x.index, name=x.name)
+    return corr if np.ndim(x) > 1 else corr[:, 0]
+
+
+def rolling_pairwise_correlation(returns, window=60, min_periods=None):
+    """
+    所有資產配對的滾動相關（一次計算）
+
+    Args:
+        returns: 回報率 DataFrame（多個資產）
+        window: 窗口期
+        min_periods: 窗口內最少有效配對數（預設 window）
+
+    Returns:
+        DataFrame: 欄位為 (資產1, 資產2) 的 MultiIndex，每個配對一欄
+    """
+    min_periods = window if min_periods is None else min_periods
+    values = _as_2d(returns)
+    left, right = np.triu_indices(values.shape[1], k=1)
+    corr = _rolling_corr(values[:, left], values[:, right], window, min_periods)
+
+    columns = pd.MultiIndex.from_arrays(
+        [returns.columns[left], returns.columns[right]], names=['asset_1', 'asset_2']
+    )
+    return pd.DataFrame(corr, index=returns.index, columns=columns)
+
+
+def rolling_ic(signals, returns, window=60, method='pearson', min_periods=None):
+    """
+    每個信號與回報率的滾動信息係數（IC）
+
+    Args:
+        signals: 信號 DataFrame（每欄一個 alpha）或 Series
+        returns: 回報率 Series
+        window: 窗口期
+        method: 'pearson'（IC）或 'spearman'（rank IC）
+        min_periods: 窗口內最少有效配對數（預設 window）
+
+    Returns:
+        與 signals 同形狀的 IC 序列
+    """
+    returns = returns.reindex(signals.index) if isinstance(returns, pd.Series) else returns
+    return rolling_correlation(signals, returns, window, min_periods, method)
+
+
+def ic_summary(ics):
+    """
+    IC 序列彙總：平均 IC、IC 標準差、IR（平均 / 標準差）與有效窗口數
+
+    Args:
+        ics: IC DataFrame（每欄一個 alpha）
+
+    Returns:
+        DataFrame: 每個 alpha 一行
+    """
+    mean_ic = ics.mean()
+    ic_std = ics.std()
+    ir = (mean_ic / ic_std).where(ic_std > 0, 0.0)
+    return pd.DataFrame({
+        'mean_ic': mean_ic,
+        'ic_std': ic_std,
+        'ir': ir,
+        'count': ics.count(),
+    })
+
+
+def target_returns(returns):
+    """IC 對照的回報率：Series 原樣返回，多資產 DataFrame 取等權籃子"""
+    if isinstance(returns, pd.DataFrame):
+        return returns.mean(axis=1)
+    return returns
+
+
+def evaluate_alpha_library(alpha_library, returns, window=60, method='pearson',
+                           target=None):
+    """
+    在共用回報率面板上批量評估 alpha 庫
+
+    每個 alpha 函數對同一份 returns 只調用一次，全部信號組成一個 DataFrame
+    後一次計算所有滾動 IC。
+
+    Args:
+        alpha_library: {名稱: alpha 函數}，函數接收 returns、返回信號 Series
+        returns: 回報率 Series 或 DataFrame（共用面板）
+        window: IC 窗口期
+        method: 'pearson'（IC）或 'spearman'（rank IC）
+        target: IC 對照的回報率 Series（預設 target_returns(returns)）
+
+    Returns:
+        tuple: (信號 DataFrame, IC 彙總 DataFrame)
+    """
+    signals = pd.DataFrame({name: alpha(returns) for name, alpha in alpha_library.items()})
+    target = target_returns(returns) if target is None else target
+    summary = ic_summary(rolling_ic(signals, target, window, method))
+    return signals, summary
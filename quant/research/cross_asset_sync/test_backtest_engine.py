@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+回測引擎測試：向量化模式與逐日參考模式的一致性
+Author: Charlie
+Date: 2026-02-17
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from backtest_engine import BacktestEngine
+
+
+def make_market(n_days=750, seed=7):
+    """生成 NQ/GC/DX 合成價格與 -1/0/1 信號"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2015-01-01', periods=n_days)
+
+    data = {}
+    for asset, vol in (('NQ', 0.018), ('GC', 0.010), ('DX', 0.005)):
+        returns = rng.normal(0.0003, vol, n_days)
+        # 插入幾個大跌日以觸發停損
+        returns[rng.choice(n_days, 6, replace=False)] = -0.07
+        data[asset] = pd.Series(100 * np.cumprod(1 + returns), index=dates)
+
+    # DX 晚開始，前段為 NaN
+    data['DX'] = data['DX'].iloc[40:]
+
+    signals = pd.Series(
+        rng.choice([-1, 0, 0, 0, 1], n_days), index=dates, dtype=float
+    )
+    return signals, data
+
+
+class TestBacktestEngineParity(unittest.TestCase):
+    """測試向量化模式與逐日模式結果一致"""
+
+    def run_both(self, signals, data, **kwargs):
+        loop = BacktestEngine(signals, data, mode='loop', **kwargs)
+        vectorized = BacktestEngine(signals, data, mode='vectorized', **kwargs)
+        return loop.run(), vectorized.run()
+
+    def assert_parity(self, loop_output, vectorized_output):
+        (loop_results, loop_metrics), (vec_results, vec_metrics) = loop_output, vectorized_output
+
+        pd.testing.assert_frame_equal(loop_results, vec_results, check_exact=False, rtol=1e-10)
+
+        for key, value in loop_metrics.items():
+            if key == 'trades':
+                continue
+            self.assertAlmostEqual(value, vec_metrics[key], places=9, msg=key)
+
+        loop_trades = loop_metrics['trades']
+        vec_trades = vec_metrics['trades']
+        self.assertEqual(len(loop_trades), len(vec_trades))
+        if len(loop_trades):
+            keys = ['date', 'asset']
+            loop_trades = loop_trades.sort_values(keys).reset_index(drop=True)
+            vec_trades = vec_trades.sort_values(keys).reset_index(drop=True)
+            pd.testing.assert_frame_equal(loop_trades, vec_trades, check_exact=False, rtol=1e-10)
+
+    def test_parity_random_signals(self):
+        """測試隨機信號下兩種模式一致"""
+        signals, data = make_market()
+        self.assert_parity(*self.run_both(signals, data))
+
+    def test_parity_with_costs(self):
+        """測試較高交易成本與滑點下兩種模式一致"""
+        signals, data = make_market(seed=11)
+        self.assert_parity(*self.run_both(signals, data, transaction_cost=0.001, slippage=0.0005))
+
+    def test_stop_loss_and_actions(self):
+        """測試停損、買入與賣出都被觸發"""
+        signals, data = make_market(seed=3)
+        (_, metrics), _ = self.run_both(signals, data)
+        actions = set(metrics['trades']['action'])
+        self.assertEqual(actions, {'buy', 'sell', 'stop_loss'})
+
+    def test_no_signal_keeps_capital(self):
+        """測試沒有信號時權益不變"""
+        signals, data = make_market()
+        signals[:] = 0
+        loop_output, vectorized_output = self.run_both(signals, data)
+        self.assert_parity(loop_output, vectorized_output)
+        self.assertTrue((vectorized_output[0]['equity_curve'] == 100000).all())
+        self.assertEqual(vectorized_output[1]['trade_count'], 0)
+
+    def test_unknown_mode(self):
+        """測試未知模式報錯"""
+        signals, data = make_market(n_days=10)
+        with self.assertRaises(ValueError):
+            BacktestEngine(signals, data, mode='fast')
+
+
+if __name__ == '__main__':
+    unittest.main()
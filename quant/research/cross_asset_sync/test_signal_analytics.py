@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+信號分析測試：累積和 / 批量排名結果與逐窗口 pandas 參考實現一致
+Author: Charlie
+Date: 2026-02-17
+"""
+
+import contextlib
+import io
+import sys
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import signal_analytics
+from trade_signal_generator import TradeSignalGenerator
+
+
+def make_returns(n_days=400, seed=7):
+    """NQ/GC/DX 合成回報率，含缺失值與一段常數"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2015-01-01', periods=n_days)
+    returns = pd.DataFrame(
+        rng.normal(0.0003, [0.018, 0.010, 0.005], (n_days, 3)), index=dates, columns=['NQ', 'GC', 'DX']
+    )
+    returns.iloc[rng.choice(n_days, 15, replace=False), 1] = np.nan
+    returns.iloc[:30, 2] = np.nan
+    returns.iloc[100:180, 2] = 0.001
+    return returns
+
+
+def ref_ic(signal, returns, window, method='pearson'):
+    """原逐窗口實現：第 k 個值為 [k, k + window) 的相關係數"""
+    ics = []
+    for i in range(window, len(signal)):
+        x, y = signal.iloc[i - window:i], returns.iloc[i - window:i]
+        if method == 'spearman':
+            pair = pd.DataFrame({'x': x, 'y': y}).dropna()
+            x, y = pair['x'].rank(), pair['y'].rank()
+        ics.append(x.corr(y))
+    return pd.Series(ics)
+
+
+class TestSignalAnalytics(unittest.TestCase):
+    """測試滾動相關與 IC"""
+
+    def setUp(self):
+        self.returns = make_returns()
+
+    def test_pairwise_correlation_matches_pandas(self):
+        corr = signal_analytics.rolling_pairwise_correlation(self.returns, window=60)
+        self.assertEqual(list(corr.columns), [('NQ', 'GC'), ('NQ', 'DX'), ('GC', 'DX')])
+        for a, b in corr.columns:
+            # pandas 在常數窗口可能給出 ±inf，只比較有限值
+            expected = self.returns[a].rolling(60).corr(self.returns[b])
+            expected = expected.where(np.isfinite(expected))
+            np.testing.assert_allclose(corr[(a, b)], expected, atol=1e-10, equal_nan=True)
+        # 常數窗口沒有相關係數
+        self.assertTrue(corr[('NQ', 'DX')].iloc[160:180].isna().all())
+        self.assertTrue(corr[('GC', 'DX')].iloc[160:180].isna().all())
+
+    def test_ic_matches_window_loop(self):
+        generator = TradeSignalGenerator(returns=self.returns)
+        signal = self.returns['NQ'].rolling(5).mean().shift(1)
+        target = self.returns['GC']
+        for method in signal_analytics.IC_METHODS:
+            ics = generator.calculate_ic(signal, target, window=40, method=method)
+            pd.testing.assert_series_equal(ics, ref_ic(signal, target, 40, method), atol=1e-10)
+
+    def test_rank_ic_with_ties(self):
+        """離散信號（大量相同值）使用平均排名"""
+        signal = np.sign(self.returns['NQ'].shift(1))
+        ics = signal_analytics.rolling_ic(signal, self.returns['NQ'], window=30,
+                                          method='spearman', min_periods=1)
+        expected = ref_ic(signal, self.returns['NQ'], 30, 'spearman')
+        np.testing.assert_allclose(ics.iloc[29:-1], expected, atol=1e-10, equal_nan=True)
+
+    def test_filter_signals_by_ic(self):
+        generator = TradeSignalGenerator(returns=self.returns)
+        signals = pd.Series(np.where(self.returns['NQ'] > 0, 1, 0), index=self.returns.index)
+        target = self.returns['NQ'].shift(-1)
+        filtered = generator.filter_signals_by_ic(signals, target, min_ic=0.05)
+
+        ics = ref_ic(signals, target, 60)
+        expected = signals.copy()
+        for i in range(60, len(signals)):
+            if ics.iloc[i - 60] < 0.05:
+                expected.iloc[i] = 0
+        pd.testing.assert_series_equal(filtered, expected)
+
+    def test_negative_correlation_signals(self):
+        generator = TradeSignalGenerator(returns=self.returns)
+        signals = generator.generate_negative_correlation_signals(correlation_window=40, threshold=0.2)
+
+        forward = generator.forward_returns(20)
+        expected = pd.Series(0, index=self.returns.index)
+        for i in range(45, len(self.returns)):
+            corr = generator.calculate_rolling_correlation(i, 40)
+            window = self.returns.iloc[i - 5:i]
+            if abs(corr) < 0.2 and window['NQ'].sum() < 0 and window['GC'].sum() < 0 and forward.iloc[i] > 0:
+                expected.iloc[i] = 1
+        self.assertGreater(expected.sum(), 0)
+        pd.testing.assert_series_equal(signals, expected)
+
+    def test_alpha_library_batch(self):
+        target = self.returns['NQ']
+        library = {
+            'lead': lambda r: r['NQ'] + 0.01 * np.random.default_rng(1).normal(size=len(r)),
+            'noise': lambda r: pd.Series(np.random.default_rng(2).normal(size=len(r)), index=r.index),
+            'momentum': lambda r: r['NQ'].rolling(10).sum().shift(1),
+        }
+        signals, summary = signal_analytics.evaluate_alpha_library(library, self.returns, window=60,
+                                                                   target=target)
+        self.assertEqual(list(summary.index), list(library))
+        for name in library:
+            ics = target.rolling(60).corr(signals[name])
+            self.assertAlmostEqual(summary.loc[name, 'mean_ic'], ics.mean(), places=10)
+            self.assertAlmostEqual(summary.loc[name, 'ir'], ics.mean() / ics.std(), places=8)
+
+        generator = TradeSignalGenerator(returns=self.returns)
+        with contextlib.redirect_stdout(io.StringIO()):
+            kept = generator.generate_alpha_signals(library, self.returns, min_ic=0.5)
+        self.assertEqual(list(kept.columns), ['lead'])
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            signal_analytics.rolling_ic(self.returns['NQ'], self.returns['GC'], method='kendall')
+
+
+if __name__ == '__main__':
+    unittest.main()
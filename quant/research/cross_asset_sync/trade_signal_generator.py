@@ -5,9 +5,16 @@ Author: Charlie
 Date: 2026-02-17
 """
 
+import sys
+from pathlib import Path
+
 import pandas as pd
 import numpy as np
 
+sys.path.insert(0, str(Path(__file__).parent))
+
+from signal_analytics import rolling_correlation, rolling_ic, target_returns
+
 
 class TradeSignalGenerator:
     """交易信號生成器"""
@@ -86,25 +93,22 @@ class TradeSignalGenerator:
         """
         signals = pd.Series(0, index=self.returns.index)
 
-        # 檢測負相關且同跌的點
-        for i in range(correlation_window + lookback, len(self.returns)):
-            # 獲取相關係數
-            corr = self.calculate_rolling_correlation(i, correlation_window)
-
-            # 檢查負相關
-            if abs(corr) < threshold:
-                # 獲取回報率
-                ret1 = self.returns.iloc[i-lookback:i].sum()
-                ret2 = self.returns.iloc[i-lookback:i].sum()
+        # 前兩個資產（只有一個資產時相關視為 0，兩腿為同一資產）
+        first = self.returns.iloc[:, 0]
+        second = self.returns.iloc[:, 1] if self.returns.shape[1] >= 2 else first
 
-                # 檢查同跌
-                if ret1 < 0 and ret2 < 0:
-                    # 計算 forward return
-                    forward_return = self.calculate_forward_return(i, 20)
+        # 第 i 天使用 [i - window, i) 的相關係數與 [i - lookback, i) 的累計回報
+        if self.returns.shape[1] >= 2:
+            corr = rolling_correlation(first, second, correlation_window, min_periods=1).shift(1)
+        else:
+            corr = pd.Series(0.0, index=self.returns.index)
+        ret1 = first.rolling(lookback, min_periods=1).sum().shift(1)
+        ret2 = second.rolling(lookback, min_periods=1).sum().shift(1)
 
-                    # 如果回報 > 0，發出信號
-                    if forward_return > 0:
-                        signals.iloc[i] = 1
+        # 低相關、同跌，且之後 20 天回報 > 0
+        triggered = (corr.abs() < threshold) & (ret1 < 0) & (ret2 < 0) & (self.forward_returns(20) > 0)
+        triggered.iloc[:correlation_window + lookback] = False
+        signals[triggered] = 1
 
         return signals
 
@@ -171,48 +175,61 @@ class TradeSignalGenerator:
 
         return corr.iloc[0, 1]
 
+    def forward_returns(self, days=20):
+        """
+        所有時點的 forward return
+
+        Args:
+            days: 天數
+
+        Returns:
+            Series: 第 i 天為之後 days 天（i+1 至 i+days）的複利回報；
+                    超出數據範圍時為 0
+        """
+        basket = target_returns(self.returns).fillna(0).values
+        wealth = np.cumprod(1 + basket)
+        forward = np.zeros(len(basket))
+        if len(basket) > days:
+            forward[:-days] = wealth[days:] / wealth[:-days] - 1
+        return pd.Series(forward, index=self.returns.index)
+
     def calculate_forward_return(self, index, days=20):
         """
         計算 forward return
 
         Args:
-            index: 當前索引
+            index: 當前索引（位置或日期）
             days: 天數
 
         Returns:
-            float: forward return
+            float: forward return（多資產時為等權籃子）
         """
-        if index + days <= self.returns.index[-1]:
-            forward_return = self.returns.iloc[index + days] / self.returns.iloc[index] - 1
-            return forward_return
-        else:
-            return 0
+        if not isinstance(index, (int, np.integer)):
+            index = self.returns.index.get_loc(index)
+        return self.forward_returns(days).iloc[index]
 
-    def calculate_ic(self, signals, returns, window=60):
+    def calculate_ic(self, signals, returns, window=60, method='pearson'):
         """
         計算信息係數（IC）
 
         Args:
-            signals: 信號序列
-            returns: 回報率序列
+            signals: 信號序列（或每欄一個信號的 DataFrame）
+            returns: 回報率序列（多資產時取等權籃子）
             window: 窗口期
+            method: 'pearson'（IC）或 'spearman'（rank IC）
 
         Returns:
-            Series: IC 序列
+            Series: IC 序列，第 k 個值為 [k, k + window) 的相關係數
         """
-        ics = []
-
-        for i in range(window, len(signals)):
-            current_signal = signals.iloc[i-window:i]
-            current_returns = returns.iloc[i-window:i]
-
-            # 計算相關係數
-            ic = current_signal.corr(current_returns)
-            ics.append(ic)
-
-        return pd.Series(ics)
-
-    def calculate_ir(self, signals, returns, window=60):
+        # 與信號按位置對齊
+        target = np.asarray(target_returns(returns), dtype=float)
+        ics = rolling_ic(signals, target, window, method, min_periods=1)
+        ics = ics.iloc[window - 1:-1].reset_index(drop=True)
+        if isinstance(ics, pd.Series):
+            ics.name = None
+        return ics
+
+    def calculate_ir(self, signals, returns, window=60, method='pearson'):
         """
         計算信息比率（IR）
 
@@ -220,11 +237,12 @@ class TradeSignalGenerator:
             signals: 信號序列
             returns: 回報率序列
             window: 窗口期
+            method: 'pearson'（IC）或 'spearman'（rank IC）
 
         Returns:
             float: IR
         """
-        ics = self.calculate_ic(signals, returns, window)
+        ics = self.calculate_ic(signals, returns, window, method)
 
         # 計算平均 IC 和標準差
         mean_ic = ics.mean()
@@ -238,7 +256,7 @@ class TradeSignalGenerator:
 
         return ir
 
-    def filter_signals_by_ic(self, signals, returns, min_ic=0.01):
+    def filter_signals_by_ic(self, signals, returns, min_ic=0.01, window=60, method='pearson'):
         """
         根據 IC 篩選信號
 
@@ -246,19 +264,21 @@ class TradeSignalGenerator:
             signals: 信號序列
             returns: 回報率序列
             min_ic: 最小 IC 閾值
+            window: IC 窗口期
+            method: 'pearson'（IC）或 'spearman'（rank IC）
 
         Returns:
             Series: 篩選後的信號
         """
         # 計算 IC
-        ics = self.calculate_ic(signals, returns)
+        ics = self.calculate_ic(signals, returns, window, method)
 
-        # 篩選高 IC 信號
-        high_ic_signals = signals.copy()
+        # 第 i 天使用 [i - window, i) 的 IC，低於閾值時清零
+        low_ic = np.zeros(len(signals), dtype=bool)
+        low_ic[window:] = ics.values < min_ic
 
-        for i in range(60, len(signals)):
-            if ics.iloc[i-60] < min_ic:
-                high_ic_signals.iloc[i] = 0
+        high_ic_signals = signals.copy()
+        high_ic_signals[low_ic] = 0
 
         return high_ic_signals
 
@@ -276,12 +296,7 @@ class TradeSignalGenerator:
         total_signals = signals.sum()
 
         # 計算平均回報
-        signal_returns = []
-
-        for i in range(len(signals)):
-            if signals.iloc[i] > 0:
-                forward_return = self.calculate_forward_return(i, 20)
-                signal_returns.append(forward_return)
+        signal_returns = self.forward_returns(20).values[signals.values > 0]
 
         avg_return = np.mean(signal_returns) if len(signal_returns) > 0 else 0
 
@@ -342,39 +357,37 @@ class TradeSignalGenerator:
         plt.savefig('signal_analysis.png', dpi=150)
         plt.close()
 
-    def generate_alpha_signals(self, alpha_library, returns, min_ic=0.01):
+    def generate_alpha_signals(self, alpha_library, returns, min_ic=0.01, method='pearson'):
         """
         生成 alpha 信號
 
+        所有 alpha 在同一份 returns 上生成後一次計算 IC。
+
         Args:
             alpha_library: Alpha 函數庫
             returns: 回報率序列
             min_ic: 最小 IC 閾值
+            method: 'pearson'（IC）或 'spearman'（rank IC）
 
         Returns:
             DataFrame: 所有 alpha 信號
         """
-        alpha_signals = pd.DataFrame()
-
-        for alpha_name, alpha_func in alpha_library.items():
-            print(f"  生成 {alpha_name} 信號...")
-            alpha_signal = alpha_func(returns)
-            alpha_signals[alpha_name] = alpha_signal
-
-            # 計算 IC
-            ic = self.calculate_ic(alpha_signal, returns)
-            mean_ic = ic.mean()
+        print(f"  生成 {len(alpha_library)} 個 alpha 信號...")
+        alpha_signals = pd.DataFrame({name: alpha(returns) for name, alpha in alpha_library.items()})
+        mean_ics = self.calculate_ic(alpha_signals, returns, method=method).mean()
 
-            print(f"    平均 IC: {mean_ic:.3f}")
+        kept = []
+        for alpha_name, mean_ic in mean_ics.items():
+            print(f"    {alpha_name} 平均 IC: {mean_ic:.3f}")
 
             # 如果 IC > min_ic，保留信號
             if mean_ic >= min_ic:
                 print(f"    ✓ 保留 {alpha_name} 信號")
+                kept.append(alpha_name)
             else:
                 print(f"    ✗ 跳過 {alpha_name} 信號（IC 低）")
-                alpha_signals.drop(columns=[alpha_name], inplace=True)
 
-        return alpha_signals
+        return alpha_signals[kept]
 
 
 if __name__ == '__main__':
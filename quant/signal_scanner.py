@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Supertrend 訊號掃描服務（增量）
+
+每檔股票在 supertrend_scan_state.json 中保存滾動的指標狀態（indicators.SupertrendState），
+每次掃描只讀取上次之後的新 bar 推進狀態，不再每次重算一整年的歷史。
+
+- 最後一根 bar 可能在收盤前被讀到，因此同時保存「最後一根 bar 之前」的狀態，
+  下次掃描從那裡重新套用最後一根 bar（數據被修正時結果也正確）
+- 數據來源：
+  - LakeSource：本地 OHLCV 數據湖（market_data_store），只讀磁盤，不訪問網絡
+  - DashboardSource：Dashboard 歷史 API。已有狀態的股票只請求最近幾天；
+    請求通過共用連接池的異步客戶端（httpx.AsyncClient）發出，並發數有上限；
+    沒有安裝 httpx 時退回線程池 + requests.Session
+- 指標參數變化時自動丟棄舊狀態重新預熱
+
+用法：
+    python3 signal_scanner.py scan 2330.TW 2317.TW [--source lake|dashboard] [--reset]
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from indicators import SupertrendState
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATE_FILE = Path.home() / '.openclaw' / 'workspace' / 'quant' / 'data' / 'supertrend_scan_state.json'
+BOOTSTRAP_DAYS = 365          # 沒有狀態時讀取的歷史長度（預熱）
+CATCH_UP_MARGIN_DAYS = 3      # 增量請求額外多取的天數（週末、假日）
+DEFAULT_CONCURRENCY = 16
+DEFAULT_TIMEOUT = 5.0
+
+# 每個來源返回：{symbol: DataFrame(high, low, close)}，以及 {symbol: 錯誤訊息}
+FetchResult = Tuple[Dict[str, pd.DataFrame], Dict[str, str]]
+
+
+def to_bars(data) -> pd.DataFrame:
+    """統一成以 Timestamp 為索引、high / low / close 三列的 DataFrame"""
+    df = pd.DataFrame(data)
+    if df.empty:
+        return pd.DataFrame(columns=['high', 'low', 'close'], dtype=float)
+    df = df.rename(columns=str.lower)
+    if 'trade_date' in df.columns:
+        df = df.set_index('trade_date')
+    elif 'date' in df.columns:
+        df = df.set_index('date')
+    missing = {'high', 'low', 'close'} - set(df.columns)
+    if missing:
+        raise ValueError(f"missing fields: {', '.join(sorted(missing))}")
+    df.index = pd.to_datetime(df.index)
+    df = df[['high', 'low', 'close']].astype(float).dropna().sort_index()
+    return df[~df.index.duplicated(keep='last')]
+
+
+class LakeSource:
+    """從本地 OHLCV 數據湖讀取 bar（只讀磁盤）"""
+
+    def __init__(self, store=None):
+        if store is None:
+            from market_data_store import get_store
+            store = get_store(offline=True)
+        self.store = store
+
+    def fetch(self, plan: Dict[str, Optional[pd.Timestamp]]) -> FetchResult:
+        """
+        Args:
+            plan: {symbol: 起始日期（含）}；None 表示讀取本地最後 BOOTSTRAP_DAYS 天
+        """
+        bars, errors = {}, {}
+        for symbol, since in plan.items():
+            try:
+                df = to_bars(self.store.read(symbol, start=since))
+            except Exception as e:
+                errors[symbol] = str(e)[:50]
+                continue
+            if since is None and len(df):
+                df = df[df.index > df.index[-1] - pd.Timedelta(days=BOOTSTRAP_DAYS)]
+            bars[symbol] = df
+        return bars, errors
+
+
+class DashboardSource:
+    """從 Dashboard 歷史 API 讀取 bar（異步連接池，並發有上限）"""
+
+    def __init__(self, base_url: str, headers: Optional[Dict[str, str]] = None, market: str = 'TW',
+                 max_concurrency: int = DEFAULT_CONCURRENCY, timeout: float = DEFAULT_TIMEOUT):
+        self.base_url = base_url.rstrip('/')
+        self.headers = headers or {}
+        self.market = market
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+
+    def _request(self, symbol: str, since: Optional[pd.Timestamp]) -> Tuple[str, dict]:
+        """請求路徑和參數：有狀態時只取最近幾天"""
+        if since is None:
+            days = BOOTSTRAP_DAYS
+        else:
+            days = max((pd.Timestamp.now().normalize() - since).days, 0) + CATCH_UP_MARGIN_DAYS
+        stock_code = symbol.split('.')[0]
+        return f"/api/stocks/{stock_code}/history", {'market': self.market, 'days': days}
+
+    @staticmethod
+    def _parse(status_code: int, payload, since: Optional[pd.Timestamp]) -> pd.DataFrame:
+        if status_code != 200:
+            raise ValueError(f"API Error: {status_code}")
+        if not payload:
+            raise ValueError("No data")
+        bars = to_bars(payload)
+        return bars if since is None else bars[bars.index >= since]
+
+    async def _fetch_async(self, plan) -> FetchResult:
+        limits = httpx.Limits(max_connections=self.max_concurrency,
+                              max_keepalive_connections=self.max_concurrency)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        bars, errors = {}, {}
+
+        async with httpx.AsyncClient(base_url=self.base_url, headers=self.headers,
+                                     timeout=self.timeout, limits=limits) as client:
+            async def fetch_one(symbol, since):
+                path, params = self._request(symbol, since)
+                try:
+                    async with semaphore:
+                        response = await client.get(path, params=params)
+                    bars[symbol] = self._parse(response.status_code, response.json(), since)
+                except httpx.TimeoutException:
+                    errors[symbol] = "Timeout"
+                except Exception as e:
+                    errors[symbol] = str(e)[:50]
+
+            await asyncio.gather(*(fetch_one(symbol, since) for symbol, since in plan.items()))
+        return bars, errors
+
+    def _fetch_threaded(self, plan) -> FetchResult:
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        bars, errors = {}, {}
+        with requests.Session() as session:
+            session.mount('http://', HTTPAdapter(pool_maxsize=self.max_concurrency))
+            session.mount('https://', HTTPAdapter(pool_maxsize=self.max_concurrency))
+            session.headers.update(self.headers)
+
+            def fetch_one(item):
+                symbol, since = item
+                path, params = self._request(symbol, since)
+                try:
+                    response = session.get(self.base_url + path, params=params, timeout=self.timeout)
+                    bars[symbol] = self._parse(response.status_code, response.json(), since)
+                except requests.Timeout:
+                    errors[symbol] = "Timeout"
+                except Exception as e:
+                    errors[symbol] = str(e)[:50]
+
+            with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+                list(pool.map(fetch_one, plan.items()))
+        return bars, errors
+
+    def fetch(self, plan: Dict[str, Optional[pd.Timestamp]]) -> FetchResult:
+        if not plan:
+            return {}, {}
+        if HTTPX_AVAILABLE:
+            return asyncio.run(self._fetch_async(plan))
+        return self._fetch_threaded(plan)
+
+
+class SupertrendScanner:
+    """增量 Supertrend 掃描器"""
+
+    def __init__(self, symbols: List[str], source, state_path: Optional[Path] = None,
+                 period: int = 10, multiplier: float = 3.0, atr_method: str = 'wilder'):
+        self.symbols = list(symbols)
+        self.source = source
+        self.state_path = Path(state_path or DEFAULT_STATE_FILE)
+        self.config = {'period': period, 'multiplier': multiplier, 'atr_method': atr_method}
+        self.state = self._load_state()
+
+    # ------------------------------------------------------------------
+    # 狀態文件
+    # ------------------------------------------------------------------
+
+    def _load_state(self) -> Dict:
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get('config') == self.config:
+                return state
+            logger.info("指標參數已變化，重新預熱")
+        except (OSError, ValueError):
+            pass
+        return {'config': self.config, 'symbols': {}}
+
+    def _save_state(self):
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.state_path.parent, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.state_path)
+
+    def reset(self):
+        """丟棄所有狀態（下次掃描重新預熱）"""
+        self.state = {'config': self.config, 'symbols': {}}
+        self._save_state()
+
+    # ------------------------------------------------------------------
+    # 掃描
+    # ------------------------------------------------------------------
+
+    def update(self) -> Dict[str, str]:
+        """
+        讀取新 bar 並推進狀態
+
+        Returns:
+            {symbol: 錯誤訊息}
+        """
+        entries = self.state['symbols']
+        plan = {
+            symbol: pd.Timestamp(entries[symbol]['last_date']) if symbol in entries else None
+            for symbol in self.symbols
+        }
+        bars, errors = self.source.fetch(plan)
+        bars = {symbol: df for symbol, df in bars.items() if len(df)}
+        if not bars:
+            return errors
+
+        # 對齊成 日期 × 股票 面板；從「最後一根 bar 之前」的狀態重新推進
+        symbols = list(bars)
+        high = pd.DataFrame({s: bars[s]['high'] for s in symbols}).sort_index()
+        low = pd.DataFrame({s: bars[s]['low'] for s in symbols}).reindex(high.index)
+        close = pd.DataFrame({s: bars[s]['close'] for s in symbols}).reindex(high.index)
+
+        st = SupertrendState.from_records(
+            [entries.get(s, {}).get('base') for s in symbols], **self.config
+        )
+        last_row = close.notna().values[::-1].argmax(axis=0)
+        last_row = len(close) - 1 - last_row
+        base = [None] * len(symbols)
+
+        for i, (h, l, c) in enumerate(zip(high.values, low.values, close.values)):
+            for col in np.flatnonzero(last_row == i):
+                base[col] = st.record(col)
+            st.update(h, l, c)
+
+        for col, symbol in enumerate(symbols):
+            entries[symbol] = {
+                'last_date': close.index[last_row[col]].strftime('%Y-%m-%d'),
+                'base': base[col],
+                'latest': st.record(col),
+                'updated_at': datetime.now().isoformat(),
+            }
+        self._save_state()
+        return errors
+
+    def signals(self) -> List[Dict]:
+        """每檔股票最新的訊號（來自保存的狀態）"""
+        results = []
+        for symbol in self.symbols:
+            stock_code = symbol.split('.')[0]
+            entry = self.state['symbols'].get(symbol)
+            if entry is None:
+                results.append({'symbol': stock_code, 'error': 'No data'})
+                continue
+
+            latest = SupertrendState.from_records([entry['latest']], **self.config)
+            direction = latest.direction[0]
+            if np.isnan(direction):
+                results.append({'symbol': stock_code, 'error': 'No Supertrend data'})
+                continue
+
+            # SUPERTd = 1 表示看漲，SUPERTd = -1 表示看跌
+            results.append({
+                'symbol': stock_code,
+                'date': entry['last_date'],
+                'close': float(latest.prev_close[0]),
+                'supertrend': float(latest.trend[0]),
+                'signal': 'BUY' if direction > 0 else 'SELL',
+                'direction': int(direction),
+            })
+        return results
+
+    def scan(self) -> Dict:
+        """更新狀態並彙總訊號（格式與 check_supertrend_signals_batch 的輸出相同）"""
+        started = time.monotonic()
+        errors = self.update()
+
+        results = {
+            'buy_signals': [],
+            'sell_signals': [],
+            'errors': [{'symbol': symbol.split('.')[0], 'error': error} for symbol, error in errors.items()],
+            'summary': {'total': len(self.symbols), 'buy': 0, 'sell': 0, 'error': 0},
+            'checked_at': None,
+        }
+        failed = {item['symbol'] for item in results['errors']}
+        for result in self.signals():
+            if result['symbol'] in failed:
+                continue
+            if 'error' in result:
+                results['errors'].append(result)
+            elif result['signal'] == 'BUY':
+                results['buy_signals'].append(result)
+            else:
+                results['sell_signals'].append(result)
+
+        results['summary']['buy'] = len(results['buy_signals'])
+        results['summary']['sell'] = len(results['sell_signals'])
+        results['summary']['error'] = len(results['errors'])
+        results['checked_at'] = datetime.now().isoformat()
+        results['elapsed_seconds'] = round(time.monotonic() - started, 3)
+        return results
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='增量 Supertrend 訊號掃描')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    scan = subparsers.add_parser('scan', help='更新狀態並輸出訊號')
+    scan.add_argument('symbols', nargs='+')
+    scan.add_argument('--source', choices=['lake', 'dashboard'], default='lake')
+    scan.add_argument('--base-url', default='http://localhost:8000')
+    scan.add_argument('--state', type=Path, default=None)
+    scan.add_argument('--reset', action='store_true', help='丟棄已保存的狀態')
+    args = parser.parse_args()
+
+    source = LakeSource() if args.source == 'lake' else DashboardSource(args.base_url)
+    scanner = SupertrendScanner(args.symbols, source, state_path=args.state)
+    if args.reset:
+        scanner.reset()
+    print(json.dumps(scanner.scan(), indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
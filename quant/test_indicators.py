@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+共用指標內核測試：2-D 批量結果與逐 bar 的單股票參考實現逐一對比
+"""
+
+import json
+import math
+import sys
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import indicators
+
+
+# ----------------------------------------------------------------------
+# 參考實現（純 Python，逐 bar，一次一檔股票，不含 NaN 前綴）
+# ----------------------------------------------------------------------
+
+def ref_true_range(high, low, close):
+    tr = [high[0] - low[0]]
+    for i in range(1, len(close)):
+        tr.append(max(high[i] - low[i], abs(high[i] - close[i - 1]), abs(low[i] - close[i - 1])))
+    return tr
+
+
+def ref_sma(values, period):
+    out = [math.nan] * len(values)
+    for i in range(period - 1, len(values)):
+        out[i] = sum(values[i - period + 1:i + 1]) / period
+    return out
+
+
+def ref_wilder(values, period, start=0):
+    """Wilder 平滑：前 period 個值取平均，之後 (prev * (n - 1) + x) / n"""
+    out = [math.nan] * len(values)
+    seed = start + period - 1
+    if seed >= len(values):
+        return out
+    out[seed] = sum(values[start:seed + 1]) / period
+    for i in range(seed + 1, len(values)):
+        out[i] = (out[i - 1] * (period - 1) + values[i]) / period
+    return out
+
+
+def ref_smooth(values, period, method, start=0):
+    if method == 'wilder':
+        return ref_wilder(values, period, start)
+    out = [math.nan] * start + ref_sma(values[start:], period)
+    return out
+
+
+def ref_ema(values, period):
+    alpha = 2 / (period + 1)
+    out = [math.nan] * len(values)
+    out[period - 1] = sum(values[:period]) / period
+    for i in range(period, len(values)):
+        out[i] = alpha * values[i] + (1 - alpha) * out[i - 1]
+    return out
+
+
+def ref_adx(high, low, close, period, method):
+    n = len(close)
+    tr = ref_true_range(high, low, close)
+    plus_dm, minus_dm = [math.nan], [math.nan]
+    for i in range(1, n):
+        up, down = high[i] - high[i - 1], low[i - 1] - low[i]
+        plus_dm.append(up if up > down and up > 0 else 0.0)
+        minus_dm.append(down if down > up and down > 0 else 0.0)
+
+    atr = ref_smooth(tr, period, method, start=1)
+    plus_s = ref_smooth(plus_dm, period, method, start=1)
+    minus_s = ref_smooth(minus_dm, period, method, start=1)
+    plus_di, minus_di, dx = [], [], []
+    for i in range(n):
+        if math.isnan(atr[i]):
+            plus_di.append(math.nan)
+            minus_di.append(math.nan)
+            dx.append(math.nan)
+            continue
+        p = 100 * plus_s[i] / atr[i] if atr[i] else 0.0
+        m = 100 * minus_s[i] / atr[i] if atr[i] else 0.0
+        plus_di.append(p)
+        minus_di.append(m)
+        dx.append(100 * abs(p - m) / (p + m) if p + m else 0.0)
+    first_dx = next(i for i, v in enumerate(dx) if not math.isnan(v))
+    return ref_smooth(dx, period, method, start=first_dx), plus_di, minus_di
+
+
+def ref_supertrend(high, low, close, period, multiplier, method):
+    """pandas_ta.supertrend 的逐 bar 規則"""
+    n = len(close)
+    atr = ref_smooth(ref_true_range(high, low, close), period, method)
+    upper = [(high[i] + low[i]) / 2 + multiplier * atr[i] for i in range(n)]
+    lower = [(high[i] + low[i]) / 2 - multiplier * atr[i] for i in range(n)]
+    direction = [1] * n
+    trend = [math.nan] * n
+    trend[0] = lower[0]
+    for i in range(1, n):
+        if close[i] > upper[i - 1]:
+            direction[i] = 1
+        elif close[i] < lower[i - 1]:
+            direction[i] = -1
+        else:
+            direction[i] = direction[i - 1]
+            if direction[i] > 0 and lower[i] < lower[i - 1]:
+                lower[i] = lower[i - 1]
+            if direction[i] < 0 and upper[i] > upper[i - 1]:
+                upper[i] = upper[i - 1]
+        trend[i] = lower[i] if direction[i] > 0 else upper[i]
+    direction = [math.nan if math.isnan(t) else d for t, d in zip(trend, direction)]
+    return trend, direction
+
+
+def make_panel(n_bars=300, starts=(0, 25, 80), seed=7):
+    """隨機遊走 OHLC；各股票從不同 bar 開始（之前為 NaN）"""
+    rng = np.random.default_rng(seed)
+    shape = (n_bars, len(starts))
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, shape), axis=0))
+    high = close * (1 + rng.uniform(0, 0.03, shape))
+    low = close * (1 - rng.uniform(0, 0.03, shape))
+    for col, start in enumerate(starts):
+        high[:start, col] = low[:start, col] = close[:start, col] = np.nan
+    return high, low, close
+
+
+class TestIndicatorKernels(unittest.TestCase):
+    """測試 2-D 內核與參考實現一致"""
+
+    def setUp(self):
+        self.starts = (0, 25, 80)
+        self.high, self.low, self.close = make_panel(starts=self.starts)
+
+    def columns(self):
+        for col, start in enumerate(self.starts):
+            yield col, start, (
+                list(self.high[start:, col]), list(self.low[start:, col]), list(self.close[start:, col])
+            )
+
+    def assert_column(self, actual, col, start, expected):
+        self.assertTrue(np.isnan(actual[:start, col]).all())
+        np.testing.assert_allclose(actual[start:, col], np.array(expected, dtype=float),
+                                   rtol=1e-9, atol=1e-9, equal_nan=True)
+
+    def test_true_range_does_not_wrap(self):
+        """第一根 bar 的真實波幅是 high - low，不使用最後一根 bar 的收盤"""
+        high = np.array([10.0, 11.0, 12.0])
+        low = np.array([9.0, 10.0, 11.0])
+        close = np.array([9.5, 10.5, 100.0])
+        np.testing.assert_allclose(indicators.true_range(high, low, close), [1.0, 1.5, 1.5])
+
+    def test_atr_matches_reference(self):
+        for method in indicators.ATR_METHODS:
+            result = indicators.atr(self.high, self.low, self.close, period=14, method=method)
+            for col, start, (h, l, c) in self.columns():
+                self.assert_column(result, col, start, ref_smooth(ref_true_range(h, l, c), 14, method))
+
+    def test_moving_averages_match_reference(self):
+        sma = indicators.sma(self.close, 20)
+        ema = indicators.ema(self.close, 20)
+        for col, start, (_, _, c) in self.columns():
+            self.assert_column(sma, col, start, ref_sma(c, 20))
+            self.assert_column(ema, col, start, ref_ema(c, 20))
+
+        above = indicators.ma_filter(self.close, 20)
+        self.assertEqual(above.dtype, bool)
+        self.assertFalse(above[:self.starts[2] + 19, 2].any())
+
+    def test_adx_matches_reference(self):
+        for method in indicators.ATR_METHODS:
+            result = indicators.adx(self.high, self.low, self.close, period=14, method=method)
+            for col, start, (h, l, c) in self.columns():
+                adx, plus_di, minus_di = ref_adx(h, l, c, 14, method)
+                self.assert_column(result.adx, col, start, adx)
+                self.assert_column(result.plus_di, col, start, plus_di)
+                self.assert_column(result.minus_di, col, start, minus_di)
+
+    def test_supertrend_matches_reference(self):
+        for method in indicators.ATR_METHODS:
+            result = indicators.supertrend(self.high, self.low, self.close, 10, 3.0, atr_method=method)
+            for col, start, (h, l, c) in self.columns():
+                trend, direction = ref_supertrend(h, l, c, 10, 3.0, method)
+                self.assert_column(result.trend, col, start, trend)
+                self.assert_column(result.direction, col, start, direction)
+            self.assertTrue(np.isin(result.direction[~np.isnan(result.direction)], (-1, 1)).all())
+            np.testing.assert_array_equal(np.isnan(result.long), ~(result.direction > 0))
+
+    def test_incremental_state_matches_batch(self):
+        """逐 bar 推進（中途序列化再恢復）與批量計算一致"""
+        for method in indicators.ATR_METHODS:
+            batch = indicators.supertrend(self.high, self.low, self.close, 10, 3.0, atr_method=method)
+            state = indicators.SupertrendState(self.close.shape[1], 10, 3.0, atr_method=method)
+            for i in range(len(self.close)):
+                if i == 150:
+                    records = [state.record(col) for col in range(self.close.shape[1])]
+                    records = json.loads(json.dumps(records))
+                    state = indicators.SupertrendState.from_records(records, 10, 3.0, atr_method=method)
+                state.update(self.high[i], self.low[i], self.close[i])
+                np.testing.assert_allclose(state.trend, batch.trend[i], rtol=1e-9, equal_nan=True)
+                np.testing.assert_array_equal(state.direction, batch.direction[i])
+
+    def test_pandas_shapes_are_preserved(self):
+        """DataFrame 輸入返回 DataFrame，Series 輸入返回 Series，單檔結果與面板中的對應列一致"""
+        index = pd.date_range('2025-01-01', periods=len(self.close), freq='B')
+        frames = [pd.DataFrame(a, index=index, columns=['A', 'B', 'C']) for a in (self.high, self.low, self.close)]
+        panel = indicators.supertrend(*frames)
+        self.assertIsInstance(panel.direction, pd.DataFrame)
+        self.assertEqual(list(panel.direction.columns), ['A', 'B', 'C'])
+
+        single = indicators.supertrend(frames[0]['B'], frames[1]['B'], frames[2]['B'])
+        self.assertIsInstance(single.trend, pd.Series)
+        pd.testing.assert_series_equal(single.trend, panel.trend['B'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+本地 OHLCV 數據湖測試（使用 fixtures/market_data 中錄製的行情，不訪問網絡）
+"""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import market_data_store
+from market_data_store import (
+    PRICE_COLUMNS, MarketDataStore, ReplayFetcher, adjust_ohlc, period_to_start
+)
+
+FIXTURES = Path(__file__).parent / 'fixtures' / 'market_data'
+
+
+class TestMarketDataStore(unittest.TestCase):
+    """測試分區存儲、增量補抓與離線模式"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.fetcher = ReplayFetcher(FIXTURES)
+        self.recorded = pd.read_csv(FIXTURES / 'QQQ.csv', index_col='Date', parse_dates=True)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def open_store(self, offline=False):
+        return MarketDataStore(self.tmpdir.name, fetcher=self.fetcher, offline=offline)
+
+    def test_first_load_partitions_by_year(self):
+        """測試首次載入按年份分區並寫入 manifest"""
+        store = self.open_store()
+        data = store.load('QQQ', start='2023-11-01', end='2024-02-29')
+
+        self.assertEqual(len(data), len(self.recorded))
+        np.testing.assert_allclose(data['Close'].values, self.recorded['Close'].values)
+        self.assertEqual(store._years('QQQ'), [2023, 2024])
+
+        entry = MarketDataStore(self.tmpdir.name, offline=True).coverage('QQQ')
+        self.assertEqual(entry['first_date'], '2023-11-01')
+        self.assertEqual(entry['fetched_through'], '2024-02-29')
+        self.assertEqual(entry['rows'], len(self.recorded))
+
+    def test_incremental_tail_and_head(self):
+        """測試只補抓缺少的尾部與頭部"""
+        store = self.open_store()
+        store.load('QQQ', start='2023-12-01', end='2024-01-15')
+        self.fetcher.calls.clear()
+
+        # 已覆蓋的區間不再下載
+        store.load('QQQ', start='2023-12-01', end='2024-01-10')
+        self.assertEqual(self.fetcher.calls, [])
+
+        # 只補抓尾部（從倒數第二個已存交易日開始，重疊一根已收盤 K 線）
+        data = store.load('QQQ', start='2023-12-01', end='2024-02-29')
+        self.assertEqual(len(self.fetcher.calls), 1)
+        _, fetch_start, fetch_end = self.fetcher.calls[0]
+        self.assertEqual(fetch_start, pd.Timestamp('2024-01-11'))
+        self.assertEqual(fetch_end, pd.Timestamp('2024-02-29'))
+        self.assertEqual(data.index[-1], pd.Timestamp('2024-02-29'))
+
+        # 更早的頭部只抓缺少的那段
+        self.fetcher.calls.clear()
+        store.load('QQQ', start='2023-11-01', end='2024-02-29')
+        self.assertEqual(
+            self.fetcher.calls,
+            [('QQQ', pd.Timestamp('2023-11-01'), pd.Timestamp('2023-11-30'))]
+        )
+        self.assertEqual(len(store.read('QQQ')), len(self.recorded))
+
+    def test_adjusted_history_is_refetched(self):
+        """測試重疊 K 線價格改變（拆股）時重新下載完整歷史"""
+        store = self.open_store()
+        store.load('QQQ', start='2023-12-01', end='2024-01-15')
+        self.fetcher.calls.clear()
+
+        # 1 拆 2：數據源回傳的整段歷史價格減半、成交量加倍
+        replay = self.fetcher
+
+        def split_fetcher(symbol, start, end):
+            data = replay(symbol, start, end)
+            data[PRICE_COLUMNS + ['Adj Close']] /= 2
+            data['Volume'] *= 2
+            return data
+
+        store.fetcher = split_fetcher
+        data = store.load('QQQ', start='2023-12-01', end='2024-02-29')
+        self.assertEqual(
+            [call[1:] for call in replay.calls],
+            [(pd.Timestamp('2024-01-11'), pd.Timestamp('2024-02-29')),
+             (pd.Timestamp('2023-12-01'), pd.Timestamp('2024-02-29'))]
+        )
+        expected = self.recorded.loc['2023-12-01':'2024-02-29', 'Close'] / 2
+        np.testing.assert_allclose(data['Close'].values, expected.values)
+        self.assertEqual(store.coverage('QQQ')['rows'], len(expected))
+
+    def test_offline_serves_from_disk(self):
+        """測試離線模式不調用下載函數"""
+        self.open_store().load('GLD', start='2023-11-01', end='2024-01-31')
+        self.fetcher.calls.clear()
+
+        offline = self.open_store(offline=True)
+        data = offline.load('GLD', start='2023-11-01', end='2024-02-29')
+        self.assertEqual(self.fetcher.calls, [])
+        self.assertEqual(data.index[-1], pd.Timestamp('2024-01-31'))
+        self.assertTrue(offline.load('SPY').empty)
+
+    def test_download_matches_yfinance_shape(self):
+        """測試 download 的列結構與 yf.download 相同"""
+        store = self.open_store()
+        panel = store.download(['QQQ', 'GLD'], start='2024-01-01', end='2024-01-31')
+        self.assertEqual(list(panel['Close'].columns), ['GLD', 'QQQ'])
+        self.assertNotIn('Adj Close', panel.columns.get_level_values(0))
+
+        single = store.download('QQQ', start='2024-01-01', end='2024-01-31')
+        self.assertIsInstance(single['Close'], pd.Series)
+
+    def test_auto_adjust(self):
+        """測試按 Adj Close 比例調整 OHLC"""
+        data = self.recorded.iloc[:3].copy()
+        data['Adj Close'] = data['Close'] * 0.5
+        adjusted = adjust_ohlc(data)
+        np.testing.assert_allclose(adjusted['Open'], data['Open'] * 0.5)
+        np.testing.assert_allclose(adjusted['Volume'], data['Volume'])
+
+    def test_csv_fallback(self):
+        """測試沒有 pyarrow 時使用 CSV 分區"""
+        available = market_data_store.PARQUET_AVAILABLE
+        market_data_store.PARQUET_AVAILABLE = False
+        try:
+            store = self.open_store()
+            store.load('QQQ', start='2024-01-01', end='2024-01-31')
+            self.assertTrue((Path(self.tmpdir.name) / 'yfinance' / 'QQQ' / '2024.csv').exists())
+            self.assertEqual(len(store.read('QQQ')), 21)
+        finally:
+            market_data_store.PARQUET_AVAILABLE = available
+
+    def test_period_to_start(self):
+        """測試 yfinance 風格 period 轉換"""
+        self.assertEqual(period_to_start('2y', '2024-03-15'), pd.Timestamp('2022-03-15'))
+        self.assertEqual(period_to_start('6mo', '2024-03-15'), pd.Timestamp('2023-09-15'))
+        self.assertIsNone(period_to_start('max'))
+        with self.assertRaises(ValueError):
+            period_to_start('ytd')
+
+
+if __name__ == '__main__':
+    unittest.main()
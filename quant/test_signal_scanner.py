@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+增量 Supertrend 掃描器測試（數據湖使用 fixtures/market_data 回放，不訪問網絡）
+"""
+
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import indicators
+from market_data_store import MarketDataStore, ReplayFetcher
+from signal_scanner import LakeSource, SupertrendScanner
+
+FIXTURES = Path(__file__).parent / 'fixtures' / 'market_data'
+SYMBOLS = ['QQQ', 'GLD']
+
+
+class FrameSource:
+    """內存數據來源：返回 since（含）之後的 bar，並記錄每次請求"""
+
+    def __init__(self, frames):
+        self.frames = frames
+        self.plans = []
+
+    def fetch(self, plan):
+        self.plans.append(dict(plan))
+        bars = {}
+        for symbol, since in plan.items():
+            df = self.frames[symbol]
+            bars[symbol] = df if since is None else df[df.index >= since]
+        return bars, {}
+
+
+def batch_signal(df, period=10, multiplier=3.0):
+    """對整段歷史批量計算，返回最後一根 bar 的 (direction, supertrend)"""
+    st = indicators.supertrend(df['high'], df['low'], df['close'], period, multiplier)
+    return int(st.direction.iloc[-1]), float(st.trend.iloc[-1])
+
+
+class TestSupertrendScanner(unittest.TestCase):
+    """測試增量掃描與批量計算一致"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.state_path = Path(self.tmpdir.name) / 'state.json'
+        recorded = {
+            symbol: pd.read_csv(FIXTURES / f'{symbol}.csv', index_col='Date', parse_dates=True)
+            for symbol in SYMBOLS
+        }
+        self.frames = {
+            symbol: df[['High', 'Low', 'Close']].rename(columns=str.lower)
+            for symbol, df in recorded.items()
+        }
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def assert_matches_batch(self, results, frames):
+        signals = {s['symbol']: s for s in results['buy_signals'] + results['sell_signals']}
+        self.assertEqual(set(signals), set(frames))
+        for symbol, df in frames.items():
+            direction, trend = batch_signal(df)
+            self.assertEqual(signals[symbol]['direction'], direction)
+            self.assertAlmostEqual(signals[symbol]['supertrend'], trend, places=9)
+            self.assertEqual(signals[symbol]['date'], df.index[-1].strftime('%Y-%m-%d'))
+
+    def test_lake_scan_is_incremental(self):
+        """數據湖補抓新數據後，掃描只推進新 bar，結果與全量重算相同"""
+        store = MarketDataStore(Path(self.tmpdir.name) / 'lake', fetcher=ReplayFetcher(FIXTURES))
+        for symbol in SYMBOLS:
+            store.load(symbol, start='2023-11-01', end='2024-01-15')
+
+        scanner = SupertrendScanner(SYMBOLS, LakeSource(store), state_path=self.state_path)
+        results = scanner.scan()
+        self.assertEqual(results['summary']['error'], 0)
+        self.assert_matches_batch(results, {s: df.loc[:'2024-01-15'] for s, df in self.frames.items()})
+
+        for symbol in SYMBOLS:
+            store.load(symbol, start='2023-11-01', end='2024-02-29')
+        scanner = SupertrendScanner(SYMBOLS, LakeSource(store), state_path=self.state_path)
+        self.assert_matches_batch(scanner.scan(), self.frames)
+
+    def test_only_new_bars_are_requested_and_last_bar_is_reapplied(self):
+        """有狀態時從最後一根 bar 起請求；最後一根 bar 被修正時以修正後的數據為準"""
+        partial = {s: df.iloc[:60].copy() for s, df in self.frames.items()}
+        source = FrameSource(partial)
+        scanner = SupertrendScanner(SYMBOLS, source, state_path=self.state_path)
+        scanner.scan()
+        self.assertEqual(source.plans[-1], {s: None for s in SYMBOLS})
+
+        # 收盤後最後一根 bar 被修正
+        partial['QQQ'].iloc[-1] = partial['QQQ'].iloc[-1] * 0.9
+        source = FrameSource(partial)
+        scanner = SupertrendScanner(SYMBOLS, source, state_path=self.state_path)
+        self.assert_matches_batch(scanner.scan(), partial)
+        self.assertEqual(source.plans[-1]['QQQ'], partial['QQQ'].index[-1])
+
+        source = FrameSource(self.frames)
+        scanner = SupertrendScanner(SYMBOLS, source, state_path=self.state_path)
+        self.assert_matches_batch(scanner.scan(), self.frames)
+
+    def test_config_change_resets_state(self):
+        """指標參數變化時重新預熱"""
+        SupertrendScanner(SYMBOLS, FrameSource(self.frames), state_path=self.state_path).scan()
+        source = FrameSource(self.frames)
+        scanner = SupertrendScanner(SYMBOLS, source, state_path=self.state_path, multiplier=2.0)
+        results = scanner.scan()
+        self.assertEqual(source.plans[-1], {s: None for s in SYMBOLS})
+
+        signals = {s['symbol']: s for s in results['buy_signals'] + results['sell_signals']}
+        direction, _ = batch_signal(self.frames['GLD'], multiplier=2.0)
+        self.assertEqual(signals['GLD']['direction'], direction)
+
+    def test_missing_symbol_is_reported(self):
+        """沒有數據的股票列入 errors"""
+        frames = dict(self.frames, EMPTY=self.frames['QQQ'].iloc[:0])
+        scanner = SupertrendScanner(SYMBOLS + ['EMPTY'], FrameSource(frames), state_path=self.state_path)
+        results = scanner.scan()
+        self.assertEqual(results['errors'], [{'symbol': 'EMPTY', 'error': 'No data'}])
+        self.assertEqual(results['summary']['buy'] + results['summary']['sell'], 2)
+        self.assertTrue(np.isfinite(results['elapsed_seconds']))
+
+
+if __name__ == '__main__':
+    unittest.main()
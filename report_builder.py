@@ -0,0 +1,631 @@
+#!/usr/bin/env python3
+"""
+研究報告增量構建器（Markdown → HTML）
+
+batch_convert_reports / convert_new_reports / convert_today_reports / publish-new-reports 共用：
+- 清單（.report_manifest.json）記錄每個輸出文件的來源內容哈希與構建參數，
+  只重新轉換內容、標題、描述或模板有變化的報告；來源 mtime/size 未變時不讀取文件
+- 需要轉換的報告分發到進程池並行轉換
+- 樣式寫入共用的外部樣式表 report.css，頁面只引用，不再內嵌 CSS
+
+使用方式：
+    python3 report_builder.py                               # 構建 kanban/projects 下全部報告
+    python3 report_builder.py --source DIR --output DIR     # 指定來源與輸出目錄
+    python3 report_builder.py --workers 4 --force           # 指定進程數，強制全部重建
+
+    from report_builder import build_reports
+
+    stats = build_reports([
+        {'filepath': '/path/to/k001.md', 'title': '偏度因子', 'description': '...'},
+    ], '/Users/charlie/report')
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+import markdown
+
+DEFAULT_SOURCE_DIR = "/Users/charlie/.openclaw/workspace/kanban/projects"
+DEFAULT_OUTPUT_DIR = "/Users/charlie/report"
+
+MANIFEST_FILENAME = ".report_manifest.json"
+STYLESHEET_FILENAME = "report.css"
+
+# 模板或轉換邏輯變化時遞增，使全部報告重建
+BUILDER_VERSION = 1
+
+MD_EXTENSIONS = [
+    'tables',
+    'fenced_code',
+    'codehilite',
+    'toc',
+    'footnotes',
+    'attr_list',
+    'def_list',
+]
+
+MD_EXTENSION_CONFIGS = {
+    'codehilite': {
+        'use_pygments': False,
+        'css_class': 'highlight'
+    },
+    'toc': {
+        'permalink': True,
+        'permalink_title': '連結到此標題'
+    }
+}
+
+REPORT_CSS = """\
+:root {
+    --primary-color: #2563eb;
+    --secondary-color: #64748b;
+    --accent-color: #f59e0b;
+    --success-color: #10b981;
+    --warning-color: #f59e0b;
+    --danger-color: #ef4444;
+    --text-color: #1e293b;
+    --bg-color: #f8fafc;
+    --card-bg: #ffffff;
+    --border-color: #e2e8f0;
+    --code-bg: #1e293b;
+    --code-text: #e2e8f0;
+    --table-header: #f1f5f9;
+}
+
+* {
+    margin: 0;
+    padding: 0;
+    box-sizing: border-box;
+}
+
+body {
+    font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif;
+    line-height: 1.6;
+    color: var(--text-color);
+    background-color: var(--bg-color);
+    margin: 0;
+    padding: 0;
+}
+
+.container {
+    max-width: 1200px;
+    margin: 0 auto;
+    padding: 2rem;
+}
+
+.header {
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    color: white;
+    padding: 3rem 2rem;
+    border-radius: 16px;
+    text-align: center;
+    margin-bottom: 2rem;
+    box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
+}
+
+.header h1 {
+    font-size: 2.5rem;
+    font-weight: 700;
+    margin-bottom: 1rem;
+}
+
+.header .subtitle {
+    font-size: 1.1rem;
+    opacity: 0.9;
+    margin-bottom: 0.5rem;
+}
+
+.header .description {
+    font-size: 1rem;
+    opacity: 0.8;
+}
+
+.content {
+    background: var(--card-bg);
+    padding: 2rem;
+    border-radius: 12px;
+    box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
+    margin-bottom: 2rem;
+}
+
+.content h1, .content h2, .content h3, .content h4, .content h5, .content h6 {
+    color: var(--primary-color);
+    margin-top: 2rem;
+    margin-bottom: 1rem;
+}
+
+.content h1 { font-size: 2.2rem; }
+.content h2 { font-size: 1.8rem; }
+.content h3 { font-size: 1.5rem; }
+.content h4 { font-size: 1.3rem; }
+.content h5 { font-size: 1.1rem; }
+.content h6 { font-size: 1rem; }
+
+.content p {
+    margin-bottom: 1rem;
+    line-height: 1.7;
+}
+
+.content ul, .content ol {
+    margin-bottom: 1rem;
+    padding-left: 2rem;
+}
+
+.content li {
+    margin-bottom: 0.5rem;
+}
+
+.content table {
+    width: 100%;
+    border-collapse: collapse;
+    margin: 1.5rem 0;
+    box-shadow: 0 2px 4px rgba(0, 0, 0, 0.1);
+}
+
+.content th, .content td {
+    border: 1px solid var(--border-color);
+    padding: 0.75rem;
+    text-align: left;
+}
+
+.content th {
+    background-color: var(--table-header);
+    font-weight: 600;
+    color: var(--primary-color);
+}
+
+.content tr:nth-child(even) {
+    background-color: #f8fafc;
+}
+
+.content blockquote {
+    border-left: 4px solid var(--primary-color);
+    padding-left: 1rem;
+    margin: 1rem 0;
+    color: var(--secondary-color);
+    font-style: italic;
+}
+
+.content code {
+    background-color: #f1f5f9;
+    color: var(--primary-color);
+    padding: 0.25rem 0.5rem;
+    border-radius: 4px;
+    font-family: 'Monaco', 'Menlo', 'Ubuntu Mono', monospace;
+    font-size: 0.9em;
+}
+
+.content pre {
+    background-color: var(--code-bg);
+    color: var(--code-text);
+    padding: 1.5rem;
+    border-radius: 8px;
+    overflow-x: auto;
+    margin: 1.5rem 0;
+    box-shadow: 0 2px 4px rgba(0, 0, 0, 0.2);
+}
+
+.content pre code {
+    background-color: transparent;
+    color: inherit;
+    padding: 0;
+}
+
+.back-to-home {
+    display: inline-flex;
+    align-items: center;
+    gap: 0.5rem;
+    background: var(--primary-color);
+    color: white;
+    text-decoration: none;
+    padding: 0.75rem 1.5rem;
+    border-radius: 8px;
+    font-weight: 500;
+    margin-bottom: 2rem;
+    transition: all 0.3s ease;
+}
+
+.back-to-home:hover {
+    background: #1d4ed8;
+    transform: translateX(-4px);
+}
+
+.footer {
+    background: var(--card-bg);
+    padding: 2rem;
+    border-radius: 12px;
+    text-align: center;
+    margin-top: 2rem;
+    border-top: 1px solid var(--border-color);
+    box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
+}
+
+.footer p {
+    color: var(--secondary-color);
+    margin-bottom: 0.5rem;
+}
+
+.footer .disclaimer {
+    font-size: 0.875rem;
+    font-style: italic;
+    margin-top: 1rem;
+    padding-top: 1rem;
+    border-top: 1px solid var(--border-color);
+}
+
+@media (max-width: 768px) {
+    .container {
+        padding: 1rem;
+    }
+
+    .header h1 {
+        font-size: 2rem;
+    }
+
+    .header {
+        padding: 2rem 1rem;
+    }
+
+    .content {
+        padding: 1.5rem;
+    }
+
+    .content h1 { font-size: 1.8rem; }
+    .content h2 { font-size: 1.5rem; }
+    .content h3 { font-size: 1.3rem; }
+}
+"""
+
+
+def clean_markdown_content(content):
+    """清理 Markdown 內容"""
+    content = re.sub(r'\[.*?\]\(.*?\.md\)', r'[相關檔案]', content)
+    return content
+
+
+def create_html_template(title, content, filename="", description="", stylesheet=STYLESHEET_FILENAME):
+    """創建 HTML 模板（樣式引用外部 report.css）"""
+
+    html_template = f"""<!DOCTYPE html>
+<html lang="zh-TW">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{title} - 量化交易研究報告</title>
+    <link rel="stylesheet" href="{stylesheet}">
+</head>
+<body>
+    <div class="container">
+        <a href="index.html" class="back-to-home">← 返回研究目錄</a>
+
+        <div class="header">
+            <h1>{title}</h1>
+            <p class="subtitle">量化交易研究報告 - {datetime.now().strftime('%Y-%m-%d')}</p>
+            {f'<p class="description">{description}</p>' if description else ''}
+        </div>
+
+        <div class="content">
+            {content}
+        </div>
+
+        <div class="footer">
+            <p>© 2026 Charlie's Quantitative Trading Research Hub</p>
+            <p class="disclaimer">⚠️ 免責聲明：研究內容僅供學術參考，不構成任何投資建議。投資有風險，請謹慎評估。</p>
+        </div>
+    </div>
+</body>
+</html>
+"""
+
+    return html_template
+
+
+def convert_markdown_to_html(md_content, title=None, extensions=None):
+    """將 Markdown 內容轉換為 HTML"""
+
+    md_content = clean_markdown_content(md_content)
+
+    return markdown.markdown(
+        md_content,
+        extensions=list(extensions or MD_EXTENSIONS),
+        extension_configs=MD_EXTENSION_CONFIGS
+    )
+
+
+def extract_title_from_md(content):
+    """從 Markdown 內容中提取標題"""
+    lines = content.split('\n')
+    for line in lines[:20]:  # 只檢查前 20 行
+        if line.startswith('# '):
+            return line[2:].strip()
+    return None
+
+
+def discover_reports(source_dir: str = DEFAULT_SOURCE_DIR) -> List[Dict[str, Any]]:
+    """
+    掃描目錄下全部 Markdown 報告（標題在轉換時從內容提取）
+
+    輸出文件名默認為來源文件名；不同子目錄下的同名文件改用相對 source_dir 的路徑
+    命名（a/b/r001.md → a-b-r001.html），避免互相覆蓋。
+    """
+    reports = []
+    for root, dirs, files in os.walk(source_dir):
+        dirs.sort()
+        for file in sorted(files):
+            if file.endswith('.md') and not file.startswith('.'):
+                reports.append({'filepath': os.path.join(root, file)})
+
+    by_name: Dict[str, List[Dict[str, Any]]] = {}
+    for report in reports:
+        by_name.setdefault(_output_name(report), []).append(report)
+    for group in by_name.values():
+        if len(group) > 1:
+            for report in group:
+                relative = os.path.relpath(report['filepath'], source_dir)
+                report['output'] = _html_name(relative.replace(os.sep, '-'))
+    return reports
+
+
+def _html_name(filename: str) -> str:
+    return filename[:-len('.md')] + '.html' if filename.endswith('.md') else filename + '.html'
+
+
+def _output_name(report: Dict[str, Any]) -> str:
+    return report.get('output') or _html_name(os.path.basename(report['filepath']))
+
+
+def _check_collisions(reports: List[Dict[str, Any]]):
+    """
+    不同來源不能寫入同一個輸出文件
+
+    Raises:
+        ValueError: 列出所有衝突的輸出文件名與來源
+    """
+    sources: Dict[str, set] = {}
+    for report in reports:
+        sources.setdefault(_output_name(report), set()).add(os.path.abspath(report['filepath']))
+    collisions = {output: paths for output, paths in sources.items() if len(paths) > 1}
+    if collisions:
+        details = '; '.join(f"{output} ← {', '.join(sorted(paths))}" for output, paths in sorted(collisions.items()))
+        raise ValueError(f"多個來源對應同一個輸出文件（請指定 output）: {details}")
+
+
+def _atomic_write(path: str, text: str):
+    """寫入臨時文件後替換，避免中斷時留下半個文件"""
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix=os.path.basename(path))
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def _build_one(job: Dict[str, Any]) -> Dict[str, Any]:
+    """轉換單個報告（在工作進程中執行）"""
+    try:
+        with open(job['filepath'], 'r', encoding='utf-8') as f:
+            md_content = f.read()
+
+        title = job.get('title') or extract_title_from_md(md_content)
+        if not title:
+            title = os.path.splitext(os.path.basename(job['filepath']))[0]
+            title = title.replace('-', ' ').replace('_', ' ').title()
+
+        html_content = convert_markdown_to_html(md_content, title, job.get('extensions'))
+        full_html = create_html_template(
+            title,
+            html_content,
+            os.path.basename(job['filepath']),
+            job.get('description', '')
+        )
+        _atomic_write(job['html_path'], full_html)
+        return {'output': job['output'], 'ok': True}
+    except Exception as e:
+        return {'output': job['output'], 'ok': False, 'error': str(e)}
+
+
+class ReportManifest:
+    """輸出目錄下的構建清單"""
+
+    def __init__(self, output_dir: str):
+        self.path = os.path.join(output_dir, MANIFEST_FILENAME)
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.stylesheet_hash: Optional[str] = None
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.entries = data.get('entries', {})
+                self.stylesheet_hash = data.get('stylesheet_hash')
+            except (OSError, json.JSONDecodeError):
+                # 清單損壞時視為首次構建
+                self.entries = {}
+
+    def save(self):
+        _atomic_write(self.path, json.dumps({
+            'builder_version': BUILDER_VERSION,
+            'stylesheet_hash': self.stylesheet_hash,
+            'entries': self.entries
+        }, indent=2, ensure_ascii=False))
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _build_key(report: Dict[str, Any], extensions: List[str]) -> str:
+    """除來源內容外影響輸出的參數"""
+    return hashlib.sha256(json.dumps([
+        BUILDER_VERSION,
+        report.get('title'),
+        report.get('description', ''),
+        extensions
+    ], ensure_ascii=False).encode('utf-8')).hexdigest()[:16]
+
+
+def write_stylesheet(output_dir: str, manifest: ReportManifest) -> bool:
+    """寫出共用樣式表（內容變化或文件缺失時）"""
+    css_hash = hashlib.sha256(REPORT_CSS.encode('utf-8')).hexdigest()
+    path = os.path.join(output_dir, STYLESHEET_FILENAME)
+    if manifest.stylesheet_hash == css_hash and os.path.exists(path):
+        return False
+    _atomic_write(path, REPORT_CSS)
+    manifest.stylesheet_hash = css_hash
+    return True
+
+
+def build_reports(
+    reports: Iterable[Dict[str, Any]],
+    output_dir: str = DEFAULT_OUTPUT_DIR,
+    workers: Optional[int] = None,
+    force: bool = False,
+    extensions: Optional[List[str]] = None,
+    verbose: bool = True
+) -> Dict[str, Any]:
+    """
+    增量構建報告
+
+    Args:
+        reports: 報告列表，每項包含 filepath，可選 title / description / output（輸出文件名）
+        output_dir: 輸出目錄
+        workers: 進程數（默認 CPU 核數）
+        force: 忽略清單，全部重建
+        extensions: Markdown 擴展（默認 MD_EXTENSIONS）
+        verbose: 是否打印進度
+
+    Returns:
+        {'built': [...], 'unchanged': [...], 'missing': [...], 'failed': {output: error}, 'elapsed': 秒}
+
+    Raises:
+        ValueError: 多個來源對應同一個輸出文件
+    """
+    reports = list(reports)
+    _check_collisions(reports)
+    started = time.perf_counter()
+    os.makedirs(output_dir, exist_ok=True)
+    extensions = list(extensions or MD_EXTENSIONS)
+    manifest = ReportManifest(output_dir)
+    write_stylesheet(output_dir, manifest)
+
+    jobs = []
+    pending_entries = {}
+    stats: Dict[str, Any] = {'built': [], 'unchanged': [], 'missing': [], 'failed': {}}
+    seen = set()
+
+    for report in reports:
+        source = report['filepath']
+        output = _output_name(report)
+        if output in seen:
+            # 同一來源重複列出時只構建一次
+            continue
+        seen.add(output)
+        html_path = os.path.join(output_dir, output)
+        try:
+            st = os.stat(source)
+        except OSError:
+            stats['missing'].append(source)
+            continue
+
+        key = _build_key(report, extensions)
+        entry = manifest.entries.get(output)
+        output_exists = os.path.exists(html_path)
+
+        if not force and entry and output_exists and entry.get('key') == key and entry.get('source') == source:
+            # 快速路徑：mtime/size 未變則不讀取文件
+            if entry.get('mtime_ns') == st.st_mtime_ns and entry.get('size') == st.st_size:
+                stats['unchanged'].append(output)
+                continue
+            content_hash = _sha256(source)
+            if entry.get('sha256') == content_hash:
+                entry.update(mtime_ns=st.st_mtime_ns, size=st.st_size)
+                stats['unchanged'].append(output)
+                continue
+        else:
+            content_hash = _sha256(source)
+
+        jobs.append({
+            'filepath': source,
+            'output': output,
+            'html_path': html_path,
+            'title': report.get('title'),
+            'description': report.get('description', ''),
+            'extensions': extensions
+        })
+        pending_entries[output] = {
+            'source': source,
+            'sha256': content_hash,
+            'mtime_ns': st.st_mtime_ns,
+            'size': st.st_size,
+            'key': key
+        }
+
+    if jobs:
+        workers = workers or os.cpu_count() or 1
+        if verbose:
+            print(f"🔄 需要轉換 {len(jobs)} 個報告（{min(workers, len(jobs))} 個進程）")
+
+        if workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+                results = list(executor.map(_build_one, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+        else:
+            results = [_build_one(job) for job in jobs]
+
+        built_at = datetime.now().isoformat(timespec='seconds')
+        for result in results:
+            output = result['output']
+            if result['ok']:
+                manifest.entries[output] = dict(pending_entries[output], built_at=built_at)
+                stats['built'].append(output)
+                if verbose:
+                    print(f"  ✅ {output}")
+            else:
+                stats['failed'][output] = result['error']
+                if verbose:
+                    print(f"  ❌ 轉換失敗: {output} - {result['error']}")
+
+    manifest.save()
+    stats['elapsed'] = time.perf_counter() - started
+    return stats
+
+
+def print_summary(stats: Dict[str, Any]):
+    """打印構建統計"""
+    print(f"\n✨ 構建完成（{stats['elapsed']:.2f} 秒）")
+    print(f"  ✅ 轉換: {len(stats['built'])} 個")
+    print(f"  ⏭️  未變化: {len(stats['unchanged'])} 個")
+    if stats['missing']:
+        print(f"  ⚠️  來源不存在: {len(stats['missing'])} 個")
+    print(f"  ❌ 失敗: {len(stats['failed'])} 個")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="研究報告增量構建器")
+    parser.add_argument("--source", default=DEFAULT_SOURCE_DIR, help="Markdown 來源目錄")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT_DIR, help="HTML 輸出目錄")
+    parser.add_argument("--workers", type=int, default=None, help="進程數（默認 CPU 核數）")
+    parser.add_argument("--force", action="store_true", help="忽略清單，全部重建")
+    args = parser.parse_args()
+
+    reports = discover_reports(args.source)
+    print(f"📊 發現 {len(reports)} 個 Markdown 文件")
+    print_summary(build_reports(reports, args.output, workers=args.workers, force=args.force))
+
+
+if __name__ == "__main__":
+    main()
@@ -117,23 +117,24 @@ class ResearchOrganizer:
             print(f"📝 將遷移 {len(research_files)} 個研究報告")
         print("=" * 50)
         
-        # 遷移每個文件
-        for i, file_path in enumerate(research_files, 1):
-            print(f"\n[{i}/{len(research_files)}] 處理: {file_path.name}")
+        # 遷移每個文件（批量模式：寫入在結束時以一次 CLI 調用提交）
+        with self.obsidian.batch():
+            for i, file_path in enumerate(research_files, 1):
+                print(f"\n[{i}/{len(research_files)}] 處理: {file_path.name}")
             
-            try:
-                if dry_run:
-                    print(f"  ⏭️  Dry run: 將遷移 {file_path.name}")
-                else:
-                    self.migrate_file(file_path)
-                    self.stats["success"] += 1
+                try:
+                    if dry_run:
+                        print(f"  ⏭️  Dry run: 將遷移 {file_path.name}")
+                    else:
+                        self.migrate_file(file_path)
+                        self.stats["success"] += 1
                 
-                self.stats["total"] += 1
+                    self.stats["total"] += 1
                 
-            except Exception as e:
-                print(f"  ❌ 遷移失敗: {e}")
-                self.stats["failed"] += 1
-                self.stats["total"] += 1
+                except Exception as e:
+                    print(f"  ❌ 遷移失敗: {e}")
+                    self.stats["failed"] += 1
+                    self.stats["total"] += 1
         
         # 打印統計
         print("\n" + "=" * 50)
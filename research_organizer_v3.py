@@ -52,6 +52,10 @@ class CompleteResearchOrganizer:
         
         for dir_name, path in self.obsidian_dirs.items():
             path.mkdir(parents=True, exist_ok=True)
+        
+        # 主題筆記緩衝：每個主題只讀一次，遷移結束後統一寫回
+        self._topic_notes: Dict[Path, str] = {}
+        self._dirty_topics: set = set()
     
     def migrate_all(self, limit=None):
         """遷移所有研究報告"""
@@ -106,17 +110,21 @@ class CompleteResearchOrganizer:
         print("=" * 50)
         
         # 遷移每個文件
-        for i, file_path in enumerate(research_files, 1):
-            print(f"\n[{i}/{len(research_files)}] 處理: {file_path.name}")
-            
-            try:
-                self.migrate_file(file_path)
-                self.stats["success"] += 1
-            except Exception as e:
-                print(f"  ❌ 遷移失敗: {e}")
-                self.stats["failed"] += 1
-            
-            self.stats["total"] += 1
+        try:
+            for i, file_path in enumerate(research_files, 1):
+                print(f"\n[{i}/{len(research_files)}] 處理: {file_path.name}")
+                
+                try:
+                    self.migrate_file(file_path)
+                    self.stats["success"] += 1
+                except Exception as e:
+                    print(f"  ❌ 遷移失敗: {e}")
+                    self.stats["failed"] += 1
+                
+                self.stats["total"] += 1
+        finally:
+            written = self.flush_topic_links()
+            print(f"\n📁 已寫入 {written} 個主題筆記")
         
         # 打印統計
         print("\n" + "=" * 50)
@@ -351,7 +359,7 @@ class CompleteResearchOrganizer:
         return frontmatter
     
     def create_topic_links(self, metadata: Dict[str, Any], filename: str, save_dir: Path):
-        """創建主題連結"""
+        """創建主題連結（寫入緩衝，由 flush_topic_links 統一落盤）"""
         
         # 為每個標籤創建主題筆記
         for tag in metadata["tags"]:
@@ -361,20 +369,20 @@ class CompleteResearchOrganizer:
             # 構建連結路徑
             link_path = save_dir.relative_to(self.obsidian_path) / filename
             
-            # 檢查是否已經連結過
-            link_already_exists = False
-            if topic_path.exists():
-                with open(topic_path, "r") as f:
-                    existing_content = f.read()
-                if str(link_path) in existing_content:
-                    link_already_exists = True
+            # 首次訪問時讀入主題筆記
+            if topic_path not in self._topic_notes and topic_path.exists():
+                with open(topic_path, "r", encoding="utf-8") as f:
+                    self._topic_notes[topic_path] = f.read()
+            existing_content = self._topic_notes.get(topic_path)
             
-            if link_already_exists:
+            # 檢查是否已經連結過
+            if existing_content is not None and str(link_path) in existing_content:
                 continue
             
             # 創建或更新主題筆記
-            if not topic_path.exists():
-                topic_content = f"""# {tag.title()}
+            self._dirty_topics.add(topic_path)
+            if existing_content is None:
+                self._topic_notes[topic_path] = f"""# {tag.title()}
 
 ## 相關研究
 
@@ -387,14 +395,22 @@ class CompleteResearchOrganizer:
 - [[{link_path}|{metadata['title']}]]
 
 """
-                with open(topic_path, "w", encoding="utf-8") as f:
-                    f.write(topic_content)
                 print(f"    📁 創建主題: Research/Topics/{tag_safe}")
             else:
                 # 添加連結
-                with open(topic_path, "a", encoding="utf-8") as f:
-                    f.write(f"- [[{link_path}|{metadata['title']}]]\n")
+                self._topic_notes[topic_path] = existing_content + f"- [[{link_path}|{metadata['title']}]]\n"
                 print(f"    🔗 更新主題: Research/Topics/{tag_safe}")
+    
+    def flush_topic_links(self) -> int:
+        """把有變化的主題筆記寫回 Vault（每個主題一次寫入）"""
+        
+        for topic_path in sorted(self._dirty_topics):
+            with open(topic_path, "w", encoding="utf-8") as f:
+                f.write(self._topic_notes[topic_path])
+        
+        written = len(self._dirty_topics)
+        self._dirty_topics.clear()
+        return written
 
 
 # 使用示例
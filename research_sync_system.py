@@ -13,6 +13,10 @@ Research Report Sync System - 自動同步研究報告到 Obsidian
     python3 research_sync_system.py sync <id>     # 同步指定報告
     python3 research_sync_system.py sync-all      # 同步所有未同步的報告
     python3 research_sync_system.py status        # 查看同步狀態
+    python3 research_sync_system.py --no-qmd sync-all  # 同步但不寫入 QMD 索引
+
+同步成功的報告會批量寫入 QMD knowledge 層（memory-knowledge collection），
+QMD 不可用時跳過索引。
 """
 
 import os
@@ -22,12 +26,19 @@ import re
 import logging
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 import hashlib
 
 # 添加工作目錄到路徑
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+# QMD 索引（可選）
+try:
+    from qmd_adapter import QMDAdapter
+    QMD_AVAILABLE = True
+except ImportError:
+    QMD_AVAILABLE = False
+
 # 配置日誌
 logging.basicConfig(
     level=logging.INFO,
@@ -44,7 +55,9 @@ class ResearchSyncSystem:
         workspace_path: str = "/Users/charlie/.openclaw/workspace",
         obsidian_vault: str = "/Users/charlie/.openclaw/workspace/quant/research",
         tasks_file: str = "/Users/charlie/.openclaw/workspace/kanban/tasks.json",
-        sync_db_path: str = "/Users/charlie/.openclaw/workspace/.research_sync_db.json"
+        sync_db_path: str = "/Users/charlie/.openclaw/workspace/.research_sync_db.json",
+        index_qmd: bool = True,
+        qmd_path: str = "~/.qmd/qmd"
     ):
         """
         初始化同步系統
@@ -54,12 +67,17 @@ class ResearchSyncSystem:
             obsidian_vault: Obsidian vault 路徑
             tasks_file: tasks.json 路徑
             sync_db_path: 同步數據庫路徑（記錄已同步的任務）
+            index_qmd: 是否把同步的報告寫入 QMD 索引
+            qmd_path: QMD CLI 路徑
         """
         self.workspace_path = Path(workspace_path)
         self.obsidian_vault = Path(obsidian_vault)
         self.tasks_file = Path(tasks_file)
         self.sync_db_path = Path(sync_db_path)
         self.kanban_works = self.workspace_path / "kanban/works"
+        self.index_qmd = index_qmd and QMD_AVAILABLE
+        self.qmd_path = qmd_path
+        self._qmd = None
 
         # 目錄結構定義
         self.research_categories = {
@@ -105,6 +123,39 @@ class ResearchSyncSystem:
         with open(self.tasks_file, 'r', encoding='utf-8') as f:
             return json.load(f)
 
+    def _get_qmd(self) -> Optional["QMDAdapter"]:
+        """按需創建 QMD 適配器，QMD 不可用時關閉索引"""
+        if not self.index_qmd:
+            return None
+        if self._qmd is None:
+            try:
+                self._qmd = QMDAdapter(self.qmd_path)
+            except RuntimeError as e:
+                logger.warning(f"QMD unavailable, skipping indexing: {e}")
+                self.index_qmd = False
+        return self._qmd
+
+    def _index_reports(self, items: List[Tuple[str, str, Dict[str, Any]]]) -> int:
+        """
+        批量寫入 QMD knowledge 層
+
+        參數:
+            items: (memory_id, content, metadata) 列表
+
+        返回:
+            成功索引的報告數
+        """
+        if not items:
+            return 0
+        qmd = self._get_qmd()
+        if qmd is None:
+            return 0
+
+        results = qmd.store_many(items)
+        indexed = sum(results.values())
+        logger.info(f"Indexed {indexed}/{len(items)} reports in QMD")
+        return indexed
+
     def _extract_metadata(self, report_path: Path) -> Dict[str, Any]:
         """
         從研究報告中提取元數據
@@ -312,17 +363,33 @@ class ResearchSyncSystem:
         返回:
             是否同步成功
         """
+        item = self._sync_report(task_id, self._load_tasks())
+        if item is None:
+            return False
+        self._index_reports([item])
+        return True
+
+    def _sync_report(
+        self,
+        task_id: str,
+        tasks: List[Dict[str, Any]]
+    ) -> Optional[Tuple[str, str, Dict[str, Any]]]:
+        """
+        同步報告到 Obsidian vault
+
+        返回:
+            待寫入 QMD 的 (memory_id, content, metadata)，同步失敗返回 None
+        """
         # 獲取任務信息
-        tasks = self._load_tasks()
         task = next((t for t in tasks if t["id"] == task_id), None)
 
         if not task:
             logger.error(f"Task not found: {task_id}")
-            return False
+            return None
 
         if task.get("status") != "completed":
             logger.error(f"Task not completed: {task_id}")
-            return False
+            return None
 
         # 查找報告文件
         work_dir = self.kanban_works / task_id
@@ -330,7 +397,7 @@ class ResearchSyncSystem:
 
         if not report_files:
             logger.error(f"Research report not found: {task_id}")
-            return False
+            return None
 
         report_path = report_files[0]
 
@@ -370,7 +437,17 @@ class ResearchSyncSystem:
         self._save_sync_db()
 
         logger.info(f"Synced report {task_id} to {relative_path}")
-        return True
+        return (
+            f"research-{task_id}",
+            content,
+            {
+                "layer": "knowledge",
+                "tags": ["research", metadata["category"]],
+                "title": metadata["title"],
+                "task_id": task_id,
+                "obsidian_path": str(relative_path)
+            }
+        )
 
     def sync_all(self) -> Dict[str, Any]:
         """
@@ -380,20 +457,25 @@ class ResearchSyncSystem:
             同步結果統計
         """
         new_reports = self.scan_new_reports()
+        tasks = self._load_tasks()
 
         results = {
             "total": len(new_reports),
             "success": 0,
             "failed": 0,
             "skipped": 0,
+            "indexed": 0,
             "details": []
         }
 
+        # 先同步全部報告，最後一次性寫入 QMD
+        qmd_items = []
         for report in new_reports:
             task_id = report["task_id"]
             try:
-                success = self.sync_report(task_id)
-                if success:
+                item = self._sync_report(task_id, tasks)
+                if item is not None:
+                    qmd_items.append(item)
                     results["success"] += 1
                     results["details"].append({"task_id": task_id, "status": "success"})
                 else:
@@ -404,6 +486,7 @@ class ResearchSyncSystem:
                 results["failed"] += 1
                 results["details"].append({"task_id": task_id, "status": "error", "error": str(e)})
 
+        results["indexed"] = self._index_reports(qmd_items)
         return results
 
     def status(self) -> Dict[str, Any]:
@@ -430,6 +513,7 @@ def main():
     import argparse
 
     parser = argparse.ArgumentParser(description="Research Report Sync System")
+    parser.add_argument("--no-qmd", action="store_true", help="Do not index synced reports in QMD")
     subparsers = parser.add_subparsers(dest="command", help="Command")
 
     # scan 命令
@@ -452,7 +536,7 @@ def main():
         return
 
     # 初始化同步系統
-    sync_system = ResearchSyncSystem()
+    sync_system = ResearchSyncSystem(index_qmd=not args.no_qmd)
 
     if args.command == "scan":
         new_reports = sync_system.scan_new_reports()
@@ -478,6 +562,7 @@ def main():
         print(f"  Total: {results['total']}")
         print(f"  ✅ Success: {results['success']}")
         print(f"  ❌ Failed: {results['failed']}")
+        print(f"  🔎 Indexed in QMD: {results['indexed']}")
         print()
 
         for detail in results["details"]:
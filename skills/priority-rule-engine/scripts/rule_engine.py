@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Compiled Priority Rule Engine
+
+Compile priority rules once and evaluate them against many tasks in-process.
+
+Instead of checking every rule against every task, tasks are indexed once
+and each rule becomes a few set intersections:
+
+- status / current_priority / tags: inverted indexes (task sets)
+- days_pending: converted to created_at cutoffs at compile time, answered
+  with a bisect over the sorted created_at timestamps
+- keywords: all keywords are matched in one pass (Aho-Corasick automaton
+  via pyahocorasick when installed, otherwise str.find over one text blob)
+
+Rules are applied in order and the first matching rule wins, as in the
+per-task matcher this replaces.
+
+Usage:
+    from rule_engine import load_engine
+
+    engine = load_engine()
+    changes = engine.evaluate(tasks)   # dry-run diff, tasks untouched
+    engine.apply(changes)              # mutate tasks, add notes
+"""
+
+import json
+import re
+from bisect import bisect_right
+from functools import lru_cache
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+DEFAULT_RULES_FILE = Path(__file__).parent.parent / "references" / "priority_rules.json"
+
+_DAYS_PATTERN = re.compile(r"^\s*(>=|<=|>|<)\s*(-?\d+)\s*$")
+
+
+@lru_cache(maxsize=65536)
+def parse_timestamp(value: str) -> Optional[float]:
+    """Parse created_at (naive timestamps are treated as UTC; cached, created_at never changes)."""
+    try:
+        if "Z" in value or "+" in value:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        else:
+            parsed = datetime.fromisoformat(value).replace(tzinfo=timezone.utc)
+        return parsed.timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def days_pending_bounds(expression: str, now: datetime):
+    """
+    Turn a days_pending expression into created_at bounds.
+
+    days_pending is the whole number of days since created_at (floored), so
+    "> N" means created_at <= now - (N+1) days, "< N" means created_at > now - N days.
+
+    Returns:
+        (max_created, min_created) — inclusive upper / exclusive lower bound, either may be None
+    """
+    match = _DAYS_PATTERN.match(str(expression))
+    if not match:
+        raise ValueError(f"invalid days_pending expression: {expression!r}")
+    op, days = match.group(1), int(match.group(2))
+
+    def cutoff(n):
+        return (now - timedelta(days=n)).timestamp()
+
+    if op == ">":
+        return cutoff(days + 1), None
+    if op == ">=":
+        return cutoff(days), None
+    if op == "<":
+        return None, cutoff(days)
+    return None, cutoff(days + 1)  # <=
+
+
+class CompiledRule:
+    """A rule with its condition pre-processed."""
+
+    __slots__ = ("name", "rule", "status", "priorities", "time_bounds", "tags", "keyword_ids")
+
+    def __init__(self, rule: Dict, now: datetime, keyword_index: Dict[str, int]):
+        condition = rule.get("condition", {})
+        self.name = rule.get("name", "")
+        self.rule = rule
+        self.status = condition.get("status")
+        self.priorities = frozenset(condition["current_priority"]) if "current_priority" in condition else None
+        self.tags = frozenset(condition["tags"]) if "tags" in condition else None
+
+        self.time_bounds = None
+        if "days_pending" in condition:
+            try:
+                self.time_bounds = days_pending_bounds(condition["days_pending"], now)
+            except ValueError:
+                # 無法解析的表達式永不匹配（與原逐任務匹配一致），由 validate_rules 報告
+                self.time_bounds = (float("-inf"), None)
+
+        self.keyword_ids = None
+        if "keywords" in condition:
+            self.keyword_ids = frozenset(
+                keyword_index.setdefault(kw.lower(), len(keyword_index))
+                for kw in condition["keywords"]
+            )
+        # related_score needs research output analysis and is not evaluated (as before)
+
+
+class TaskIndex:
+    """Inverted indexes over one batch of tasks (built lazily per condition type)."""
+
+    def __init__(self, tasks: List[Dict], keywords: List[str], automaton=None):
+        self.tasks = tasks
+        self.all = set(range(len(tasks)))
+        self._keywords = keywords
+        self._automaton = automaton
+        self._by_key: Dict[str, Dict] = {}
+        self._lookups: Dict[tuple, Set[int]] = {}
+        self._created = None
+        self._ranges: Dict[tuple, Set[int]] = {}
+        self._keyword_hits: Optional[List[Set[int]]] = None
+
+    def _inverted(self, field: str) -> Dict:
+        index = self._by_key.get(field)
+        if index is None:
+            index = self._by_key[field] = {}
+            for i, task in enumerate(self.tasks):
+                if field == "priority":
+                    values = (task.get("priority", "normal"),)
+                elif field == "tags":
+                    values = task.get("tags") or ()
+                else:
+                    values = (task.get(field),)
+                for value in values:
+                    try:
+                        index.setdefault(value, set()).add(i)
+                    except TypeError:
+                        continue  # 不可哈希的值無法匹配任何規則
+        return index
+
+    def lookup(self, field: str, values) -> Set[int]:
+        key = (field, frozenset(values))
+        result = self._lookups.get(key)
+        if result is None:
+            index = self._inverted(field)
+            result = set()
+            for value in values:
+                result |= index.get(value, set())
+            self._lookups[key] = result
+        return result
+
+    def created_between(self, max_created, min_created) -> Set[int]:
+        """Tasks with min_created < created_at <= max_created."""
+        if self._created is None:
+            pairs = []
+            for i, task in enumerate(self.tasks):
+                ts = parse_timestamp(task.get("created_at") or "")
+                if ts is not None:
+                    pairs.append((ts, i))
+            pairs.sort()
+            self._created = ([ts for ts, _ in pairs], [i for _, i in pairs])
+
+        key = (max_created, min_created)
+        result = self._ranges.get(key)
+        if result is None:
+            stamps, ids = self._created
+            lo = 0 if min_created is None else bisect_right(stamps, min_created)
+            hi = len(stamps) if max_created is None else bisect_right(stamps, max_created)
+            result = self._ranges[key] = set(ids[lo:hi])
+        return result
+
+    def with_keywords(self, keyword_ids) -> Set[int]:
+        if self._keyword_hits is None:
+            self._keyword_hits = self._scan_keywords()
+        if len(keyword_ids) == 1:
+            return self._keyword_hits[next(iter(keyword_ids))]
+        result: Set[int] = set()
+        for keyword_id in keyword_ids:
+            result |= self._keyword_hits[keyword_id]
+        return result
+
+    def _scan_keywords(self) -> List[Set[int]]:
+        """One pass over title + description of every task."""
+        hits: List[Set[int]] = [set() for _ in self._keywords]
+        texts = [
+            ((task.get("title") or "") + " " + (task.get("description") or "")).lower()
+            for task in self.tasks
+        ]
+
+        if self._automaton is not None:
+            for i, text in enumerate(texts):
+                for _, keyword_id in self._automaton.iter(text):
+                    hits[keyword_id].add(i)
+            return hits
+
+        # 無 pyahocorasick：把所有文本拼成一個字串，每個關鍵詞用 str.find 掃描（C 實現）
+        starts = []
+        offset = 0
+        for text in texts:
+            starts.append(offset)
+            offset += len(text) + 1
+        blob = "\0".join(texts)
+        for keyword_id, keyword in enumerate(self._keywords):
+            if not keyword:
+                continue
+            pos = blob.find(keyword)
+            while pos != -1:
+                i = bisect_right(starts, pos) - 1
+                hits[keyword_id].add(i)
+                if i + 1 >= len(starts):
+                    break
+                pos = blob.find(keyword, starts[i + 1])
+        return hits
+
+
+class RuleEngine:
+    """Priority rules compiled into a matcher."""
+
+    def __init__(self, rules: List[Dict], now: Optional[datetime] = None):
+        self.now = now or datetime.now(timezone.utc)
+        keyword_index: Dict[str, int] = {}
+        self.rules = [CompiledRule(rule, self.now, keyword_index) for rule in rules]
+        self.keywords = sorted(keyword_index, key=keyword_index.get)
+
+        self.automaton = None
+        if AHOCORASICK_AVAILABLE and self.keywords:
+            self.automaton = ahocorasick.Automaton()
+            for keyword_id, keyword in enumerate(self.keywords):
+                if keyword:
+                    self.automaton.add_word(keyword, keyword_id)
+            self.automaton.make_automaton()
+
+    def match_all(self, tasks: List[Dict]) -> Dict[int, CompiledRule]:
+        """
+        First matching rule for each task.
+
+        Returns:
+            {task position in tasks: rule}
+        """
+        index = TaskIndex(tasks, self.keywords, self.automaton)
+        remaining = set(index.all)
+        matched: Dict[int, CompiledRule] = {}
+
+        for rule in self.rules:
+            if not remaining:
+                break
+            filters = []
+            if rule.status is not None:
+                filters.append(index.lookup("status", (rule.status,)))
+            if rule.priorities is not None:
+                filters.append(index.lookup("priority", rule.priorities))
+            if rule.time_bounds is not None:
+                filters.append(index.created_between(*rule.time_bounds))
+            if rule.tags is not None:
+                filters.append(index.lookup("tags", rule.tags))
+            if rule.keyword_ids is not None:
+                filters.append(index.with_keywords(rule.keyword_ids))
+
+            # 從最小的集合開始求交集
+            filters.sort(key=len)
+            candidates = remaining
+            for task_set in filters:
+                if not candidates:
+                    break
+                candidates = task_set & candidates
+
+            for i in candidates:
+                matched[i] = rule
+            remaining = remaining - candidates
+        return matched
+
+    def evaluate(self, tasks: Iterable[Dict], status: Optional[str] = "pending") -> List[Dict]:
+        """
+        Dry run: compute priority changes without touching tasks.
+
+        A matching rule whose priority equals the current one produces no change.
+
+        Args:
+            tasks: task list
+            status: only consider tasks in this status (None for all)
+
+        Returns:
+            [{'id', 'rule', 'from', 'to', 'task'}] in task order
+        """
+        bucket = [task for task in tasks if status is None or task.get("status") == status]
+        matched = self.match_all(bucket)
+
+        changes = []
+        for i in sorted(matched):
+            rule = matched[i]
+            task = bucket[i]
+            if rule.rule.get("action") != "set_priority":
+                continue
+            current = task.get("priority", "normal")
+            target = rule.rule["priority"]
+            if current == target:
+                continue
+            changes.append({
+                "id": task.get("id"),
+                "rule": rule.name,
+                "from": current,
+                "to": target,
+                "task": task,
+            })
+        return changes
+
+    @staticmethod
+    def apply(changes: List[Dict]) -> List[Dict]:
+        """
+        Apply changes from evaluate() to their tasks.
+
+        Returns:
+            the updated tasks
+        """
+        now = datetime.now(timezone.utc).isoformat()
+        updated = []
+        for change in changes:
+            task = change["task"]
+            task["priority"] = change["to"]
+            task["updated_at"] = now
+
+            if "notes" not in task:
+                task["notes"] = []
+            elif isinstance(task["notes"], str):
+                # 如果 notes 是字串，轉換為列表
+                task["notes"] = [{"message": task["notes"]}]
+            task["notes"].append({
+                "type": "priority_update",
+                "rule": change["rule"],
+                "message": f"優先級根據規則 '{change['rule']}' 更新為 {change['to']}"
+            })
+            updated.append(task)
+        return updated
+
+
+_engines: Dict[str, tuple] = {}
+
+
+def load_engine(rules_path=None, now: Optional[datetime] = None) -> RuleEngine:
+    """
+    Load and compile rules.
+
+    Compiled engines are cached per rules file and reused while the file is
+    unchanged and the days_pending cutoffs are less than an hour old.
+    """
+    path = Path(rules_path or DEFAULT_RULES_FILE)
+    mtime = path.stat().st_mtime_ns
+    cached = _engines.get(str(path))
+    current = now or datetime.now(timezone.utc)
+    if cached and cached[0] == mtime and abs((current - cached[1].now).total_seconds()) < 3600:
+        return cached[1]
+
+    with open(path, "r", encoding="utf-8") as f:
+        engine = RuleEngine(json.load(f), now=current)
+    _engines[str(path)] = (mtime, engine)
+    return engine
+
+
+def format_diff(changes: List[Dict]) -> str:
+    """Human-readable dry-run diff."""
+    return "\n".join(
+        f"  {c['id']}: {c['from']} → {c['to']}  ({c['rule']})" for c in changes
+    )
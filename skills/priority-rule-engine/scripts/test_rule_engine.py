@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Tests for the compiled priority rule engine
+
+The reference is the per-task matcher the engine replaced (one rule at a
+time, every task), with its '>=' / '<=' handling fixed.
+"""
+
+import copy
+import json
+import random
+import sys
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import rule_engine
+from rule_engine import DEFAULT_RULES_FILE, RuleEngine, days_pending_bounds
+
+NOW = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+STATUSES = ["pending", "pending", "pending", "in_progress", "completed"]
+PRIORITIES = ["low", "normal", "medium", "high"]
+TAGS = ["user_needed", "research", "urgent", "ops"]
+WORDS = ["ML", "ai", "Machine Learning", "deep learning", "trading", "Strategy",
+         "backtest", "portfolio", "report", "cleanup", "data", "dashboard"]
+
+
+def reference_match(task, condition, now):
+    """Legacy apply_rules.evaluate_condition (comparison order fixed)"""
+    if "status" in condition and task.get("status") != condition["status"]:
+        return False
+
+    if "current_priority" in condition:
+        if task.get("priority", "normal") not in condition["current_priority"]:
+            return False
+
+    if "days_pending" in condition:
+        created_at = task.get("created_at")
+        if not created_at:
+            return False
+        try:
+            if "Z" in created_at or "+" in created_at:
+                task_time = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+            else:
+                task_time = datetime.fromisoformat(created_at).replace(tzinfo=timezone.utc)
+            days_pending = (now - task_time).days
+
+            op = condition["days_pending"].replace(" ", "")
+            if op.startswith(">="):
+                if days_pending < int(op[2:]):
+                    return False
+            elif op.startswith("<="):
+                if days_pending > int(op[2:]):
+                    return False
+            elif op.startswith(">"):
+                if days_pending <= int(op[1:]):
+                    return False
+            elif op.startswith("<"):
+                if days_pending >= int(op[1:]):
+                    return False
+        except ValueError:
+            return False
+
+    if "tags" in condition:
+        task_tags = task.get("tags", [])
+        if not any(tag in task_tags for tag in condition["tags"]):
+            return False
+
+    if "keywords" in condition:
+        combined = task.get("title", "").lower() + " " + task.get("description", "").lower()
+        if not any(kw.lower() in combined for kw in condition["keywords"]):
+            return False
+
+    return True
+
+
+def reference_first_match(tasks, rules, now):
+    """{task position: rule name} for pending tasks, first matching rule wins"""
+    matched = {}
+    pending = [task for task in tasks if task.get("status") == "pending"]
+    for i, task in enumerate(pending):
+        for rule in rules:
+            if reference_match(task, rule.get("condition", {}), now):
+                matched[i] = rule["name"]
+                break
+    return matched
+
+
+def random_task(rng, i):
+    created = NOW - timedelta(days=rng.uniform(0, 30))
+    if rng.random() < 0.05:
+        created_at = None
+    elif rng.random() < 0.5:
+        created_at = created.isoformat()
+    else:
+        created_at = created.replace(tzinfo=None).isoformat()
+    task = {
+        "id": f"t-{i}",
+        "status": rng.choice(STATUSES),
+        "title": " ".join(rng.sample(WORDS, rng.randint(0, 3))),
+        "description": " ".join(rng.sample(WORDS, rng.randint(0, 2))),
+        "tags": rng.sample(TAGS, rng.randint(0, 2)),
+        "created_at": created_at,
+    }
+    if rng.random() < 0.8:
+        task["priority"] = rng.choice(PRIORITIES)
+    return task
+
+
+def random_rules(rng, n):
+    rules = []
+    for i in range(n):
+        condition = {"status": "pending"}
+        if rng.random() < 0.6:
+            condition["current_priority"] = rng.sample(PRIORITIES, rng.randint(1, 3))
+        if rng.random() < 0.4:
+            condition["days_pending"] = f"{rng.choice(['>', '>=', '<', '<='])} {rng.randint(0, 20)}"
+        if rng.random() < 0.3:
+            condition["tags"] = rng.sample(TAGS, rng.randint(1, 2))
+        if rng.random() < 0.4:
+            condition["keywords"] = rng.sample(WORDS, rng.randint(1, 3))
+        rules.append({"name": f"rule-{i}", "condition": condition,
+                      "action": "set_priority", "priority": rng.choice(PRIORITIES)})
+    return rules
+
+
+def engine_first_match(engine, tasks):
+    pending = [task for task in tasks if task.get("status") == "pending"]
+    return {i: rule.name for i, rule in engine.match_all(pending).items()}
+
+
+class TestParity(unittest.TestCase):
+    """Compiled matcher vs the per-task matcher on random tasks"""
+
+    def setUp(self):
+        rng = random.Random(12)
+        self.tasks = [random_task(rng, i) for i in range(3000)]
+        with open(DEFAULT_RULES_FILE, "r", encoding="utf-8") as f:
+            self.rules = json.load(f) + random_rules(rng, 30)
+
+    def test_first_match_parity(self):
+        engine = RuleEngine(self.rules, now=NOW)
+        expected = reference_first_match(self.tasks, self.rules, NOW)
+        self.assertGreater(len(expected), 500)
+        self.assertEqual(engine_first_match(engine, self.tasks), expected)
+
+    def test_str_find_fallback(self):
+        engine = RuleEngine(self.rules, now=NOW)
+        engine.automaton = None
+        self.assertEqual(engine_first_match(engine, self.tasks),
+                         reference_first_match(self.tasks, self.rules, NOW))
+
+    @unittest.skipUnless(rule_engine.AHOCORASICK_AVAILABLE, "pyahocorasick not installed")
+    def test_automaton_matches_fallback(self):
+        engine = RuleEngine(self.rules, now=NOW)
+        fallback = RuleEngine(self.rules, now=NOW)
+        fallback.automaton = None
+        self.assertEqual(engine_first_match(engine, self.tasks), engine_first_match(fallback, self.tasks))
+
+    def test_evaluate_reports_only_changes(self):
+        engine = RuleEngine(self.rules, now=NOW)
+        rules = {rule["name"]: rule for rule in self.rules}
+        pending = [task for task in self.tasks if task.get("status") == "pending"]
+        expected = [
+            (pending[i]["id"], name, rules[name]["priority"])
+            for i, name in sorted(reference_first_match(self.tasks, self.rules, NOW).items())
+            if pending[i].get("priority", "normal") != rules[name]["priority"]
+        ]
+        changes = engine.evaluate(self.tasks)
+        self.assertEqual([(c["id"], c["rule"], c["to"]) for c in changes], expected)
+
+
+class TestDaysPending(unittest.TestCase):
+    """days_pending bounds at the whole-day boundaries"""
+
+    def matching_ages(self, expression):
+        engine = RuleEngine([{
+            "name": "age", "condition": {"days_pending": expression},
+            "action": "set_priority", "priority": "high",
+        }], now=NOW)
+        ages = [timedelta(days=d, seconds=s) for d in (5, 6, 7, 8) for s in (0, 1, 86399)]
+        tasks = [{"id": str(age), "created_at": (NOW - age).isoformat()} for age in ages]
+        return sorted(ages[i] for i in engine.match_all(tasks))
+
+    def days(self, lo, hi):
+        """Ages whose whole-day count is in [lo, hi]"""
+        return [timedelta(days=d, seconds=s) for d in range(lo, hi + 1) for s in (0, 1, 86399)]
+
+    def test_operators(self):
+        self.assertEqual(self.matching_ages("> 6"), self.days(7, 8))
+        self.assertEqual(self.matching_ages(">= 6"), self.days(6, 8))
+        self.assertEqual(self.matching_ages("< 7"), self.days(5, 6))
+        self.assertEqual(self.matching_ages("<= 7"), self.days(5, 7))
+        self.assertEqual(self.matching_ages(">=7"), self.days(7, 8))
+
+    def test_bounds(self):
+        day = timedelta(days=1).total_seconds()
+        ts = NOW.timestamp()
+        self.assertEqual(days_pending_bounds("> 6", NOW), (ts - 7 * day, None))
+        self.assertEqual(days_pending_bounds(">= 6", NOW), (ts - 6 * day, None))
+        self.assertEqual(days_pending_bounds("< 6", NOW), (None, ts - 6 * day))
+        self.assertEqual(days_pending_bounds("<= 6", NOW), (None, ts - 7 * day))
+        with self.assertRaises(ValueError):
+            days_pending_bounds("about a week", NOW)
+
+    def test_invalid_expression_never_matches(self):
+        self.assertEqual(self.matching_ages("== 7"), [])
+
+
+class TestEvaluate(unittest.TestCase):
+    """Rule order, dry runs and apply()"""
+
+    def setUp(self):
+        self.rules = [
+            {"name": "first", "condition": {"status": "pending", "tags": ["urgent"]},
+             "action": "set_priority", "priority": "high"},
+            {"name": "second", "condition": {"status": "pending", "keywords": ["trading"]},
+             "action": "set_priority", "priority": "medium"},
+        ]
+        self.tasks = [
+            {"id": "a", "status": "pending", "title": "Trading bot", "tags": ["urgent"]},
+            {"id": "b", "status": "pending", "title": "Trading journal", "priority": "low",
+             "notes": "legacy note"},
+            {"id": "c", "status": "pending", "title": "Trading", "priority": "medium"},
+            {"id": "d", "status": "completed", "title": "Trading", "tags": ["urgent"]},
+        ]
+
+    def test_first_match_wins(self):
+        changes = RuleEngine(self.rules, now=NOW).evaluate(self.tasks)
+        # c already has the target priority; d is not pending
+        self.assertEqual([(c["id"], c["rule"], c["from"], c["to"]) for c in changes],
+                         [("a", "first", "normal", "high"), ("b", "second", "low", "medium")])
+
+    def test_evaluate_does_not_mutate(self):
+        before = copy.deepcopy(self.tasks)
+        RuleEngine(self.rules, now=NOW).evaluate(self.tasks)
+        self.assertEqual(self.tasks, before)
+
+    def test_apply(self):
+        engine = RuleEngine(self.rules, now=NOW)
+        updated = engine.apply(engine.evaluate(self.tasks))
+        self.assertEqual([task["id"] for task in updated], ["a", "b"])
+        self.assertEqual(self.tasks[1]["priority"], "medium")
+        self.assertEqual(self.tasks[1]["notes"][0], {"message": "legacy note"})
+        self.assertEqual(self.tasks[1]["notes"][1]["rule"], "second")
+        self.assertNotIn("updated_at", self.tasks[2])
+
+
+if __name__ == "__main__":
+    unittest.main()
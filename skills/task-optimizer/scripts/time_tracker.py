@@ -6,11 +6,20 @@
 """
 
 import json
+import sys
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass, asdict
 from pathlib import Path
 
+# kanban-ops 的共享 tasks.json 寫入路徑（加鎖、原子替換、合併並發修改）
+sys.path.append(str(Path.home() / ".openclaw" / "workspace" / "kanban-ops"))
+try:
+    from tasks_file import merge_tasks, task_fingerprints
+    TASKS_FILE_AVAILABLE = True
+except ImportError:
+    TASKS_FILE_AVAILABLE = False
+
 
 @dataclass
 class TimeEstimate:
@@ -75,10 +84,17 @@ class TaskTimeTracker:
             return []
 
         with open(self.tasks_json_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+            tasks = json.load(f)
+        if TASKS_FILE_AVAILABLE:
+            self._baseline = task_fingerprints(tasks)
+        return tasks
 
     def _save_tasks(self):
-        """保存任務"""
+        """保存任務（只寫回本實例修改過的任務，不覆蓋其他進程的更新）"""
+        if TASKS_FILE_AVAILABLE:
+            merge_tasks(self.tasks, getattr(self, '_baseline', {}), self.tasks_json_path)
+            self._baseline = task_fingerprints(self.tasks)
+            return
         with open(self.tasks_json_path, 'w', encoding='utf-8') as f:
             json.dump(self.tasks, f, ensure_ascii=False, indent=2)
 
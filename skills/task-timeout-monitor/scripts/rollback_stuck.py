@@ -15,6 +15,14 @@ KANBAN_DIR = Path.home() / ".openclaw" / "workspace" / "kanban"
 TASKS_FILE = KANBAN_DIR / "tasks.json"
 BACKUP_DIR = KANBAN_DIR / "backups"
 
+# Shared locked/atomic tasks.json writer from kanban-ops
+sys.path.append(str(KANBAN_DIR.parent / "kanban-ops"))
+try:
+    from tasks_file import update_tasks
+    TASKS_FILE_AVAILABLE = True
+except ImportError:
+    TASKS_FILE_AVAILABLE = False
+
 DEFAULT_SPAWNING_TIMEOUT = 2  # hours
 
 def parse_task_time(task_time_str):
@@ -54,28 +62,12 @@ def backup_tasks(tasks):
     print(f"✅ 已備份: {backup_file}")
     return backup_file
 
-def rollback_stuck(hours=None, dry_run=False):
-    """Rollback tasks stuck in spawning state.
-
-    Args:
-        hours: Timeout threshold in hours (default: 2)
-        dry_run: Preview changes without executing
+def rollback_tasks(tasks, threshold, dry_run=False):
+    """Find (and unless dry_run, roll back) spawning tasks older than threshold hours.
 
     Returns:
-        Number of rolled back tasks
+        List of rolled back task summaries
     """
-    if not TASKS_FILE.exists():
-        print(f"❌ tasks.json 不存在: {TASKS_FILE}")
-        return 0
-
-    try:
-        with open(TASKS_FILE, "r") as f:
-            tasks = json.load(f)
-    except Exception as e:
-        print(f"❌ 讀取 tasks.json 失敗: {e}")
-        return 0
-
-    threshold = hours if hours else DEFAULT_SPAWNING_TIMEOUT
     rolled_back = []
 
     for task in tasks:
@@ -112,6 +104,32 @@ def rollback_stuck(hours=None, dry_run=False):
                     "message": f"任務卡在 spawning 狀態 {duration:.1f} 小時，超過閾值 {threshold} 小時，已自動回滾"
                 })
 
+    return rolled_back
+
+def rollback_stuck(hours=None, dry_run=False):
+    """Rollback tasks stuck in spawning state.
+
+    Args:
+        hours: Timeout threshold in hours (default: 2)
+        dry_run: Preview changes without executing
+
+    Returns:
+        Number of rolled back tasks
+    """
+    if not TASKS_FILE.exists():
+        print(f"❌ tasks.json 不存在: {TASKS_FILE}")
+        return 0
+
+    try:
+        with open(TASKS_FILE, "r") as f:
+            tasks = json.load(f)
+    except Exception as e:
+        print(f"❌ 讀取 tasks.json 失敗: {e}")
+        return 0
+
+    threshold = hours if hours else DEFAULT_SPAWNING_TIMEOUT
+    rolled_back = rollback_tasks(tasks, threshold, dry_run)
+
     if not rolled_back:
         print("✅ 無需要回滾的任務")
         return 0
@@ -139,8 +157,16 @@ def rollback_stuck(hours=None, dry_run=False):
     backup_tasks(tasks)
 
     # Save updated tasks
-    with open(TASKS_FILE, "w") as f:
-        json.dump(tasks, f, indent=2, ensure_ascii=False)
+    if TASKS_FILE_AVAILABLE:
+        # Redo the rollback on the latest tasks.json so concurrent writers are not clobbered
+        def mutate(fresh_tasks):
+            rolled_back[:] = rollback_tasks(fresh_tasks, threshold)
+            return bool(rolled_back)
+
+        update_tasks(mutate, TASKS_FILE)
+    else:
+        with open(TASKS_FILE, "w") as f:
+            json.dump(tasks, f, indent=2, ensure_ascii=False)
 
     print("=" * 70)
     print(f"🔄 已回滾 {len(rolled_back)} 個卡住的任務")
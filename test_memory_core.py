@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+MemoryCore 測試（各層使用內存假適配器，不需要 Obsidian / QMD）
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import memory_core
+from memory_core import MemoryCore
+
+
+class FakeAdapter:
+    """按關鍵詞匹配的內存適配器；gate 被設置前 search 會一直阻塞"""
+
+    def __init__(self, memories=None, gate=None):
+        self.memories = dict(memories or {})
+        self.gate = gate
+        self.calls = 0
+        self.running = 0
+        self.max_running = 0
+        self.on_delete = None
+        self._lock = threading.Lock()
+
+    def search(self, query, limit, filters):
+        with self._lock:
+            self.calls += 1
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        try:
+            if self.gate is not None:
+                self.gate.wait()
+            return [
+                {'memory_id': memory_id, 'content': content, 'metadata': {}, 'score': 0.5}
+                for memory_id, content in self.memories.items() if query in content
+            ][:limit]
+        finally:
+            with self._lock:
+                self.running -= 1
+
+    def delete(self, memory_id):
+        if self.on_delete is not None:
+            self.on_delete()
+        return self.memories.pop(memory_id, None) is not None
+
+
+class TestMemoryCore(unittest.TestCase):
+    """測試並行查詢、快取與刪除"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        root = Path(self.tmpdir.name)
+        # QMDAdapter 只檢查 CLI 是否存在
+        qmd = root / 'qmd'
+        qmd.write_text('#!/bin/sh\n')
+        os.chmod(qmd, 0o755)
+        (root / 'vault').mkdir()
+        self.gate = threading.Event()
+        self.cores = []
+
+    def tearDown(self):
+        self.gate.set()
+        for core in self.cores:
+            core.close()
+        self.tmpdir.cleanup()
+
+    def open_core(self, session=None, working=None, knowledge=None, **kwargs):
+        root = Path(self.tmpdir.name)
+        core = MemoryCore(
+            obsidian_path=str(root / 'vault'),
+            qmd_path=str(root / 'qmd'),
+            session_path=str(root / 'session' / 'session.json'),
+            **kwargs
+        )
+        core.adapters.update({
+            'session': session or FakeAdapter(),
+            'working': working or FakeAdapter(),
+            'knowledge': knowledge or FakeAdapter(),
+        })
+        self.cores.append(core)
+        return core
+
+    def ids(self, results):
+        return sorted(r['memory_id'] for r in results)
+
+    def test_query_merges_layers_and_caches(self):
+        working = FakeAdapter({'w-1': '肥尾風險筆記'})
+        knowledge = FakeAdapter({'k-1': '肥尾風險報告', 'k-2': '動量'})
+        core = self.open_core(working=working, knowledge=knowledge)
+
+        results = core.query('肥尾')
+        self.assertEqual(self.ids(results), ['k-1', 'w-1'])
+        self.assertEqual({r['layer'] for r in results}, {'working', 'knowledge'})
+
+        core.query('肥尾')
+        self.assertEqual((working.calls, knowledge.calls), (1, 1))
+
+    def test_delete_invalidates_after_adapter_delete(self):
+        working = FakeAdapter({'w-1': '肥尾', 'w-2': '肥尾'})
+        core = self.open_core(working=working)
+        self.assertEqual(self.ids(core.query('肥尾', layers=['working'])), ['w-1', 'w-2'])
+
+        # 刪除進行中（記憶尚未移除）時另一個查詢重新填入快取
+        working.on_delete = lambda: core.query('肥尾', layers=['working'])
+        self.assertTrue(core.delete('w-1', layer='working'))
+        self.assertEqual(self.ids(core.query('肥尾', layers=['working'])), ['w-2'])
+
+    def test_hung_layer_does_not_starve_other_layers(self):
+        knowledge = FakeAdapter({'k-1': '肥尾'}, gate=self.gate)
+        working = FakeAdapter({'w-1': '肥尾'})
+        core = self.open_core(working=working, knowledge=knowledge, cache_ttl=0,
+                              layer_timeouts={'knowledge': 0.05})
+
+        started = time.monotonic()
+        for _ in range(10):
+            self.assertEqual(self.ids(core.query('肥尾')), ['w-1'])
+        # 名額用完後卡住的層直接略過，不再等待截止時間
+        self.assertLess(time.monotonic() - started, 10 * 0.05)
+        self.assertEqual(knowledge.calls, memory_core.LAYER_WORKERS)
+        self.assertEqual(working.calls, 10)
+
+        # 卡住的查詢結束後該層恢復
+        self.gate.set()
+        deadline = time.monotonic() + 5
+        while knowledge.running and time.monotonic() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.05)
+        self.assertEqual(self.ids(core.query('肥尾')), ['k-1', 'w-1'])
+
+
+if __name__ == '__main__':
+    unittest.main()
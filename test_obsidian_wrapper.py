@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+ObsidianCLI 批量寫入測試（使用記錄調用的假 obsidian 可執行文件）
+"""
+
+import json
+import os
+import sys
+import tempfile
+import textwrap
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from obsidian_wrapper import ObsidianCLI, _parse_batch_report
+
+# 假 obsidian：參數追加到 calls.jsonl；eval 輸出 eval_output 的內容並以 eval_exit 退出
+FAKE_OBSIDIAN = textwrap.dedent('''\
+    #!{python}
+    import json, sys
+    from pathlib import Path
+    state = Path(__file__).parent
+    args = sys.argv[1:]
+    with open(state / 'calls.jsonl', 'a') as f:
+        f.write(json.dumps(args) + '\\n')
+    if args[0] == 'eval':
+        output = state / 'eval_output'
+        print(output.read_text() if output.exists() else '')
+        code = state / 'eval_exit'
+        sys.exit(int(code.read_text()) if code.exists() else 0)
+''')
+
+
+class TestBatchReport(unittest.TestCase):
+    """測試批量腳本報告解析"""
+
+    def test_parse(self):
+        self.assertEqual(_parse_batch_report('=> {"done":3}'), {'done': 3})
+        self.assertEqual(_parse_batch_report('{"done":1,"error":"Error: x"}\n'),
+                         {'done': 1, 'error': 'Error: x'})
+        self.assertIsNone(_parse_batch_report('Unknown command: eval'))
+        self.assertIsNone(_parse_batch_report(''))
+
+
+class TestObsidianBatch(unittest.TestCase):
+    """測試 flush 只重放未執行的操作"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.state = Path(self.tmpdir.name)
+        self.cmd = self.state / 'obsidian'
+        self.cmd.write_text(FAKE_OBSIDIAN.format(python=sys.executable))
+        os.chmod(self.cmd, 0o755)
+        (self.state / 'vault').mkdir()
+        self.cli = ObsidianCLI(vault_path=str(self.state / 'vault'), obsidian_cmd=str(self.cmd))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def eval_returns(self, output, exit_code=0):
+        (self.state / 'eval_output').write_text(output)
+        (self.state / 'eval_exit').write_text(str(exit_code))
+
+    def commands(self):
+        path = self.state / 'calls.jsonl'
+        if not path.exists():
+            return []
+        calls = [json.loads(line) for line in path.read_text().splitlines()]
+        # eval 只保留命令名，其他命令保留 file= 參數
+        return [args[:1] if args[0] == 'eval' else args[:2] for args in calls]
+
+    def write_batch(self):
+        with self.cli.batch():
+            self.cli.append('a', 'one')
+            self.cli.prepend('b', 'two')
+            self.cli.append('c', 'three')
+            # 批量模式下不立即執行
+            self.assertEqual(self.commands(), [])
+
+    def test_batch_runs_in_one_eval(self):
+        self.eval_returns('{"done":3}')
+        self.write_batch()
+        self.assertEqual([c[0] for c in self.commands()], ['eval'])
+
+    def test_partial_failure_replays_remaining(self):
+        self.eval_returns('{"done":1,"error":"TypeError: file is null"}')
+        self.write_batch()
+        self.assertEqual(self.commands(), [['eval'], ['prepend', 'file=b'], ['append', 'file=c']])
+
+    def test_eval_error_with_report_replays_remaining(self):
+        self.eval_returns('{"done":2,"error":"Error: timeout"}', exit_code=1)
+        self.write_batch()
+        self.assertEqual(self.commands(), [['eval'], ['append', 'file=c']])
+
+    def test_eval_unavailable_replays_all(self):
+        self.eval_returns('Unknown command: eval', exit_code=1)
+        self.write_batch()
+        self.assertEqual(self.commands(), [
+            ['eval'], ['append', 'file=a'], ['prepend', 'file=b'], ['append', 'file=c']
+        ])
+
+    def test_empty_batch_does_nothing(self):
+        with self.cli.batch():
+            pass
+        self.assertEqual(self.cli.flush(), 0)
+        self.assertEqual(self.commands(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
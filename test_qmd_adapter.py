@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+QMDAdapter 測試（使用記錄調用的假 qmd 可執行文件，不需要安裝 QMD）
+"""
+
+import json
+import os
+import sys
+import tempfile
+import textwrap
+import threading
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from qmd_adapter import QMDAdapter, create_frontmatter, parse_memory
+
+# 假 qmd：把每次調用的參數追加到 calls.jsonl；vsearch 輸出 vsearch.json 的內容，
+# 名字在 fail 文件中的子命令以非零狀態退出，在 hang 文件中的子命令卡住。
+# mcp 子命令是逐行 JSON-RPC 服務：tools/call 記錄為 ['tools/call', 工具名, 參數]，
+# 返回 vsearch.json 的內容；工具列表可用 mcp_tools.json 替換
+FAKE_QMD = textwrap.dedent('''\
+    #!{python}
+    import json, sys, time
+    from pathlib import Path
+    state = Path(__file__).parent
+    args = sys.argv[1:]
+
+    def record(entry):
+        with open(state / 'calls.jsonl', 'a') as f:
+            f.write(json.dumps(entry) + '\\n')
+
+    record(args)
+    fail = (state / 'fail').read_text().split() if (state / 'fail').exists() else []
+    if args[0] in fail:
+        sys.stderr.write(args[0] + ' failed')
+        sys.exit(1)
+    if (state / 'hang').exists() and args[0] in (state / 'hang').read_text().split():
+        time.sleep(10)
+    if args[:2] == ['collection', 'list']:
+        print((state / 'collections').read_text() if (state / 'collections').exists() else '')
+    elif args[0] == 'vsearch':
+        print((state / 'vsearch.json').read_text())
+    elif args[0] == 'mcp':
+        tools_file = state / 'mcp_tools.json'
+        tools = json.loads(tools_file.read_text()) if tools_file.exists() else [
+            dict(name='vsearch', inputSchema=dict(properties=dict(query=dict(), limit=dict(), collection=dict())))
+        ]
+        for line in sys.stdin:
+            message = json.loads(line)
+            if 'id' not in message:
+                continue
+            if message['method'] == 'initialize':
+                result = dict(protocolVersion=message['params']['protocolVersion'], capabilities=dict())
+            elif message['method'] == 'tools/list':
+                result = dict(tools=tools)
+            else:
+                params = message['params']
+                record(['tools/call', params['name'], params['arguments']])
+                hits = json.loads((state / 'vsearch.json').read_text())
+                result = dict(content=[dict(type='text', text=json.dumps(hits))])
+            print(json.dumps(dict(jsonrpc='2.0', id=message['id'], result=result)), flush=True)
+''')
+
+SEARCH_HITS = [
+    {'docid': '#a1', 'score': 0.9, 'file': 'qmd://memory-knowledge/r-1.md', 'snippet': '肥尾'},
+    {'docid': '#b2', 'score': 0.4, 'file': 'qmd://memory-knowledge/R-2.md', 'snippet': '動量'},
+    {'docid': '#c3', 'score': 0.2, 'file': 'qmd://memory-knowledge/gone.md', 'snippet': '舊'},
+]
+
+
+class TestFrontmatter(unittest.TestCase):
+    """測試記憶文件格式"""
+
+    def test_round_trip(self):
+        text = f"{create_frontmatter({'layer': 'working', 'tags': ['a', 'b'], 'importance': 0.8})}\n\n內容"
+        memory = parse_memory(text)
+        self.assertEqual(memory['content'], '內容')
+        self.assertEqual(memory['metadata'], {'layer': 'working', 'tags': ['a', 'b'], 'importance': '0.8'})
+
+    def test_without_frontmatter(self):
+        self.assertEqual(parse_memory('純文本'), {'content': '純文本', 'metadata': {}})
+
+
+class FakeQMDTestCase(unittest.TestCase):
+    """在臨時目錄中安裝假 qmd"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.state = Path(self.tmpdir.name) / 'bin'
+        self.state.mkdir()
+        self.qmd = self.state / 'qmd'
+        self.qmd.write_text(FAKE_QMD.replace('{python}', sys.executable))
+        os.chmod(self.qmd, 0o755)
+        self.root = Path(self.tmpdir.name) / 'memories'
+        self.adapters = []
+
+    def tearDown(self):
+        for adapter in self.adapters:
+            adapter.close()
+        self.tmpdir.cleanup()
+
+    def open_adapter(self, **kwargs):
+        kwargs.setdefault('index_delay', None)
+        kwargs.setdefault('persistent', False)
+        adapter = QMDAdapter(str(self.qmd), root=self.root, **kwargs)
+        self.adapters.append(adapter)
+        return adapter
+
+    def calls(self):
+        path = self.state / 'calls.jsonl'
+        if not path.exists():
+            return []
+        return [json.loads(line) for line in path.read_text().splitlines()]
+
+    def commands(self, name):
+        return [call for call in self.calls() if call[0] == name]
+
+
+class TestQMDAdapter(FakeQMDTestCase):
+    """測試文件寫入、批量索引與搜索結果映射"""
+
+    def setUp(self):
+        super().setUp()
+        self.adapter = self.open_adapter()
+
+    def test_missing_cli(self):
+        with self.assertRaises(RuntimeError):
+            QMDAdapter(str(self.state / 'missing'))
+
+    def test_store_many_indexes_once(self):
+        results = self.adapter.store_many([
+            ('r-1', '報告一', {'layer': 'knowledge', 'tags': ['research']}),
+            ('r-2', '報告二', {'layer': 'knowledge', 'tags': ['research']}),
+            ('d-1', '日誌', {'layer': 'working'}),
+        ])
+        self.assertEqual(results, {'r-1': True, 'r-2': True, 'd-1': True})
+        self.assertEqual(self.calls(), [
+            ['collection', 'list'],
+            ['collection', 'add', str(self.root / 'memory-knowledge'), '--name', 'memory-knowledge',
+             '--mask', '**/*.md'],
+            ['collection', 'add', str(self.root / 'memory-working'), '--name', 'memory-working',
+             '--mask', '**/*.md'],
+            ['update'],
+            ['embed'],
+        ])
+        self.assertEqual(self.adapter.get('r-2')['content'], '報告二')
+        self.assertEqual(self.adapter.get_metadata('r-1')['tags'], ['research'])
+
+        # 已註冊的 collection 不再添加；單條 store 的索引等到 flush
+        self.assertTrue(self.adapter.store('r-3', '報告三', {'layer': 'knowledge'}))
+        self.assertEqual(self.calls()[5:], [])
+        self.assertTrue(self.adapter.flush())
+        self.assertEqual(self.calls()[5:], [['update'], ['embed']])
+        self.assertFalse(self.adapter.flush())
+
+    def test_single_stores_share_one_reindex(self):
+        adapter = self.open_adapter(index_delay=0.05)
+        for i in range(5):
+            adapter.store(f'd-{i}', f'日誌 {i}', {'layer': 'working'})
+        deadline = time.monotonic() + 5
+        while not self.commands('embed') and time.monotonic() < deadline:
+            time.sleep(0.02)
+        time.sleep(0.1)
+        self.assertEqual(len(self.commands('update')), 1)
+        self.assertEqual(len(self.commands('embed')), 1)
+
+    def test_close_indexes_pending_writes(self):
+        self.adapter.store('d-1', '日誌', {'layer': 'working'})
+        self.adapter.close()
+        self.assertEqual(self.calls()[-2:], [['update'], ['embed']])
+
+    def test_embed_timeout(self):
+        (self.state / 'hang').write_text('embed')
+        adapter = self.open_adapter(embed_timeout=0.2)
+        started = time.monotonic()
+        self.assertEqual(adapter.store_many([('r-1', '報告', {'layer': 'knowledge'})]), {'r-1': False})
+        self.assertLess(time.monotonic() - started, 5)
+        # 失敗的寫入保持未索引，恢復後 flush 重試
+        (self.state / 'hang').unlink()
+        self.assertTrue(adapter.flush())
+
+    def test_existing_collection_is_not_added(self):
+        (self.state / 'collections').write_text('memory-knowledge (qmd://memory-knowledge/)\n')
+        self.adapter.store('r-1', '報告', {'layer': 'knowledge'})
+        self.assertNotIn('add', [call[1] for call in self.calls() if call[0] == 'collection'])
+
+    def test_store_many_reports_index_failure(self):
+        (self.state / 'fail').write_text('update')
+        results = self.adapter.store_many([('r-1', '報告', {'layer': 'knowledge'})])
+        self.assertEqual(results, {'r-1': False})
+        # 文件已寫入，下次 update 時仍會被索引
+        self.assertIsNotNone(self.adapter.get('r-1'))
+        self.assertTrue(self.adapter.store('r-2', '報告', {'layer': 'knowledge'}))
+        with self.assertRaises(RuntimeError):
+            self.adapter.flush()
+        (self.state / 'fail').unlink()
+        self.assertTrue(self.adapter.flush())
+
+    def test_search_maps_files_to_memories(self):
+        self.adapter.store_many([
+            ('r-1', '肥尾風險', {'layer': 'knowledge', 'tags': ['risk']}),
+            ('r-2', '動量策略', {'layer': 'knowledge', 'tags': ['momentum']}),
+        ])
+        (self.state / 'vsearch.json').write_text(json.dumps(SEARCH_HITS))
+
+        results = self.adapter.search('風險', limit=3, filters={'layer': 'knowledge'})
+        self.assertEqual(self.calls()[-1], ['vsearch', '風險', '-n', '3', '--json', '-c', 'memory-knowledge'])
+        self.assertEqual([r['memory_id'] for r in results], ['r-1', 'r-2', 'gone'])
+        self.assertEqual(results[0]['content'], '肥尾風險')
+        self.assertEqual(results[0]['metadata']['tags'], ['risk'])
+        self.assertEqual(results[2]['content'], '舊')
+
+        filtered = self.adapter.search('風險', filters={'layer': 'knowledge', 'tags': ['risk']})
+        self.assertEqual([r['memory_id'] for r in filtered], ['r-1'])
+
+    def test_search_failure_raises(self):
+        (self.state / 'fail').write_text('vsearch')
+        with self.assertRaises(RuntimeError):
+            self.adapter.search('風險')
+
+    def test_metadata_and_delete(self):
+        self.adapter.store_many([('r-1', '報告', {'layer': 'knowledge', 'access_count': 1})])
+        self.assertEqual(self.adapter.update_access_counts({'r-1': 2, 'missing': 1}), 1)
+        self.assertEqual(self.adapter.get_metadata('r-1')['access_count'], '3')
+        self.assertEqual(self.adapter.get('r-1')['content'], '報告')
+
+        self.assertTrue(self.adapter.delete('r-1'))
+        self.assertEqual(self.calls()[-1], ['update'])
+        self.assertIsNone(self.adapter.get('r-1'))
+        self.assertFalse(self.adapter.delete('r-1'))
+
+
+
+class TestQMDMCP(FakeQMDTestCase):
+    """測試常駐 qmd mcp 進程上的搜索"""
+
+    def setUp(self):
+        super().setUp()
+        self.adapter = self.open_adapter(persistent=True)
+        self.adapter.store_many([
+            ('r-1', '肥尾風險', {'layer': 'knowledge', 'tags': ['risk']}),
+            ('r-2', '動量策略', {'layer': 'knowledge', 'tags': ['momentum']}),
+            ('d-1', '日誌', {'layer': 'working'}),
+        ])
+        (self.state / 'vsearch.json').write_text(json.dumps(SEARCH_HITS))
+
+    def ids(self, results):
+        return [r['memory_id'] for r in results]
+
+    def test_searches_share_one_process(self):
+        for _ in range(3):
+            results = self.adapter.search('風險', limit=3, filters={'layer': 'knowledge'})
+            self.assertEqual(self.ids(results), ['r-1', 'r-2', 'gone'])
+        self.assertEqual(results[0]['metadata']['tags'], ['risk'])
+        self.assertEqual(len(self.commands('mcp')), 1)
+        self.assertEqual(self.commands('vsearch'), [])
+        self.assertEqual(self.commands('tools/call')[-1],
+                         ['tools/call', 'vsearch', {'query': '風險', 'limit': 3, 'collection': 'memory-knowledge'}])
+
+    def test_concurrent_searches(self):
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.ids(self.adapter.search('風險'))))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+        self.assertEqual(results, [['r-1', 'r-2', 'gone']] * 8)
+        self.assertEqual(len(self.commands('mcp')), 1)
+        self.assertEqual(len(self.commands('tools/call')), 8)
+
+    def test_layer_filtered_locally_without_collection_argument(self):
+        (self.state / 'mcp_tools.json').write_text(json.dumps([
+            {'name': 'vector_search', 'inputSchema': {'properties': {'query': {}, 'n': {}}}}
+        ]))
+        (self.state / 'vsearch.json').write_text(json.dumps(
+            [{'file': 'qmd://memory-working/d-1.md', 'score': 0.8}] + SEARCH_HITS[:1]))
+        results = self.adapter.search('風險', limit=2, filters={'layer': 'knowledge'})
+        self.assertEqual(self.ids(results), ['r-1'])
+        self.assertEqual(self.commands('tools/call'), [['tools/call', 'vector_search', {'query': '風險', 'n': 2}]])
+
+    def test_unavailable_server_falls_back_to_cli(self):
+        (self.state / 'fail').write_text('mcp')
+        for _ in range(2):
+            self.assertEqual(self.ids(self.adapter.search('風險')), ['r-1', 'r-2', 'gone'])
+        self.assertEqual(len(self.commands('mcp')), 1)
+        self.assertEqual(len(self.commands('vsearch')), 2)
+
+    def test_exited_server_is_restarted(self):
+        self.adapter.search('風險')
+        process = self.adapter._mcp._process
+        process.kill()
+        process.wait()
+        # 本次退回 CLI，下次重新啟動常駐進程
+        self.assertEqual(self.ids(self.adapter.search('風險')), ['r-1', 'r-2', 'gone'])
+        self.assertEqual(self.ids(self.adapter.search('風險')), ['r-1', 'r-2', 'gone'])
+        self.assertEqual(len(self.commands('mcp')), 2)
+        self.assertEqual(len(self.commands('vsearch')), 1)
+
+    def test_close_stops_server(self):
+        self.adapter.search('風險')
+        process = self.adapter._mcp._process
+        self.adapter.close()
+        self.assertIsNotNone(process.poll())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+報告構建器測試：同名來源不互相覆蓋、清單增量構建
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from report_builder import MANIFEST_FILENAME, build_reports, discover_reports
+
+
+class TestReportBuilder(unittest.TestCase):
+    """測試輸出命名與增量構建"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.source = Path(self.tmpdir.name) / 'projects'
+        self.output = Path(self.tmpdir.name) / 'report'
+        self.write('alpha/r001-research.md', '# Alpha 研究')
+        self.write('beta/r001-research.md', '# Beta 研究')
+        self.write('alpha/checkpoints/k003.md', '# 風險指標')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, relative, content):
+        path = self.source / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding='utf-8')
+        return path
+
+    def build(self, reports=None):
+        reports = discover_reports(str(self.source)) if reports is None else reports
+        return build_reports(reports, str(self.output), workers=1, verbose=False)
+
+    def test_same_name_sources_get_distinct_outputs(self):
+        stats = self.build()
+        self.assertEqual(sorted(stats['built']), [
+            'alpha-r001-research.html', 'beta-r001-research.html', 'k003.html'
+        ])
+        self.assertIn('Alpha 研究', (self.output / 'alpha-r001-research.html').read_text(encoding='utf-8'))
+        self.assertIn('Beta 研究', (self.output / 'beta-r001-research.html').read_text(encoding='utf-8'))
+
+        manifest = json.loads((self.output / MANIFEST_FILENAME).read_text(encoding='utf-8'))
+        self.assertEqual(manifest['entries']['beta-r001-research.html']['source'],
+                         str(self.source / 'beta' / 'r001-research.md'))
+
+        # 再次構建時兩者都不變（不會在同名來源之間來回重建）
+        stats = self.build()
+        self.assertEqual(stats['built'], [])
+        self.assertEqual(len(stats['unchanged']), 3)
+
+    def test_explicit_collision_fails_loudly(self):
+        reports = [
+            {'filepath': str(self.source / 'alpha' / 'r001-research.md')},
+            {'filepath': str(self.source / 'beta' / 'r001-research.md')},
+        ]
+        with self.assertRaises(ValueError) as ctx:
+            self.build(reports)
+        self.assertIn('r001-research.html', str(ctx.exception))
+        self.assertFalse((self.output / 'r001-research.html').exists())
+
+        # 指定 output 後可以構建
+        reports[1]['output'] = 'beta-r001.html'
+        self.assertEqual(sorted(self.build(reports)['built']), ['beta-r001.html', 'r001-research.html'])
+
+    def test_duplicate_source_is_built_once(self):
+        path = str(self.source / 'alpha' / 'checkpoints' / 'k003.md')
+        stats = self.build([{'filepath': path}, {'filepath': path}])
+        self.assertEqual(stats['built'], ['k003.html'])
+
+    def test_changed_source_is_rebuilt(self):
+        self.build()
+        target = self.write('beta/r001-research.md', '# Beta 研究（更新）')
+        os.utime(target, ns=(1, 1))
+        stats = self.build()
+        self.assertEqual(stats['built'], ['beta-r001-research.html'])
+        self.assertIn('更新', (self.output / 'beta-r001-research.html').read_text(encoding='utf-8'))
+
+
+if __name__ == '__main__':
+    unittest.main()